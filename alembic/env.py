@@ -29,10 +29,19 @@ if config.config_file_name is not None:
 # add your model's MetaData object here
 # for 'autogenerate' support
 # Import all models here to ensure they are registered with Base.metadata
-from app.models import User, Organization, Project, UserOrganization, File, FileChunk
+from app.models import User, Organization, Project, UserOrganization, File, FileChunk, ContentBlob, ChunkEmbedding
+
+from app.models.chunk_embedding import PROJECT_INDEX_PATTERN
 
 target_metadata = Base.metadata
 
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Keep autogenerate from dropping the per-project ANN indexes PgVectorStore manages at runtime."""
+    if type_ == "index" and reflected and name and PROJECT_INDEX_PATTERN.match(name):
+        return False
+    return True
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -55,6 +64,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -78,7 +88,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_object=include_object
         )
 
         with context.begin_transaction():
@@ -0,0 +1,52 @@
+"""add_content_blobs_for_dedup
+
+Revision ID: a3c5e7f9b1d2
+Revises: dff828b29910
+Create Date: 2026-10-16 10:12:31.417203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c5e7f9b1d2'
+down_revision: Union[str, None] = 'dff828b29910'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Step 1: Content-addressed blob registry (one row per organization + content hash)
+    op.create_table('content_blobs',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('organization_id', sa.UUID(), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('blob_storage_path', sa.String(length=1000), nullable=False),
+        sa.Column('converted_file_path', sa.String(length=1000), nullable=True),
+        sa.Column('enriched_file_path', sa.String(length=1000), nullable=True),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('organization_id', 'content_hash', name='uq_content_blobs_organization_id_content_hash')
+    )
+    op.create_index('idx_content_blobs_organization_id', 'content_blobs', ['organization_id'], unique=False)
+    
+    # Step 2: Record content hash on files (NULL for files uploaded before dedup)
+    op.add_column('files', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index('idx_files_content_hash', 'files', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    # Step 1: Drop content hash from files
+    op.drop_index('idx_files_content_hash', table_name='files')
+    op.drop_column('files', 'content_hash')
+    
+    # Step 2: Drop content blob registry
+    op.drop_index('idx_content_blobs_organization_id', table_name='content_blobs')
+    op.drop_table('content_blobs')
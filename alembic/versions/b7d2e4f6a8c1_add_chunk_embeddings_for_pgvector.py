@@ -0,0 +1,92 @@
+"""add_chunk_embeddings_for_pgvector
+
+Revision ID: b7d2e4f6a8c1
+Revises: a3c5e7f9b1d2
+Create Date: 2026-10-16 14:03:52.118406
+
+pgvector is only needed by VECTOR_STORE_BACKEND=pgvector. On servers where
+the vector extension is not available (stock Postgres, Azure Flexible Server
+without it in azure.extensions) the table is skipped and the revision still
+applies. To enable pgvector there later, install the extension and re-run
+this revision: alembic downgrade a3c5e7f9b1d2 && alembic upgrade head.
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e4f6a8c1'
+down_revision: Union[str, None] = 'a3c5e7f9b1d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# Width of chunk_embeddings.embedding, the default EMBEDDING_DIMENSION (text-embedding-ada-002).
+# PgVectorStore refuses to start when EMBEDDING_DIMENSION differs; a model with another
+# dimension needs a new migration that alters the column (and re-embedding every chunk).
+EMBEDDING_DIMENSION = 1536
+
+
+def _enable_pgvector() -> bool:
+    """Create the vector extension if the server offers it and allows it; False if not."""
+    if context.is_offline_mode():
+        # Generated SQL is reviewed before it runs; assume the extension is wanted
+        op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+        return True
+
+    bind = op.get_bind()
+    available = bind.execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'vector'")).first()
+    if not available:
+        logger.warning("pgvector extension not available on this server; skipping chunk_embeddings")
+        return False
+    try:
+        # A savepoint keeps a refused CREATE EXTENSION from aborting the migration transaction
+        with bind.begin_nested():
+            bind.execute(sa.text("CREATE EXTENSION IF NOT EXISTS vector"))
+    except sa.exc.DBAPIError as e:
+        logger.warning(f"Could not create the pgvector extension ({e.orig}); skipping chunk_embeddings")
+        return False
+    return True
+
+
+def upgrade() -> None:
+    # Step 1: Enable pgvector, or skip the table where the extension is unavailable
+    if not _enable_pgvector():
+        return
+
+    # Step 2: Embeddings table for the pgvector backend
+    op.create_table('chunk_embeddings',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('project_id', sa.UUID(), nullable=False),
+        sa.Column('file_id', sa.UUID(), nullable=True),
+        sa.Column('chunk_id', sa.UUID(), nullable=True),
+        sa.Column('vector_id', sa.String(length=255), nullable=False),
+        sa.Column('vector_metadata', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['file_id'], ['files.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['chunk_id'], ['file_chunks.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('project_id', 'vector_id', name='uq_chunk_embeddings_project_id_vector_id')
+    )
+    op.execute(
+        f"ALTER TABLE chunk_embeddings ADD COLUMN embedding vector({EMBEDDING_DIMENSION}) NOT NULL"
+    )
+    op.create_index('idx_chunk_embeddings_project_id', 'chunk_embeddings', ['project_id'], unique=False)
+    op.create_index('idx_chunk_embeddings_file_id', 'chunk_embeddings', ['file_id'], unique=False)
+    op.create_index('idx_chunk_embeddings_chunk_id', 'chunk_embeddings', ['chunk_id'], unique=False)
+
+    # Approximate-search indexes are partial indexes per project, created at
+    # runtime by PgVectorStore (idx_chunk_embeddings_ann_<project_id>)
+
+
+def downgrade() -> None:
+    # Step 1: Drop embeddings table (also drops per-project ANN indexes); upgrade may have skipped it
+    op.execute("DROP TABLE IF EXISTS chunk_embeddings")
+
+    # The vector extension is left installed; other database objects may use it
@@ -1,4 +1,5 @@
 from celery import Celery
+from celery.signals import worker_process_shutdown
 from app.config import settings
 import logging
 
@@ -54,6 +55,18 @@ celery_app.conf.update(
 
 logger.info("Celery app configured successfully")
 
+
+@worker_process_shutdown.connect
+def close_worker_clients(**kwargs):
+    """Close per-process client connection pools when a worker process exits."""
+    from app.core.embeddings import close_embedding_engine
+    from app.core.storage import close_storage_client
+    from app.core.vector_store import close_vector_store
+    close_embedding_engine()
+    close_storage_client()
+    close_vector_store()
+
+
 # Explicitly import tasks to ensure they're registered
 from app.tasks import file_tasks, conversion_tasks, parsing_tasks, chunking_tasks, embedding_tasks
 
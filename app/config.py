@@ -43,7 +43,35 @@ class Settings(BaseSettings):
     # Azure Blob Storage Configuration (Alternative)
     azure_storage_connection_string: Optional[str] = Field(default=None, env="AZURE_STORAGE_CONNECTION_STRING")
     azure_storage_container_name: str = Field(default="memic-documents", env="AZURE_STORAGE_CONTAINER_NAME")
-    
+
+    # Storage Backend Selection (auto-detected from credentials when unset)
+    storage_backend: Optional[Literal["azure", "supabase", "local"]] = Field(default=None, env="STORAGE_BACKEND")
+
+    # Local Filesystem Storage Configuration (STORAGE_BACKEND=local)
+    local_storage_path: str = Field(default="./storage", env="LOCAL_STORAGE_PATH")
+    local_storage_base_url: str = Field(default="http://localhost:8000/api/v1", env="LOCAL_STORAGE_BASE_URL")
+    local_storage_signing_key: Optional[str] = Field(default=None, env="LOCAL_STORAGE_SIGNING_KEY")  # Falls back to JWT_SECRET_KEY
+
+    # Storage Client Connection Pool (shared per process)
+    storage_pool_connections: int = Field(default=10, env="STORAGE_POOL_CONNECTIONS")
+    storage_pool_maxsize: int = Field(default=32, env="STORAGE_POOL_MAXSIZE")
+    storage_connection_timeout: int = Field(default=10, env="STORAGE_CONNECTION_TIMEOUT")
+    storage_read_timeout: int = Field(default=120, env="STORAGE_READ_TIMEOUT")
+    storage_max_workers: int = Field(default=16, env="STORAGE_MAX_WORKERS")  # Threads for blocking SDK calls
+    storage_delete_batch_size: int = Field(default=256, env="STORAGE_DELETE_BATCH_SIZE")  # Blobs per batch delete (Azure max 256)
+    storage_transfer_block_size: int = Field(default=8 * 1024 * 1024, env="STORAGE_TRANSFER_BLOCK_SIZE")  # Bytes per block/range
+    storage_transfer_max_concurrency: int = Field(default=4, env="STORAGE_TRANSFER_MAX_CONCURRENCY")  # Parallel blocks per transfer
+
+    # Presigned URL Cache (URLs reused within an expiry bucket)
+    signed_url_cache_size: int = Field(default=10000, env="SIGNED_URL_CACHE_SIZE")
+    signed_url_bucket_seconds: int = Field(default=300, env="SIGNED_URL_BUCKET_SECONDS")
+    signed_url_cache_redis: bool = Field(default=False, env="SIGNED_URL_CACHE_REDIS")  # Share cached URLs across pods via REDIS_URL
+
+    # Streaming Upload Configuration (POST /projects/{project_id}/files)
+    upload_block_size: int = Field(default=4 * 1024 * 1024, env="UPLOAD_BLOCK_SIZE")  # Bytes per staged block
+    upload_max_inflight_blocks: int = Field(default=4, env="UPLOAD_MAX_INFLIGHT_BLOCKS")
+    enable_content_dedup: bool = Field(default=True, env="ENABLE_CONTENT_DEDUP")  # Share raw blobs and pipeline output per org by content hash
+
     # File Conversion Configuration
     libreoffice_path: str = Field(
         default="/Applications/LibreOffice.app/Contents/MacOS/soffice",
@@ -72,6 +100,42 @@ class Settings(BaseSettings):
     pinecone_api_key: Optional[str] = Field(default=None, env="PINECONE_API_KEY")
     pinecone_environment: str = Field(default="gcp-starter", env="PINECONE_ENVIRONMENT")
     pinecone_index_name: str = Field(default="memic-rag", env="PINECONE_INDEX_NAME")
+    pinecone_index_host: Optional[str] = Field(default=None, env="PINECONE_INDEX_HOST")  # Skips the host lookup
+    pinecone_transport: str = Field(default="http", env="PINECONE_TRANSPORT")  # "http" or "grpc"
+    pinecone_pool_threads: int = Field(default=4, env="PINECONE_POOL_THREADS")
+    pinecone_connection_pool_size: int = Field(default=16, env="PINECONE_CONNECTION_POOL_SIZE")
+    pinecone_provision_on_startup: bool = Field(default=True, env="PINECONE_PROVISION_ON_STARTUP")
+    
+    # Vector Store Backend ("pinecone", "local" or "pgvector"; autodetected from PINECONE_API_KEY when unset)
+    vector_store_backend: Optional[Literal["pinecone", "local", "pgvector"]] = Field(default=None, env="VECTOR_STORE_BACKEND")
+    local_vector_store_path: str = Field(default="./vector_store", env="LOCAL_VECTOR_STORE_PATH")
+    local_vector_index: Literal["flat", "hnsw"] = Field(default="flat", env="LOCAL_VECTOR_INDEX")
+    local_vector_hnsw_m: int = Field(default=16, env="LOCAL_VECTOR_HNSW_M")
+    local_vector_hnsw_ef_construction: int = Field(default=100, env="LOCAL_VECTOR_HNSW_EF_CONSTRUCTION")
+    local_vector_hnsw_ef_search: int = Field(default=64, env="LOCAL_VECTOR_HNSW_EF_SEARCH")  # Default per query
+    local_vector_hnsw_min_rows: int = Field(default=10000, env="LOCAL_VECTOR_HNSW_MIN_ROWS")  # Smaller namespaces stay exact
+    local_vector_hnsw_buffer_rows: int = Field(default=5000, env="LOCAL_VECTOR_HNSW_BUFFER_ROWS")  # New rows before graph insert
+    local_vector_compaction_dead_ratio: float = Field(default=0.2, env="LOCAL_VECTOR_COMPACTION_DEAD_RATIO")
+    local_vector_quantization: Literal["none", "int8", "pq"] = Field(default="none", env="LOCAL_VECTOR_QUANTIZATION")
+    local_vector_quantization_min_rows: int = Field(default=10000, env="LOCAL_VECTOR_QUANTIZATION_MIN_ROWS")
+    local_vector_pq_subvector_dimension: int = Field(default=4, env="LOCAL_VECTOR_PQ_SUBVECTOR_DIMENSION")  # Dims per code byte
+    pgvector_index_type: Literal["hnsw", "ivfflat"] = Field(default="hnsw", env="PGVECTOR_INDEX_TYPE")
+    pgvector_index_min_rows: int = Field(default=1000, env="PGVECTOR_INDEX_MIN_ROWS")  # Smaller projects use an exact scan
+    pgvector_hnsw_m: int = Field(default=16, env="PGVECTOR_HNSW_M")
+    pgvector_hnsw_ef_construction: int = Field(default=64, env="PGVECTOR_HNSW_EF_CONSTRUCTION")
+    pgvector_hnsw_ef_search: int = Field(default=40, env="PGVECTOR_HNSW_EF_SEARCH")
+    pgvector_ivfflat_lists: int = Field(default=100, env="PGVECTOR_IVFFLAT_LISTS")
+    pgvector_ivfflat_probes: int = Field(default=10, env="PGVECTOR_IVFFLAT_PROBES")
+    pgvector_quantization: Literal["none", "halfvec", "binary"] = Field(default="none", env="PGVECTOR_QUANTIZATION")
+    vector_quantization_rerank_factor: int = Field(default=4, env="VECTOR_QUANTIZATION_RERANK_FACTOR")  # Candidates per result re-scored at full precision
+    
+    # Vector Upsert Pipeline (all vector stores)
+    vector_store_max_workers: int = Field(default=8, env="VECTOR_STORE_MAX_WORKERS")  # Threads for blocking SDK calls
+    vector_upsert_batch_size: int = Field(default=100, env="VECTOR_UPSERT_BATCH_SIZE")  # Max vectors per request
+    vector_upsert_max_bytes: int = Field(default=2 * 1000 * 1000, env="VECTOR_UPSERT_MAX_BYTES")  # Max request body (Pinecone limit 2 MB)
+    vector_upsert_max_inflight: int = Field(default=4, env="VECTOR_UPSERT_MAX_INFLIGHT")  # Concurrent batch requests
+    vector_upsert_max_retries: int = Field(default=3, env="VECTOR_UPSERT_MAX_RETRIES")  # Retries per failed batch
+    vector_upsert_retry_delay: float = Field(default=0.5, env="VECTOR_UPSERT_RETRY_DELAY")  # Seconds, doubled per retry
     
     # Redis Configuration
     redis_url: str = Field(default="redis://localhost:6379/0", env="REDIS_URL")
@@ -83,9 +147,56 @@ class Settings(BaseSettings):
     # RAG Processing Configuration
     chunk_size: int = Field(default=512, env="CHUNK_SIZE")
     chunk_overlap: int = Field(default=50, env="CHUNK_OVERLAP")
+    chunk_flush_batch_size: int = Field(default=256, env="CHUNK_FLUSH_BATCH_SIZE")  # Chunks uploaded/inserted per batch
+    chunk_table_mode: Literal["rows", "whole"] = Field(default="rows", env="CHUNK_TABLE_MODE")  # Split large tables by row groups
     embedding_model: str = Field(default="text-embedding-ada-002", env="EMBEDDING_MODEL")
+
+    # Tokenizer ("tiktoken", "bpe" or "estimate"; autodetected when unset)
+    tokenizer_backend: Optional[Literal["tiktoken", "bpe", "estimate"]] = Field(default=None, env="TOKENIZER_BACKEND")
+    tokenizer_encoding: str = Field(default="cl100k_base", env="TOKENIZER_ENCODING")
+    tokenizer_bpe_file: Optional[str] = Field(default=None, env="TOKENIZER_BPE_FILE")  # Local .tiktoken rank file
+    tokenizer_threads: int = Field(default=4, env="TOKENIZER_THREADS")  # Threads per tiktoken batch
+    tokenizer_cache_size: int = Field(default=50000, env="TOKENIZER_CACHE_SIZE")  # Texts with cached token counts
+    tokenizer_cache_max_chars: int = Field(default=512, env="TOKENIZER_CACHE_MAX_CHARS")  # Longer texts are not cached
     embedding_dimension: int = Field(default=1536, env="EMBEDDING_DIMENSION")
-    
+
+    # Embedding Requests (OpenAI-compatible API)
+    embedding_api_base: Optional[str] = Field(default=None, env="EMBEDDING_API_BASE")  # Defaults to api.openai.com
+    embedding_batch_max_inputs: int = Field(default=2048, env="EMBEDDING_BATCH_MAX_INPUTS")  # Inputs per request (OpenAI limit 2048)
+    embedding_batch_max_tokens: int = Field(default=250000, env="EMBEDDING_BATCH_MAX_TOKENS")  # Tokens per request (OpenAI limit 300k, headroom for count drift)
+    embedding_max_inflight: int = Field(default=4, env="EMBEDDING_MAX_INFLIGHT")  # Concurrent requests per worker process
+    embedding_coalesce_wait: float = Field(default=0.0, env="EMBEDDING_COALESCE_WAIT")  # Seconds a partial request waits for more chunks
+    embedding_max_retries: int = Field(default=3, env="EMBEDDING_MAX_RETRIES")  # Retries per failed request
+    embedding_retry_delay: float = Field(default=1.0, env="EMBEDDING_RETRY_DELAY")  # Seconds, doubled per retry
+    embedding_request_timeout: float = Field(default=60.0, env="EMBEDDING_REQUEST_TIMEOUT")  # Seconds
+    embedding_task_window: int = Field(default=2048, env="EMBEDDING_TASK_WINDOW")  # Chunks read and embedded per step of a file
+    embedding_cache_size: int = Field(default=10000, env="EMBEDDING_CACHE_SIZE")  # Vectors kept in process memory (float16, ~3 KB each at 1536 dims)
+    embedding_cache_redis: bool = Field(default=False, env="EMBEDDING_CACHE_REDIS")  # Share cached vectors across workers via REDIS_URL
+    embedding_cache_ttl_seconds: int = Field(default=30 * 24 * 3600, env="EMBEDDING_CACHE_TTL_SECONDS")  # Lifetime of shared entries
+    embedding_price_per_million_tokens: float = Field(default=0.10, env="EMBEDDING_PRICE_PER_MILLION_TOKENS")  # USD, for cost reporting
+
+    # Semantic Search (POST /projects/{project_id}/files/search)
+    search_deadline_ms: int = Field(default=2000, env="SEARCH_DEADLINE_MS")  # Budget for the whole request; 504 when exceeded
+
+    # Provider Rate Limits (per minute; 0 = unlimited; tenant = organization)
+    rate_limit_redis: bool = Field(default=True, env="RATE_LIMIT_REDIS")  # Share buckets across workers via REDIS_URL
+    rate_limit_burst_seconds: float = Field(default=1.0, env="RATE_LIMIT_BURST_SECONDS")  # Bucket capacity, in seconds of quota
+    rate_limit_default_backoff: float = Field(default=5.0, env="RATE_LIMIT_DEFAULT_BACKOFF")  # Seconds all workers pause after a 429 without Retry-After
+    rate_limit_max_throttle_retries: int = Field(default=8, env="RATE_LIMIT_MAX_THROTTLE_RETRIES")  # 429 retries per call
+    afr_requests_per_minute: int = Field(default=900, env="AFR_REQUESTS_PER_MINUTE")  # Document Intelligence S0: 15 analyze requests/s
+    afr_tenant_requests_per_minute: int = Field(default=0, env="AFR_TENANT_REQUESTS_PER_MINUTE")
+    afr_max_concurrency: int = Field(default=8, env="AFR_MAX_CONCURRENCY")  # Analyses in flight per worker process
+    llm_requests_per_minute: int = Field(default=500, env="LLM_REQUESTS_PER_MINUTE")
+    llm_tokens_per_minute: int = Field(default=200000, env="LLM_TOKENS_PER_MINUTE")
+    llm_tenant_requests_per_minute: int = Field(default=0, env="LLM_TENANT_REQUESTS_PER_MINUTE")
+    llm_tenant_tokens_per_minute: int = Field(default=0, env="LLM_TENANT_TOKENS_PER_MINUTE")
+    llm_max_concurrency: int = Field(default=8, env="LLM_MAX_CONCURRENCY")  # Enrichment calls in flight per worker process
+    llm_latency_target: float = Field(default=30.0, env="LLM_LATENCY_TARGET")  # Seconds; slower calls shrink concurrency (0 = off)
+    embedding_requests_per_minute: int = Field(default=3000, env="EMBEDDING_REQUESTS_PER_MINUTE")
+    embedding_tokens_per_minute: int = Field(default=1000000, env="EMBEDDING_TOKENS_PER_MINUTE")
+    embedding_tenant_tokens_per_minute: int = Field(default=0, env="EMBEDDING_TENANT_TOKENS_PER_MINUTE")
+    embedding_latency_target: float = Field(default=15.0, env="EMBEDDING_LATENCY_TARGET")  # Seconds; slower requests shrink concurrency (0 = off)
+
     # Environment-specific settings
     log_level: str = Field(default="INFO", env="LOG_LEVEL")
     cors_origins: str = Field(default="*", env="CORS_ORIGINS")
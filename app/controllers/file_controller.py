@@ -1,13 +1,15 @@
 """
 File controller for handling file upload and RAG operations.
 """
-from fastapi import APIRouter, Depends, UploadFile, File as FastAPIFile, HTTPException, Query
+from fastapi import APIRouter, Depends, UploadFile, File as FastAPIFile, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from typing import Optional
 from uuid import UUID
 
 from app.database import get_db
 from app.core.auth import get_current_user
+from app.config import settings
+from app.core.request_timing import RequestTimer
 from app.models.user import User
 from app.models.file import FileStatus
 from app.services.file_service import FileService
@@ -21,7 +23,9 @@ from app.dtos.file_dto import (
     FileSearchRequestDTO,
     FileSearchResultDTO,
     FileInitUploadRequestDTO,
-    FileInitUploadResponseDTO
+    FileInitUploadResponseDTO,
+    FileDownloadUrlsRequestDTO,
+    FileDownloadUrlsResponseDTO
 )
 
 router = APIRouter(prefix="/projects/{project_id}/files", tags=["Files"])
@@ -134,6 +138,31 @@ async def get_file_download_url(
     }
 
 
+@router.post(
+    "/download-urls",
+    response_model=FileDownloadUrlsResponseDTO,
+    summary="Get download URLs (batch)",
+    description="Get presigned download URLs for up to 500 files in one request"
+)
+async def get_file_download_urls(
+    project_id: UUID,
+    request: FileDownloadUrlsRequestDTO,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get presigned download URLs for many files at once.
+    
+    Use this instead of calling `/{file_id}/download-url` in a loop (e.g. when
+    rendering a file list). Files that do not exist in the project or are
+    still uploading are returned in `missing`.
+    """
+    # TODO: Add project access check
+    
+    file_service = FileService(db)
+    return await file_service.get_download_urls(request.file_ids, project_id, request.expiry)
+
+
 @router.post(
     "",
     response_model=FileUploadResponseDTO,
@@ -144,6 +173,10 @@ async def get_file_download_url(
 async def upload_file(
     project_id: UUID,
     file: UploadFile = FastAPIFile(...),
+    revision_of: Optional[UUID] = Query(
+        None,
+        description="Upload a revised version of this file; unchanged chunks keep their embeddings"
+    ),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -157,6 +190,10 @@ async def upload_file(
     4. Chunking
     5. Embedding generation
     
+    With `revision_of`, the upload replaces the content of an existing file
+    (same file ID). Only chunks that changed are embedded again; vectors of
+    removed chunks are deleted.
+    
     Returns the file record with initial status.
     """
     # TODO: Add project access check (verify user has access to this project)
@@ -169,6 +206,13 @@ async def upload_file(
         raise HTTPException(status_code=404, detail="Project not found")
     
     file_service = FileService(db)
+    if revision_of:
+        return await file_service.upload_revision(
+            file=file,
+            file_id=revision_of,
+            project_id=project_id,
+            organization_id=project.organization_id
+        )
     return await file_service.upload_file(
         file=file,
         project_id=project_id,
@@ -308,6 +352,7 @@ async def delete_file(
 async def search_files(
     project_id: UUID,
     search_request: FileSearchRequestDTO,
+    response: Response,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -315,17 +360,20 @@ async def search_files(
     Perform semantic search across all files in a project.
     
     Returns the most relevant chunks with their scores and metadata.
-    
-    Note: In Phase 1, this is a stub. Phase 2 will implement actual
-    semantic search using embeddings and Pinecone.
+    The request has SEARCH_DEADLINE_MS to complete (504 otherwise); the
+    Server-Timing header reports the duration of each stage.
     """
     # TODO: Add project access check
     
+    timer = RequestTimer(settings.search_deadline_ms / 1000)
     file_service = FileService(db)
-    return await file_service.search_similar(
+    result = await file_service.search_similar(
         query=search_request.query,
         project_id=project_id,
         top_k=search_request.top_k,
-        filters=search_request.filters
+        filters=search_request.filters,
+        timer=timer
     )
+    response.headers["Server-Timing"] = timer.server_timing()
+    return result
 
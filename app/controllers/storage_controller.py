@@ -0,0 +1,131 @@
+"""
+Storage controller serving signed URLs for the local filesystem backend.
+
+Cloud backends hand out URLs that point straight at Azure or Supabase. With
+STORAGE_BACKEND=local the signed URLs point here instead, so clients use the
+same direct upload/download flow in development and on-prem deployments.
+"""
+import mimetypes
+import os
+import re
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse
+
+from app.core.storage import LocalFileStorageClient, get_storage_client
+
+router = APIRouter(prefix="/storage/local", tags=["Storage"])
+
+_RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+def _get_local_client(method: str, blob_path: str, expires: int, signature: str) -> LocalFileStorageClient:
+    """
+    Return the local storage client after checking the URL signature.
+
+    Raises:
+        HTTPException: 404 if local storage is not the active backend,
+            403 if the signature is invalid or expired
+    """
+    storage_client = get_storage_client()
+    if not isinstance(storage_client, LocalFileStorageClient):
+        raise HTTPException(status_code=404, detail="Local storage is not enabled")
+
+    if not storage_client.verify_signature(method, blob_path, expires, signature):
+        raise HTTPException(status_code=403, detail="Invalid or expired signature")
+
+    return storage_client
+
+
+@router.get(
+    "/{blob_path:path}",
+    summary="Download file (signed URL)",
+    description="Serve a file from local storage using a URL from get_file_url()"
+)
+async def download_local_file(
+    blob_path: str,
+    request: Request,
+    expires: int = Query(..., description="URL expiry (unix seconds)"),
+    signature: str = Query(..., description="URL signature")
+):
+    """
+    Download a file from local storage.
+
+    Supports a single `Range: bytes=start-end` header; ranged reads come
+    straight from the file's memory map.
+    """
+    storage_client = _get_local_client("GET", blob_path, expires, signature)
+
+    try:
+        path = storage_client.resolve_path(blob_path)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid blob path")
+
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    range_header = request.headers.get("range")
+
+    if not range_header:
+        return FileResponse(path, media_type=media_type, filename=os.path.basename(path))
+
+    size = os.path.getsize(path)
+    match = _RANGE_PATTERN.match(range_header.strip())
+    if not match or not any(match.groups()):
+        raise HTTPException(status_code=416, detail="Unsupported range")
+
+    start_text, end_text = match.groups()
+    if start_text:
+        start = int(start_text)
+        end = min(int(end_text), size - 1) if end_text else size - 1
+    else:
+        # Suffix range: last N bytes
+        start = max(size - int(end_text), 0)
+        end = size - 1
+
+    if start > end or start >= size:
+        raise HTTPException(status_code=416, detail="Range not satisfiable")
+
+    content = await storage_client.download_range(blob_path, start, end - start + 1)
+    return Response(
+        content=content,
+        status_code=206,
+        media_type=media_type,
+        headers={
+            "Content-Range": f"bytes {start}-{end}/{size}",
+            "Accept-Ranges": "bytes"
+        }
+    )
+
+
+@router.put(
+    "/{blob_path:path}",
+    status_code=201,
+    summary="Upload file (signed URL)",
+    description="Store a file in local storage using a URL from get_upload_url()"
+)
+async def upload_local_file(
+    blob_path: str,
+    request: Request,
+    expires: int = Query(..., description="URL expiry (unix seconds)"),
+    signature: str = Query(..., description="URL signature")
+):
+    """
+    Upload a file to local storage.
+
+    The request body is streamed to disk and renamed into place once
+    complete, so a failed upload never leaves a partial file behind.
+    """
+    storage_client = _get_local_client("PUT", blob_path, expires, signature)
+
+    try:
+        await storage_client.upload_chunks(
+            chunks=request.stream(),
+            blob_path=blob_path,
+            content_type=request.headers.get("content-type")
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid blob path")
+
+    return Response(status_code=201)
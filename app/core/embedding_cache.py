@@ -0,0 +1,236 @@
+"""
+Cache of chunk embeddings.
+
+Boilerplate (disclaimers, page headers, signature blocks, duplicate pages)
+repeats across files and tenants, and its embedding only depends on the
+model and the text. Entries are keyed by a SHA-256 of EMBEDDING_MODEL and the
+normalized text (Unicode NFC, whitespace runs collapsed, trimmed), so texts
+differing only in layout whitespace share one entry.
+
+Vectors are stored as little-endian float16 (2 bytes per dimension, about
+3 KB at 1536 dimensions); the rounding error, below 1e-3 per component of a
+unit vector, does not change similarity rankings in practice.
+
+Entries live in an in-process LRU. With EMBEDDING_CACHE_REDIS=true they are
+also shared across workers through Redis for EMBEDDING_CACHE_TTL_SECONDS;
+Redis errors only cost a cache miss, never a failed embedding.
+"""
+import hashlib
+import logging
+import re
+import struct
+import threading
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Text as used for cache keys: NFC, whitespace runs collapsed to one space, trimmed."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def encode_vector(vector: Sequence[float]) -> bytes:
+    """Pack a vector as little-endian float16."""
+    return struct.pack(f"<{len(vector)}e", *vector)
+
+
+def decode_vector(payload: bytes) -> List[float]:
+    """Unpack a little-endian float16 vector."""
+    return list(struct.unpack(f"<{len(payload) // 2}e", payload))
+
+
+@dataclass
+class EmbeddingCacheStats:
+    """Lookup counters of an embedding cache."""
+    lookups: int = 0
+    local_hits: int = 0
+    shared_hits: int = 0
+    stores: int = 0
+    shared_errors: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.local_hits + self.shared_hits
+
+    @property
+    def misses(self) -> int:
+        return self.lookups - self.hits
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.lookups} lookups, hit rate {self.hit_rate:.1%} "
+            f"({self.local_hits} local, {self.shared_hits} shared), {self.stores} stored"
+        )
+
+
+class EmbeddingCache:
+    """Thread-safe LRU of float16 embeddings keyed by model and normalized text."""
+
+    def __init__(
+        self,
+        model: str,
+        max_entries: int,
+        redis_url: Optional[str] = None,
+        ttl_seconds: int = 30 * 24 * 3600
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            model: Embedding model; part of every key, so a model change starts cold
+            max_entries: Maximum vectors kept in process memory
+            redis_url: Redis URL for sharing across workers (None = process-local only)
+            ttl_seconds: Lifetime of shared entries in Redis
+        """
+        self.model = model
+        self.max_entries = max_entries
+        self.redis_url = redis_url
+        self.ttl_seconds = ttl_seconds
+        self.stats = EmbeddingCacheStats()
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+
+    @property
+    def shared(self) -> bool:
+        """Whether vectors are also shared through Redis."""
+        return self.redis_url is not None
+
+    def key(self, text: str) -> str:
+        """Cache key of a text for this cache's model."""
+        return hashlib.sha256(f"{self.model}\0{normalize_text(text)}".encode()).hexdigest()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        """
+        Look up vectors, first in process memory, then (for the rest) in Redis.
+
+        Shared hits are copied into the in-process LRU.
+
+        Args:
+            keys: Cache keys from key()
+
+        Returns:
+            Vectors found, by key
+        """
+        found: Dict[str, bytes] = {}
+        with self._lock:
+            for key in keys:
+                payload = self._entries.get(key)
+                if payload is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = payload
+            local_hits = len(found)
+
+        missing = list(dict.fromkeys(key for key in keys if key not in found))
+        shared: Dict[str, bytes] = self._get_shared(missing) if missing and self.shared else {}
+        if shared:
+            found.update(shared)
+            self._put_local(shared)
+
+        with self._lock:
+            self.stats.lookups += len(keys)
+            self.stats.local_hits += local_hits
+            self.stats.shared_hits += sum(1 for key in keys if key in shared)
+        return {key: decode_vector(payload) for key, payload in found.items()}
+
+    def put_many(self, vectors: Dict[str, Sequence[float]]) -> None:
+        """
+        Store vectors in process memory and (if shared) in Redis.
+
+        Args:
+            vectors: Vectors by cache key
+        """
+        payloads = {}
+        for key, vector in vectors.items():
+            try:
+                payloads[key] = encode_vector(vector)
+            except (OverflowError, struct.error):
+                # Components beyond float16 range; not a normalized embedding, leave it uncached
+                continue
+        if not payloads:
+            return
+
+        self._put_local(payloads)
+        if self.shared:
+            self._put_shared(payloads)
+        with self._lock:
+            self.stats.stores += len(payloads)
+
+    def clear(self) -> None:
+        """Drop all in-process entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def _put_local(self, payloads: Dict[str, bytes]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            for key, payload in payloads.items():
+                self._entries[key] = payload
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _redis_key(self, key: str) -> str:
+        return f"memic:embedding:{key}"
+
+    def _get_redis(self) -> Any:
+        """Lazily create the Redis client."""
+        if self._redis is None:
+            import redis
+            self._redis = redis.Redis.from_url(
+                self.redis_url,
+                socket_timeout=1,
+                socket_connect_timeout=1
+            )
+        return self._redis
+
+    def _get_shared(self, keys: List[str]) -> Dict[str, bytes]:
+        try:
+            values = self._get_redis().mget([self._redis_key(key) for key in keys])
+            return {key: value for key, value in zip(keys, values) if value}
+        except Exception as e:
+            with self._lock:
+                self.stats.shared_errors += 1
+            logger.warning(f"Embedding cache lookup in Redis failed: {str(e)}")
+            return {}
+
+    def _put_shared(self, payloads: Dict[str, bytes]) -> None:
+        try:
+            pipeline = self._get_redis().pipeline(transaction=False)
+            for key, payload in payloads.items():
+                pipeline.set(self._redis_key(key), payload, ex=self.ttl_seconds)
+            pipeline.execute()
+        except Exception as e:
+            with self._lock:
+                self.stats.shared_errors += 1
+            logger.warning(f"Embedding cache write to Redis failed: {str(e)}")
+
+
+def create_embedding_cache() -> Optional[EmbeddingCache]:
+    """
+    Build the embedding cache from settings.
+
+    Returns:
+        EmbeddingCache, or None if both tiers are disabled
+    """
+    if settings.embedding_cache_size <= 0 and not settings.embedding_cache_redis:
+        return None
+    return EmbeddingCache(
+        model=settings.embedding_model,
+        max_entries=settings.embedding_cache_size,
+        redis_url=settings.redis_url if settings.embedding_cache_redis else None,
+        ttl_seconds=settings.embedding_cache_ttl_seconds
+    )
@@ -0,0 +1,533 @@
+"""
+Batched embedding requests.
+
+EmbeddingEngine turns embed calls into as few provider requests as
+possible: texts submitted by any task in the process go into one queue,
+and a dispatcher thread packs them into requests of up to
+EMBEDDING_BATCH_MAX_INPUTS inputs and EMBEDDING_BATCH_MAX_TOKENS tokens.
+Up to EMBEDDING_MAX_INFLIGHT requests are in flight, so the next request is
+packed and sent while the previous ones are still being answered; while all
+of them are busy, chunks of every file embedded at the same time (Celery
+threads / gevent pools run several embedding tasks in one process) queue up
+and leave together in the next request. EMBEDDING_COALESCE_WAIT optionally
+holds a partial request back for more chunks, trading latency for fewer
+requests (e.g. under a requests-per-minute quota).
+
+With a ProviderRateLimiter, requests wait for the shared embedding quota
+(requests and tokens per minute across all workers) before they are sent,
+the number in flight adapts to 429s and latency (AIMD), and submissions
+with a tenant wait for that tenant's token quota before they are queued.
+
+With an EmbeddingCache, texts whose embedding is cached are answered
+without a request, and a text already waiting for a request (the same
+boilerplate in several files being embedded together) is attached to that
+request instead of being sent again.
+
+Providers speak the OpenAI embeddings API (EMBEDDING_API_BASE selects an
+OpenAI-compatible endpoint). Vectors are requested base64-encoded, which is
+about a quarter of the JSON float response size.
+"""
+import array
+import base64
+import logging
+import os
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from app.config import settings
+from app.core.embedding_cache import EmbeddingCache, create_embedding_cache
+from app.core.rate_limit import AdaptiveConcurrency, ProviderRateLimiter, get_rate_limiter, is_rate_limited, retry_after
+from app.core.tokenizer import get_tokenizer
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EmbeddingResponse:
+    """Vectors for one request, in input order, and the tokens billed for it."""
+    vectors: List[List[float]]
+    tokens: int
+
+
+@dataclass
+class EmbeddingStats:
+    """Counters of the requests an engine has sent."""
+    requests: int = 0
+    inputs: int = 0
+    tokens: int = 0  # Billed tokens, as reported by the provider
+    retries: int = 0
+    throttled: int = 0  # 429 responses (retried up to max_throttle_retries before counting against max_retries)
+    failed_requests: int = 0
+    cache_hits: int = 0  # Texts answered from the cache
+    deduplicated: int = 0  # Texts that joined an identical queued or in-flight text
+
+    def cost(self, price_per_million_tokens: float) -> float:
+        """Cost of the billed tokens."""
+        return self.tokens * price_per_million_tokens / 1_000_000
+
+
+class BaseEmbeddingProvider(ABC):
+    """An embedding API; embed() sends one request."""
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> EmbeddingResponse:
+        """
+        Embed texts with one request.
+
+        Args:
+            texts: Inputs, within the provider's per-request limits
+
+        Returns:
+            EmbeddingResponse with one vector per text
+        """
+        pass
+
+    def close(self) -> None:
+        """Release connections held by the provider."""
+        pass
+
+
+class OpenAIEmbeddingProvider(BaseEmbeddingProvider):
+    """OpenAI (or OpenAI-compatible) embeddings endpoint."""
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        base_url: Optional[str] = None,
+        timeout: float = 60.0,
+        max_connections: int = 4
+    ):
+        import httpx
+        from openai import OpenAI
+
+        # Own HTTP client: one keep-alive connection per in-flight request (and
+        # openai 1.54's default client does not construct under httpx >= 0.28)
+        http_client = httpx.Client(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+        # Retries are done by the engine, which knows the request is idempotent
+        self.client = OpenAI(
+            api_key=api_key, base_url=base_url, timeout=timeout, max_retries=0, http_client=http_client
+        )
+        self.model = model
+
+    def embed(self, texts: List[str]) -> EmbeddingResponse:
+        response = self.client.embeddings.create(model=self.model, input=texts, encoding_format="base64")
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        for item in response.data:
+            vectors[item.index] = _decode_vector(item.embedding)
+        return EmbeddingResponse(vectors=vectors, tokens=response.usage.prompt_tokens)
+
+    def close(self) -> None:
+        self.client.close()
+
+
+def _decode_vector(embedding) -> List[float]:
+    """Decode a base64 little-endian float32 embedding (lists are passed through)."""
+    if not isinstance(embedding, str):
+        return list(embedding)
+    values = array.array("f", base64.b64decode(embedding))
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values.tolist()
+
+
+class _Job:
+    """One submit() call: its future and the vectors received so far."""
+
+    def __init__(self, size: int):
+        self.future: Future = Future()
+        self.vectors: List[Optional[List[float]]] = [None] * size
+        self.remaining = size
+        self.failed = False
+
+
+@dataclass
+class _Item:
+    """One distinct text waiting for a request, and the (job, position) slots waiting for it."""
+    key: str
+    text: str
+    tokens: int
+    enqueued: float
+    waiters: List[Tuple[_Job, int]]
+
+
+class EmbeddingEngine:
+    """
+    Packs texts from every caller in the process into filled provider requests.
+
+    submit() returns immediately with a Future; a dispatcher thread sends the
+    requests on a pool of max_inflight threads. A failed request is retried
+    with exponential backoff, a rate-limited one (429) after the limiter's
+    shared pause; when it keeps failing, the futures of the
+    submissions it contained fail and their remaining texts are dropped.
+    Identical texts are embedded once per engine (and, with a cache, once
+    per cache lifetime).
+    """
+
+    def __init__(
+        self,
+        provider: BaseEmbeddingProvider,
+        max_inputs: int = 2048,
+        max_tokens: int = 250_000,
+        max_inflight: int = 4,
+        coalesce_wait: float = 0.0,
+        max_retries: int = 3,
+        retry_delay: float = 1.0,
+        cache: Optional[EmbeddingCache] = None,
+        limiter: Optional[ProviderRateLimiter] = None,
+        max_throttle_retries: int = 8
+    ):
+        self.provider = provider
+        self.cache = cache
+        self.max_inputs = max_inputs
+        self.max_tokens = max_tokens
+        self.max_inflight = max_inflight
+        self.coalesce_wait = coalesce_wait
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.limiter = limiter
+        self.max_throttle_retries = max_throttle_retries
+        self.stats = EmbeddingStats()
+
+        self._pending: Deque[_Item] = deque()
+        self._queued: Dict[str, _Item] = {}  # Items not answered yet (pending or in flight), by key
+        self._pending_tokens = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._lock = threading.Lock()  # Guards job progress and stats (_condition guards the queue)
+        # Without a limiter the slots never shrink, as nothing reports throttling or latency
+        self._slots = limiter.concurrency if limiter else AdaptiveConcurrency(max_inflight)
+        self._executor = ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix="embedding")
+        self._dispatcher = threading.Thread(target=self._dispatch, name="embedding-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    def submit(
+        self,
+        texts: Sequence[str],
+        token_counts: Optional[Sequence[int]] = None,
+        tenant: Optional[str] = None
+    ) -> Future:
+        """
+        Queue texts for embedding.
+
+        Args:
+            texts: Texts to embed
+            token_counts: Token count of each text (counted with the shared
+                tokenizer when omitted); used to fill requests up to max_tokens
+            tenant: Tenant (organization) ID; with a limiter, blocks until the
+                tenant's token quota covers the texts not answered by the cache
+
+        Returns:
+            Future resolving to one vector per text, in order
+        """
+        job = _Job(len(texts))
+        if not texts:
+            job.future.set_result([])
+            return job.future
+
+        keys = [self.cache.key(text) for text in texts] if self.cache else list(texts)
+
+        # Cached texts are filled in before the job is visible to request threads
+        cached = self.cache.get_many(keys) if self.cache else {}
+        for position, key in enumerate(keys):
+            vector = cached.get(key)
+            if vector is not None:
+                job.vectors[position] = vector
+                job.remaining -= 1
+        cache_hits = len(texts) - job.remaining
+        if job.remaining == 0:
+            with self._lock:
+                self.stats.cache_hits += cache_hits
+            job.future.set_result(job.vectors)
+            return job.future
+
+        if token_counts is None:
+            token_counts = get_tokenizer().count_batch(list(texts))
+
+        if self.limiter and tenant:
+            uncached_tokens = sum(tokens for key, tokens in zip(keys, token_counts) if key not in cached)
+            self.limiter.wait_for_quota(uncached_tokens, tenant, requests=0, provider=False)
+
+        deduplicated = 0
+        now = time.monotonic()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Embedding engine is closed")
+            for position, (key, text, tokens) in enumerate(zip(keys, texts, token_counts)):
+                if key in cached:
+                    continue
+                item = self._queued.get(key)
+                if item is not None:
+                    item.waiters.append((job, position))
+                    deduplicated += 1
+                    continue
+                item = _Item(key, text, tokens, now, [(job, position)])
+                self._queued[key] = item
+                self._pending.append(item)
+                self._pending_tokens += tokens
+            self._condition.notify_all()
+
+        with self._lock:
+            self.stats.cache_hits += cache_hits
+            self.stats.deduplicated += deduplicated
+        return job.future
+
+    def embed(
+        self,
+        texts: Sequence[str],
+        token_counts: Optional[Sequence[int]] = None,
+        tenant: Optional[str] = None
+    ) -> List[List[float]]:
+        """Embed texts and wait for the vectors (see submit())."""
+        return self.submit(texts, token_counts, tenant).result()
+
+    def close(self) -> None:
+        """Send what is queued, wait for in-flight requests and stop the threads."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._dispatcher.join()
+        self._executor.shutdown(wait=True)
+        self.provider.close()
+
+    # -- dispatching -------------------------------------------------------
+
+    def _is_full(self) -> bool:
+        return len(self._pending) >= self.max_inputs or self._pending_tokens >= self.max_tokens
+
+    def _take_batch(self) -> List[_Item]:
+        """Pop queued items, oldest first, up to the request limits (always at least one)."""
+        batch: List[_Item] = []
+        tokens = 0
+        while self._pending and len(batch) < self.max_inputs:
+            item = self._pending[0]
+            if batch and tokens + item.tokens > self.max_tokens:
+                break
+            self._pending.popleft()
+            self._pending_tokens -= item.tokens
+            # Texts only wanted by submissions that already failed are not worth sending
+            if all(job.failed for job, _ in item.waiters):
+                del self._queued[item.key]
+                continue
+            batch.append(item)
+            tokens += item.tokens
+        return batch
+
+    def _dispatch(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+
+            # Waiting for a free slot lets the queue fill up, so requests get fuller under load
+            self._slots.acquire()
+            with self._condition:
+                # Optionally hold a partial request back for chunks still being submitted
+                deadline = self._pending[0].enqueued + self.coalesce_wait
+                while not self._closed and not self._is_full():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._take_batch()
+
+            if batch:
+                self._executor.submit(self._send, batch)
+            else:
+                self._slots.release()
+
+    def _send(self, batch: List[_Item]) -> None:
+        try:
+            texts = [item.text for item in batch]
+            tokens = sum(item.tokens for item in batch)
+            attempts = 0
+            throttles = 0
+            while True:
+                if self.limiter:
+                    self.limiter.wait_for_quota(tokens)
+                start = time.monotonic()
+                try:
+                    response = self.provider.embed(texts)
+                    self._slots.on_success(time.monotonic() - start)
+                    break
+                except Exception as e:
+                    if is_rate_limited(e):
+                        with self._lock:
+                            self.stats.throttled += 1
+                        if self.limiter:
+                            self.limiter.throttled(e)
+                        if throttles < self.max_throttle_retries:
+                            throttles += 1
+                            if not self.limiter:
+                                time.sleep(retry_after(e) or self.retry_delay * 2 ** (throttles - 1))
+                            # With a limiter, the next wait_for_quota() waits out the pause shared by all workers
+                            continue
+                    attempts += 1
+                    if attempts > self.max_retries:
+                        logger.error(
+                            f"Embedding request of {len(batch)} inputs failed after {attempts} attempts: {str(e)}"
+                        )
+                        self._fail(batch, e)
+                        return
+                    with self._lock:
+                        self.stats.retries += 1
+                    time.sleep(self.retry_delay * 2 ** (attempts - 1))
+            self._complete(batch, response)
+        except Exception as e:
+            self._fail(batch, e)
+        finally:
+            self._slots.release()
+
+    def _complete(self, batch: List[_Item], response: EmbeddingResponse) -> None:
+        if len(response.vectors) != len(batch):
+            raise ValueError(f"Expected {len(batch)} embeddings, got {len(response.vectors)}")
+
+        if self.cache:
+            self.cache.put_many({item.key: vector for item, vector in zip(batch, response.vectors)})
+
+        # No waiter can join an item once it is out of _queued (later submissions hit the cache or re-queue)
+        with self._condition:
+            for item in batch:
+                self._queued.pop(item.key, None)
+
+        done = []
+        with self._lock:
+            self.stats.requests += 1
+            self.stats.inputs += len(batch)
+            self.stats.tokens += response.tokens
+            for item, vector in zip(batch, response.vectors):
+                for job, position in item.waiters:
+                    if job.failed:
+                        continue
+                    job.vectors[position] = vector
+                    job.remaining -= 1
+                    if job.remaining == 0:
+                        done.append(job)
+        for job in done:
+            job.future.set_result(job.vectors)
+
+    def _fail(self, batch: List[_Item], error: Exception) -> None:
+        with self._condition:
+            for item in batch:
+                self._queued.pop(item.key, None)
+
+        failed = []
+        with self._lock:
+            self.stats.failed_requests += 1
+            for item in batch:
+                for job, _ in item.waiters:
+                    if not job.failed:
+                        job.failed = True
+                        failed.append(job)
+        for job in failed:
+            job.future.set_exception(error)
+
+
+def _create_embedding_engine() -> EmbeddingEngine:
+    if not settings.openai_api_key:
+        raise ValueError("OpenAI API key not configured. Please set OPENAI_API_KEY to embed chunks")
+
+    provider = OpenAIEmbeddingProvider(
+        api_key=settings.openai_api_key,
+        model=settings.embedding_model,
+        base_url=settings.embedding_api_base,
+        timeout=settings.embedding_request_timeout,
+        max_connections=settings.embedding_max_inflight
+    )
+    return EmbeddingEngine(
+        provider,
+        max_inputs=settings.embedding_batch_max_inputs,
+        max_tokens=settings.embedding_batch_max_tokens,
+        max_inflight=settings.embedding_max_inflight,
+        coalesce_wait=settings.embedding_coalesce_wait,
+        max_retries=settings.embedding_max_retries,
+        retry_delay=settings.embedding_retry_delay,
+        cache=create_embedding_cache(),
+        limiter=get_rate_limiter("embedding"),
+        max_throttle_retries=settings.rate_limit_max_throttle_retries
+    )
+
+
+_embedding_engine: Optional[EmbeddingEngine] = None
+_embedding_engine_pid: Optional[int] = None
+_embedding_engine_lock = threading.Lock()
+
+
+def get_embedding_engine() -> EmbeddingEngine:
+    """
+    Get the shared embedding engine for this process.
+
+    Every task in the process submits to the same engine, which is what lets
+    chunks of different files share requests. Forked children (Celery
+    prefork workers) build their own, since threads do not survive a fork.
+    """
+    global _embedding_engine, _embedding_engine_pid
+
+    pid = os.getpid()
+    engine = _embedding_engine
+    if engine is not None and _embedding_engine_pid == pid:
+        return engine
+
+    with _embedding_engine_lock:
+        if _embedding_engine is None or _embedding_engine_pid != pid:
+            _embedding_engine = _create_embedding_engine()
+            _embedding_engine_pid = pid
+        return _embedding_engine
+
+
+def close_embedding_engine() -> None:
+    """
+    Close the shared embedding engine, if one was created in this process.
+
+    Safe to call multiple times. The next get_embedding_engine() call
+    creates a fresh engine.
+    """
+    global _embedding_engine, _embedding_engine_pid
+
+    with _embedding_engine_lock:
+        engine = _embedding_engine
+        owned = _embedding_engine_pid == os.getpid()
+        _embedding_engine = None
+        _embedding_engine_pid = None
+
+    if engine is not None and owned:
+        engine.close()
+
+
+def embed_query(text: str) -> List[float]:
+    """
+    Embed one search query (blocking).
+
+    Queries are latency-bound, so they are sent straight to the provider
+    instead of queueing behind file chunks in the engine, and do not wait
+    for the shared rate limit buckets (a query is one small request). The
+    engine's cache still applies, so repeated queries cost no request.
+
+    Args:
+        text: Query text
+
+    Returns:
+        Query vector
+    """
+    engine = get_embedding_engine()
+    key = engine.cache.key(text) if engine.cache else None
+    if key is not None:
+        cached = engine.cache.get_many([key]).get(key)
+        if cached is not None:
+            return cached
+
+    vector = engine.provider.embed([text]).vectors[0]
+    if key is not None:
+        engine.cache.put_many({key: vector})
+    return vector
@@ -0,0 +1,288 @@
+"""
+Hierarchical Navigable Small World graph for approximate nearest neighbour search.
+
+NumPy implementation of Malkov & Yashunin's HNSW over unit-length float32
+vectors, where cosine similarity is a dot product. Used by LocalVectorStore
+for namespaces too large to scan exhaustively.
+
+The graph stores only node ids; vectors are passed in by the caller (row i
+of the vectors matrix is node i), so the vectors can stay memory-mapped in
+their segment file. Layer 0 adjacency is a fixed-width int32 matrix padded
+with -1, which can itself be memory-mapped from disk for searching.
+Upper layers hold few nodes and are kept as Python lists.
+"""
+import heapq
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class HnswGraph:
+    """HNSW graph over rows of a caller-provided vectors matrix."""
+
+    def __init__(self, m: int = 16, ef_construction: int = 100, seed: int = 0):
+        """
+        Initialize an empty graph.
+
+        Args:
+            m: Neighbours per node on upper layers (2 * m on layer 0)
+            ef_construction: Candidate list size while inserting
+            seed: Seed for level assignment
+        """
+        self.m = m
+        self.m0 = 2 * m
+        self.ef_construction = ef_construction
+        self.layer0 = np.full((0, self.m0), -1, dtype=np.int32)
+        self.upper: List[Dict[int, List[int]]] = []  # upper[level - 1][node] -> neighbours
+        self.entry = -1
+        self.max_level = -1
+        self.count = 0
+        self._level_scale = 1.0 / math.log(m)
+        self._rng = np.random.default_rng(seed)
+
+    # -- persistence -------------------------------------------------------
+
+    def meta(self) -> Dict[str, Any]:
+        """Scalar state stored alongside the graph arrays."""
+        return {
+            "m": self.m,
+            "ef_construction": self.ef_construction,
+            "entry": self.entry,
+            "max_level": self.max_level,
+            "count": self.count
+        }
+
+    def upper_array(self) -> np.ndarray:
+        """Upper layers as rows of [node, level, neighbour count, neighbours (padded to m)]."""
+        rows = [
+            [node, level + 1, len(neighbours)] + neighbours + [-1] * (self.m - len(neighbours))
+            for level, layer in enumerate(self.upper)
+            for node, neighbours in layer.items()
+        ]
+        return np.asarray(rows, dtype=np.int32).reshape(-1, self.m + 3)
+
+    @classmethod
+    def from_arrays(cls, meta: Dict[str, Any], layer0: np.ndarray, upper: np.ndarray) -> "HnswGraph":
+        """
+        Rebuild a graph from saved arrays.
+
+        layer0 may be a read-only memory map; call copy() before inserting.
+        """
+        graph = cls(m=meta["m"], ef_construction=meta["ef_construction"])
+        graph.layer0 = layer0
+        graph.entry = meta["entry"]
+        graph.max_level = meta["max_level"]
+        graph.count = meta["count"]
+        graph.upper = [{} for _ in range(max(graph.max_level, 0))]
+        for row in upper.tolist():
+            node, level, size = row[0], row[1], row[2]
+            graph.upper[level - 1][node] = row[3:3 + size]
+        return graph
+
+    def copy(self) -> "HnswGraph":
+        """Writable deep copy (e.g. of a memory-mapped graph) for further inserts."""
+        graph = HnswGraph(m=self.m, ef_construction=self.ef_construction)
+        graph.layer0 = np.array(self.layer0[:self.count], dtype=np.int32)
+        graph.upper = [{node: list(nbrs) for node, nbrs in layer.items()} for layer in self.upper]
+        graph.entry = self.entry
+        graph.max_level = self.max_level
+        graph.count = self.count
+        return graph
+
+    # -- search ------------------------------------------------------------
+
+    def _neighbours(self, node: int, level: int) -> List[int]:
+        if level == 0:
+            return [n for n in self.layer0[node].tolist() if n >= 0]
+        return self.upper[level - 1].get(node, [])
+
+    def _search_layer(
+        self,
+        vectors: np.ndarray,
+        query: np.ndarray,
+        entry_points: List[Tuple[float, int]],
+        ef: int,
+        level: int,
+        allowed: Optional[np.ndarray] = None
+    ) -> List[Tuple[float, int]]:
+        """
+        Best-first search of one layer.
+
+        Nodes outside allowed (tombstoned or filtered out) are traversed but
+        never returned.
+
+        Returns:
+            Up to ef (similarity, node) pairs, unordered
+        """
+        visited = {node for _, node in entry_points}
+        candidates = [(-sim, node) for sim, node in entry_points]
+        heapq.heapify(candidates)
+        results = [
+            (sim, node) for sim, node in entry_points
+            if allowed is None or allowed[node]
+        ]
+        heapq.heapify(results)
+
+        while candidates:
+            negative_sim, node = heapq.heappop(candidates)
+            if len(results) >= ef and -negative_sim < results[0][0]:
+                break
+
+            fresh = [n for n in self._neighbours(node, level) if n not in visited]
+            if not fresh:
+                continue
+            visited.update(fresh)
+
+            similarities = (vectors[fresh] @ query).tolist()
+            for neighbour, sim in zip(fresh, similarities):
+                if len(results) < ef or sim > results[0][0]:
+                    heapq.heappush(candidates, (-sim, neighbour))
+                    if allowed is None or allowed[neighbour]:
+                        if len(results) < ef:
+                            heapq.heappush(results, (sim, neighbour))
+                        else:
+                            heapq.heappushpop(results, (sim, neighbour))
+        return results
+
+    def _descend(self, vectors: np.ndarray, query: np.ndarray, down_to: int) -> List[Tuple[float, int]]:
+        """Greedy search from the entry point through the layers above down_to."""
+        entry = [(float(vectors[self.entry] @ query), self.entry)]
+        for level in range(self.max_level, down_to, -1):
+            entry = [max(self._search_layer(vectors, query, entry, 1, level))]
+        return entry
+
+    def search(
+        self,
+        vectors: np.ndarray,
+        query: np.ndarray,
+        k: int,
+        ef: int,
+        allowed: Optional[np.ndarray] = None
+    ) -> List[Tuple[float, int]]:
+        """
+        Approximate top-k search.
+
+        Args:
+            vectors: Matrix whose row i is node i (unit length)
+            query: Unit-length query vector
+            k: Number of results
+            ef: Candidate list size (higher = better recall, slower)
+            allowed: Optional boolean mask of nodes that may be returned
+
+        Returns:
+            Up to k (similarity, node) pairs, best first
+        """
+        if self.entry < 0:
+            return []
+        entry = self._descend(vectors, query, 0)
+        found = self._search_layer(vectors, query, entry, max(ef, k), 0, allowed)
+        return heapq.nlargest(k, found)
+
+    # -- construction ------------------------------------------------------
+
+    def _select(self, vectors: np.ndarray, candidates: List[Tuple[float, int]], m: int) -> List[int]:
+        """
+        Neighbour selection heuristic: keep a candidate only if it is closer
+        to the base node than to every neighbour already kept, then top up
+        with the closest pruned candidates.
+        """
+        candidates = sorted(candidates, reverse=True)
+        if len(candidates) <= m:
+            return [node for _, node in candidates]
+
+        nodes = [node for _, node in candidates]
+        similarities = np.asarray([sim for sim, _ in candidates], dtype=np.float32)
+        pairwise = vectors[nodes] @ vectors[nodes].T
+
+        # closest[j]: similarity of candidate j to its most similar kept neighbour
+        closest = np.full(len(nodes), -np.inf, dtype=np.float32)
+        keep = np.zeros(len(nodes), dtype=bool)
+        start = 0
+        while keep.sum() < m:
+            eligible = np.flatnonzero(closest[start:] < similarities[start:])
+            if not len(eligible):
+                break
+            i = start + int(eligible[0])
+            keep[i] = True
+            np.maximum(closest, pairwise[i], out=closest)
+            start = i + 1
+
+        kept = np.flatnonzero(keep).tolist()
+        kept.extend(np.flatnonzero(~keep)[:m - len(kept)].tolist())
+        return [nodes[i] for i in kept]
+
+    def _link(self, vectors: np.ndarray, node: int, neighbour: int, level: int) -> None:
+        """Add node to neighbour's list, re-selecting the list if it is full."""
+        if level == 0:
+            row = self.layer0[neighbour]
+            free = np.flatnonzero(row < 0)
+            if len(free):
+                row[free[0]] = node
+                return
+            members = row.tolist() + [node]
+            limit = self.m0
+        else:
+            members = self.upper[level - 1][neighbour]
+            if len(members) < self.m:
+                members.append(node)
+                return
+            members = members + [node]
+            limit = self.m
+
+        # Full list: drop the least similar member (the diversity heuristic
+        # is only applied to a node's own list; re-running it on every
+        # overflow costs far more than it gains in recall)
+        similarities = vectors[members] @ vectors[neighbour]
+        kept = [members[i] for i in np.argsort(-similarities, kind="stable")[:limit].tolist()]
+        if level == 0:
+            row[:] = -1
+            row[:len(kept)] = kept
+        else:
+            self.upper[level - 1][neighbour] = kept
+
+    def add(self, vectors: np.ndarray, end: int) -> None:
+        """
+        Insert nodes count..end-1 (rows of vectors) into the graph.
+
+        Args:
+            vectors: Matrix whose row i is node i (unit length); must hold at least end rows
+            end: One past the last node to insert
+        """
+        if end <= self.count:
+            return
+        if len(self.layer0) < end:
+            grown = np.full((end, self.m0), -1, dtype=np.int32)
+            grown[:self.count] = self.layer0[:self.count]
+            self.layer0 = grown
+
+        for node in range(self.count, end):
+            self._insert(vectors, node)
+            self.count = node + 1
+
+    def _insert(self, vectors: np.ndarray, node: int) -> None:
+        query = vectors[node]
+        level = int(-math.log(1.0 - self._rng.random()) * self._level_scale)
+        while len(self.upper) < level:
+            self.upper.append({})
+        for l in range(1, level + 1):
+            self.upper[l - 1][node] = []
+
+        if self.entry < 0:
+            self.entry, self.max_level = node, level
+            return
+
+        entry = self._descend(vectors, query, level)
+        for l in range(min(level, self.max_level), -1, -1):
+            found = self._search_layer(vectors, query, entry, self.ef_construction, l)
+            neighbours = self._select(vectors, found, self.m)
+            if l == 0:
+                self.layer0[node, :len(neighbours)] = neighbours
+            else:
+                self.upper[l - 1][node] = list(neighbours)
+            for neighbour in neighbours:
+                self._link(vectors, node, neighbour, l)
+            entry = found
+
+        if level > self.max_level:
+            self.entry, self.max_level = node, level
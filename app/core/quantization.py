@@ -0,0 +1,179 @@
+"""
+Compressed vector codes for approximate scoring.
+
+LocalVectorStore keeps full-precision vectors memory-mapped on disk and
+holds only these codes in memory. Queries score every candidate row on its
+codes, then re-score the best few with the full-precision rows.
+
+- ScalarQuantizer: one int8 per dimension, scaled per dimension (4x smaller
+  than float32)
+- ProductQuantizer: the vector is split into subvectors of a few
+  dimensions, each replaced by the index of its nearest of 256 k-means
+  centroids (one byte per subvector; 16x smaller with 4-dimension
+  subvectors). Queries use asymmetric distance: the query stays exact and
+  is compared against the centroids once per query.
+
+Both score by inner product, which is cosine similarity for the unit-length
+vectors the store keeps.
+"""
+from typing import Any, Optional
+
+import numpy as np
+
+# Rows converted per step; small enough for the float32 copy to stay in cache
+_SCORE_CHUNK_ROWS = 256
+# Rows encoded per step, bounding the temporaries of encoding
+_ENCODE_CHUNK_ROWS = 4096
+
+
+class ScalarQuantizer:
+    """Per-dimension affine mapping of float32 values onto int8."""
+
+    mode = "int8"
+
+    def __init__(self, offset: np.ndarray, scale: np.ndarray):
+        self.offset = offset
+        self.scale = scale
+
+    @classmethod
+    def train(cls, vectors: Any) -> "ScalarQuantizer":
+        """Fit the per-dimension range of vectors."""
+        low = np.asarray(vectors.min(axis=0), dtype=np.float32)
+        high = np.asarray(vectors.max(axis=0), dtype=np.float32)
+        scale = (high - low) / 255.0
+        scale[scale == 0] = 1.0
+        return cls(low, scale)
+
+    def encode(self, vectors: Any) -> np.ndarray:
+        """int8 codes of vectors, (rows, dimension)."""
+        codes = np.empty(vectors.shape, dtype=np.int8)
+        for start in range(0, len(vectors), _ENCODE_CHUNK_ROWS):
+            chunk = (np.asarray(vectors[start:start + _ENCODE_CHUNK_ROWS]) - self.offset) / self.scale
+            codes[start:start + len(chunk)] = np.clip(np.rint(chunk), 0, 255) - 128
+        return codes
+
+    def scores(self, codes: np.ndarray, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Approximate inner products of query with the encoded rows (all, or the given row numbers)."""
+        if rows is not None:
+            codes = codes[rows]
+        weights = (query * self.scale).astype(np.float32)
+        bias = float(query @ self.offset) + 128.0 * float(weights.sum())
+        result = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), _SCORE_CHUNK_ROWS):
+            chunk = codes[start:start + _SCORE_CHUNK_ROWS]
+            result[start:start + len(chunk)] = chunk.astype(np.float32) @ weights
+        return result + bias
+
+    def to_array(self) -> np.ndarray:
+        return np.stack([self.offset, self.scale])
+
+    @classmethod
+    def from_array(cls, array: np.ndarray) -> "ScalarQuantizer":
+        return cls(np.asarray(array[0]), np.asarray(array[1]))
+
+
+class ProductQuantizer:
+    """256-centroid codebook per subvector; one uint8 code per subvector."""
+
+    mode = "pq"
+
+    # k-means settings; training uses a sample, encoding covers every row
+    _CENTROIDS = 256
+    _TRAIN_ROWS = 8192
+    _ITERATIONS = 8
+
+    def __init__(self, centroids: np.ndarray):
+        self.centroids = centroids  # (subvectors, 256, subvector dimension)
+
+    @property
+    def subvectors(self) -> int:
+        return self.centroids.shape[0]
+
+    @classmethod
+    def train(cls, vectors: Any, subvector_dimension: int, seed: int = 0) -> "ProductQuantizer":
+        """
+        Learn one codebook per subvector with k-means on a sample of vectors.
+
+        Args:
+            vectors: (rows, dimension) matrix
+            subvector_dimension: Dimensions per code byte; must divide the dimension
+            seed: Seed for sampling and centroid initialization
+        """
+        rows, dimension = vectors.shape
+        if dimension % subvector_dimension:
+            raise ValueError(
+                f"PQ subvector dimension {subvector_dimension} does not divide vector dimension {dimension}"
+            )
+        subvectors = dimension // subvector_dimension
+
+        rng = np.random.default_rng(seed)
+        sample_rows = np.sort(rng.choice(rows, size=min(rows, cls._TRAIN_ROWS), replace=False))
+        # (subvectors, sample, subvector dimension)
+        sample = np.asarray(vectors[sample_rows], dtype=np.float32) \
+            .reshape(len(sample_rows), subvectors, subvector_dimension).transpose(1, 0, 2).copy()
+
+        count = min(cls._CENTROIDS, len(sample_rows))
+        centroids = np.zeros((subvectors, cls._CENTROIDS, subvector_dimension), dtype=np.float32)
+        centroids[:, :count] = sample[:, rng.choice(len(sample_rows), size=count, replace=False)]
+
+        for _ in range(cls._ITERATIONS):
+            # Cluster sums of all subspaces at once, over flat (subspace, centroid) bins
+            bins = (cls._assign(sample, centroids[:, :count]) + np.arange(subvectors)[:, None] * count).ravel()
+            sizes = np.bincount(bins, minlength=subvectors * count).reshape(subvectors, count)
+            sums = np.stack([
+                np.bincount(bins, weights=sample[:, :, d].ravel(), minlength=subvectors * count)
+                for d in range(subvector_dimension)
+            ], axis=1).reshape(subvectors, count, subvector_dimension)
+            filled = sizes > 0
+            # Empty clusters keep their previous centroid
+            centroids[:, :count][filled] = sums[filled] / sizes[filled][:, None]
+        return cls(centroids)
+
+    @classmethod
+    def _assign(cls, parts: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """Nearest centroid of each part of a (subvectors, rows, subvector dimension) array."""
+        codes = np.empty(parts.shape[:2], dtype=np.intp)
+        half_norms = 0.5 * (centroids ** 2).sum(axis=2)
+        for s in range(len(parts)):
+            # argmin |x - c|^2 == argmax x.c - |c|^2 / 2
+            similarity = parts[s] @ centroids[s].T
+            similarity -= half_norms[s]
+            codes[s] = similarity.argmax(axis=1)
+        return codes
+
+    def encode(self, vectors: Any) -> np.ndarray:
+        """
+        uint8 codes of vectors, (subvectors, rows).
+        
+        Stored subvector-major so scoring gathers from one contiguous row of
+        codes per subvector.
+        """
+        subvectors, _, subvector_dimension = self.centroids.shape
+        codes = np.empty((subvectors, len(vectors)), dtype=np.uint8)
+        for start in range(0, len(vectors), _ENCODE_CHUNK_ROWS):
+            chunk = np.asarray(vectors[start:start + _ENCODE_CHUNK_ROWS], dtype=np.float32)
+            parts = chunk.reshape(len(chunk), subvectors, subvector_dimension).transpose(1, 0, 2)
+            codes[:, start:start + len(chunk)] = self._assign(parts, self.centroids)
+        return codes
+
+    def scores(self, codes: np.ndarray, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Approximate inner products of query with the encoded rows (asymmetric distance)."""
+        if rows is not None:
+            codes = codes[:, rows]
+        subvectors, _, subvector_dimension = self.centroids.shape
+        # table[s, c]: inner product of the query's subvector s with centroid c
+        table = np.einsum("sd,scd->sc", query.reshape(subvectors, subvector_dimension), self.centroids)
+        result = np.zeros(codes.shape[1], dtype=np.float32)
+        for s in range(subvectors):
+            result += table[s][codes[s]]
+        return result
+
+    def to_array(self) -> np.ndarray:
+        return self.centroids
+
+    @classmethod
+    def from_array(cls, array: np.ndarray) -> "ProductQuantizer":
+        return cls(np.asarray(array, dtype=np.float32))
+
+
+QUANTIZERS = {ScalarQuantizer.mode: ScalarQuantizer, ProductQuantizer.mode: ProductQuantizer}
@@ -0,0 +1,545 @@
+"""
+Client-side rate limiting for external AI providers.
+
+Every call to a provider (Azure Form Recognizer, OpenAI enrichment,
+embeddings) goes through the provider's ProviderRateLimiter, which applies:
+
+- Token buckets for requests/min and tokens/min, per provider and per tenant
+  (organization). With RATE_LIMIT_REDIS=true (the default) the buckets live
+  in Redis and are shared by every worker, so parallel workers together stay
+  under the provider quota instead of each assuming it has all of it. Redis
+  errors fall back to in-process buckets.
+- A shared pause: a 429 blocks the provider's bucket for its Retry-After (or
+  RATE_LIMIT_DEFAULT_BACKOFF), so all workers back off together instead of
+  stampeding the provider again the moment their own sleeps end.
+- AIMD concurrency per process: the number of calls in flight grows by one
+  per window of successful calls and halves on a 429 or on a call slower
+  than the provider's latency target.
+
+Limits are configured per provider; 0 disables a limit.
+"""
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ("afr", "llm", "embedding")
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """Whether an SDK error is an HTTP 429 (OpenAI and Azure errors carry status_code)."""
+    return getattr(error, "status_code", None) == 429
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds to wait from a 429's Retry-After / retry-after-ms header, if present."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass  # HTTP-date form; fall back to the default backoff
+    return None
+
+
+@dataclass(frozen=True)
+class Bucket:
+    """One token bucket to draw from: refills per_minute units per minute."""
+    key: str
+    per_minute: float
+    cost: float
+
+
+class BaseBucketStore(ABC):
+    """
+    Token bucket state.
+
+    A bucket holds up to burst_seconds worth of its rate and starts full. A
+    cost larger than that capacity is granted once the bucket is full and
+    leaves it in debt, so oversized calls are delayed rather than refused.
+    """
+
+    def __init__(self, burst_seconds: float):
+        self.burst_seconds = burst_seconds
+
+    @abstractmethod
+    def try_acquire(self, buckets: List[Bucket]) -> float:
+        """
+        Take cost from every bucket, or from none of them.
+
+        Args:
+            buckets: Buckets to draw from
+
+        Returns:
+            0 if granted, otherwise seconds to wait before trying again
+        """
+        pass
+
+    @abstractmethod
+    def block(self, keys: List[str], seconds: float) -> None:
+        """
+        Refuse every acquisition involving these buckets for a while.
+
+        Args:
+            keys: Bucket keys
+            seconds: Pause length
+        """
+        pass
+
+
+class LocalBucketStore(BaseBucketStore):
+    """Buckets in process memory (one quota per process)."""
+
+    def __init__(self, burst_seconds: float):
+        super().__init__(burst_seconds)
+        self._state: Dict[str, List[float]] = {}  # key -> [level, updated_at, blocked_until]
+        self._lock = threading.Lock()
+
+    def try_acquire(self, buckets: List[Bucket]) -> float:
+        now = time.monotonic()
+        with self._lock:
+            wait = 0.0
+            levels = []
+            for bucket in buckets:
+                rate = bucket.per_minute / 60
+                capacity = rate * self.burst_seconds
+                state = self._state.setdefault(bucket.key, [capacity, now, 0.0])
+                level = min(capacity, state[0] + (now - state[1]) * rate)
+                levels.append(level)
+                wait = max(wait, state[2] - now)
+                need = min(bucket.cost, capacity)
+                if level < need:
+                    wait = max(wait, (need - level) / rate)
+            if wait > 0:
+                return wait
+            for bucket, level in zip(buckets, levels):
+                self._state[bucket.key][:2] = [level - bucket.cost, now]
+            return 0.0
+
+    def block(self, keys: List[str], seconds: float) -> None:
+        until = time.monotonic() + seconds
+        with self._lock:
+            for key in keys:
+                state = self._state.setdefault(key, [0.0, time.monotonic(), 0.0])
+                state[2] = max(state[2], until)
+
+
+# KEYS: bucket keys; ARGV: burst_seconds, then (per_minute, cost) per key.
+# Uses the Redis clock, so workers with skewed clocks share one timeline.
+_ACQUIRE_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local burst = tonumber(ARGV[1])
+local wait = 0
+local levels = {}
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i]) / 60
+    local cost = tonumber(ARGV[2 * i + 1])
+    local capacity = rate * burst
+    local state = redis.call('HMGET', key, 'level', 'updated', 'blocked')
+    local level = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    local blocked = tonumber(state[3]) or 0
+    level = math.min(capacity, level + math.max(0, now - updated) * rate)
+    levels[i] = level
+    if blocked > now then wait = math.max(wait, blocked - now) end
+    local need = math.min(cost, capacity)
+    if level < need then wait = math.max(wait, (need - level) / rate) end
+end
+if wait > 0 then return tostring(wait) end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i]) / 60
+    local cost = tonumber(ARGV[2 * i + 1])
+    redis.call('HSET', key, 'level', tostring(levels[i] - cost), 'updated', tostring(now))
+    redis.call('EXPIRE', key, math.ceil(burst + cost / rate) + 60)
+end
+return '0'
+"""
+
+# KEYS: bucket keys; ARGV: seconds
+_BLOCK_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local until_time = now + tonumber(ARGV[1])
+for _, key in ipairs(KEYS) do
+    local blocked = tonumber(redis.call('HGET', key, 'blocked')) or 0
+    if until_time > blocked then
+        redis.call('HSET', key, 'blocked', tostring(until_time))
+    end
+    if redis.call('TTL', key) < tonumber(ARGV[1]) + 60 then
+        redis.call('EXPIRE', key, math.ceil(tonumber(ARGV[1])) + 60)
+    end
+end
+return 1
+"""
+
+
+class RedisBucketStore(BaseBucketStore):
+    """Buckets in Redis, shared by every worker; each acquisition is one atomic script call."""
+
+    def __init__(self, redis_url: str, burst_seconds: float, prefix: str = "memic:rate"):
+        super().__init__(burst_seconds)
+        self.redis_url = redis_url
+        self.prefix = prefix
+        self._fallback = LocalBucketStore(burst_seconds)
+        self._redis = None
+        self._acquire = None
+        self._block = None
+        self._warned_at = float("-inf")
+
+    def _warn(self, message: str) -> None:
+        # Every call fails while Redis is down; one warning a minute is enough
+        now = time.monotonic()
+        if now - self._warned_at >= 60:
+            self._warned_at = now
+            logger.warning(message)
+
+    def _scripts(self) -> Any:
+        """Lazily create the Redis client and register the scripts."""
+        if self._redis is None:
+            import redis
+            self._redis = redis.Redis.from_url(self.redis_url, socket_timeout=1, socket_connect_timeout=1)
+            self._acquire = self._redis.register_script(_ACQUIRE_SCRIPT)
+            self._block = self._redis.register_script(_BLOCK_SCRIPT)
+        return self._redis
+
+    def try_acquire(self, buckets: List[Bucket]) -> float:
+        try:
+            self._scripts()
+            args: List[float] = [self.burst_seconds]
+            for bucket in buckets:
+                args.extend([bucket.per_minute, bucket.cost])
+            return float(self._acquire(keys=[f"{self.prefix}:{b.key}" for b in buckets], args=args))
+        except Exception as e:
+            self._warn(f"Shared rate limit check failed, using process-local buckets: {str(e)}")
+            return self._fallback.try_acquire(buckets)
+
+    def block(self, keys: List[str], seconds: float) -> None:
+        self._fallback.block(keys, seconds)
+        try:
+            self._scripts()
+            self._block(keys=[f"{self.prefix}:{key}" for key in keys], args=[seconds])
+        except Exception as e:
+            self._warn(f"Shared rate limit pause failed: {str(e)}")
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD limit on calls in flight in this process.
+
+    The limit starts at max_limit, grows by 1/limit per successful call
+    (about one per window of calls) and is multiplied by decrease_factor on
+    a 429 or a call slower than latency_target, at most once per cooldown so
+    one burst of failures only counts once.
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int = 1,
+        latency_target: Optional[float] = None,
+        decrease_factor: float = 0.5,
+        cooldown: float = 1.0
+    ):
+        self.max_limit = max_limit
+        self.min_limit = min(min_limit, max_limit)
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.decreases = 0
+        self._limit = float(max_limit)
+        self._in_flight = 0
+        self._last_decrease = float("-inf")
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """Current number of calls allowed in flight."""
+        return max(self.min_limit, int(self._limit))
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free."""
+        with self._condition:
+            if self._in_flight >= self.limit:
+                return False
+            self._in_flight += 1
+            return True
+
+    def acquire(self) -> None:
+        """Wait for a free slot and take it."""
+        with self._condition:
+            while self._in_flight >= self.limit:
+                self._condition.wait()
+            self._in_flight += 1
+
+    async def acquire_async(self) -> None:
+        """Wait for a free slot without blocking the event loop."""
+        delay = 0.01
+        while not self.try_acquire():
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    def release(self) -> None:
+        """Return a slot."""
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self, latency: float) -> None:
+        """Record a successful call and its latency in seconds."""
+        with self._condition:
+            if self.latency_target and latency > self.latency_target:
+                self._decrease()
+            else:
+                self._limit = min(float(self.max_limit), self._limit + 1 / self._limit)
+            self._condition.notify_all()
+
+    def on_throttle(self) -> None:
+        """Record a 429."""
+        with self._condition:
+            self._decrease()
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+        self._last_decrease = now
+        self.decreases += 1
+
+
+class ProviderRateLimiter:
+    """Token buckets, shared pauses and AIMD concurrency for one provider."""
+
+    def __init__(
+        self,
+        provider: str,
+        store: BaseBucketStore,
+        concurrency: AdaptiveConcurrency,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        tenant_requests_per_minute: int = 0,
+        tenant_tokens_per_minute: int = 0,
+        default_backoff: float = 5.0
+    ):
+        self.provider = provider
+        self.store = store
+        self.concurrency = concurrency
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.tenant_requests_per_minute = tenant_requests_per_minute
+        self.tenant_tokens_per_minute = tenant_tokens_per_minute
+        self.default_backoff = default_backoff
+        self.throttles = 0
+        self.waited = 0.0  # Seconds spent waiting for quota
+
+    def _buckets(self, requests: int, tokens: int, tenant: Optional[str], provider: bool) -> List[Bucket]:
+        limits = []
+        if provider:
+            limits += [("requests", self.requests_per_minute, requests), ("tokens", self.tokens_per_minute, tokens)]
+        if tenant:
+            limits += [
+                (f"tenant:{tenant}:requests", self.tenant_requests_per_minute, requests),
+                (f"tenant:{tenant}:tokens", self.tenant_tokens_per_minute, tokens),
+            ]
+        return [
+            Bucket(f"{self.provider}:{name}", per_minute, cost)
+            for name, per_minute, cost in limits
+            if per_minute > 0 and cost > 0
+        ]
+
+    def _provider_keys(self) -> List[str]:
+        return [f"{self.provider}:requests", f"{self.provider}:tokens"]
+
+    def wait_for_quota(self, tokens: int = 0, tenant: Optional[str] = None, requests: int = 1, provider: bool = True) -> None:
+        """
+        Block until the provider and tenant buckets grant a call.
+
+        Args:
+            tokens: Tokens the call consumes
+            tenant: Tenant (organization) ID, or None to skip tenant limits
+            requests: Requests the call counts as (0 to only draw tokens)
+            provider: Also draw from the provider-wide buckets
+        """
+        buckets = self._buckets(requests, tokens, tenant, provider)
+        while buckets:
+            wait = self.store.try_acquire(buckets)
+            if wait <= 0:
+                return
+            # Jitter keeps workers that were refused together from retrying together
+            wait *= 1 + random.random() * 0.1
+            self.waited += wait
+            time.sleep(wait)
+
+    async def wait_for_quota_async(
+        self, tokens: int = 0, tenant: Optional[str] = None, requests: int = 1, provider: bool = True
+    ) -> None:
+        """wait_for_quota() for async callers (Redis calls run off the event loop)."""
+        buckets = self._buckets(requests, tokens, tenant, provider)
+        while buckets:
+            wait = await asyncio.to_thread(self.store.try_acquire, buckets)
+            if wait <= 0:
+                return
+            wait *= 1 + random.random() * 0.1
+            self.waited += wait
+            await asyncio.sleep(wait)
+
+    def throttled(self, error: Optional[BaseException] = None) -> float:
+        """
+        Record a 429: shrink concurrency and pause the provider for every worker.
+
+        Args:
+            error: The 429 error (its Retry-After sets the pause)
+
+        Returns:
+            Pause length in seconds
+        """
+        pause = (retry_after(error) if error is not None else None) or self.default_backoff
+        self.throttles += 1
+        self.concurrency.on_throttle()
+        self.store.block(self._provider_keys(), pause)
+        logger.warning(
+            f"{self.provider} rate limited (429); pausing all workers for {pause:.1f}s, "
+            f"concurrency now {self.concurrency.limit}"
+        )
+        return pause
+
+    @contextmanager
+    def limit(self, tokens: int = 0, tenant: Optional[str] = None) -> Iterator[None]:
+        """
+        Run one provider call within the limits (blocking callers).
+
+        Waits for quota and a concurrency slot, then records the outcome: a 429
+        raised by the call triggers throttled() before it propagates, so the
+        caller's retry waits out the shared pause.
+        """
+        self.wait_for_quota(tokens, tenant)
+        self.concurrency.acquire()
+        start = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            if is_rate_limited(e):
+                self.throttled(e)
+            raise
+        else:
+            self.concurrency.on_success(time.monotonic() - start)
+        finally:
+            self.concurrency.release()
+
+    @asynccontextmanager
+    async def limit_async(self, tokens: int = 0, tenant: Optional[str] = None):
+        """limit() for async callers."""
+        await self.wait_for_quota_async(tokens, tenant)
+        await self.concurrency.acquire_async()
+        start = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            if is_rate_limited(e):
+                await asyncio.to_thread(self.throttled, e)
+            raise
+        else:
+            self.concurrency.on_success(time.monotonic() - start)
+        finally:
+            self.concurrency.release()
+
+
+def _provider_limits(provider: str) -> Dict[str, Any]:
+    """Configured limits of a provider."""
+    if provider == "afr":
+        return dict(
+            requests_per_minute=settings.afr_requests_per_minute,
+            tenant_requests_per_minute=settings.afr_tenant_requests_per_minute,
+            max_concurrency=settings.afr_max_concurrency,
+            latency_target=None  # Analysis time depends on document size
+        )
+    if provider == "llm":
+        return dict(
+            requests_per_minute=settings.llm_requests_per_minute,
+            tokens_per_minute=settings.llm_tokens_per_minute,
+            tenant_requests_per_minute=settings.llm_tenant_requests_per_minute,
+            tenant_tokens_per_minute=settings.llm_tenant_tokens_per_minute,
+            max_concurrency=settings.llm_max_concurrency,
+            latency_target=settings.llm_latency_target
+        )
+    if provider == "embedding":
+        return dict(
+            requests_per_minute=settings.embedding_requests_per_minute,
+            tokens_per_minute=settings.embedding_tokens_per_minute,
+            tenant_tokens_per_minute=settings.embedding_tenant_tokens_per_minute,
+            max_concurrency=settings.embedding_max_inflight,
+            latency_target=settings.embedding_latency_target
+        )
+    raise ValueError(f"Unknown provider: {provider}. Expected one of {PROVIDERS}")
+
+
+def _create_bucket_store() -> BaseBucketStore:
+    if settings.rate_limit_redis:
+        return RedisBucketStore(settings.redis_url, settings.rate_limit_burst_seconds)
+    return LocalBucketStore(settings.rate_limit_burst_seconds)
+
+
+def create_rate_limiter(provider: str, store: BaseBucketStore) -> ProviderRateLimiter:
+    """
+    Build a provider's limiter from settings.
+
+    Args:
+        provider: "afr", "llm" or "embedding"
+        store: Bucket store to draw from
+
+    Returns:
+        ProviderRateLimiter instance
+    """
+    limits = _provider_limits(provider)
+    concurrency = AdaptiveConcurrency(
+        max_limit=limits.pop("max_concurrency"),
+        latency_target=limits.pop("latency_target") or None
+    )
+    return ProviderRateLimiter(
+        provider, store, concurrency, default_backoff=settings.rate_limit_default_backoff, **limits
+    )
+
+
+_rate_limiters: Dict[str, ProviderRateLimiter] = {}
+_rate_limiters_pid: Optional[int] = None
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str) -> ProviderRateLimiter:
+    """
+    Get the shared limiter of a provider for this process.
+
+    All limiters of a process share one bucket store. Forked children
+    (Celery prefork workers) build their own, since Redis connections and
+    in-flight counts do not carry over a fork.
+    """
+    global _rate_limiters, _rate_limiters_pid
+
+    pid = os.getpid()
+    limiter = _rate_limiters.get(provider) if _rate_limiters_pid == pid else None
+    if limiter is not None:
+        return limiter
+
+    with _rate_limiters_lock:
+        if _rate_limiters_pid != pid:
+            _rate_limiters = {}
+            _rate_limiters_pid = pid
+        if provider not in _rate_limiters:
+            store = next(iter(_rate_limiters.values())).store if _rate_limiters else _create_bucket_store()
+            _rate_limiters[provider] = create_rate_limiter(provider, store)
+        return _rate_limiters[provider]
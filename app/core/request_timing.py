@@ -0,0 +1,79 @@
+"""
+Per-request deadline budget and stage timings.
+
+A RequestTimer gives a request a total time budget. Each stage runs with
+whatever is left of it, so a slow first stage leaves less time for the
+next instead of every stage getting its own full timeout. Stage durations
+are rendered as a Server-Timing header, which browsers' dev tools and most
+APM agents pick up.
+"""
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Dict, Iterator
+
+
+class RequestTimer:
+    """Deadline and stage durations (milliseconds) of one request."""
+
+    def __init__(self, budget_seconds: float):
+        """
+        Start the clock.
+
+        Args:
+            budget_seconds: Time allowed for the whole request
+        """
+        self.budget_seconds = budget_seconds
+        self.started = time.monotonic()
+        self.deadline = self.started + budget_seconds
+        self.stages: Dict[str, float] = {}
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (negative once it has passed)."""
+        return self.deadline - time.monotonic()
+
+    def elapsed_ms(self) -> float:
+        """Milliseconds since the request started."""
+        return (time.monotonic() - self.started) * 1000
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Time a synchronous stage.
+
+        Raises:
+            asyncio.TimeoutError: If the deadline passed before or during the stage
+        """
+        if self.remaining() <= 0:
+            raise asyncio.TimeoutError(f"Deadline passed before {name}")
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.stages[name] = (time.monotonic() - start) * 1000
+        if self.remaining() <= 0:
+            raise asyncio.TimeoutError(f"Deadline passed during {name}")
+
+    async def run(self, name: str, awaitable: Awaitable[Any]) -> Any:
+        """
+        Await a stage, cancelled when the deadline passes.
+
+        Raises:
+            asyncio.TimeoutError: If the deadline passed before or during the stage
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise asyncio.TimeoutError(f"Deadline passed before {name}")
+        start = time.monotonic()
+        try:
+            return await asyncio.wait_for(awaitable, timeout=remaining)
+        finally:
+            self.stages[name] = (time.monotonic() - start) * 1000
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: every stage, then the total."""
+        metrics = [f"{name};dur={duration:.1f}" for name, duration in self.stages.items()]
+        metrics.append(f"total;dur={self.elapsed_ms():.1f}")
+        return ", ".join(metrics)
@@ -1,8 +1,25 @@
 from abc import ABC, abstractmethod
-from typing import BinaryIO, Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, BinaryIO, Callable, Iterator, Optional
+from urllib.parse import quote
+import asyncio
+import base64
+import functools
+import hashlib
+import hmac
+import mimetypes
+import mmap
+import secrets
+import shutil
+import tempfile
+import time
 import os
+import threading
 from io import BytesIO
 from app.config import settings
+from app.core.url_cache import create_signed_url_cache
 import logging
 
 # Azure imports (lazy loaded in AzureBlobStorageClient)
@@ -16,8 +33,73 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class BlobProperties:
+    """Metadata of a stored file, as returned by BaseStorageClient.stat()."""
+    
+    size: int
+    etag: Optional[str] = None
+    content_type: Optional[str] = None
+
+
 class BaseStorageClient(ABC):
-    """Abstract base class for storage clients."""
+    """
+    Abstract base class for storage clients.
+    
+    The vendor SDKs are synchronous, so implementations run every network call
+    on a bounded thread pool via _run_blocking() instead of on the event loop.
+    A slow transfer then only occupies one pool thread, and the pool size caps
+    how many transfers a single process runs at once.
+    
+    Presigned URLs are cached (see app/core/url_cache.py); implementations
+    only provide _generate_file_url() and _generate_upload_url().
+    """
+    
+    def __init__(self):
+        """Create the bounded I/O thread pool and the signed URL cache."""
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.storage_max_workers,
+            thread_name_prefix=f"{self.__class__.__name__}-io"
+        )
+        self._url_cache = create_signed_url_cache(namespace=self.__class__.__name__)
+    
+    async def _run_blocking(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking SDK call on the I/O thread pool and await its result.
+        
+        Args:
+            func: Blocking callable
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+            
+        Returns:
+            Whatever func returns
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+    
+    async def _iterate_blocking(self, iterator: Iterator[bytes]) -> AsyncIterator[bytes]:
+        """
+        Drive a blocking chunk generator from async code, one chunk at a time.
+        
+        Each next() runs on the I/O thread pool. The generator is closed (which
+        releases its HTTP response) even if the consumer stops early.
+        
+        Args:
+            iterator: Sync generator yielding chunks
+            
+        Yields:
+            Chunks in order
+        """
+        sentinel = object()
+        try:
+            while True:
+                chunk = await self._run_blocking(next, iterator, sentinel)
+                if chunk is sentinel:
+                    break
+                yield chunk
+        finally:
+            await self._run_blocking(iterator.close)
     
     @abstractmethod
     async def upload_file(self, file_content: bytes, blob_path: str, content_type: Optional[str] = None) -> str:
@@ -49,6 +131,29 @@ class BaseStorageClient(ABC):
         """
         pass
     
+    @abstractmethod
+    async def upload_chunks(
+        self,
+        chunks: AsyncIterator[bytes],
+        blob_path: str,
+        content_type: Optional[str] = None
+    ) -> str:
+        """
+        Upload a file from an async stream of chunks without buffering it whole.
+        
+        Memory use is bounded by the chunk size and the number of chunks in
+        flight, not by the size of the file.
+        
+        Args:
+            chunks: Async iterator yielding file content in order
+            blob_path: Path where file should be stored
+            content_type: MIME type of the file
+            
+        Returns:
+            URL of the uploaded file
+        """
+        pass
+    
     @abstractmethod
     async def download_file(self, blob_path: str) -> bytes:
         """
@@ -62,6 +167,58 @@ class BaseStorageClient(ABC):
         """
         pass
     
+    @abstractmethod
+    def open_stream(self, blob_path: str, chunk_size: Optional[int] = None) -> AsyncIterator[bytes]:
+        """
+        Stream a file from storage in chunks without loading it whole.
+        
+        Args:
+            blob_path: Path to the file in storage
+            chunk_size: Preferred chunk size in bytes (backend default if None)
+            
+        Returns:
+            Async iterator of content chunks, in order
+        """
+        pass
+    
+    @abstractmethod
+    async def download_range(self, blob_path: str, start: int, length: int) -> bytes:
+        """
+        Download a byte range of a file.
+        
+        Args:
+            blob_path: Path to the file in storage
+            start: Offset of the first byte
+            length: Number of bytes to read (fewer are returned at end of file)
+            
+        Returns:
+            Requested bytes
+        """
+        pass
+    
+    async def download_to_path(self, blob_path: str, local_path: str) -> int:
+        """
+        Stream a file from storage to a local path.
+        
+        Only one chunk is held in memory at a time, so peak memory does not
+        grow with the size of the file.
+        
+        Args:
+            blob_path: Path to the file in storage
+            local_path: Destination path on the local filesystem
+            
+        Returns:
+            Number of bytes written
+        """
+        size = 0
+        with open(local_path, "wb") as f:
+            async for chunk in self.open_stream(blob_path):
+                await self._run_blocking(f.write, chunk)
+                size += len(chunk)
+        
+        logger.info(f"Downloaded {size} bytes from {blob_path} to {local_path}")
+        return size
+    
     @abstractmethod
     async def delete_file(self, blob_path: str) -> bool:
         """
@@ -75,11 +232,142 @@ class BaseStorageClient(ABC):
         """
         pass
     
+    async def delete_files(self, blob_paths: list[str]) -> int:
+        """
+        Delete many files, at most STORAGE_TRANSFER_MAX_CONCURRENCY at a time.
+        
+        Backends with multi-object deletes override this with batch requests.
+        
+        Args:
+            blob_paths: Paths of the files in storage
+            
+        Returns:
+            Number of files deleted
+        """
+        semaphore = asyncio.Semaphore(settings.storage_transfer_max_concurrency)
+        
+        async def _delete(blob_path: str) -> bool:
+            async with semaphore:
+                return await self.delete_file(blob_path)
+        
+        return sum(await asyncio.gather(*(_delete(blob_path) for blob_path in blob_paths)))
+    
+    @abstractmethod
+    async def delete_prefix(self, prefix: str) -> int:
+        """
+        Delete every file under a folder prefix using batch deletes.
+        
+        Args:
+            prefix: Folder prefix ending in '/', e.g. org_id/project_id/file_id/
+            
+        Returns:
+            Number of files deleted
+        """
+        pass
+    
+    @staticmethod
+    def _validate_prefix(prefix: str) -> None:
+        """
+        Reject prefixes that are not a whole folder.
+        
+        Without the trailing slash, org/project_1 would also match
+        org/project_10; an empty prefix would match the whole container.
+        
+        Raises:
+            ValueError: If the prefix is empty or does not end in '/'
+        """
+        if not prefix.strip("/") or not prefix.endswith("/"):
+            raise ValueError(f"Delete prefix must be a non-empty folder path ending in '/': {prefix!r}")
+    
     @abstractmethod
+    async def move_file(self, source_blob_path: str, dest_blob_path: str) -> None:
+        """
+        Move a file to a new path within storage (server-side, no download).
+        
+        Args:
+            source_blob_path: Current path of the file
+            dest_blob_path: New path (overwritten if it exists)
+        """
+        pass
+    
     async def get_file_url(self, blob_path: str, expiry_seconds: int = 3600) -> str:
         """
         Get a signed URL for downloading/accessing the file.
         
+        Repeated calls within one expiry bucket return the same cached URL;
+        it stays valid for at least expiry_seconds from the time of the call.
+        
+        Args:
+            blob_path: Path to the file in storage
+            expiry_seconds: Minimum URL lifetime in seconds
+            
+        Returns:
+            Signed download URL
+        """
+        return await self._get_signed_url("read", blob_path, expiry_seconds, self._generate_file_url)
+    
+    async def get_upload_url(self, blob_path: str, expiry_seconds: int = 3600, content_type: Optional[str] = None) -> str:
+        """
+        Get a presigned URL for uploading a file directly to storage.
+        
+        Cached like get_file_url().
+        
+        Args:
+            blob_path: Path where file should be uploaded
+            expiry_seconds: Minimum URL lifetime in seconds
+            content_type: MIME type of the file to upload
+            
+        Returns:
+            Presigned upload URL
+        """
+        return await self._get_signed_url(
+            "write",
+            blob_path,
+            expiry_seconds,
+            functools.partial(self._generate_upload_url, content_type=content_type)
+        )
+    
+    async def _get_signed_url(
+        self,
+        permission: str,
+        blob_path: str,
+        expiry_seconds: int,
+        generate: Callable[[str, int], Any]
+    ) -> str:
+        """
+        Return a cached signed URL, signing (and caching) a new one on a miss.
+        
+        Args:
+            permission: "read" or "write"
+            blob_path: Path to the file in storage
+            expiry_seconds: Minimum URL lifetime in seconds
+            generate: Coroutine function signing (blob_path, expiry_seconds)
+            
+        Returns:
+            Signed URL
+        """
+        key, sign_seconds, valid_until = self._url_cache.key(blob_path, permission, expiry_seconds)
+        
+        url = self._url_cache.get(key)
+        if url is not None:
+            return url
+        
+        if self._url_cache.shared:
+            url = await self._run_blocking(self._url_cache.get_shared, key)
+        
+        if url is None:
+            url = await generate(blob_path, sign_seconds)
+            if self._url_cache.shared:
+                await self._run_blocking(self._url_cache.put_shared, key, url, valid_until)
+        
+        self._url_cache.put(key, url, valid_until)
+        return url
+    
+    @abstractmethod
+    async def _generate_file_url(self, blob_path: str, expiry_seconds: int = 3600) -> str:
+        """
+        Sign a download URL (uncached; use get_file_url()).
+        
         Args:
             blob_path: Path to the file in storage
             expiry_seconds: URL expiry time in seconds
@@ -90,9 +378,9 @@ class BaseStorageClient(ABC):
         pass
     
     @abstractmethod
-    async def get_upload_url(self, blob_path: str, expiry_seconds: int = 3600, content_type: Optional[str] = None) -> str:
+    async def _generate_upload_url(self, blob_path: str, expiry_seconds: int = 3600, content_type: Optional[str] = None) -> str:
         """
-        Get a presigned URL for uploading a file directly to storage.
+        Sign an upload URL (uncached; use get_upload_url()).
         
         Args:
             blob_path: Path where file should be uploaded
@@ -107,7 +395,7 @@ class BaseStorageClient(ABC):
     @abstractmethod
     async def file_exists(self, blob_path: str) -> bool:
         """
-        Check if a file exists in storage.
+        Check if a file exists in storage (metadata only, no content is read).
         
         Args:
             blob_path: Path to the file in storage
@@ -117,6 +405,28 @@ class BaseStorageClient(ABC):
         """
         pass
     
+    @abstractmethod
+    async def stat(self, blob_path: str) -> Optional[BlobProperties]:
+        """
+        Get size, ETag and content type of a file without reading its content.
+        
+        Args:
+            blob_path: Path to the file in storage
+            
+        Returns:
+            BlobProperties, or None if the file does not exist
+        """
+        pass
+    
+    def close(self) -> None:
+        """
+        Release network resources held by the client (connection pools, sessions).
+        
+        Called once at process shutdown. Subclasses that hold connection pools
+        close them and then call super().close() to stop the I/O thread pool.
+        """
+        self._executor.shutdown(wait=False)
+    
     @staticmethod
     def generate_blob_path(org_id: str, project_id: str, file_id: str, stage: str, filename: str) -> str:
         """
@@ -144,6 +454,64 @@ class BaseStorageClient(ABC):
             - Future sharding capabilities
         """
         return f"{org_id}/{project_id}/{file_id}/{stage}/{filename}"
+    
+    @staticmethod
+    def generate_content_blob_path(org_id: str, content_hash: str, blob_id: str, stage: str, filename: str) -> str:
+        """
+        Generate content-addressed blob storage path.
+        
+        Files with identical content in an organization share these blobs
+        (see ContentBlob). They live outside any project prefix so deleting
+        one project never removes content another project still references.
+        
+        Args:
+            org_id: Organization ID
+            content_hash: SHA-256 hex digest of the raw content
+            blob_id: ContentBlob ID; content deleted and uploaded again gets a
+                new one, so a pending delete of the old blobs never hits the new
+            stage: Processing stage (raw, converted, enriched)
+            filename: Filename of the first upload with this content
+            
+        Returns:
+            Blob path string
+        
+        Examples:
+            - org_id/_content/9f86d08.../blob_id/raw/document.docx
+            - org_id/_content/9f86d08.../blob_id/converted/document.pdf
+        """
+        return f"{BaseStorageClient.generate_content_blob_prefix(org_id, content_hash, blob_id)}{stage}/{filename}"
+    
+    @staticmethod
+    def generate_blob_prefix(org_id: str, project_id: str, file_id: Optional[str] = None) -> str:
+        """
+        Generate the folder prefix holding all blobs of a project or a file.
+        
+        Args:
+            org_id: Organization ID
+            project_id: Project ID
+            file_id: File ID (omit for the whole project)
+            
+        Returns:
+            Prefix ending in '/', for delete_prefix()
+        """
+        if file_id:
+            return f"{org_id}/{project_id}/{file_id}/"
+        return f"{org_id}/{project_id}/"
+    
+    @staticmethod
+    def generate_content_blob_prefix(org_id: str, content_hash: str, blob_id: str) -> str:
+        """
+        Generate the folder prefix holding all blobs of one shared content blob.
+        
+        Args:
+            org_id: Organization ID
+            content_hash: SHA-256 hex digest of the raw content
+            blob_id: ContentBlob ID
+            
+        Returns:
+            Prefix ending in '/', for delete_prefix()
+        """
+        return f"{org_id}/_content/{content_hash}/{blob_id}/"
 
 
 class AzureBlobStorageClient(BaseStorageClient):
@@ -154,12 +522,21 @@ class AzureBlobStorageClient(BaseStorageClient):
         if not settings.azure_storage_connection_string:
             raise ValueError("Azure Storage connection string not configured")
         
+        super().__init__()
+        
         self.connection_string = settings.azure_storage_connection_string
         self.container_name = settings.azure_storage_container_name
         
-        # Initialize blob service client
+        # Initialize blob service client on a pooled transport so every request
+        # in this process reuses warm TLS connections. Transfers larger than one
+        # block are split into blocks/ranges moved max_concurrency at a time.
         self.blob_service_client = BlobServiceClient.from_connection_string(
-            self.connection_string
+            self.connection_string,
+            transport=self._create_transport(),
+            max_block_size=settings.storage_transfer_block_size,
+            max_single_put_size=settings.storage_transfer_block_size,
+            max_single_get_size=settings.storage_transfer_block_size,
+            max_chunk_get_size=settings.storage_transfer_block_size
         )
         
         # Get or create container
@@ -175,6 +552,42 @@ class AzureBlobStorageClient(BaseStorageClient):
             # Container might already exist
             logger.debug(f"Container {self.container_name} already exists or error: {str(e)}")
     
+    @staticmethod
+    def _create_transport():
+        """
+        Build an HTTP transport backed by a sized connection pool.
+        
+        The default transport keeps a pool of 10 connections, which is too small
+        for a worker serving many concurrent requests against the same account.
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+        from azure.core.pipeline.transport import RequestsTransport
+        
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=settings.storage_pool_connections,
+            pool_maxsize=settings.storage_pool_maxsize
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        
+        return RequestsTransport(
+            session=session,
+            session_owner=True,
+            connection_timeout=settings.storage_connection_timeout,
+            read_timeout=settings.storage_read_timeout
+        )
+    
+    def close(self) -> None:
+        """Close the blob service client and its connection pool."""
+        try:
+            self.blob_service_client.close()
+            logger.info("Closed Azure Blob Storage client")
+        except Exception as e:
+            logger.warning(f"Error closing Azure Blob Storage client: {str(e)}")
+        super().close()
+    
     async def upload_file(self, file_content: bytes, blob_path: str, content_type: Optional[str] = None) -> str:
         """Upload file to Azure Blob Storage."""
         try:
@@ -186,10 +599,12 @@ class AzureBlobStorageClient(BaseStorageClient):
                 from azure.storage.blob import ContentSettings
                 content_settings = ContentSettings(content_type=content_type)
             
-            blob_client.upload_blob(
+            await self._run_blocking(
+                blob_client.upload_blob,
                 file_content,
                 overwrite=True,
-                content_settings=content_settings
+                content_settings=content_settings,
+                max_concurrency=settings.storage_transfer_max_concurrency
             )
             
             logger.info(f"Uploaded file to {blob_path}")
@@ -202,21 +617,95 @@ class AzureBlobStorageClient(BaseStorageClient):
     async def upload_file_from_path(self, local_path: str, blob_path: str, content_type: Optional[str] = None) -> str:
         """Upload file from local path to Azure Blob Storage."""
         try:
-            with open(local_path, "rb") as data:
-                file_content = data.read()
+            blob_client = self.container_client.get_blob_client(blob_path)
             
-            return await self.upload_file(file_content, blob_path, content_type)
+            content_settings = None
+            if content_type:
+                from azure.storage.blob import ContentSettings
+                content_settings = ContentSettings(content_type=content_type)
+            
+            def _upload():
+                # Stream from the open file handle instead of reading it into memory
+                with open(local_path, "rb") as data:
+                    blob_client.upload_blob(
+                        data,
+                        overwrite=True,
+                        content_settings=content_settings,
+                        max_concurrency=settings.storage_transfer_max_concurrency
+                    )
+            
+            await self._run_blocking(_upload)
+            
+            logger.info(f"Uploaded file from {local_path} to {blob_path}")
+            return blob_client.url
             
         except Exception as e:
             logger.error(f"Error uploading file from {local_path} to {blob_path}: {str(e)}")
             raise
     
+    async def upload_chunks(
+        self,
+        chunks: AsyncIterator[bytes],
+        blob_path: str,
+        content_type: Optional[str] = None
+    ) -> str:
+        """
+        Upload a chunk stream to Azure Blob Storage as staged blocks.
+        
+        Each chunk becomes one block (stage_block); up to
+        settings.upload_max_inflight_blocks blocks are staged concurrently
+        while the next chunk is read. The blob becomes visible atomically
+        when the block list is committed.
+        """
+        from azure.storage.blob import BlobBlock, ContentSettings
+        
+        blob_client = self.container_client.get_blob_client(blob_path)
+        block_ids = []
+        in_flight = set()
+        
+        try:
+            async for chunk in chunks:
+                # Block IDs must be base64 and the same length for every block
+                block_id = base64.b64encode(f"{len(block_ids):08d}".encode()).decode()
+                block_ids.append(block_id)
+                in_flight.add(asyncio.ensure_future(
+                    self._run_blocking(blob_client.stage_block, block_id, chunk)
+                ))
+                
+                if len(in_flight) >= settings.upload_max_inflight_blocks:
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        task.result()
+            
+            if in_flight:
+                await asyncio.gather(*in_flight)
+                in_flight = set()
+            
+            content_settings = ContentSettings(content_type=content_type) if content_type else None
+            await self._run_blocking(
+                blob_client.commit_block_list,
+                [BlobBlock(block_id=block_id) for block_id in block_ids],
+                content_settings=content_settings
+            )
+            
+            logger.info(f"Uploaded {len(block_ids)} blocks to {blob_path}")
+            return blob_client.url
+            
+        except Exception as e:
+            for task in in_flight:
+                task.cancel()
+            logger.error(f"Error uploading block stream to {blob_path}: {str(e)}")
+            raise
+    
     async def download_file(self, blob_path: str) -> bytes:
         """Download file from Azure Blob Storage."""
         try:
             blob_client = self.container_client.get_blob_client(blob_path)
-            download_stream = blob_client.download_blob()
-            file_content = download_stream.readall()
+            file_content = await self._run_blocking(
+                lambda: blob_client.download_blob(
+                    max_concurrency=settings.storage_transfer_max_concurrency
+                ).readall()
+            )
             
             logger.info(f"Downloaded file from {blob_path}")
             return file_content
@@ -225,11 +714,54 @@ class AzureBlobStorageClient(BaseStorageClient):
             logger.error(f"Error downloading file from {blob_path}: {str(e)}")
             raise
     
+    def open_stream(self, blob_path: str, chunk_size: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Stream file from Azure Blob Storage in SDK-sized chunks."""
+        blob_client = self.container_client.get_blob_client(blob_path)
+        
+        def _chunks():
+            # chunk_size maps onto the SDK's ranged GET size
+            kwargs = {"max_chunk_get_size": chunk_size} if chunk_size else {}
+            yield from blob_client.download_blob(**kwargs).chunks()
+        
+        return self._iterate_blocking(_chunks())
+    
+    async def download_range(self, blob_path: str, start: int, length: int) -> bytes:
+        """Download a byte range from Azure Blob Storage."""
+        try:
+            blob_client = self.container_client.get_blob_client(blob_path)
+            return await self._run_blocking(
+                lambda: blob_client.download_blob(offset=start, length=length).readall()
+            )
+            
+        except Exception as e:
+            logger.error(f"Error downloading range {start}+{length} from {blob_path}: {str(e)}")
+            raise
+    
+    async def download_to_path(self, blob_path: str, local_path: str) -> int:
+        """Download file from Azure Blob Storage straight into a local file."""
+        try:
+            blob_client = self.container_client.get_blob_client(blob_path)
+            
+            def _download():
+                with open(local_path, "wb") as f:
+                    # Ranges are fetched in parallel and written at their offsets
+                    return blob_client.download_blob(
+                        max_concurrency=settings.storage_transfer_max_concurrency
+                    ).readinto(f)
+            
+            size = await self._run_blocking(_download)
+            logger.info(f"Downloaded {size} bytes from {blob_path} to {local_path}")
+            return size
+            
+        except Exception as e:
+            logger.error(f"Error downloading {blob_path} to {local_path}: {str(e)}")
+            raise
+    
     async def delete_file(self, blob_path: str) -> bool:
         """Delete file from Azure Blob Storage."""
         try:
             blob_client = self.container_client.get_blob_client(blob_path)
-            blob_client.delete_blob()
+            await self._run_blocking(blob_client.delete_blob)
             
             logger.info(f"Deleted file from {blob_path}")
             return True
@@ -238,7 +770,62 @@ class AzureBlobStorageClient(BaseStorageClient):
             logger.error(f"Error deleting file from {blob_path}: {str(e)}")
             return False
     
-    async def get_file_url(self, blob_path: str, expiry_seconds: int = 3600) -> str:
+    def _delete_batch(self, blob_names: list[str]) -> int:
+        """Delete up to 256 blobs in one batch request; returns how many were deleted."""
+        responses = self.container_client.delete_blobs(*blob_names, raise_on_any_failure=False)
+        return sum(1 for response in responses if response.status_code == 202)
+    
+    async def delete_files(self, blob_paths: list[str]) -> int:
+        """Delete blobs with Blob Batch requests (256 blobs each)."""
+        # Batches run concurrently on the I/O pool
+        batch_size = min(settings.storage_delete_batch_size, 256)
+        results = await asyncio.gather(*(
+            self._run_blocking(self._delete_batch, blob_paths[i:i + batch_size])
+            for i in range(0, len(blob_paths), batch_size)
+        ))
+        return sum(results)
+    
+    async def delete_prefix(self, prefix: str) -> int:
+        """Delete all blobs under a prefix with Blob Batch requests (256 blobs each)."""
+        self._validate_prefix(prefix)
+        try:
+            blob_names = await self._run_blocking(
+                lambda: [blob.name for blob in self.container_client.list_blobs(name_starts_with=prefix)]
+            )
+            
+            deleted = await self.delete_files(blob_names)
+            logger.info(f"Deleted {deleted}/{len(blob_names)} blobs under {prefix}")
+            return deleted
+            
+        except Exception as e:
+            logger.error(f"Error deleting blobs under {prefix}: {str(e)}")
+            raise
+    
+    async def move_file(self, source_blob_path: str, dest_blob_path: str) -> None:
+        """Move file within the container (server-side copy, then delete the source)."""
+        try:
+            source_client = self.container_client.get_blob_client(source_blob_path)
+            dest_client = self.container_client.get_blob_client(dest_blob_path)
+            
+            def _move():
+                # Same-account copies are authorised by the account key, no source SAS needed
+                copy = dest_client.start_copy_from_url(source_client.url)
+                status = copy["copy_status"]
+                while status == "pending":
+                    time.sleep(0.2)
+                    status = dest_client.get_blob_properties().copy.status
+                if status != "success":
+                    raise RuntimeError(f"Copy of {source_blob_path} ended with status {status}")
+                source_client.delete_blob()
+            
+            await self._run_blocking(_move)
+            logger.info(f"Moved file from {source_blob_path} to {dest_blob_path}")
+            
+        except Exception as e:
+            logger.error(f"Error moving file from {source_blob_path} to {dest_blob_path}: {str(e)}")
+            raise
+    
+    async def _generate_file_url(self, blob_path: str, expiry_seconds: int = 3600) -> str:
         """Get signed download URL for Azure Blob Storage file."""
         try:
             from datetime import datetime, timedelta
@@ -266,7 +853,7 @@ class AzureBlobStorageClient(BaseStorageClient):
             logger.error(f"Error generating signed URL for {blob_path}: {str(e)}")
             raise
     
-    async def get_upload_url(self, blob_path: str, expiry_seconds: int = 3600, content_type: Optional[str] = None) -> str:
+    async def _generate_upload_url(self, blob_path: str, expiry_seconds: int = 3600, content_type: Optional[str] = None) -> str:
         """Get presigned upload URL for Azure Blob Storage."""
         try:
             from datetime import datetime, timedelta
@@ -298,11 +885,30 @@ class AzureBlobStorageClient(BaseStorageClient):
         """Check if file exists in Azure Blob Storage."""
         try:
             blob_client = self.container_client.get_blob_client(blob_path)
-            return blob_client.exists()
+            return await self._run_blocking(blob_client.exists)
             
         except Exception as e:
             logger.error(f"Error checking file existence for {blob_path}: {str(e)}")
             return False
+    
+    async def stat(self, blob_path: str) -> Optional[BlobProperties]:
+        """Get file properties from Azure Blob Storage (HEAD request)."""
+        from azure.core.exceptions import ResourceNotFoundError
+        
+        try:
+            blob_client = self.container_client.get_blob_client(blob_path)
+            properties = await self._run_blocking(blob_client.get_blob_properties)
+            return BlobProperties(
+                size=properties.size,
+                etag=properties.etag,
+                content_type=properties.content_settings.content_type
+            )
+            
+        except ResourceNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Error getting properties for {blob_path}: {str(e)}")
+            raise
 
 
 class SupabaseStorageClient(BaseStorageClient):
@@ -313,14 +919,21 @@ class SupabaseStorageClient(BaseStorageClient):
         if not settings.supabase_url or not settings.supabase_key:
             raise ValueError("Supabase URL and Key not configured")
         
+        super().__init__()
+        
         from supabase import create_client, Client
+        from supabase.lib.client_options import ClientOptions
         
         self.supabase_url = settings.supabase_url
         self.supabase_key = settings.supabase_key
         self.bucket_name = settings.supabase_bucket_name
         
-        # Initialize Supabase client
-        self.client: Client = create_client(self.supabase_url, self.supabase_key)
+        # Initialize Supabase client (storage calls share one pooled httpx session)
+        self.client: Client = create_client(
+            self.supabase_url,
+            self.supabase_key,
+            options=ClientOptions(storage_client_timeout=settings.storage_read_timeout)
+        )
         
         # Get or create bucket
         try:
@@ -337,6 +950,16 @@ class SupabaseStorageClient(BaseStorageClient):
         except Exception as e:
             logger.warning(f"Note: {str(e)}. Bucket might already exist.")
     
+    def close(self) -> None:
+        """Close the storage HTTP session."""
+        try:
+            # The sync storage client has no close() of its own; its pooled httpx.Client does
+            self.client.storage.session.close()
+            logger.info("Closed Supabase Storage client")
+        except Exception as e:
+            logger.warning(f"Error closing Supabase Storage client: {str(e)}")
+        super().close()
+    
     async def upload_file(self, file_content: bytes, blob_path: str, content_type: Optional[str] = None) -> str:
         """Upload file to Supabase Storage."""
         try:
@@ -344,7 +967,8 @@ class SupabaseStorageClient(BaseStorageClient):
             file_options = {"content-type": content_type} if content_type else {}
             
             # Upload to Supabase
-            self.client.storage.from_(self.bucket_name).upload(
+            await self._run_blocking(
+                self.client.storage.from_(self.bucket_name).upload,
                 path=blob_path,
                 file=file_content,
                 file_options=file_options
@@ -363,19 +987,54 @@ class SupabaseStorageClient(BaseStorageClient):
     async def upload_file_from_path(self, local_path: str, blob_path: str, content_type: Optional[str] = None) -> str:
         """Upload file from local path to Supabase Storage."""
         try:
-            with open(local_path, "rb") as data:
-                file_content = data.read()
+            file_options = {"content-type": content_type} if content_type else {}
             
-            return await self.upload_file(file_content, blob_path, content_type)
+            # storage3 opens and streams the file itself when given a path
+            await self._run_blocking(
+                self.client.storage.from_(self.bucket_name).upload,
+                path=blob_path,
+                file=local_path,
+                file_options=file_options
+            )
+            
+            logger.info(f"Uploaded file from {local_path} to Supabase: {blob_path}")
+            return self.client.storage.from_(self.bucket_name).get_public_url(blob_path)
             
         except Exception as e:
             logger.error(f"Error uploading file from {local_path} to {blob_path}: {str(e)}")
             raise
     
+    async def upload_chunks(
+        self,
+        chunks: AsyncIterator[bytes],
+        blob_path: str,
+        content_type: Optional[str] = None
+    ) -> str:
+        """
+        Upload a chunk stream to Supabase Storage.
+        
+        Supabase has no staged block API, so chunks are spooled to a local
+        temporary file and uploaded from disk; memory stays bounded by one chunk.
+        """
+        try:
+            with tempfile.NamedTemporaryFile(prefix="memic_upload_") as spool:
+                async for chunk in chunks:
+                    await self._run_blocking(spool.write, chunk)
+                await self._run_blocking(spool.flush)
+                
+                return await self.upload_file_from_path(spool.name, blob_path, content_type)
+                
+        except Exception as e:
+            logger.error(f"Error uploading stream to Supabase {blob_path}: {str(e)}")
+            raise
+    
     async def download_file(self, blob_path: str) -> bytes:
         """Download file from Supabase Storage."""
         try:
-            file_content = self.client.storage.from_(self.bucket_name).download(blob_path)
+            file_content = await self._run_blocking(
+                self.client.storage.from_(self.bucket_name).download,
+                blob_path
+            )
             
             logger.info(f"Downloaded file from Supabase: {blob_path}")
             return file_content
@@ -384,10 +1043,79 @@ class SupabaseStorageClient(BaseStorageClient):
             logger.error(f"Error downloading file from Supabase {blob_path}: {str(e)}")
             raise
     
+    def _object_url(self, blob_path: str) -> str:
+        """Storage API path of an object (relative to the storage session base URL)."""
+        return f"/object/{self.bucket_name}/{blob_path}"
+    
+    def open_stream(self, blob_path: str, chunk_size: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Stream file from Supabase Storage over the shared HTTP session."""
+        session = self.client.storage.session
+        
+        def _chunks():
+            with session.stream("GET", self._object_url(blob_path)) as response:
+                response.raise_for_status()
+                yield from response.iter_bytes(chunk_size or 1024 * 1024)
+        
+        return self._iterate_blocking(_chunks())
+    
+    async def download_range(self, blob_path: str, start: int, length: int) -> bytes:
+        """Download a byte range from Supabase Storage using an HTTP Range request."""
+        try:
+            session = self.client.storage.session
+            response = await self._run_blocking(
+                session.get,
+                self._object_url(blob_path),
+                headers={"Range": f"bytes={start}-{start + length - 1}"}
+            )
+            response.raise_for_status()
+            return response.content
+            
+        except Exception as e:
+            logger.error(f"Error downloading range {start}+{length} from Supabase {blob_path}: {str(e)}")
+            raise
+    
+    async def download_to_path(self, blob_path: str, local_path: str) -> int:
+        """
+        Download file from Supabase Storage with parallel range requests.
+        
+        Files larger than one transfer block are fetched as block-sized ranges,
+        up to settings.storage_transfer_max_concurrency at a time, each written
+        at its offset. Memory use is bounded by max_concurrency blocks.
+        """
+        block_size = settings.storage_transfer_block_size
+        properties = await self.stat(blob_path)
+        if properties is None:
+            raise FileNotFoundError(f"File not found in Supabase: {blob_path}")
+        
+        if properties.size <= block_size:
+            return await super().download_to_path(blob_path, local_path)
+        
+        try:
+            semaphore = asyncio.Semaphore(settings.storage_transfer_max_concurrency)
+            
+            with open(local_path, "wb") as f:
+                await self._run_blocking(f.truncate, properties.size)
+                
+                async def _fetch(offset: int) -> None:
+                    async with semaphore:
+                        data = await self.download_range(blob_path, offset, block_size)
+                        await self._run_blocking(os.pwrite, f.fileno(), data, offset)
+                
+                await asyncio.gather(*(
+                    _fetch(offset) for offset in range(0, properties.size, block_size)
+                ))
+            
+            logger.info(f"Downloaded {properties.size} bytes from {blob_path} to {local_path}")
+            return properties.size
+            
+        except Exception as e:
+            logger.error(f"Error downloading {blob_path} to {local_path}: {str(e)}")
+            raise
+    
     async def delete_file(self, blob_path: str) -> bool:
         """Delete file from Supabase Storage."""
         try:
-            self.client.storage.from_(self.bucket_name).remove([blob_path])
+            await self._run_blocking(self.client.storage.from_(self.bucket_name).remove, [blob_path])
             
             logger.info(f"Deleted file from Supabase: {blob_path}")
             return True
@@ -396,11 +1124,74 @@ class SupabaseStorageClient(BaseStorageClient):
             logger.error(f"Error deleting file from Supabase {blob_path}: {str(e)}")
             return False
     
-    async def get_file_url(self, blob_path: str, expiry_seconds: int = 3600) -> str:
+    def _list_files(self, folder: str) -> list[str]:
+        """Recursively list object paths under a folder (Supabase lists one level at a time)."""
+        bucket = self.client.storage.from_(self.bucket_name)
+        page_size = 1000
+        paths = []
+        offset = 0
+        
+        while True:
+            items = bucket.list(folder, {"limit": page_size, "offset": offset})
+            for item in items:
+                path = f"{folder}/{item['name']}"
+                # Folders are listed without an object id
+                if item.get("id") is None:
+                    paths.extend(self._list_files(path))
+                else:
+                    paths.append(path)
+            
+            if len(items) < page_size:
+                return paths
+            offset += page_size
+    
+    async def delete_files(self, blob_paths: list[str]) -> int:
+        """Delete objects with multi-object remove requests."""
+        bucket = self.client.storage.from_(self.bucket_name)
+        batch_size = settings.storage_delete_batch_size
+        results = await asyncio.gather(*(
+            self._run_blocking(bucket.remove, blob_paths[i:i + batch_size])
+            for i in range(0, len(blob_paths), batch_size)
+        ))
+        return sum(len(removed) for removed in results)
+    
+    async def delete_prefix(self, prefix: str) -> int:
+        """Delete all objects under a prefix with multi-object remove requests."""
+        self._validate_prefix(prefix)
+        try:
+            paths = await self._run_blocking(self._list_files, prefix.rstrip("/"))
+            
+            deleted = await self.delete_files(paths)
+            logger.info(f"Deleted {deleted}/{len(paths)} objects from Supabase under {prefix}")
+            return deleted
+            
+        except Exception as e:
+            logger.error(f"Error deleting objects from Supabase under {prefix}: {str(e)}")
+            raise
+    
+    async def move_file(self, source_blob_path: str, dest_blob_path: str) -> None:
+        """Move file within the Supabase bucket."""
+        try:
+            bucket = self.client.storage.from_(self.bucket_name)
+            
+            def _move():
+                # Supabase refuses to move onto an existing object
+                bucket.remove([dest_blob_path])
+                bucket.move(source_blob_path, dest_blob_path)
+            
+            await self._run_blocking(_move)
+            logger.info(f"Moved file in Supabase from {source_blob_path} to {dest_blob_path}")
+            
+        except Exception as e:
+            logger.error(f"Error moving file from {source_blob_path} to {dest_blob_path}: {str(e)}")
+            raise
+    
+    async def _generate_file_url(self, blob_path: str, expiry_seconds: int = 3600) -> str:
         """Get signed download URL for Supabase Storage file."""
         try:
             # Create signed URL with expiry
-            signed_url = self.client.storage.from_(self.bucket_name).create_signed_url(
+            signed_url = await self._run_blocking(
+                self.client.storage.from_(self.bucket_name).create_signed_url,
                 blob_path,
                 expiry_seconds
             )
@@ -412,12 +1203,13 @@ class SupabaseStorageClient(BaseStorageClient):
             logger.error(f"Error generating signed URL for {blob_path}: {str(e)}")
             raise
     
-    async def get_upload_url(self, blob_path: str, expiry_seconds: int = 3600, content_type: Optional[str] = None) -> str:
+    async def _generate_upload_url(self, blob_path: str, expiry_seconds: int = 3600, content_type: Optional[str] = None) -> str:
         """Get presigned upload URL for Supabase Storage."""
         try:
             # Supabase upload URL
             # Create signed upload URL with expiry
-            signed_upload_url = self.client.storage.from_(self.bucket_name).create_signed_upload_url(
+            signed_upload_url = await self._run_blocking(
+                self.client.storage.from_(self.bucket_name).create_signed_upload_url,
                 blob_path
             )
             
@@ -429,23 +1221,387 @@ class SupabaseStorageClient(BaseStorageClient):
             raise
     
     async def file_exists(self, blob_path: str) -> bool:
-        """Check if file exists in Supabase Storage."""
+        """Check if file exists in Supabase Storage (HEAD request, no download)."""
+        try:
+            return await self.stat(blob_path) is not None
+        except Exception as e:
+            logger.error(f"Error checking file existence for {blob_path}: {str(e)}")
+            return False
+    
+    async def stat(self, blob_path: str) -> Optional[BlobProperties]:
+        """Get file properties from Supabase Storage (HEAD request)."""
+        try:
+            session = self.client.storage.session
+            response = await self._run_blocking(session.head, self._object_url(blob_path))
+            
+            # The storage API answers 400 (not 404) for some missing objects
+            if response.status_code in (400, 404):
+                return None
+            response.raise_for_status()
+            
+            return BlobProperties(
+                size=int(response.headers.get("content-length", 0)),
+                etag=response.headers.get("etag"),
+                content_type=response.headers.get("content-type")
+            )
+            
+        except Exception as e:
+            logger.error(f"Error getting properties for Supabase {blob_path}: {str(e)}")
+            raise
+
+
+class LocalFileStorageClient(BaseStorageClient):
+    """
+    Local filesystem storage implementation (development, benchmarks, on-prem).
+    
+    Blobs live under settings.local_storage_path using the same
+    generate_blob_path() layout as the cloud backends. Writes go to a
+    temporary file in the destination directory and are renamed into place,
+    so readers never see a partially written blob. Reads map the file into
+    memory instead of copying it through read() buffers.
+    
+    Signed URLs point at the local storage endpoint
+    (app/controllers/storage_controller.py), which verifies an HMAC
+    signature and expiry before serving or accepting the file.
+    """
+    
+    def __init__(self):
+        """Initialize local filesystem storage client."""
+        super().__init__()
+        
+        self.root = os.path.realpath(settings.local_storage_path)
+        os.makedirs(self.root, exist_ok=True)
+        
+        self.base_url = settings.local_storage_base_url.rstrip("/")
+        
+        signing_key = settings.local_storage_signing_key or settings.jwt_secret_key
+        if not signing_key:
+            # Signed URLs then only verify within this process
+            logger.warning("No LOCAL_STORAGE_SIGNING_KEY or JWT_SECRET_KEY set; using a random signing key")
+            signing_key = secrets.token_urlsafe(32)
+        self._signing_key = signing_key.encode()
+        
+        logger.info(f"Using local storage root: {self.root}")
+    
+    def resolve_path(self, blob_path: str) -> str:
+        """
+        Map a blob path to an absolute path under the storage root.
+        
+        Raises:
+            ValueError: If the blob path escapes the storage root
+        """
+        path = os.path.realpath(os.path.join(self.root, blob_path.lstrip("/")))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid blob path: {blob_path}")
+        return path
+    
+    def _open_temp(self, blob_path: str) -> tuple[BinaryIO, str, str]:
+        """Open a temporary file next to the final blob location for an atomic write."""
+        path = self.resolve_path(blob_path)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".part")
+        return os.fdopen(fd, "wb"), temp_path, path
+    
+    @staticmethod
+    def _commit_temp(f: BinaryIO, temp_path: str, path: str) -> None:
+        """Flush a temporary file to disk and atomically rename it over the blob."""
+        f.flush()
+        os.fsync(f.fileno())
+        f.close()
+        os.replace(temp_path, path)
+    
+    @staticmethod
+    def _discard_temp(f: BinaryIO, temp_path: str) -> None:
+        """Remove a temporary file after a failed write."""
+        f.close()
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+    
+    def _write_atomic(self, blob_path: str, write: Callable[[BinaryIO], None]) -> None:
+        """Run write() against a temporary file and rename it into place on success."""
+        f, temp_path, path = self._open_temp(blob_path)
+        try:
+            write(f)
+            self._commit_temp(f, temp_path, path)
+        except BaseException:
+            self._discard_temp(f, temp_path)
+            raise
+    
+    @contextmanager
+    def map_file(self, blob_path: str) -> Iterator[memoryview]:
+        """
+        Map a blob into memory read-only and yield a view of its bytes.
+        
+        Slicing the view does not copy; the pages are shared with the OS
+        page cache. The view must not be used after the block exits.
+        
+        Args:
+            blob_path: Path to the file in storage
+            
+        Yields:
+            memoryview over the file content
+        """
+        with open(self.resolve_path(blob_path), "rb") as f:
+            # mmap rejects empty files
+            if os.fstat(f.fileno()).st_size == 0:
+                yield memoryview(b"")
+                return
+            
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    yield view
+                finally:
+                    view.release()
+    
+    def _sign(self, method: str, blob_path: str, expires: int) -> str:
+        """HMAC signature over the method, blob path and expiry time."""
+        message = f"{method}\n{blob_path}\n{expires}".encode()
+        return hmac.new(self._signing_key, message, hashlib.sha256).hexdigest()
+    
+    def _signed_url(self, method: str, blob_path: str, expiry_seconds: int) -> str:
+        """Build a signed URL for the local storage endpoint."""
+        expires = int(time.time()) + expiry_seconds
+        signature = self._sign(method, blob_path, expires)
+        return f"{self.base_url}/storage/local/{quote(blob_path)}?expires={expires}&signature={signature}"
+    
+    def verify_signature(self, method: str, blob_path: str, expires: int, signature: str) -> bool:
+        """
+        Check a signed URL produced by get_file_url() or get_upload_url().
+        
+        Args:
+            method: HTTP method the URL was signed for (GET or PUT)
+            blob_path: Path to the file in storage
+            expires: Expiry time from the URL (unix seconds)
+            signature: Signature from the URL
+            
+        Returns:
+            True if the signature matches and has not expired
+        """
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(self._sign(method, blob_path, expires), signature)
+    
+    async def upload_file(self, file_content: bytes, blob_path: str, content_type: Optional[str] = None) -> str:
+        """Write file to local storage atomically."""
         try:
-            # Try to get file info
-            self.client.storage.from_(self.bucket_name).download(blob_path)
+            await self._run_blocking(self._write_atomic, blob_path, lambda f: f.write(file_content))
+            
+            logger.info(f"Uploaded file to local storage: {blob_path}")
+            return self.resolve_path(blob_path)
+            
+        except Exception as e:
+            logger.error(f"Error uploading file to local storage {blob_path}: {str(e)}")
+            raise
+    
+    async def upload_file_from_path(self, local_path: str, blob_path: str, content_type: Optional[str] = None) -> str:
+        """Copy file from local path into local storage atomically."""
+        try:
+            def _copy(f: BinaryIO) -> None:
+                with open(local_path, "rb") as src:
+                    shutil.copyfileobj(src, f, settings.upload_block_size)
+            
+            await self._run_blocking(self._write_atomic, blob_path, _copy)
+            
+            logger.info(f"Uploaded file from {local_path} to local storage: {blob_path}")
+            return self.resolve_path(blob_path)
+            
+        except Exception as e:
+            logger.error(f"Error uploading file from {local_path} to {blob_path}: {str(e)}")
+            raise
+    
+    async def upload_chunks(
+        self,
+        chunks: AsyncIterator[bytes],
+        blob_path: str,
+        content_type: Optional[str] = None
+    ) -> str:
+        """Write a chunk stream to a temporary file and rename it into place."""
+        try:
+            f, temp_path, path = await self._run_blocking(self._open_temp, blob_path)
+        except Exception as e:
+            logger.error(f"Error uploading stream to local storage {blob_path}: {str(e)}")
+            raise
+        
+        try:
+            async for chunk in chunks:
+                await self._run_blocking(f.write, chunk)
+            await self._run_blocking(self._commit_temp, f, temp_path, path)
+            
+            logger.info(f"Uploaded stream to local storage: {blob_path}")
+            return path
+            
+        except BaseException as e:
+            self._discard_temp(f, temp_path)
+            logger.error(f"Error uploading stream to local storage {blob_path}: {str(e)}")
+            raise
+    
+    async def download_file(self, blob_path: str) -> bytes:
+        """Read file from local storage."""
+        try:
+            def _read() -> bytes:
+                with self.map_file(blob_path) as view:
+                    return view.tobytes()
+            
+            file_content = await self._run_blocking(_read)
+            
+            logger.info(f"Downloaded file from local storage: {blob_path}")
+            return file_content
+            
+        except Exception as e:
+            logger.error(f"Error downloading file from local storage {blob_path}: {str(e)}")
+            raise
+    
+    def open_stream(self, blob_path: str, chunk_size: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Stream file from local storage in slices of its memory map."""
+        chunk_size = chunk_size or settings.upload_block_size
+        
+        def _chunks():
+            with self.map_file(blob_path) as view:
+                for offset in range(0, len(view), chunk_size):
+                    yield view[offset:offset + chunk_size].tobytes()
+        
+        return self._iterate_blocking(_chunks())
+    
+    async def download_range(self, blob_path: str, start: int, length: int) -> bytes:
+        """Read a byte range from local storage without reading the rest of the file."""
+        try:
+            def _read() -> bytes:
+                with self.map_file(blob_path) as view:
+                    return view[start:start + length].tobytes()
+            
+            return await self._run_blocking(_read)
+            
+        except Exception as e:
+            logger.error(f"Error downloading range {start}+{length} from local storage {blob_path}: {str(e)}")
+            raise
+    
+    async def download_to_path(self, blob_path: str, local_path: str) -> int:
+        """Copy file out of local storage (kernel-side copy where the OS supports it)."""
+        try:
+            source = self.resolve_path(blob_path)
+            await self._run_blocking(shutil.copyfile, source, local_path)
+            size = os.path.getsize(local_path)
+            
+            logger.info(f"Downloaded {size} bytes from {blob_path} to {local_path}")
+            return size
+            
+        except Exception as e:
+            logger.error(f"Error downloading {blob_path} to {local_path}: {str(e)}")
+            raise
+    
+    async def delete_file(self, blob_path: str) -> bool:
+        """Delete file from local storage."""
+        try:
+            await self._run_blocking(os.remove, self.resolve_path(blob_path))
+            
+            logger.info(f"Deleted file from local storage: {blob_path}")
             return True
-        except:
+            
+        except Exception as e:
+            logger.error(f"Error deleting file from local storage {blob_path}: {str(e)}")
+            return False
+    
+    async def delete_prefix(self, prefix: str) -> int:
+        """Delete the directory holding a prefix from local storage."""
+        self._validate_prefix(prefix)
+        try:
+            directory = self.resolve_path(prefix)
+            
+            def _delete() -> int:
+                if not os.path.isdir(directory):
+                    return 0
+                count = sum(len(files) for _, _, files in os.walk(directory))
+                shutil.rmtree(directory)
+                return count
+            
+            deleted = await self._run_blocking(_delete)
+            logger.info(f"Deleted {deleted} files from local storage under {prefix}")
+            return deleted
+            
+        except Exception as e:
+            logger.error(f"Error deleting files from local storage under {prefix}: {str(e)}")
+            raise
+    
+    async def move_file(self, source_blob_path: str, dest_blob_path: str) -> None:
+        """Move file within local storage (atomic rename)."""
+        try:
+            source = self.resolve_path(source_blob_path)
+            dest = self.resolve_path(dest_blob_path)
+            
+            def _move():
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                os.replace(source, dest)
+            
+            await self._run_blocking(_move)
+            logger.info(f"Moved file in local storage from {source_blob_path} to {dest_blob_path}")
+            
+        except Exception as e:
+            logger.error(f"Error moving file from {source_blob_path} to {dest_blob_path}: {str(e)}")
+            raise
+    
+    async def _generate_file_url(self, blob_path: str, expiry_seconds: int = 3600) -> str:
+        """Get signed download URL served by the local storage endpoint."""
+        self.resolve_path(blob_path)
+        logger.info(f"Generated signed download URL for local file: {blob_path}")
+        return self._signed_url("GET", blob_path, expiry_seconds)
+    
+    async def _generate_upload_url(self, blob_path: str, expiry_seconds: int = 3600, content_type: Optional[str] = None) -> str:
+        """Get signed upload URL (HTTP PUT) served by the local storage endpoint."""
+        self.resolve_path(blob_path)
+        logger.info(f"Generated presigned upload URL for local file: {blob_path}")
+        return self._signed_url("PUT", blob_path, expiry_seconds)
+    
+    async def file_exists(self, blob_path: str) -> bool:
+        """Check if file exists in local storage."""
+        try:
+            return await self._run_blocking(os.path.isfile, self.resolve_path(blob_path))
+        except Exception as e:
+            logger.error(f"Error checking file existence for {blob_path}: {str(e)}")
             return False
+    
+    async def stat(self, blob_path: str) -> Optional[BlobProperties]:
+        """Get file properties from local storage."""
+        path = self.resolve_path(blob_path)
+        try:
+            st = await self._run_blocking(os.stat, path)
+        except FileNotFoundError:
+            return None
+        
+        return BlobProperties(
+            size=st.st_size,
+            etag=f'"{st.st_mtime_ns:x}-{st.st_size:x}"',
+            content_type=mimetypes.guess_type(path)[0]
+        )
 
 
-def get_storage_client() -> BaseStorageClient:
+# Process-wide storage client (see get_storage_client)
+_storage_client: Optional[BaseStorageClient] = None
+_storage_client_pid: Optional[int] = None
+_storage_client_lock = threading.Lock()
+
+
+def _create_storage_client() -> BaseStorageClient:
     """
-    Factory function to get the appropriate storage client.
-    Prioritizes Azure Blob Storage (better Python 3.14 compatibility than Supabase).
+    Build a new storage client for the configured backend.
+    
+    STORAGE_BACKEND selects a backend explicitly. When it is unset, Azure
+    Blob Storage is preferred (better Python 3.14 compatibility than Supabase).
     Can be extended to support other storage backends (AWS S3, GCS, etc.)
     """
+    if settings.storage_backend == "local":
+        logger.info("Using local filesystem storage")
+        return LocalFileStorageClient()
+    
+    if settings.storage_backend == "supabase":
+        logger.info("Using Supabase Storage")
+        return SupabaseStorageClient()
+    
     # Use Azure Blob Storage (no Python 3.14 compatibility issues)
-    if settings.azure_storage_connection_string:
+    if settings.storage_backend == "azure" or settings.azure_storage_connection_string:
         logger.info("Using Azure Blob Storage")
         return AzureBlobStorageClient()
     
@@ -457,6 +1613,48 @@ def get_storage_client() -> BaseStorageClient:
     else:
         raise ValueError(
             "No storage backend configured. Please set AZURE_STORAGE_CONNECTION_STRING "
-            "in your .env file"
+            "in your .env file, or STORAGE_BACKEND=local for local filesystem storage"
         )
 
+
+def get_storage_client() -> BaseStorageClient:
+    """
+    Get the shared storage client for this process.
+    
+    The client is created lazily on first use and reused afterwards, so the
+    container/bucket check and TLS handshakes happen once per process instead
+    of once per request. Forked children (Celery prefork workers) build their
+    own client because connection pools cannot be shared across processes.
+    """
+    global _storage_client, _storage_client_pid
+    
+    pid = os.getpid()
+    client = _storage_client
+    if client is not None and _storage_client_pid == pid:
+        return client
+    
+    with _storage_client_lock:
+        if _storage_client is None or _storage_client_pid != pid:
+            _storage_client = _create_storage_client()
+            _storage_client_pid = pid
+        return _storage_client
+
+
+def close_storage_client() -> None:
+    """
+    Close the shared storage client, if one was created in this process.
+    
+    Safe to call multiple times. The next get_storage_client() call
+    creates a fresh client.
+    """
+    global _storage_client, _storage_client_pid
+    
+    with _storage_client_lock:
+        client = _storage_client
+        owned = _storage_client_pid == os.getpid()
+        _storage_client = None
+        _storage_client_pid = None
+    
+    # A client inherited from a parent process shares its sockets; leave them alone
+    if client is not None and owned:
+        client.close()
@@ -0,0 +1,360 @@
+"""
+Token counting for chunking and embedding.
+
+Every tokenizer exposes count_tokens() for one text and count_batch() for
+many texts per call (e.g. all sentences of a section). Short texts, such as
+page headers, footers and other boilerplate repeated on every page, are kept
+in a per-tokenizer LRU so they are only encoded once per process.
+
+Backends (TOKENIZER_BACKEND):
+- tiktoken: native BPE (Rust), batches encoded on TOKENIZER_THREADS threads.
+- bpe:      pure-Python byte-level BPE over a .tiktoken rank file
+            (TOKENIZER_BPE_FILE); same token ids as tiktoken, no compiler needed.
+- estimate: regex estimate of cl100k-style counts, no vocabulary needed.
+
+When TOKENIZER_BACKEND is unset the choice depends only on configuration:
+with TOKENIZER_BPE_FILE, tiktoken (or bpe where tiktoken is not installed)
+over that file; without it, the estimate. Chunk boundaries, token counts and
+chunk hashes must agree across workers, so a rank file that fails to load is
+an error rather than a silent fallback to a different backend.
+"""
+import base64
+import functools
+import logging
+import math
+import re
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from app.config import settings
+
+# tiktoken is optional; without it the pure-Python BPE (or the estimate) is used
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# regex supports the \p{L} / \p{N} classes of the original split patterns
+try:
+    import regex
+except ImportError:
+    regex = None
+
+logger = logging.getLogger(__name__)
+
+# Pre-tokenizer of cl100k_base (text-embedding-ada-002, text-embedding-3-*)
+_CL100K_PATTERN = (
+    r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}++|\p{N}{1,3}+| ?[^\s\p{L}\p{N}]++[\r\n]*+"""
+    r"""|\s++$|\s*[\r\n]|\s+(?!\S)|\s"""
+)
+# The same pattern for the re module: \p{L} is [^\W\d_], \p{N} is \d
+_CL100K_RE_PATTERN = (
+    r"""'(?i:[sdmt]|ll|ve|re)|(?:[^\r\n\w]|_)?+[^\W\d_]++|\d{1,3}+| ?(?:[^\s\w]|_)++[\r\n]*+"""
+    r"""|\s++$|\s*[\r\n]|\s+(?!\S)|\s"""
+)
+SPLIT_PATTERNS = {"cl100k_base": (_CL100K_PATTERN, _CL100K_RE_PATTERN)}
+
+# tiktoken starts a thread pool per batch call; smaller batches are encoded inline
+_THREADED_BATCH_MIN_CHARS = 256 * 1024
+
+_WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate BPE token count of text.
+
+    Counts words and punctuation marks, with long words costing one token
+    per four characters (roughly what cl100k-style tokenizers produce for
+    English prose).
+    """
+    return sum(math.ceil(len(piece) / 4) for piece in _WORD_PATTERN.findall(text))
+
+
+def load_bpe_ranks(path: str) -> Dict[bytes, int]:
+    """
+    Load a .tiktoken rank file (one "<base64 token> <rank>" pair per line).
+
+    Args:
+        path: Local path of the rank file
+
+    Returns:
+        dict: Token bytes -> rank (also the token id)
+    """
+    ranks = {}
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                token, rank = line.split()
+                ranks[base64.b64decode(token)] = int(rank)
+    return ranks
+
+
+class BaseTokenizer(ABC):
+    """Token counter with batched counting and an LRU for short, repeated texts."""
+
+    name = "base"
+
+    def __init__(self, cache_size: int = 0, cache_max_chars: int = 0):
+        """
+        Initialize the tokenizer.
+
+        Args:
+            cache_size: Maximum texts kept in the count cache (0 disables it)
+            cache_max_chars: Only texts up to this length are cached
+        """
+        self.cache_size = cache_size
+        self.cache_max_chars = cache_max_chars
+        self._cache: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _count_batch(self, texts: List[str]) -> List[int]:
+        """Count tokens of texts without consulting the cache."""
+        pass
+
+    def count_tokens(self, text: str) -> int:
+        """Number of tokens in text."""
+        return self.count_batch([text])[0]
+
+    def count_batch(self, texts: List[str]) -> List[int]:
+        """
+        Count tokens of many texts with one backend call.
+
+        Cached texts are answered from the LRU; the remaining distinct texts
+        are counted together and the short ones are added to the cache.
+
+        Args:
+            texts: Texts to count
+
+        Returns:
+            list: Token count per text, in order
+        """
+        counts: Dict[str, int] = {}
+        if self.cache_size:
+            with self._lock:
+                for text in texts:
+                    count = self._cache.get(text)
+                    if count is not None:
+                        self._cache.move_to_end(text)
+                        counts[text] = count
+
+        # dict.fromkeys keeps order and drops texts repeated within the batch
+        missing = [text for text in dict.fromkeys(texts) if text not in counts]
+        if missing:
+            new_counts = self._count_batch(missing)
+            counts.update(zip(missing, new_counts))
+            if self.cache_size:
+                with self._lock:
+                    for text, count in zip(missing, new_counts):
+                        if len(text) <= self.cache_max_chars:
+                            self._cache[text] = count
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+
+        return [counts[text] for text in texts]
+
+    def clear_cache(self) -> None:
+        """Drop all cached counts."""
+        with self._lock:
+            self._cache.clear()
+
+
+class EstimateTokenizer(BaseTokenizer):
+    """Vocabulary-free estimate of cl100k-style token counts (see estimate_tokens)."""
+
+    name = "estimate"
+
+    def _count_batch(self, texts: List[str]) -> List[int]:
+        return [estimate_tokens(text) for text in texts]
+
+
+class BpeTokenizer(BaseTokenizer):
+    """
+    Pure-Python byte-level BPE, token-for-token compatible with tiktoken.
+
+    Text is split with the encoding's pre-tokenizer pattern and each piece
+    is merged by rank. Merged pieces are memoized, so common words cost one
+    dict lookup after their first occurrence.
+    """
+
+    name = "bpe"
+
+    def __init__(
+        self,
+        ranks: Dict[bytes, int],
+        encoding: str = "cl100k_base",
+        cache_size: int = 0,
+        cache_max_chars: int = 0,
+        piece_cache_size: int = 100000,
+    ):
+        """
+        Initialize the tokenizer.
+
+        Args:
+            ranks: Token bytes -> rank, e.g. from load_bpe_ranks()
+            encoding: Encoding whose pre-tokenizer pattern is used
+            cache_size: Maximum texts kept in the count cache
+            cache_max_chars: Only texts up to this length are cached
+            piece_cache_size: Maximum pre-tokenized pieces kept with their merged ids
+        """
+        super().__init__(cache_size, cache_max_chars)
+        if encoding not in SPLIT_PATTERNS:
+            raise ValueError(f"No pre-tokenizer pattern for encoding {encoding}; supported: {list(SPLIT_PATTERNS)}")
+
+        pattern, re_pattern = SPLIT_PATTERNS[encoding]
+        self.encoding = encoding
+        self.ranks = ranks
+        self._split = regex.compile(pattern).findall if regex else re.compile(re_pattern).findall
+        self._encode_piece = functools.lru_cache(maxsize=piece_cache_size)(self._merge)
+
+    def _merge(self, piece: bytes) -> tuple[int, ...]:
+        """Token ids of one pre-tokenized piece."""
+        ranks = self.ranks
+        rank = ranks.get(piece)
+        if rank is not None:
+            return (rank,)
+
+        parts = [piece[i:i + 1] for i in range(len(piece))]
+        while len(parts) > 1:
+            best_rank = None
+            best_index = 0
+            for i in range(len(parts) - 1):
+                rank = ranks.get(parts[i] + parts[i + 1])
+                if rank is not None and (best_rank is None or rank < best_rank):
+                    best_rank, best_index = rank, i
+            if best_rank is None:
+                break
+            parts[best_index:best_index + 2] = [parts[best_index] + parts[best_index + 1]]
+        return tuple(ranks[part] for part in parts)
+
+    def encode(self, text: str) -> List[int]:
+        """Token ids of text (special tokens are encoded as plain text)."""
+        ids: List[int] = []
+        for piece in self._split(text):
+            ids.extend(self._encode_piece(piece.encode("utf-8")))
+        return ids
+
+    def encode_batch(self, texts: List[str]) -> List[List[int]]:
+        return [self.encode(text) for text in texts]
+
+    def _count_batch(self, texts: List[str]) -> List[int]:
+        encode_piece = self._encode_piece
+        split = self._split
+        return [
+            sum(len(encode_piece(piece.encode("utf-8"))) for piece in split(text))
+            for text in texts
+        ]
+
+
+class TiktokenTokenizer(BaseTokenizer):
+    """Native BPE through tiktoken; large batches are encoded on several threads."""
+
+    name = "tiktoken"
+
+    def __init__(
+        self,
+        encoding: str = "cl100k_base",
+        bpe_file: Optional[str] = None,
+        threads: int = 4,
+        cache_size: int = 0,
+        cache_max_chars: int = 0,
+    ):
+        """
+        Initialize the tokenizer.
+
+        Args:
+            encoding: tiktoken encoding name
+            bpe_file: Local .tiktoken rank file; avoids tiktoken's download (None = tiktoken's own cache)
+            threads: Threads used for batches of at least 256 KB of text
+            cache_size: Maximum texts kept in the count cache
+            cache_max_chars: Only texts up to this length are cached
+        """
+        if tiktoken is None:
+            raise ImportError("tiktoken not installed. Install with: pip install tiktoken")
+
+        super().__init__(cache_size, cache_max_chars)
+        self.threads = threads
+        if bpe_file:
+            if encoding not in SPLIT_PATTERNS:
+                raise ValueError(f"No pre-tokenizer pattern for encoding {encoding}; supported: {list(SPLIT_PATTERNS)}")
+            self._encoding = tiktoken.Encoding(
+                name=encoding,
+                pat_str=SPLIT_PATTERNS[encoding][0],
+                mergeable_ranks=load_bpe_ranks(bpe_file),
+                special_tokens={},
+            )
+        else:
+            self._encoding = tiktoken.get_encoding(encoding)
+
+    def encode(self, text: str) -> List[int]:
+        """Token ids of text (special tokens are encoded as plain text)."""
+        return self._encoding.encode_ordinary(text)
+
+    def encode_batch(self, texts: List[str]) -> List[List[int]]:
+        if self.threads > 1 and sum(len(text) for text in texts) >= _THREADED_BATCH_MIN_CHARS:
+            return self._encoding.encode_ordinary_batch(texts, num_threads=self.threads)
+        encode = self._encoding.encode_ordinary
+        return [encode(text) for text in texts]
+
+    def _count_batch(self, texts: List[str]) -> List[int]:
+        return [len(ids) for ids in self.encode_batch(texts)]
+
+
+def _create_tokenizer() -> BaseTokenizer:
+    """
+    Build a tokenizer for the configured backend.
+
+    TOKENIZER_BACKEND selects a backend explicitly. When it is unset,
+    TOKENIZER_BPE_FILE decides: with it, tiktoken (or the pure-Python BPE if
+    tiktoken is not installed) over the local ranks; without it, the estimate.
+    tiktoken's own rank download is only used with TOKENIZER_BACKEND=tiktoken,
+    and load failures are raised so workers never mix backends silently.
+    """
+    cache = dict(cache_size=settings.tokenizer_cache_size, cache_max_chars=settings.tokenizer_cache_max_chars)
+    backend = settings.tokenizer_backend
+    bpe_file = settings.tokenizer_bpe_file
+
+    if backend is None:
+        if not bpe_file:
+            logger.warning("TOKENIZER_BPE_FILE is not set; token counts are estimated")
+            return EstimateTokenizer(**cache)
+        backend = "tiktoken" if tiktoken is not None else "bpe"
+
+    if backend == "tiktoken":
+        tokenizer = TiktokenTokenizer(settings.tokenizer_encoding, bpe_file, settings.tokenizer_threads, **cache)
+        logger.info(f"Using tiktoken tokenizer ({settings.tokenizer_encoding})")
+        return tokenizer
+
+    if backend == "bpe":
+        if not bpe_file:
+            raise ValueError("TOKENIZER_BACKEND=bpe requires TOKENIZER_BPE_FILE (a .tiktoken rank file)")
+        logger.info(f"Using pure-Python BPE tokenizer ({settings.tokenizer_encoding})")
+        return BpeTokenizer(load_bpe_ranks(bpe_file), settings.tokenizer_encoding, **cache)
+
+    return EstimateTokenizer(**cache)
+
+
+_tokenizer: Optional[BaseTokenizer] = None
+_tokenizer_lock = threading.Lock()
+
+
+def get_tokenizer() -> BaseTokenizer:
+    """
+    Get the shared tokenizer for this process.
+
+    Created lazily on first use, so the rank file is loaded (and the count
+    cache filled) once per process rather than once per task.
+    """
+    global _tokenizer
+
+    tokenizer = _tokenizer
+    if tokenizer is not None:
+        return tokenizer
+
+    with _tokenizer_lock:
+        if _tokenizer is None:
+            _tokenizer = _create_tokenizer()
+        return _tokenizer
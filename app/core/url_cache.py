@@ -0,0 +1,189 @@
+"""
+Cache for presigned storage URLs.
+
+Signed URLs are valid for a window of time, so the same URL can be handed to
+every caller inside that window. Time is split into fixed buckets of
+settings.signed_url_bucket_seconds; all requests for the same
+(blob_path, permission, expiry) within one bucket share one URL, signed to
+expire expiry_seconds after the bucket ends. A cached URL therefore always
+has at least the requested lifetime left when it is served, and entries stop
+being served as soon as their bucket ends (early expiry, never late).
+
+Entries live in an in-process LRU. With SIGNED_URL_CACHE_REDIS=true they are
+also shared across processes and pods through Redis; Redis errors only cost
+a cache miss, never a failed request.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SignedUrlCache:
+    """Thread-safe LRU of signed URLs keyed by blob path, permission and expiry bucket."""
+
+    def __init__(
+        self,
+        max_entries: int,
+        bucket_seconds: int,
+        redis_url: Optional[str] = None,
+        namespace: str = "storage"
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum URLs kept in process memory
+            bucket_seconds: Length of an expiry bucket in seconds
+            redis_url: Redis URL for cross-process sharing (None = process-local only)
+            namespace: Prefix separating Redis keys of different storage backends
+        """
+        self.max_entries = max_entries
+        self.bucket_seconds = bucket_seconds
+        self.redis_url = redis_url
+        self.namespace = namespace
+        self._entries: OrderedDict[tuple, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+
+    @property
+    def shared(self) -> bool:
+        """Whether URLs are also shared through Redis."""
+        return self.redis_url is not None
+
+    def key(self, blob_path: str, permission: str, expiry_seconds: int) -> tuple[tuple, int, float]:
+        """
+        Build the cache key for a signing request.
+
+        Args:
+            blob_path: Path to the file in storage
+            permission: "read" or "write"
+            expiry_seconds: Minimum lifetime the caller asked for
+
+        Returns:
+            Tuple of (cache key, lifetime to sign the URL with in seconds,
+            time at which the cached URL stops being served)
+        """
+        now = time.time()
+        bucket = int(now // self.bucket_seconds)
+        bucket_end = (bucket + 1) * self.bucket_seconds
+        sign_seconds = int(bucket_end - now) + expiry_seconds
+        return (blob_path, permission, expiry_seconds, bucket), sign_seconds, bucket_end
+
+    def get(self, key: tuple) -> Optional[str]:
+        """
+        Get a URL from the in-process LRU.
+
+        Args:
+            key: Cache key from key()
+
+        Returns:
+            Cached URL, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            url, valid_until = entry
+            if valid_until <= time.time():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return url
+
+    def put(self, key: tuple, url: str, valid_until: float) -> None:
+        """
+        Store a URL in the in-process LRU, evicting the least recently used.
+
+        Args:
+            key: Cache key from key()
+            url: Signed URL
+            valid_until: Time at which the URL stops being served
+        """
+        with self._lock:
+            self._entries[key] = (url, valid_until)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _redis_key(self, key: tuple) -> str:
+        """Redis key for a cache key (hashed to keep it short)."""
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return f"memic:signed-url:{self.namespace}:{digest}"
+
+    def _get_redis(self) -> Any:
+        """Lazily create the Redis client."""
+        if self._redis is None:
+            import redis
+            self._redis = redis.Redis.from_url(
+                self.redis_url,
+                socket_timeout=1,
+                socket_connect_timeout=1
+            )
+        return self._redis
+
+    def get_shared(self, key: tuple) -> Optional[str]:
+        """
+        Get a URL from Redis (blocking; run off the event loop).
+
+        Args:
+            key: Cache key from key()
+
+        Returns:
+            Cached URL, or None on a miss or Redis error
+        """
+        try:
+            value = self._get_redis().get(self._redis_key(key))
+            return value.decode() if value else None
+        except Exception as e:
+            logger.warning(f"Signed URL cache lookup in Redis failed: {str(e)}")
+            return None
+
+    def put_shared(self, key: tuple, url: str, valid_until: float) -> None:
+        """
+        Store a URL in Redis until its bucket ends (blocking; run off the event loop).
+
+        Args:
+            key: Cache key from key()
+            url: Signed URL
+            valid_until: Time at which the URL stops being served
+        """
+        ttl = int(valid_until - time.time())
+        if ttl <= 0:
+            return
+
+        try:
+            self._get_redis().set(self._redis_key(key), url, ex=ttl)
+        except Exception as e:
+            logger.warning(f"Signed URL cache write to Redis failed: {str(e)}")
+
+    def clear(self) -> None:
+        """Drop all in-process entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+def create_signed_url_cache(namespace: str) -> SignedUrlCache:
+    """
+    Build a signed URL cache from settings.
+
+    Args:
+        namespace: Prefix separating Redis keys of different storage backends
+
+    Returns:
+        SignedUrlCache instance
+    """
+    return SignedUrlCache(
+        max_entries=settings.signed_url_cache_size,
+        bucket_seconds=settings.signed_url_bucket_seconds,
+        redis_url=settings.redis_url if settings.signed_url_cache_redis else None,
+        namespace=namespace
+    )
@@ -1,33 +1,213 @@
+"""
+Vector store backends: Pinecone, a local NumPy store and Postgres/pgvector.
+
+PgVectorStore creates and drops per-project partial ANN indexes at runtime.
+This is the one exception to managing the schema through Alembic: the
+indexes exist per project and only once a project is large enough, which
+no migration can know ahead of time. They are derived data, dropped with the
+project's vectors, and alembic/env.py excludes them from autogenerate.
+"""
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import asyncio
+import functools
+import heapq
+import json
 import logging
+import os
+import re
+import secrets
+import shutil
+import tempfile
+import threading
+import time
+from uuid import UUID, uuid4
+from sqlalchemy import and_, case, cast, delete, false, func, not_, null, or_, select, text, true, Float, Numeric
+from sqlalchemy.dialects.postgresql import BIT
 from app.config import settings
 
+# NumPy is only needed by LocalVectorStore
+try:
+    import numpy as np
+    from app.core.hnsw import HnswGraph
+    from app.core.quantization import ProductQuantizer, QUANTIZERS, ScalarQuantizer
+except ImportError:
+    np = None
+    HnswGraph = None
+
+# Cross-process locking of LocalVectorStore namespaces (POSIX only)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 logger = logging.getLogger(__name__)
 
+# Rough JSON size of one float in an upsert request body
+_BYTES_PER_VALUE = 20
+# Per-vector JSON framing (keys, brackets, separators)
+_VECTOR_OVERHEAD_BYTES = 64
+# Maximum IDs per Pinecone delete request
+_PINECONE_DELETE_BATCH = 1000
+# Attempts to open a LocalVectorStore manifest whose segments another process is replacing
+_MANIFEST_READ_ATTEMPTS = 5
+# Age after which segment files no manifest references are treated as crash leftovers
+_ORPHAN_SEGMENT_SECONDS = 3600
+
+
+@dataclass
+class UpsertBatchResult:
+    """Outcome of one upsert request sent by upsert_vectors()."""
+    batch_index: int
+    vector_count: int
+    payload_bytes: int  # Estimated request body size
+    attempts: int
+    success: bool
+    error: Optional[str] = None
+
+
+def estimate_vector_bytes(vector: tuple) -> int:
+    """
+    Estimate the request body size of one (id, values[, metadata]) tuple.
+    
+    Args:
+        vector: Vector tuple as passed to upsert_vectors()
+        
+    Returns:
+        Estimated size in bytes
+    """
+    size = _VECTOR_OVERHEAD_BYTES + len(str(vector[0])) + _BYTES_PER_VALUE * len(vector[1])
+    if len(vector) > 2 and vector[2]:
+        size += len(json.dumps(vector[2], default=str))
+    return size
+
+
+def split_vector_batches(
+    vectors: List[tuple],
+    max_count: int,
+    max_bytes: int
+) -> Iterator[tuple[List[tuple], int]]:
+    """
+    Split vectors into batches bounded by vector count and payload size.
+    
+    A single vector larger than max_bytes is still sent, alone, so the
+    service can reject it with a precise error.
+    
+    Args:
+        vectors: Vector tuples in upsert order
+        max_count: Maximum vectors per batch
+        max_bytes: Maximum estimated request body size per batch
+        
+    Yields:
+        (batch, estimated payload bytes) tuples
+    """
+    batch: List[tuple] = []
+    batch_bytes = 0
+    for vector in vectors:
+        vector_bytes = estimate_vector_bytes(vector)
+        if batch and (len(batch) >= max_count or batch_bytes + vector_bytes > max_bytes):
+            yield batch, batch_bytes
+            batch, batch_bytes = [], 0
+        batch.append(vector)
+        batch_bytes += vector_bytes
+    if batch:
+        yield batch, batch_bytes
+
 
 class BaseVectorStore(ABC):
     """Abstract base class for vector store implementations."""
     
+    def __init__(self):
+        """Create the thread pool that runs blocking SDK calls."""
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.vector_store_max_workers,
+            thread_name_prefix=f"{self.__class__.__name__}-io"
+        )
+    
+    async def _run_blocking(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking SDK call on the I/O thread pool and await its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+    
     @abstractmethod
+    def _upsert_batch(self, vectors: List[tuple], namespace: str) -> None:
+        """
+        Send one upsert request (blocking; called from the I/O thread pool).
+        
+        Args:
+            vectors: List of (id, vector, metadata) tuples within the size limits
+            namespace: Namespace for tenant isolation
+        """
+        pass
+    
     async def upsert_vectors(
         self,
         vectors: List[tuple],
         namespace: str,
         metadata: Optional[List[Dict[str, Any]]] = None
-    ) -> bool:
+    ) -> List[UpsertBatchResult]:
         """
         Insert or update vectors in the vector store.
         
+        Vectors are split into batches of at most VECTOR_UPSERT_BATCH_SIZE
+        vectors and VECTOR_UPSERT_MAX_BYTES estimated bytes, sent
+        VECTOR_UPSERT_MAX_INFLIGHT at a time. A failed batch is retried on its
+        own with exponential backoff; other batches are unaffected.
+        
         Args:
             vectors: List of (id, vector, metadata) tuples
             namespace: Namespace for tenant isolation (typically project_id)
             metadata: Optional list of metadata dictionaries for each vector
+                (merged into tuples that have none)
             
         Returns:
-            True if successful
+            One result per batch, in vector order; check success on each
         """
-        pass
+        if metadata:
+            vectors = [
+                (v[0], v[1], v[2] if len(v) > 2 and v[2] else meta)
+                for v, meta in zip(vectors, metadata)
+            ]
+        
+        semaphore = asyncio.Semaphore(settings.vector_upsert_max_inflight)
+        
+        async def _send(batch_index: int, batch: List[tuple], payload_bytes: int) -> UpsertBatchResult:
+            async with semaphore:
+                attempts = 0
+                while True:
+                    attempts += 1
+                    try:
+                        await self._run_blocking(self._upsert_batch, batch, namespace)
+                        return UpsertBatchResult(batch_index, len(batch), payload_bytes, attempts, True)
+                    except Exception as e:
+                        if attempts > settings.vector_upsert_max_retries:
+                            logger.error(
+                                f"Upsert batch {batch_index} ({len(batch)} vectors) to namespace "
+                                f"{namespace} failed after {attempts} attempts: {str(e)}"
+                            )
+                            return UpsertBatchResult(
+                                batch_index, len(batch), payload_bytes, attempts, False, str(e)
+                            )
+                        await asyncio.sleep(settings.vector_upsert_retry_delay * 2 ** (attempts - 1))
+        
+        results = await asyncio.gather(*(
+            _send(i, batch, payload_bytes)
+            for i, (batch, payload_bytes) in enumerate(split_vector_batches(
+                vectors,
+                settings.vector_upsert_batch_size,
+                settings.vector_upsert_max_bytes
+            ))
+        ))
+        
+        upserted = sum(r.vector_count for r in results if r.success)
+        logger.info(
+            f"Upserted {upserted}/{len(vectors)} vectors to namespace {namespace} "
+            f"in {len(results)} batches"
+        )
+        return list(results)
     
     @abstractmethod
     async def query(
@@ -35,7 +215,8 @@ class BaseVectorStore(ABC):
         query_vector: List[float],
         namespace: str,
         top_k: int = 10,
-        filter_dict: Optional[Dict[str, Any]] = None
+        filter_dict: Optional[Dict[str, Any]] = None,
+        ef_search: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Query for similar vectors.
@@ -45,6 +226,8 @@ class BaseVectorStore(ABC):
             namespace: Namespace to search in (typically project_id)
             top_k: Number of results to return
             filter_dict: Optional metadata filters
+            ef_search: Candidate list size for graph (HNSW) indexes; higher
+                trades latency for recall. Ignored by backends without one.
             
         Returns:
             List of results with id, score, and metadata
@@ -90,80 +273,84 @@ class BaseVectorStore(ABC):
             Dictionary with index statistics
         """
         pass
+    
+    def close(self) -> None:
+        """
+        Release network resources held by the client (connection pools).
+        
+        Called once at process shutdown. Subclasses that hold connection
+        pools close them and then call super().close().
+        """
+        self._executor.shutdown(wait=False)
 
 
 class PineconeVectorStore(BaseVectorStore):
     """Pinecone vector store implementation."""
     
     def __init__(self):
-        """Initialize Pinecone client."""
+        """
+        Initialize Pinecone client and connect to the index.
+        
+        Only the data plane is touched here: the index is assumed to exist
+        (see provision_pinecone_index). With PINECONE_INDEX_HOST set no
+        control-plane call is made at all; otherwise the host is looked up
+        once and cached for the lifetime of the client.
+        """
         if not settings.pinecone_api_key:
             raise ValueError("Pinecone API key not configured")
         
+        super().__init__()
+        
         try:
-            from pinecone import Pinecone, ServerlessSpec
-            
-            # Initialize Pinecone (v5.x API)
-            self.pc = Pinecone(api_key=settings.pinecone_api_key)
+            self.pc = _create_pinecone_client()
             
-            # Get or create index
             index_name = settings.pinecone_index_name
-            
-            # Check if index exists
-            existing_indexes = [idx['name'] for idx in self.pc.list_indexes()]
-            
-            if index_name not in existing_indexes:
-                logger.info(f"Creating Pinecone index: {index_name}")
-                # Create index with serverless spec
-                self.pc.create_index(
+            if settings.pinecone_transport == "grpc":
+                self.index = self.pc.Index(name=index_name, host=settings.pinecone_index_host or "")
+            else:
+                # Index handles copy the client's HTTP config, pool size included
+                self.pc.openapi_config.connection_pool_maxsize = settings.pinecone_connection_pool_size
+                self.index = self.pc.Index(
                     name=index_name,
-                    dimension=settings.embedding_dimension,
-                    metric='cosine',
-                    spec=ServerlessSpec(
-                        cloud='aws',
-                        region='us-east-1'
-                    )
+                    host=settings.pinecone_index_host or "",
+                    pool_threads=settings.pinecone_pool_threads
                 )
-                logger.info(f"Created Pinecone index: {index_name}")
-            
-            # Connect to index
-            self.index = self.pc.Index(index_name)
-            logger.info(f"Connected to Pinecone index: {index_name}")
+            logger.info(f"Connected to Pinecone index: {index_name} ({settings.pinecone_transport})")
             
         except Exception as e:
             logger.error(f"Error initializing Pinecone: {str(e)}")
             raise
     
-    async def upsert_vectors(
-        self,
-        vectors: List[tuple],
-        namespace: str,
-        metadata: Optional[List[Dict[str, Any]]] = None
-    ) -> bool:
-        """
-        Upsert vectors to Pinecone.
-        
-        Args:
-            vectors: List of (id, vector, metadata) tuples
-            namespace: Namespace for tenant isolation
-            metadata: Optional metadata (already included in tuples)
-        """
+    def close(self) -> None:
+        """Release the index handle's connections."""
         try:
-            # Pinecone expects format: [(id, values, metadata), ...]
-            self.index.upsert(vectors=vectors, namespace=namespace)
-            logger.info(f"Upserted {len(vectors)} vectors to namespace {namespace}")
-            return True
-            
+            close = getattr(self.index, "close", None)
+            if close is not None:
+                # gRPC handles (and HTTP handles on SDK versions that add a public close())
+                close()
+            else:
+                # The pinecone-client 5 HTTP Index has no close(); its urllib3 pool is only
+                # reachable through the private generated API client, so look it up defensively
+                api_client = getattr(getattr(self.index, "_vector_api", None), "api_client", None)
+                if api_client is not None:
+                    api_client.close()
+                else:
+                    logger.warning("Pinecone index handle has no API client to close")
         except Exception as e:
-            logger.error(f"Error upserting vectors to Pinecone: {str(e)}")
-            raise
+            logger.warning(f"Error closing Pinecone index handle: {str(e)}")
+        super().close()
+    
+    def _upsert_batch(self, vectors: List[tuple], namespace: str) -> None:
+        """Send one batch to Pinecone; format: [(id, values, metadata), ...]."""
+        self.index.upsert(vectors=vectors, namespace=namespace, show_progress=False)
     
     async def query(
         self,
         query_vector: List[float],
         namespace: str,
         top_k: int = 10,
-        filter_dict: Optional[Dict[str, Any]] = None
+        filter_dict: Optional[Dict[str, Any]] = None,
+        ef_search: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Query Pinecone for similar vectors.
@@ -179,7 +366,7 @@ class PineconeVectorStore(BaseVectorStore):
             if filter_dict:
                 query_params["filter"] = filter_dict
             
-            results = self.index.query(**query_params)
+            results = await self._run_blocking(self.index.query, **query_params)
             
             # Format results
             formatted_results = []
@@ -198,9 +385,12 @@ class PineconeVectorStore(BaseVectorStore):
             raise
     
     async def delete(self, vector_ids: List[str], namespace: str) -> bool:
-        """Delete vectors from Pinecone."""
+        """Delete vectors from Pinecone (split into requests of at most 1000 IDs, the API limit)."""
         try:
-            self.index.delete(ids=vector_ids, namespace=namespace)
+            for start in range(0, len(vector_ids), _PINECONE_DELETE_BATCH):
+                await self._run_blocking(
+                    self.index.delete, ids=vector_ids[start:start + _PINECONE_DELETE_BATCH], namespace=namespace
+                )
             logger.info(f"Deleted {len(vector_ids)} vectors from namespace {namespace}")
             return True
             
@@ -211,7 +401,7 @@ class PineconeVectorStore(BaseVectorStore):
     async def delete_namespace(self, namespace: str) -> bool:
         """Delete entire namespace from Pinecone."""
         try:
-            self.index.delete(delete_all=True, namespace=namespace)
+            await self._run_blocking(self.index.delete, delete_all=True, namespace=namespace)
             logger.info(f"Deleted namespace {namespace}")
             return True
             
@@ -222,7 +412,7 @@ class PineconeVectorStore(BaseVectorStore):
     async def get_index_stats(self, namespace: Optional[str] = None) -> Dict[str, Any]:
         """Get Pinecone index statistics."""
         try:
-            stats = self.index.describe_index_stats()
+            stats = await self._run_blocking(self.index.describe_index_stats)
             
             if namespace:
                 namespace_stats = stats.namespaces.get(namespace, {})
@@ -245,11 +435,1428 @@ class PineconeVectorStore(BaseVectorStore):
             raise
 
 
+class _Segment:
+    """
+    One immutable block of vectors in a LocalVectorStore namespace.
+    
+    vectors is a (rows, dimension) float32 matrix of unit-length rows,
+    memory-mapped from its .npy file. alive is replaced (never mutated) on
+    delete so concurrent queries keep a consistent snapshot. Segments built
+    by compaction in HNSW mode also carry a graph over their rows, and large
+    segments may carry in-memory quantized codes of their vectors.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        vectors: Any,
+        ids: List[str],
+        metadata: List[Dict[str, Any]],
+        alive: Any,
+        graph: Optional[HnswGraph] = None,
+        quantizer: Optional[Any] = None,
+        codes: Optional[Any] = None
+    ):
+        self.name = name
+        self.vectors = vectors
+        self.ids = ids
+        self.metadata = metadata
+        self.alive = alive
+        self.graph = graph
+        self.quantizer = quantizer
+        self.codes = codes
+        self._columns: Dict[str, Any] = {}
+    
+    @property
+    def live_count(self) -> int:
+        return int(self.alive.sum())
+    
+    def with_alive(self, alive: Any) -> "_Segment":
+        """Copy of the segment with a new alive mask (shares vectors, graph, codes and metadata columns)."""
+        segment = _Segment(
+            self.name, self.vectors, self.ids, self.metadata, alive, self.graph, self.quantizer, self.codes
+        )
+        segment._columns = self._columns
+        return segment
+    
+    def column(self, key: str) -> Any:
+        """
+        Metadata values for key as an array aligned with the rows.
+        
+        All-numeric columns become float64 (missing = NaN) so range filters
+        are vectorized; anything else is an object array (missing = None).
+        """
+        column = self._columns.get(key)
+        if column is None:
+            values = [meta.get(key) for meta in self.metadata]
+            if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values if v is not None) \
+                    and any(v is not None for v in values):
+                column = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+            else:
+                column = np.empty(len(values), dtype=object)
+                column[:] = values
+            self._columns[key] = column
+        return column
+
+
+class LocalVectorStore(BaseVectorStore):
+    """
+    In-process vector store on NumPy (development, tests, small on-prem deployments).
+    
+    Each namespace is a directory under settings.local_vector_store_path
+    holding immutable segments: a float32 .npy matrix of normalized vectors
+    plus a JSON file of ids and metadata. manifest.json lists the live
+    segments and deleted rows and is atomically replaced on every write, so
+    a crash never exposes a half-written segment. Segments are opened with
+    mmap_mode="r" and queried in place, making restarts instant.
+    
+    Queries compute cosine similarity as one matrix-vector product per
+    segment and select the top k with argpartition. Metadata filters (the
+    Pinecone filter syntax: $eq, $ne, $in, $nin, $gt, $gte, $lt, $lte, $and,
+    $or) are evaluated as boolean masks over columnar metadata.
+    
+    Small segments are merged as they accumulate (each merge at least
+    doubles the merged segment), which keeps the segment count logarithmic
+    in the number of vectors and drops deleted rows.
+    
+    With LOCAL_VECTOR_INDEX=hnsw, namespaces of LOCAL_VECTOR_HNSW_MIN_ROWS
+    vectors or more get an HNSW graph (app/core/hnsw.py) on their first
+    segment. New vectors land in small exhaustively searched segments and
+    a background compaction thread inserts them into the graph once
+    LOCAL_VECTOR_HNSW_BUFFER_ROWS have accumulated. Deletes are tombstones
+    (the graph keeps routing through deleted nodes but never returns them);
+    the graph is rebuilt without them once they exceed
+    LOCAL_VECTOR_COMPACTION_DEAD_RATIO of its rows.
+    
+    With LOCAL_VECTOR_QUANTIZATION=int8 or pq, the background thread also
+    encodes segments of LOCAL_VECTOR_QUANTIZATION_MIN_ROWS or more
+    (app/core/quantization.py). The codes are held in memory and scanned
+    first; only the best VECTOR_QUANTIZATION_RERANK_FACTOR * top_k rows are
+    re-scored on the memory-mapped float32 vectors, so most of the vector
+    data stays on disk.
+    
+    Several processes (API workers, Celery workers) can share a root. Every
+    write holds the namespace's .lock file (fcntl.flock) from loading the
+    manifest to committing the next one, and the manifest carries a version
+    that readers check (with its mtime) on each access, reopening only the
+    segments they have not seen. Files of dropped segments are removed by
+    the commit that drops them; unreferenced files that no manifest ever
+    listed are left alone for an hour, since another process's compaction
+    may be about to publish them. Compactions of a namespace are serialized
+    across processes by a second lock file, .compact.lock.
+    """
+    
+    _NAMESPACE_PATTERN = re.compile(r"^[A-Za-z0-9_.-]+$")
+    
+    def __init__(self):
+        """Initialize local vector store."""
+        if np is None:
+            raise ImportError("numpy not installed. Install with: pip install numpy")
+        
+        super().__init__()
+        
+        self.root = os.path.realpath(settings.local_vector_store_path)
+        os.makedirs(self.root, exist_ok=True)
+        self.dimension = settings.embedding_dimension
+        self.use_hnsw = settings.local_vector_index == "hnsw"
+        self.quantization = settings.local_vector_quantization
+        # Work for the compaction thread: graph maintenance and/or encoding segments
+        self.compacts = self.use_hnsw or self.quantization != "none"
+        
+        # Namespace -> list of segments; lists are replaced, never mutated
+        self._segments: Dict[str, List[_Segment]] = {}
+        # Namespace -> (manifest stat signature, manifest version) the segments were loaded from
+        self._manifests: Dict[str, tuple] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        
+        # Single background thread so at most one compaction rewrites a namespace at a time
+        self._compactor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="LocalVectorStore-compact")
+        self._compaction_pending: set = set()
+        # Namespace -> names of segments written by a running compaction but not yet published
+        self._unpublished: Dict[str, set] = {}
+        
+        logger.info(
+            f"Using local vector store root: {self.root} "
+            f"({settings.local_vector_index} index, quantization: {self.quantization})"
+        )
+    
+    def close(self) -> None:
+        """Stop the compaction thread; an unfinished compaction is simply not committed."""
+        self._compactor.shutdown(wait=False, cancel_futures=True)
+        super().close()
+    
+    # -- storage layout ----------------------------------------------------
+    
+    def _namespace_dir(self, namespace: str) -> str:
+        """Directory of a namespace; rejects names that are not a single path component."""
+        if not self._NAMESPACE_PATTERN.match(namespace) or namespace in (".", ".."):
+            raise ValueError(f"Invalid namespace: {namespace}")
+        return os.path.join(self.root, namespace)
+    
+    def _thread_lock(self, namespace: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(namespace, threading.Lock())
+    
+    @contextmanager
+    def _lock(self, namespace: str) -> Iterator[None]:
+        """Hold a namespace exclusively against other threads and processes."""
+        with self._thread_lock(namespace), self._file_lock(self._namespace_dir(namespace), ".lock"):
+            yield
+    
+    @staticmethod
+    @contextmanager
+    def _file_lock(directory: str, filename: str) -> Iterator[None]:
+        """
+        flock a lock file in a namespace directory (a no-op without fcntl).
+        
+        A namespace deleted while we waited leaves us locking a removed
+        file, so the lock is taken again on the file now at that path.
+        """
+        if fcntl is None:
+            yield
+            return
+        
+        lock_path = os.path.join(directory, filename)
+        while True:
+            os.makedirs(directory, exist_ok=True)
+            fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                try:
+                    current = os.fstat(fd).st_ino == os.stat(lock_path).st_ino
+                except FileNotFoundError:
+                    current = False
+            except BaseException:
+                os.close(fd)
+                raise
+            if current:
+                break
+            os.close(fd)
+        
+        try:
+            yield
+        finally:
+            # Closing the descriptor releases the flock
+            os.close(fd)
+    
+    @staticmethod
+    def _write_atomic(path: str, write: Callable[[Any], None]) -> None:
+        """Write a file through a temporary file renamed into place."""
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".", suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+    
+    @staticmethod
+    def _manifest_signature(manifest_path: str) -> Optional[tuple]:
+        """Identity of the manifest file on disk (it is replaced, never rewritten), or None if missing."""
+        try:
+            stat = os.stat(manifest_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+    
+    def _load(self, namespace: str) -> List[_Segment]:
+        """
+        Segments of a namespace as of its current manifest.
+        
+        The manifest is checked on every call, so commits by other
+        processes are picked up. Callers that modify the namespace hold
+        _lock(namespace), which makes the result the latest state until they
+        commit.
+        """
+        directory = self._namespace_dir(namespace)
+        manifest_path = os.path.join(directory, "manifest.json")
+        
+        for attempt in range(_MANIFEST_READ_ATTEMPTS):
+            signature = self._manifest_signature(manifest_path)
+            loaded = self._manifests.get(namespace)
+            cached = self._segments.get(namespace)
+            if loaded is not None and loaded[0] == signature and cached is not None:
+                return cached
+            if signature is None:
+                segments, version = [], 0
+            else:
+                try:
+                    segments, version = self._read_manifest(namespace, directory, manifest_path)
+                except FileNotFoundError:
+                    # A newer commit dropped (and removed) a segment of the manifest we read
+                    if attempt == _MANIFEST_READ_ATTEMPTS - 1:
+                        raise
+                    continue
+            
+            self._segments[namespace] = segments
+            self._manifests[namespace] = (signature, version)
+            return segments
+    
+    def _read_manifest(self, namespace: str, directory: str, manifest_path: str) -> tuple[List[_Segment], int]:
+        """Open the segments listed in a namespace's manifest, reusing those already open."""
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        version = manifest.get("version", 0)
+        loaded = self._manifests.get(namespace)
+        cached = self._segments.get(namespace)
+        if version and loaded is not None and loaded[1] == version and cached is not None:
+            return cached, version
+        
+        opened = {s.name: s for s in cached or []}
+        segments = []
+        for entry in manifest["segments"]:
+            name = entry["name"]
+            # Segment files never change once written; only deletes and codes are added later
+            segment = opened.get(name)
+            if segment is None:
+                vectors = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+                with open(os.path.join(directory, f"{name}.json")) as f:
+                    rows = json.load(f)
+                graph = None
+                if entry.get("graph"):
+                    graph = HnswGraph.from_arrays(
+                        entry["graph"],
+                        np.load(os.path.join(directory, f"{name}.graph.npy"), mmap_mode="r"),
+                        np.load(os.path.join(directory, f"{name}.upper.npy"))
+                    )
+                segment = _Segment(name, vectors, rows["ids"], rows["metadata"], None, graph)
+            
+            alive = np.ones(len(segment.ids), dtype=bool)
+            alive[entry.get("deleted", [])] = False
+            segment = segment.with_alive(alive)
+            if entry.get("quantization") and segment.quantizer is None:
+                segment.quantizer = QUANTIZERS[entry["quantization"]].from_array(
+                    np.load(os.path.join(directory, f"{name}.quant.npy"))
+                )
+                # Codes are the in-memory part of a quantized segment
+                segment.codes = np.load(os.path.join(directory, f"{name}.codes.npy"))
+            segments.append(segment)
+        return segments, version
+    
+    def _commit(self, namespace: str, segments: List[_Segment]) -> None:
+        """
+        Persist the manifest for segments, publish them and remove files of dropped segments.
+        
+        Must be called under _lock(namespace) after _load, so the segments
+        it replaces are the ones in the manifest on disk.
+        """
+        directory = self._namespace_dir(namespace)
+        manifest_path = os.path.join(directory, "manifest.json")
+        previous = self._segments.get(namespace, [])
+        version = (self._manifests.get(namespace) or (None, 0))[1] + 1
+        manifest = {
+            "version": version,
+            "dimension": self.dimension,
+            "segments": [
+                {
+                    "name": s.name,
+                    "deleted": np.flatnonzero(~s.alive).tolist(),
+                    "graph": s.graph.meta() if s.graph is not None else None,
+                    "quantization": s.quantizer.mode if s.quantizer is not None else None
+                }
+                for s in segments
+            ]
+        }
+        self._write_atomic(manifest_path, lambda f: f.write(json.dumps(manifest).encode()))
+        self._segments[namespace] = segments
+        self._manifests[namespace] = (self._manifest_signature(manifest_path), version)
+        
+        with self._locks_guard:
+            referenced = {s.name for s in segments} | self._unpublished.get(namespace, set())
+        dropped = {s.name for s in previous} - referenced
+        orphaned_before = time.time() - _ORPHAN_SEGMENT_SECONDS
+        for filename in os.listdir(directory):
+            stem = filename.split(".", 1)[0]
+            if not stem.startswith("seg-") or stem in referenced:
+                continue
+            path = os.path.join(directory, filename)
+            try:
+                if stem in dropped or os.path.getmtime(path) < orphaned_before:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+    
+    def _write_segment(
+        self,
+        directory: str,
+        vectors: Any,
+        ids: List[str],
+        metadata: List[Dict[str, Any]],
+        alive: Optional[Any] = None,
+        graph: Optional[HnswGraph] = None,
+        unpublished: Optional[set] = None
+    ) -> _Segment:
+        """
+        Write a new segment (and its graph) to disk and open it memory-mapped.
+        
+        The name is added to unpublished before any file is written, so
+        commits racing with a compaction do not clean the files up.
+        """
+        name = f"seg-{time.time_ns():x}-{secrets.token_hex(4)}"
+        if unpublished is not None:
+            with self._locks_guard:
+                unpublished.add(name)
+        self._write_atomic(os.path.join(directory, f"{name}.npy"), lambda f: np.save(f, vectors))
+        self._write_atomic(
+            os.path.join(directory, f"{name}.json"),
+            lambda f: f.write(json.dumps({"ids": ids, "metadata": metadata}, default=str).encode())
+        )
+        if graph is not None:
+            self._write_atomic(
+                os.path.join(directory, f"{name}.graph.npy"),
+                lambda f: np.save(f, graph.layer0[:graph.count])
+            )
+            self._write_atomic(os.path.join(directory, f"{name}.upper.npy"), lambda f: np.save(f, graph.upper_array()))
+        
+        mapped = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+        if alive is None:
+            alive = np.ones(len(ids), dtype=bool)
+        return _Segment(name, mapped, ids, metadata, alive, graph)
+    
+    def _merge(
+        self,
+        directory: str,
+        segments: List[_Segment],
+        unpublished: Optional[set] = None
+    ) -> List[_Segment]:
+        """Merge trailing segments while the newer one is at least half the size of the one before."""
+        segments = list(segments)
+        while len(segments) >= 2 and segments[-2].graph is None \
+                and segments[-1].live_count * 2 >= segments[-2].live_count:
+            older, newer = segments[-2], segments[-1]
+            vectors, ids, metadata = self._live_rows([older, newer])
+            segments[-2:] = [self._write_segment(directory, vectors, ids, metadata, unpublished=unpublished)]
+        return [s for s in segments if s.live_count or s.graph is not None]
+    
+    def _live_rows(self, segments: List[_Segment]) -> tuple[Any, List[str], List[Dict[str, Any]]]:
+        """Vectors, ids and metadata of the live rows of segments, in order."""
+        parts = [s for s in segments if s.live_count]
+        vectors = np.concatenate([s.vectors[s.alive] for s in parts]) if parts \
+            else np.empty((0, self.dimension), dtype=np.float32)
+        ids = [i for s in parts for i, keep in zip(s.ids, s.alive) if keep]
+        metadata = [m for s in parts for m, keep in zip(s.metadata, s.alive) if keep]
+        return vectors, ids, metadata
+    
+    @staticmethod
+    def _without(segments: List[_Segment], vector_ids: set) -> tuple[List[_Segment], int]:
+        """Copies of segments with vector_ids marked deleted, and the number of rows deleted."""
+        result = []
+        deleted = 0
+        for segment in segments:
+            hits = [row for row, vid in enumerate(segment.ids) if vid in vector_ids and segment.alive[row]]
+            if hits:
+                alive = segment.alive.copy()
+                alive[hits] = False
+                deleted += len(hits)
+                segment = segment.with_alive(alive)
+            result.append(segment)
+        return result, deleted
+    
+    # -- writes ------------------------------------------------------------
+    
+    def _upsert_batch(self, vectors: List[tuple], namespace: str) -> None:
+        """Append one batch as a new segment, replacing existing vectors with the same ids."""
+        matrix = np.asarray([v[1] for v in vectors], dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[1] != self.dimension:
+            raise ValueError(f"Expected vectors of dimension {self.dimension}, got shape {matrix.shape}")
+        
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        
+        # Last occurrence of an id within the batch wins
+        latest = {str(v[0]): row for row, v in enumerate(vectors)}
+        rows = sorted(latest.values())
+        ids = [str(vectors[row][0]) for row in rows]
+        metadata = [(vectors[row][2] if len(vectors[row]) > 2 else None) or {} for row in rows]
+        
+        directory = self._namespace_dir(namespace)
+        with self._lock(namespace):
+            segments, _ = self._without(self._load(namespace), set(ids))
+            segments.append(self._write_segment(directory, matrix[rows], ids, metadata))
+            if self.use_hnsw:
+                # Merging is left to the compaction thread
+                self._commit(namespace, segments)
+            else:
+                self._commit(namespace, self._merge(directory, segments))
+        
+        if self.compacts:
+            self._schedule_compaction(namespace)
+    
+    def _delete(self, vector_ids: List[str], namespace: str) -> int:
+        if not os.path.isdir(self._namespace_dir(namespace)):
+            return 0
+        with self._lock(namespace):
+            segments, deleted = self._without(self._load(namespace), set(vector_ids))
+            if deleted:
+                self._commit(namespace, [s for s in segments if s.live_count or s.graph is not None])
+        
+        if deleted and self.compacts:
+            self._schedule_compaction(namespace)
+        return deleted
+    
+    async def delete(self, vector_ids: List[str], namespace: str) -> bool:
+        """Delete vectors by IDs."""
+        try:
+            deleted = await self._run_blocking(self._delete, vector_ids, namespace)
+            logger.info(f"Deleted {deleted} vectors from namespace {namespace}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error deleting vectors from local vector store: {str(e)}")
+            return False
+    
+    def _delete_namespace(self, namespace: str) -> None:
+        directory = self._namespace_dir(namespace)
+        with self._lock(namespace):
+            self._manifests.pop(namespace, None)
+            self._segments.pop(namespace, None)
+            shutil.rmtree(directory, ignore_errors=True)
+    
+    async def delete_namespace(self, namespace: str) -> bool:
+        """Delete an entire namespace and its files."""
+        try:
+            await self._run_blocking(self._delete_namespace, namespace)
+            logger.info(f"Deleted namespace {namespace}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error deleting namespace from local vector store: {str(e)}")
+            return False
+    
+    # -- compaction (HNSW mode) --------------------------------------------
+    
+    def _schedule_compaction(self, namespace: str) -> None:
+        """Queue a background compaction of namespace unless one is already queued."""
+        with self._locks_guard:
+            if namespace in self._compaction_pending:
+                return
+            self._compaction_pending.add(namespace)
+        try:
+            self._compactor.submit(self._compact_safe, namespace)
+        except RuntimeError:
+            # Store is closing
+            with self._locks_guard:
+                self._compaction_pending.discard(namespace)
+    
+    def _compact_safe(self, namespace: str) -> None:
+        with self._locks_guard:
+            self._compaction_pending.discard(namespace)
+        try:
+            directory = self._namespace_dir(namespace)
+            if not os.path.isdir(directory):
+                return
+            # One compaction per namespace across processes; waiting for another one means starting from its result
+            with self._file_lock(directory, ".compact.lock"):
+                if self.use_hnsw:
+                    self._compact(namespace)
+                if self.quantization != "none":
+                    self._quantize(namespace)
+        except Exception as e:
+            logger.error(f"Compaction of namespace {namespace} failed: {str(e)}", exc_info=True)
+    
+    def _compact(self, namespace: str) -> None:
+        """
+        Bring a namespace's graph up to date.
+        
+        Builds the graph segment once the namespace is large enough, inserts
+        accumulated buffer segments into it, rebuilds it when too many of its
+        rows are tombstones, and otherwise just merges small buffer segments.
+        The expensive work runs without the namespace lock; deletes that
+        arrive meanwhile are carried over when the result is committed.
+        """
+        directory = self._namespace_dir(namespace)
+        snapshot = self._load(namespace)
+        if not snapshot:
+            return
+        
+        main = snapshot[0] if snapshot[0].graph is not None else None
+        buffers = snapshot[1:] if main is not None else snapshot
+        buffer_rows = sum(s.live_count for s in buffers)
+        total_rows = buffer_rows + (main.live_count if main is not None else 0)
+        
+        if main is None:
+            rebuild = total_rows >= settings.local_vector_hnsw_min_rows
+        else:
+            rebuild = len(main.ids) - main.live_count > settings.local_vector_compaction_dead_ratio * len(main.ids)
+        append = main is not None and not rebuild and buffer_rows >= settings.local_vector_hnsw_buffer_rows
+        
+        if not rebuild and not append:
+            # Small merges only; cheap enough to run under the lock like flat mode does inline
+            with self._lock(namespace):
+                segments = self._load(namespace)
+                head = segments[:1] if segments and segments[0].graph is not None else []
+                merged = self._merge(directory, segments[len(head):])
+                if [s.name for s in merged] != [s.name for s in segments[len(head):]]:
+                    self._commit(namespace, head + merged)
+            return
+        
+        unpublished: set = set()
+        with self._locks_guard:
+            self._unpublished[namespace] = unpublished
+        try:
+            start = time.perf_counter()
+            compacted = self._build(directory, main, buffers, snapshot, rebuild, unpublished)
+            logger.info(
+                f"Compacted namespace {namespace}: {'rebuilt' if rebuild else 'extended'} graph to "
+                f"{len(compacted.ids)} nodes in {time.perf_counter() - start:.1f}s"
+            )
+            self._publish(namespace, snapshot, compacted, keep_dead_rows=not rebuild)
+        finally:
+            with self._locks_guard:
+                self._unpublished.pop(namespace, None)
+    
+    def _build(
+        self,
+        directory: str,
+        main: Optional[_Segment],
+        buffers: List[_Segment],
+        snapshot: List[_Segment],
+        rebuild: bool,
+        unpublished: set
+    ) -> _Segment:
+        """Write the graph segment replacing snapshot: rebuilt from live rows, or main extended with buffers."""
+        if rebuild:
+            vectors, ids, metadata = self._live_rows(snapshot)
+            alive = np.ones(len(ids), dtype=bool)
+            graph = HnswGraph(
+                m=settings.local_vector_hnsw_m,
+                ef_construction=settings.local_vector_hnsw_ef_construction
+            )
+        else:
+            # Keep main's rows (tombstones included) so existing node ids stay valid
+            new_vectors, new_ids, new_metadata = self._live_rows(buffers)
+            vectors = np.concatenate([np.asarray(main.vectors), new_vectors])
+            ids = main.ids + new_ids
+            metadata = main.metadata + new_metadata
+            alive = np.concatenate([main.alive, np.ones(len(new_ids), dtype=bool)])
+            graph = main.graph.copy()
+        
+        graph.add(vectors, len(ids))
+        return self._write_segment(directory, vectors, ids, metadata, alive, graph, unpublished)
+    
+    def _publish(
+        self,
+        namespace: str,
+        consumed: List[_Segment],
+        compacted: _Segment,
+        keep_dead_rows: bool = False
+    ) -> None:
+        """
+        Swap consumed segments for the compacted segment built from them.
+        
+        Rows of compacted are the live rows of consumed in order (all rows of
+        the first one, with keep_dead_rows). Rows deleted or replaced since
+        the snapshot are marked dead in compacted, and segments added
+        meanwhile are kept after it.
+        """
+        with self._lock(namespace):
+            segments = self._load(namespace)
+            current = {s.name: s for s in segments}
+            
+            alive = compacted.alive.copy()
+            offset = 0
+            for index, before in enumerate(consumed):
+                kept = np.ones(len(before.ids), dtype=bool) if keep_dead_rows and index == 0 else before.alive
+                after = current.get(before.name)
+                # Segments dropped since the snapshot had every row deleted
+                now_alive = after.alive if after is not None else np.zeros(len(before.ids), dtype=bool)
+                alive[offset + np.flatnonzero((before.alive & ~now_alive)[kept])] = False
+                offset += int(kept.sum())
+            
+            consumed_names = {s.name for s in consumed}
+            remaining = [s for s in segments if s.name not in consumed_names]
+            if alive.any():
+                self._commit(namespace, [compacted.with_alive(alive)] + remaining)
+                return
+            
+            # Every row was deleted meanwhile, or another process compacted the same segments first
+            if len(remaining) != len(segments):
+                self._commit(namespace, remaining)
+            directory = self._namespace_dir(namespace)
+            for filename in os.listdir(directory):
+                if filename.split(".", 1)[0] == compacted.name:
+                    os.remove(os.path.join(directory, filename))
+    
+    def _quantize(self, namespace: str) -> None:
+        """Train a quantizer for and encode each large segment that has no codes yet."""
+        directory = self._namespace_dir(namespace)
+        for segment in self._load(namespace):
+            if segment.quantizer is not None or len(segment.ids) < settings.local_vector_quantization_min_rows:
+                continue
+            
+            start = time.perf_counter()
+            if self.quantization == "pq":
+                quantizer = ProductQuantizer.train(segment.vectors, settings.local_vector_pq_subvector_dimension)
+            else:
+                quantizer = ScalarQuantizer.train(segment.vectors)
+            codes = quantizer.encode(segment.vectors)
+            # Files share the segment's name, so they are cleaned up with it
+            self._write_atomic(
+                os.path.join(directory, f"{segment.name}.quant.npy"), lambda f: np.save(f, quantizer.to_array())
+            )
+            self._write_atomic(os.path.join(directory, f"{segment.name}.codes.npy"), lambda f: np.save(f, codes))
+            
+            with self._lock(namespace):
+                segments = list(self._load(namespace))
+                for index, current in enumerate(segments):
+                    if current.name == segment.name:
+                        current = current.with_alive(current.alive)
+                        current.quantizer, current.codes = quantizer, codes
+                        segments[index] = current
+                        self._commit(namespace, segments)
+                        break
+            logger.info(
+                f"Quantized segment {segment.name} of namespace {namespace} ({self.quantization}, "
+                f"{len(segment.ids)} rows, {segment.vectors.nbytes // codes.nbytes}x smaller) "
+                f"in {time.perf_counter() - start:.1f}s"
+            )
+    
+    # -- reads -------------------------------------------------------------
+    
+    def _filter_mask(self, segment: _Segment, filter_dict: Dict[str, Any]) -> Any:
+        """Evaluate a Pinecone-style metadata filter as a boolean mask over a segment's rows."""
+        mask = np.ones(len(segment.ids), dtype=bool)
+        for key, condition in filter_dict.items():
+            if key == "$and":
+                for clause in condition:
+                    mask &= self._filter_mask(segment, clause)
+                continue
+            if key == "$or":
+                any_mask = np.zeros(len(segment.ids), dtype=bool)
+                for clause in condition:
+                    any_mask |= self._filter_mask(segment, clause)
+                mask &= any_mask
+                continue
+            
+            column = segment.column(key)
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            for op, value in condition.items():
+                mask &= self._compare(column, op, value)
+        return mask
+    
+    @staticmethod
+    def _compare(column: Any, op: str, value: Any) -> Any:
+        """Apply one filter operator to a metadata column."""
+        if op in ("$in", "$nin"):
+            hits = np.isin(column, list(value))
+            return hits if op == "$in" else ~hits
+        if op == "$eq":
+            return np.asarray(column == value, dtype=bool)
+        if op == "$ne":
+            return np.asarray(column != value, dtype=bool)
+        
+        compare = {"$gt": np.greater, "$gte": np.greater_equal, "$lt": np.less, "$lte": np.less_equal}.get(op)
+        if compare is None:
+            raise ValueError(f"Unsupported filter operator: {op}")
+        if column.dtype == np.float64:
+            with np.errstate(invalid="ignore"):
+                return compare(column, value)
+        # Mixed-type column: compare only the values of a comparable type
+        return np.fromiter(
+            (isinstance(v, type(value)) and bool(compare(v, value)) for v in column),
+            dtype=bool,
+            count=len(column)
+        )
+    
+    def _exact_top_k(self, segment: _Segment, query: Any, top_k: int, mask: Any) -> List[tuple[float, int]]:
+        """
+        Exhaustive top-k over the rows of a segment selected by mask.
+        
+        Quantized segments are scanned on their codes; the best candidates
+        are then re-scored on the full-precision vectors.
+        """
+        rows = np.flatnonzero(mask)
+        if not len(rows):
+            return []
+        # Score only the selected rows when that avoids touching most of the segment
+        subset = len(rows) * 4 < len(mask)
+        
+        candidates = top_k * settings.vector_quantization_rerank_factor
+        if segment.codes is not None and self.quantization != "none" and len(rows) > candidates:
+            approximate = segment.quantizer.scores(segment.codes, query, rows if subset else None)
+            if not subset:
+                approximate = approximate[rows]
+            # Sorted so the re-scored rows are read from the memory map in file order
+            rows = np.sort(rows[np.argpartition(-approximate, candidates - 1)[:candidates]])
+            scores = segment.vectors[rows] @ query
+        else:
+            scores = segment.vectors[rows] @ query if subset else (segment.vectors @ query)[rows]
+        
+        k = min(top_k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return list(zip(scores[top].tolist(), rows[top].tolist()))
+    
+    def _query(
+        self,
+        query_vector: List[float],
+        namespace: str,
+        top_k: int,
+        filter_dict: Optional[Dict[str, Any]],
+        ef_search: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        segments = self._load(namespace)
+        if not segments or top_k <= 0:
+            return []
+        
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+        ef = max(ef_search or settings.local_vector_hnsw_ef_search, top_k)
+        
+        candidates = []
+        for index, segment in enumerate(segments):
+            mask = segment.alive
+            if filter_dict:
+                mask = mask & self._filter_mask(segment, filter_dict)
+            
+            # Highly selective masks are cheaper (and exact) to scan than to route around in the graph
+            if segment.graph is not None and int(mask.sum()) > ef * 50:
+                allowed = None if mask.all() else mask
+                found = segment.graph.search(segment.vectors, query, top_k, ef, allowed)
+            else:
+                found = self._exact_top_k(segment, query, top_k, mask)
+            candidates.extend((score, index, row) for score, row in found)
+        
+        return [
+            {
+                "id": segments[index].ids[row],
+                "score": float(score),
+                "metadata": segments[index].metadata[row]
+            }
+            for score, index, row in heapq.nlargest(top_k, candidates)
+        ]
+    
+    async def query(
+        self,
+        query_vector: List[float],
+        namespace: str,
+        top_k: int = 10,
+        filter_dict: Optional[Dict[str, Any]] = None,
+        ef_search: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Query the local store for similar vectors (cosine similarity)."""
+        try:
+            results = await self._run_blocking(
+                self._query, query_vector, namespace, top_k, filter_dict, ef_search
+            )
+            logger.info(f"Query returned {len(results)} results from namespace {namespace}")
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error querying local vector store: {str(e)}")
+            raise
+    
+    async def get_index_stats(self, namespace: Optional[str] = None) -> Dict[str, Any]:
+        """Get local vector store statistics."""
+        def _stats() -> Dict[str, Any]:
+            if namespace:
+                return {
+                    "namespace": namespace,
+                    "vector_count": sum(s.live_count for s in self._load(namespace))
+                }
+            
+            namespaces = {
+                name: {"vector_count": sum(s.live_count for s in self._load(name))}
+                for name in sorted(os.listdir(self.root))
+                if os.path.isdir(os.path.join(self.root, name)) and self._NAMESPACE_PATTERN.match(name)
+            }
+            return {
+                "total_vector_count": sum(ns["vector_count"] for ns in namespaces.values()),
+                "dimension": self.dimension,
+                "namespaces": namespaces
+            }
+        
+        try:
+            return await self._run_blocking(_stats)
+            
+        except Exception as e:
+            logger.error(f"Error getting index stats from local vector store: {str(e)}")
+            raise
+
+
+class PgVectorStore(BaseVectorStore):
+    """
+    Postgres vector store on the pgvector extension.
+    
+    Vectors live in the chunk_embeddings table next to files and
+    file_chunks, so there is no extra network hop and filters can be joined
+    against file metadata in SQL. The namespace must be a project ID.
+    
+    Batches are ingested with COPY into a temporary table followed by one
+    INSERT ... ON CONFLICT, instead of a statement per vector. Once a project
+    holds PGVECTOR_INDEX_MIN_ROWS vectors, a partial HNSW or IVFFlat index
+    covering only that project is built (CREATE INDEX CONCURRENTLY), so each
+    project's searches walk a graph of its own vectors.
+    
+    The project indexes are managed here rather than by Alembic (see the
+    module docstring). A CONCURRENTLY build that fails or is interrupted
+    leaves an INVALID index behind, which queries never use but every write
+    still maintains. A failed build drops its index right away. An index left
+    by a worker that died is found by the project's next upsert, which drops
+    and rebuilds it. get_index_stats reports each project's index state.
+    
+    Filters use the Pinecone syntax over vector metadata; keys prefixed with
+    "file." are matched against files.file_metadata instead.
+    
+    With PGVECTOR_QUANTIZATION, the index is built over halfvec or binary
+    quantized vectors (expression indexes), which shrinks what must stay in
+    shared buffers 2x or 32x. Searches walk the quantized index for
+    VECTOR_QUANTIZATION_RERANK_FACTOR * top_k candidates and re-rank them by
+    the full-precision embedding column.
+    """
+    
+    def __init__(self):
+        """Initialize pgvector store on the application database engine."""
+        super().__init__()
+        
+        from app.database import engine
+        from app.models.chunk_embedding import ChunkEmbedding
+        
+        self.engine = engine
+        self.table = ChunkEmbedding.__table__
+        self.dimension = settings.embedding_dimension
+        self._indexed_projects: set = set()
+        self._check_schema()
+        
+        logger.info(
+            f"Using pgvector store ({settings.pgvector_index_type} indexes, "
+            f"quantization: {settings.pgvector_quantization})"
+        )
+    
+    def _check_schema(self) -> None:
+        """
+        Fail fast if chunk_embeddings does not exist or its vectors are not EMBEDDING_DIMENSION wide.
+        
+        The width is set by the migration; every upsert would be rejected
+        after a model change without one.
+        
+        Raises:
+            ValueError: If the table is missing (the migration skips it where
+                the vector extension is unavailable) or has another dimension
+        """
+        with self.engine.connect() as connection:
+            column_type = connection.execute(text(
+                "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+                "WHERE attrelid = to_regclass('chunk_embeddings') AND attname = 'embedding' AND NOT attisdropped"
+            )).scalar()
+        if column_type is None:
+            raise ValueError(
+                "chunk_embeddings table not found. Install the pgvector extension, then re-run its migration: "
+                "alembic downgrade a3c5e7f9b1d2 && alembic upgrade head"
+            )
+        if column_type != f"vector({self.dimension})":
+            raise ValueError(
+                f"chunk_embeddings.embedding is {column_type} but EMBEDDING_DIMENSION is {self.dimension}. "
+                "Changing the dimension needs a migration that alters the column, and re-embedding"
+            )
+    
+    @staticmethod
+    def _project_id(namespace: str) -> UUID:
+        """Parse a namespace as a project ID."""
+        try:
+            return UUID(namespace)
+        except ValueError:
+            raise ValueError(f"pgvector namespaces must be project IDs, got: {namespace}")
+    
+    # Index name infix and indexed expression per PGVECTOR_QUANTIZATION
+    _INDEX_KINDS = {
+        "none": ("ann", "embedding vector_cosine_ops"),
+        "halfvec": ("halfvec", "(embedding::halfvec({dimension})) halfvec_cosine_ops"),
+        "binary": ("binary", "(binary_quantize(embedding)::bit({dimension})) bit_hamming_ops"),
+    }
+    
+    @classmethod
+    def _index_name(cls, project_id: UUID, quantization: Optional[str] = None) -> str:
+        infix = cls._INDEX_KINDS[quantization or settings.pgvector_quantization][0]
+        return f"idx_chunk_embeddings_{infix}_{project_id.hex}"
+    
+    # -- writes ------------------------------------------------------------
+    
+    @staticmethod
+    def _optional_uuid(value: Any) -> Optional[str]:
+        """Metadata value as a UUID string, or None if it is not one."""
+        try:
+            return str(UUID(str(value))) if value else None
+        except ValueError:
+            return None
+    
+    def _upsert_batch(self, vectors: List[tuple], namespace: str) -> None:
+        """COPY one batch into a temporary table and merge it into chunk_embeddings."""
+        from app.models.chunk_embedding import format_vector
+        
+        project_id = str(self._project_id(namespace))
+        for vector in vectors:
+            if len(vector[1]) != self.dimension:
+                raise ValueError(f"Expected vectors of dimension {self.dimension}, got {len(vector[1])}")
+        
+        # Last occurrence of an id within the batch wins
+        latest = {str(v[0]): v for v in vectors}
+        
+        raw = self.engine.raw_connection()
+        try:
+            with raw.cursor() as cursor:
+                cursor.execute(
+                    "CREATE TEMP TABLE chunk_embeddings_stage "
+                    "(LIKE chunk_embeddings INCLUDING DEFAULTS) ON COMMIT DROP"
+                )
+                with cursor.copy(
+                    "COPY chunk_embeddings_stage "
+                    "(id, project_id, file_id, chunk_id, vector_id, embedding, vector_metadata) FROM STDIN"
+                ) as copy:
+                    for vector_id, vector in latest.items():
+                        metadata = (vector[2] if len(vector) > 2 else None) or {}
+                        copy.write_row((
+                            str(uuid4()),
+                            project_id,
+                            self._optional_uuid(metadata.get("file_id")),
+                            self._optional_uuid(metadata.get("chunk_id")),
+                            vector_id,
+                            format_vector(vector[1]),
+                            json.dumps(metadata, default=str)
+                        ))
+                cursor.execute(
+                    "INSERT INTO chunk_embeddings "
+                    "(id, project_id, file_id, chunk_id, vector_id, embedding, vector_metadata) "
+                    "SELECT id, project_id, file_id, chunk_id, vector_id, embedding, vector_metadata "
+                    "FROM chunk_embeddings_stage "
+                    "ON CONFLICT (project_id, vector_id) DO UPDATE SET "
+                    "file_id = EXCLUDED.file_id, chunk_id = EXCLUDED.chunk_id, "
+                    "embedding = EXCLUDED.embedding, vector_metadata = EXCLUDED.vector_metadata"
+                )
+            raw.commit()
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
+    
+    async def upsert_vectors(
+        self,
+        vectors: List[tuple],
+        namespace: str,
+        metadata: Optional[List[Dict[str, Any]]] = None
+    ) -> List[UpsertBatchResult]:
+        """Upsert vectors, then build the project's ANN index if it has grown large enough."""
+        results = await super().upsert_vectors(vectors, namespace, metadata)
+        try:
+            await self._run_blocking(self._ensure_project_index, self._project_id(namespace))
+        except Exception as e:
+            # Searches still work (exact scan); the next upsert retries
+            logger.warning(f"Could not build ANN index for namespace {namespace}: {str(e)}")
+        return results
+    
+    @staticmethod
+    def _index_state(connection: Any, index_name: str) -> Optional[str]:
+        """
+        State of a project index: None (missing), "valid", "building" or "invalid".
+        
+        A build in progress is INVALID too; pg_stat_progress_create_index
+        tells it apart from one that failed or was interrupted.
+        """
+        row = connection.execute(
+            text(
+                "SELECT i.indisvalid, EXISTS ("
+                "SELECT 1 FROM pg_stat_progress_create_index p WHERE p.index_relid = i.indexrelid"
+                ") FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE c.relname = :name"
+            ),
+            {"name": index_name}
+        ).first()
+        if row is None:
+            return None
+        valid, building = row
+        return "valid" if valid else "building" if building else "invalid"
+    
+    def _drop_indexes(self, index_names: List[str]) -> None:
+        # CONCURRENTLY cannot run inside a transaction block
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            for index_name in index_names:
+                connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}"))
+    
+    def _ensure_project_index(self, project_id: UUID) -> None:
+        """Create the partial ANN index for a project once it has PGVECTOR_INDEX_MIN_ROWS vectors."""
+        if project_id in self._indexed_projects:
+            return
+        
+        index_name = self._index_name(project_id)
+        with self.engine.connect() as connection:
+            state = self._index_state(connection, index_name)
+            if state == "valid":
+                self._indexed_projects.add(project_id)
+                return
+            if state == "building":
+                # Another worker is building it
+                return
+            
+            count = connection.execute(
+                select(func.count()).select_from(self.table).where(self.table.c.project_id == project_id)
+            ).scalar()
+        
+        if state == "invalid":
+            logger.warning(f"Dropping invalid index {index_name} left by an interrupted build")
+            self._drop_indexes([index_name])
+        
+        if count < settings.pgvector_index_min_rows:
+            return
+        
+        column = self._INDEX_KINDS[settings.pgvector_quantization][1].format(dimension=self.dimension)
+        if settings.pgvector_index_type == "ivfflat":
+            # Lists are fixed at build time; sized for the rows present now
+            lists = max(1, min(settings.pgvector_ivfflat_lists, count // 39))
+            method = f"ivfflat ({column}) WITH (lists = {lists})"
+        else:
+            method = (
+                f"hnsw ({column}) WITH "
+                f"(m = {settings.pgvector_hnsw_m}, ef_construction = {settings.pgvector_hnsw_ef_construction})"
+            )
+        
+        # CONCURRENTLY cannot run inside a transaction block
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            logger.info(f"Building {settings.pgvector_index_type} index for project {project_id} ({count} vectors)")
+            try:
+                connection.execute(text(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} ON chunk_embeddings "
+                    f"USING {method} WHERE project_id = '{project_id}'"
+                ))
+            except Exception:
+                logger.error(f"Building index {index_name} failed; dropping the invalid index it left")
+                try:
+                    self._drop_indexes([index_name])
+                except Exception as e:
+                    # The next upsert into the project finds it INVALID and retries the drop
+                    logger.error(f"Could not drop invalid index {index_name}: {str(e)}")
+                raise
+        self._indexed_projects.add(project_id)
+    
+    def _delete(self, vector_ids: List[str], namespace: str) -> int:
+        with self.engine.begin() as connection:
+            return connection.execute(
+                delete(self.table).where(
+                    self.table.c.project_id == self._project_id(namespace),
+                    self.table.c.vector_id.in_(vector_ids)
+                )
+            ).rowcount
+    
+    async def delete(self, vector_ids: List[str], namespace: str) -> bool:
+        """Delete vectors by IDs."""
+        try:
+            deleted = await self._run_blocking(self._delete, vector_ids, namespace)
+            logger.info(f"Deleted {deleted} vectors from namespace {namespace}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error deleting vectors from pgvector: {str(e)}")
+            return False
+    
+    def _delete_namespace(self, namespace: str) -> None:
+        project_id = self._project_id(namespace)
+        self._drop_indexes([self._index_name(project_id, quantization) for quantization in self._INDEX_KINDS])
+        with self.engine.begin() as connection:
+            connection.execute(delete(self.table).where(self.table.c.project_id == project_id))
+        self._indexed_projects.discard(project_id)
+    
+    async def delete_namespace(self, namespace: str) -> bool:
+        """Delete all vectors of a project and its ANN index."""
+        try:
+            await self._run_blocking(self._delete_namespace, namespace)
+            logger.info(f"Deleted namespace {namespace}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error deleting namespace from pgvector: {str(e)}")
+            return False
+    
+    # -- reads -------------------------------------------------------------
+    
+    def _filter_clause(self, filter_dict: Dict[str, Any], files: Any) -> Any:
+        """Translate a Pinecone-style metadata filter into a SQL expression."""
+        clauses = []
+        for key, condition in filter_dict.items():
+            if key == "$and":
+                clauses.append(and_(*(self._filter_clause(c, files) for c in condition)))
+                continue
+            if key == "$or":
+                clauses.append(or_(*(self._filter_clause(c, files) for c in condition)))
+                continue
+            
+            if key.startswith("file."):
+                document, field = files.c.file_metadata, key[len("file."):]
+            else:
+                document, field = self.table.c.vector_metadata, key
+            
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            for op, value in condition.items():
+                clauses.append(self._compare(document, field, op, value))
+        return and_(true(), *clauses)
+    
+    @staticmethod
+    def _compare(document: Any, field: str, op: str, value: Any) -> Any:
+        """One filter operator on a JSONB field; equality uses containment so GIN indexes apply."""
+        if op == "$eq":
+            return document.contains({field: value})
+        if op == "$ne":
+            return not_(document.contains({field: value}))
+        if op in ("$in", "$nin"):
+            hits = or_(false(), *(document.contains({field: v}) for v in value))
+            return hits if op == "$in" else not_(hits)
+        
+        compare = {"$gt": "__gt__", "$gte": "__ge__", "$lt": "__lt__", "$lte": "__le__"}.get(op)
+        if compare is None:
+            raise ValueError(f"Unsupported filter operator: {op}")
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            # Only compare numbers against numeric JSON values
+            field_value = case(
+                (func.jsonb_typeof(document[field]) == "number", document[field].astext.cast(Numeric)),
+                else_=null()
+            )
+            return getattr(field_value, compare)(value)
+        return getattr(document[field].astext, compare)(str(value))
+    
+    def _query(
+        self,
+        query_vector: List[float],
+        namespace: str,
+        top_k: int,
+        filter_dict: Optional[Dict[str, Any]],
+        ef_search: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        from app.models.chunk_embedding import HalfVector
+        from app.models.file import File
+        
+        project_id = self._project_id(namespace)
+        embedding = self.table.c.embedding
+        distance = embedding.cosine_distance(cast(query_vector, embedding.type))
+        
+        statement = select(self.table.c.vector_id, distance.label("distance"), self.table.c.vector_metadata)
+        statement = statement.where(self.table.c.project_id == project_id)
+        if filter_dict:
+            files = File.__table__
+            if any(k.startswith("file.") for k in _filter_keys(filter_dict)):
+                statement = statement.join(files, files.c.id == self.table.c.file_id)
+            statement = statement.where(self._filter_clause(filter_dict, files))
+        
+        limit = top_k
+        if settings.pgvector_quantization == "none":
+            statement = statement.order_by(distance).limit(top_k)
+        else:
+            # Order by the indexed expression so the quantized index is used, then re-rank exactly
+            if settings.pgvector_quantization == "halfvec":
+                half = HalfVector(self.dimension)
+                approximate = cast(embedding, half).cosine_distance(cast(query_vector, half))
+            else:
+                bits = BIT(self.dimension)
+                approximate = cast(func.binary_quantize(embedding), bits).op("<~>", return_type=Float)(
+                    cast(func.binary_quantize(cast(query_vector, embedding.type)), bits)
+                )
+            limit = top_k * settings.vector_quantization_rerank_factor
+            candidates = statement.order_by(approximate).limit(limit).subquery()
+            statement = select(candidates).order_by(candidates.c.distance).limit(top_k)
+        
+        with self.engine.begin() as connection:
+            # Search breadth for this transaction only
+            if settings.pgvector_index_type == "ivfflat":
+                connection.execute(text(f"SET LOCAL ivfflat.probes = {int(settings.pgvector_ivfflat_probes)}"))
+            else:
+                # hnsw.ef_search is capped at 1000 by pgvector
+                ef_search = min(max(ef_search or settings.pgvector_hnsw_ef_search, limit), 1000)
+                connection.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+            rows = connection.execute(statement).all()
+        
+        return [
+            {"id": row.vector_id, "score": 1.0 - float(row.distance), "metadata": row.vector_metadata or {}}
+            for row in rows
+        ]
+    
+    async def query(
+        self,
+        query_vector: List[float],
+        namespace: str,
+        top_k: int = 10,
+        filter_dict: Optional[Dict[str, Any]] = None,
+        ef_search: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Query pgvector for similar vectors (cosine similarity)."""
+        try:
+            results = await self._run_blocking(
+                self._query, query_vector, namespace, top_k, filter_dict, ef_search
+            )
+            logger.info(f"Query returned {len(results)} results from namespace {namespace}")
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error querying pgvector: {str(e)}")
+            raise
+    
+    async def get_index_stats(self, namespace: Optional[str] = None) -> Dict[str, Any]:
+        """Get pgvector statistics."""
+        def _stats() -> Dict[str, Any]:
+            statement = select(self.table.c.project_id, func.count()).group_by(self.table.c.project_id)
+            if namespace:
+                statement = statement.where(self.table.c.project_id == self._project_id(namespace))
+            with self.engine.connect() as connection:
+                counts = {str(project_id): count for project_id, count in connection.execute(statement)}
+            
+            if namespace:
+                with self.engine.connect() as connection:
+                    index_state = self._index_state(connection, self._index_name(self._project_id(namespace)))
+                return {
+                    "namespace": namespace,
+                    "vector_count": counts.get(namespace, 0),
+                    "ann_index": index_state
+                }
+            return {
+                "total_vector_count": sum(counts.values()),
+                "dimension": self.dimension,
+                "namespaces": {ns: {"vector_count": count} for ns, count in counts.items()}
+            }
+        
+        try:
+            return await self._run_blocking(_stats)
+            
+        except Exception as e:
+            logger.error(f"Error getting index stats from pgvector: {str(e)}")
+            raise
+
+
+def _filter_keys(filter_dict: Dict[str, Any]) -> Iterator[str]:
+    """All field names referenced by a Pinecone-style filter."""
+    for key, condition in filter_dict.items():
+        if key in ("$and", "$or"):
+            for clause in condition:
+                yield from _filter_keys(clause)
+        else:
+            yield key
+
+
+def _create_pinecone_client():
+    """
+    Build a Pinecone client for the configured transport.
+    
+    PINECONE_TRANSPORT=grpc uses the gRPC data plane (requires the
+    pinecone-client[grpc] extra); the default is pooled HTTP.
+    """
+    if settings.pinecone_transport == "grpc":
+        from pinecone.grpc import PineconeGRPC
+        return PineconeGRPC(api_key=settings.pinecone_api_key)
+    
+    from pinecone import Pinecone
+    return Pinecone(api_key=settings.pinecone_api_key, pool_threads=settings.pinecone_pool_threads)
+
+
+def provision_pinecone_index() -> str:
+    """
+    Create the Pinecone index if it does not exist yet.
+    
+    This is the only control-plane work the application does. It runs once
+    at API startup (PINECONE_PROVISION_ON_STARTUP) instead of every time a
+    vector store is built, and blocks until the index is ready.
+    
+    Returns:
+        Host of the index; set it as PINECONE_INDEX_HOST to skip the
+        host lookup in every process
+    """
+    from pinecone import Pinecone, ServerlessSpec
+    
+    pc = Pinecone(api_key=settings.pinecone_api_key)
+    index_name = settings.pinecone_index_name
+    
+    existing_indexes = [idx['name'] for idx in pc.list_indexes()]
+    if index_name not in existing_indexes:
+        logger.info(f"Creating Pinecone index: {index_name}")
+        pc.create_index(
+            name=index_name,
+            dimension=settings.embedding_dimension,
+            metric='cosine',
+            spec=ServerlessSpec(
+                cloud='aws',
+                region='us-east-1'
+            )
+        )
+        logger.info(f"Created Pinecone index: {index_name}")
+    
+    host = pc.describe_index(index_name).host
+    logger.info(f"Pinecone index {index_name} is ready at {host}")
+    return host
+
+
+# Process-wide vector store (see get_vector_store)
+_vector_store: Optional[BaseVectorStore] = None
+_vector_store_pid: Optional[int] = None
+_vector_store_lock = threading.Lock()
+
+
+def _create_vector_store() -> BaseVectorStore:
+    """
+    Build a new vector store for the configured backend.
+    
+    VECTOR_STORE_BACKEND selects a backend explicitly. When it is unset,
+    Pinecone is used if PINECONE_API_KEY is set.
+    Can be extended to support other vector stores (Weaviate, Qdrant, pgvector, etc.)
+    """
+    if settings.vector_store_backend == "local":
+        logger.info("Using local vector store")
+        return LocalVectorStore()
+    
+    if settings.vector_store_backend == "pgvector":
+        logger.info("Using pgvector store")
+        return PgVectorStore()
+    
+    if settings.vector_store_backend == "pinecone" or settings.pinecone_api_key:
+        logger.info("Using Pinecone vector store")
+        return PineconeVectorStore()
+    
+    raise ValueError(
+        "No vector store configured. Please set PINECONE_API_KEY in your .env file, "
+        "or VECTOR_STORE_BACKEND=local / pgvector to keep vectors in-process or in Postgres"
+    )
+
+
 def get_vector_store() -> BaseVectorStore:
     """
-    Factory function to get the appropriate vector store client.
-    Currently returns Pinecone client, but can be extended
-    to support other vector stores (Weaviate, Qdrant, pgvector, etc.)
+    Get the shared vector store for this process.
+    
+    The client and index handle are created lazily on first use and reused
+    afterwards, so data-plane calls never wait on a control-plane round trip.
+    Forked children (Celery prefork workers) build their own because
+    connection pools cannot be shared across processes.
     """
-    return PineconeVectorStore()
+    global _vector_store, _vector_store_pid
+    
+    pid = os.getpid()
+    store = _vector_store
+    if store is not None and _vector_store_pid == pid:
+        return store
+    
+    with _vector_store_lock:
+        if _vector_store is None or _vector_store_pid != pid:
+            _vector_store = _create_vector_store()
+            _vector_store_pid = pid
+        return _vector_store
 
+
+def close_vector_store() -> None:
+    """
+    Close the shared vector store, if one was created in this process.
+    
+    Safe to call multiple times. The next get_vector_store() call
+    creates a fresh client.
+    """
+    global _vector_store, _vector_store_pid
+    
+    with _vector_store_lock:
+        store = _vector_store
+        owned = _vector_store_pid == os.getpid()
+        _vector_store = None
+        _vector_store_pid = None
+    
+    # A client inherited from a parent process shares its sockets; leave them alone
+    if store is not None and owned:
+        store.close()
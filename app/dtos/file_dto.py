@@ -22,6 +22,25 @@ class FileInitUploadResponseDTO(BaseModel):
         from_attributes = True
 
 
+class FileDownloadUrlsRequestDTO(BaseModel):
+    """Request DTO for signing download URLs of many files at once."""
+    file_ids: List[UUID4] = Field(..., min_length=1, max_length=500, description="Files to sign URLs for")
+    expiry: int = Field(default=3600, ge=60, le=86400, description="URL expiry in seconds")
+
+
+class FileDownloadUrlDTO(BaseModel):
+    """Signed download URL for one file."""
+    file_id: UUID4
+    download_url: str
+    expires_in: int
+
+
+class FileDownloadUrlsResponseDTO(BaseModel):
+    """Response DTO for batch download URL signing."""
+    items: List[FileDownloadUrlDTO]
+    missing: List[UUID4] = Field(default_factory=list, description="Requested files not found or not uploaded yet")
+
+
 class FileConfirmUploadRequestDTO(BaseModel):
     """Request DTO for confirming file upload completion."""
     file_id: UUID4
@@ -53,6 +72,7 @@ class FileStatusResponseDTO(BaseModel):
     
     # File paths
     blob_storage_path: str
+    content_hash: Optional[str] = None
     is_converted: bool
     converted_file_path: Optional[str] = None
     enriched_file_path: Optional[str] = None
@@ -1,7 +1,11 @@
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.database import test_database_connection
+from app.core.storage import close_storage_client
+from app.core.vector_store import close_vector_store, provision_pinecone_index
+from app.core.embeddings import close_embedding_engine
 from app.routes.api import router as api_router
 
 # Create FastAPI application
@@ -30,6 +34,15 @@ async def startup_event():
     """Initialize application on startup."""
     # Test database connection
     test_database_connection()
+    
+    # Create the vector index once here so request and task paths never
+    # make control-plane calls
+    if settings.vector_store_backend in (None, "pinecone") and settings.pinecone_api_key \
+            and settings.pinecone_provision_on_startup:
+        try:
+            await run_in_threadpool(provision_pinecone_index)
+        except Exception as e:
+            print(f"Pinecone index provisioning failed: {str(e)}")
     print(f"{settings.app_name} v{settings.app_version} started successfully!")
     print(f"Environment: {settings.app_env}")
 
@@ -38,6 +51,9 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on application shutdown."""
     print("Application shutting down...")
+    close_storage_client()
+    close_vector_store()
+    close_embedding_engine()
 
 
 @app.get("/")
@@ -9,6 +9,8 @@ from app.models.project import Project
 from app.models.user_organization import UserOrganization, UserRole
 from app.models.file import File, FileStatus
 from app.models.file_chunk import FileChunk
+from app.models.content_blob import ContentBlob
+from app.models.chunk_embedding import ChunkEmbedding
 
 __all__ = [
     "User",
@@ -19,5 +21,7 @@ __all__ = [
     "File",
     "FileStatus",
     "FileChunk",
+    "ContentBlob",
+    "ChunkEmbedding",
 ]
 
@@ -0,0 +1,124 @@
+from sqlalchemy import Column, String, DateTime, Float, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.sql import func
+from sqlalchemy.types import UserDefinedType
+import re
+import uuid
+
+from app.config import settings
+from app.database import Base
+
+
+class Vector(UserDefinedType):
+    """
+    pgvector `vector(n)` column type.
+
+    Values are exchanged in pgvector's text format ("[1,2,3]"), so no extra
+    driver package is needed.
+    """
+
+    cache_ok = True
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+
+    def get_col_spec(self, **kw):
+        return f"VECTOR({self.dimension})"
+
+    def bind_processor(self, dialect):
+        def process(value):
+            if value is None or isinstance(value, str):
+                return value
+            return format_vector(value)
+        return process
+
+    def result_processor(self, dialect, coltype):
+        def process(value):
+            if value is None or not isinstance(value, str):
+                return value
+            return [float(v) for v in value.strip("[]").split(",")] if value != "[]" else []
+        return process
+
+    class comparator_factory(UserDefinedType.Comparator):
+        def cosine_distance(self, other):
+            """Cosine distance (pgvector <=> operator); 0 = same direction."""
+            return self.op("<=>", return_type=Float)(other)
+
+
+class HalfVector(Vector):
+    """pgvector `halfvec(n)` type (half precision); used to cast for quantized indexes."""
+
+    cache_ok = True
+
+    def get_col_spec(self, **kw):
+        return f"HALFVEC({self.dimension})"
+
+
+# Per-project ANN indexes, created and dropped at runtime by PgVectorStore (not part of the model)
+PROJECT_INDEX_PATTERN = re.compile(r"^idx_chunk_embeddings_(ann|halfvec|binary)_[0-9a-f]{32}$")
+
+
+def format_vector(values) -> str:
+    """Format a sequence of floats in pgvector's text format."""
+    return "[" + ",".join(repr(float(v)) for v in values) + "]"
+
+
+class ChunkEmbedding(Base):
+    """
+    Chunk embedding stored in Postgres for the pgvector backend.
+
+    One row per vector upserted through PgVectorStore; project_id is the
+    vector store namespace and vector_id the id used by the caller (the
+    FileChunk.vector_id). file_id and chunk_id are taken from the vector
+    metadata when present, so searches can filter and join against files
+    and file_chunks in SQL. Approximate-search indexes are partial indexes
+    per project, created by PgVectorStore once a project is large enough.
+    """
+
+    __tablename__ = "chunk_embeddings"
+
+    # Primary Key
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    # Foreign Keys
+    project_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("projects.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    file_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("files.id", ondelete="CASCADE"),
+        nullable=True
+    )
+    chunk_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("file_chunks.id", ondelete="CASCADE"),
+        nullable=True
+    )
+
+    # Vector
+    vector_id = Column(String(255), nullable=False)  # ID in the vector store API
+    # Migrated as vector(1536); PgVectorStore checks EMBEDDING_DIMENSION against the actual column
+    embedding = Column(Vector(settings.embedding_dimension), nullable=False)
+
+    # Vector Metadata (what Pinecone stores alongside the vector)
+    vector_metadata = Column(JSONB, nullable=True, default=dict)
+
+    # Timestamps
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+
+    # Indexes
+    __table_args__ = (
+        UniqueConstraint('project_id', 'vector_id', name='uq_chunk_embeddings_project_id_vector_id'),
+        Index('idx_chunk_embeddings_project_id', 'project_id'),
+        Index('idx_chunk_embeddings_file_id', 'file_id'),
+        Index('idx_chunk_embeddings_chunk_id', 'chunk_id'),
+    )
+
+    def __repr__(self):
+        return f"<ChunkEmbedding(id={self.id}, project_id={self.project_id}, vector_id={self.vector_id})>"
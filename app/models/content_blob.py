@@ -0,0 +1,65 @@
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+import uuid
+
+from app.database import Base
+
+
+class ContentBlob(Base):
+    """
+    Content-addressed raw blob shared by every File with the same content.
+
+    Keyed by (organization_id, content_hash) so identical uploads within an
+    organization reuse one stored blob and its pipeline artifacts (converted
+    PDF, enriched JSON). Deduplication never crosses organizations.
+    ref_count tracks how many File rows point at the blob; storage is only
+    deleted once it drops to zero.
+    """
+
+    __tablename__ = "content_blobs"
+
+    # Primary Key
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    # Foreign Key
+    organization_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("organizations.id", ondelete="CASCADE"),
+        nullable=False
+    )
+
+    # Content Identity
+    content_hash = Column(String(64), nullable=False)  # SHA-256 hex digest
+    size = Column(Integer, nullable=False)  # Size in bytes
+
+    # Storage Paths
+    # Path format: {org_id}/_content/{content_hash}/{id}/{stage}/{filename}
+    blob_storage_path = Column(String(1000), nullable=False)  # Path to raw file
+    converted_file_path = Column(String(1000), nullable=True)  # Shared converted PDF (if applicable)
+    enriched_file_path = Column(String(1000), nullable=True)  # Shared enriched JSON
+
+    # Number of File rows referencing this blob
+    ref_count = Column(Integer, default=1, nullable=False)
+
+    # Timestamps
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False
+    )
+
+    # Indexes
+    __table_args__ = (
+        UniqueConstraint('organization_id', 'content_hash', name='uq_content_blobs_organization_id_content_hash'),
+        Index('idx_content_blobs_organization_id', 'organization_id'),
+    )
+
+    def __repr__(self):
+        return f"<ContentBlob(id={self.id}, content_hash={self.content_hash}, ref_count={self.ref_count})>"
@@ -44,6 +44,7 @@ class File(Base):
     original_filename = Column(String(500), nullable=False)
     size = Column(Integer, nullable=False)  # Size in bytes
     mime_type = Column(String(100), nullable=False)
+    content_hash = Column(String(64), nullable=True)  # SHA-256 of raw content (see ContentBlob)
     
     # Foreign Keys
     project_id = Column(
@@ -117,6 +118,7 @@ class File(Base):
         Index('idx_files_uploaded_by_user_id', 'uploaded_by_user_id'),
         Index('idx_files_status', 'status'),
         Index('idx_files_created_at', 'created_at'),
+        Index('idx_files_content_hash', 'content_hash'),
     )
     
     def __repr__(self):
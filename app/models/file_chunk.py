@@ -31,13 +31,16 @@ class FileChunk(Base):
     
     # Storage
     # Chunk text is stored in blob storage, NOT in database for performance/cost
-    # Path format: {org_id}/{project_id}/{file_id}/chunks/chunk_{index}.json
-    blob_storage_path = Column(String(1000), nullable=False)  # REQUIRED: Path to chunk JSON in blob storage
+    # Path format: {org_id}/{project_id}/{file_id}/chunks/chunks_{content_hash[:16]}.jsonl, a bundle shared by all
+    # chunks of the file; the chunk's byte range is chunk_metadata bundle_offset / bundle_length.
+    # Rows without a byte range point at a single-chunk blob (.../chunks/chunk_{index}.json).
+    blob_storage_path = Column(String(1000), nullable=False)  # REQUIRED: Path to chunk bundle in blob storage
     
     # Vector Database Reference
     vector_id = Column(String(255), nullable=True)  # ID in vector database (Pinecone)
     
-    # Chunk Metadata (bounding box, page number, content type, etc.)
+    # Chunk Metadata (page range, headings, content type, bundle byte range, chunk_hash /
+    # section_hashes used to keep the vectors of unchanged chunks across revisions)
     chunk_metadata = Column(JSONB, nullable=True, default=dict)
     
     # Timestamps
@@ -1,10 +1,11 @@
 from typing import List, Optional
 from uuid import UUID
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, contains_eager
 from sqlalchemy import and_, or_, desc
 
 from app.models.file import File, FileStatus
 from app.models.file_chunk import FileChunk
+from app.models.content_blob import ContentBlob
 from app.repositories.base_repository import BaseRepository
 from app.core.tenant_context import TenantContext
 
@@ -68,6 +69,24 @@ class FileRepository(BaseRepository[File]):
                     ))\
                     .first()
     
+    def get_many(self, file_ids: List[UUID], project_id: UUID) -> List[File]:
+        """
+        Get several files of a project in one query.
+        
+        Args:
+            file_ids: File IDs
+            project_id: Project ID for tenant isolation
+            
+        Returns:
+            Files found (in no particular order)
+        """
+        return self.db.query(File)\
+                    .filter(and_(
+                        File.id.in_(file_ids),
+                        File.project_id == project_id
+                    ))\
+                    .all()
+    
     def update_status(
         self,
         file_id: UUID,
@@ -94,6 +113,23 @@ class FileRepository(BaseRepository[File]):
             self.db.refresh(file)
         return file
     
+    def get_with_content_hash(self, project_id: UUID) -> List[File]:
+        """
+        Get all files in a project that record a content hash.
+        
+        Args:
+            project_id: Project ID
+            
+        Returns:
+            List of files
+        """
+        return self.db.query(File)\
+                    .filter(and_(
+                        File.project_id == project_id,
+                        File.content_hash.isnot(None)
+                    ))\
+                    .all()
+    
     def get_by_status(
         self,
         project_id: UUID,
@@ -138,34 +174,131 @@ class FileChunkRepository(BaseRepository[FileChunk]):
                     .order_by(FileChunk.chunk_index)\
                     .all()
     
-    def get_by_vector_ids(self, vector_ids: List[str]) -> List[FileChunk]:
+    def get_by_vector_ids(self, vector_ids: List[str], project_id: Optional[UUID] = None) -> List[FileChunk]:
         """
         Get chunks by their vector IDs.
         
         Args:
             vector_ids: List of vector IDs from Pinecone
+            project_id: Optional project ID; limits chunks to the project's files
+                and loads each chunk's file in the same query
             
         Returns:
             List of matching chunks
         """
-        return self.db.query(FileChunk)\
-                    .filter(FileChunk.vector_id.in_(vector_ids))\
+        query = self.db.query(FileChunk).filter(FileChunk.vector_id.in_(vector_ids))
+        if project_id is not None:
+            query = query.join(FileChunk.file)\
+                         .filter(File.project_id == project_id)\
+                         .options(contains_eager(FileChunk.file))
+        return query.all()
+    
+    def get_embedded_hashes(self, file_id: UUID) -> List[tuple[UUID, str, Optional[str]]]:
+        """
+        Get the id, vector ID and chunk hash of every embedded chunk of a file.
+        
+        Only these columns are loaded, so diffing a large file against its
+        previous chunks does not materialise full rows.
+        
+        Args:
+            file_id: File ID
+            
+        Returns:
+            List of (chunk id, vector ID, chunk_hash) tuples; chunk_hash is None
+            for chunks stored before hashes were recorded
+        """
+        return self.db.query(
+                        FileChunk.id,
+                        FileChunk.vector_id,
+                        FileChunk.chunk_metadata["chunk_hash"].astext
+                    )\
+                    .filter(and_(
+                        FileChunk.file_id == file_id,
+                        FileChunk.vector_id.isnot(None)
+                    ))\
                     .all()
     
-    def bulk_create(self, chunks: List[FileChunk]) -> List[FileChunk]:
+    def get_blob_paths(self, file_id: UUID) -> List[str]:
+        """
+        Get the distinct storage paths (chunk bundles) referenced by a file's chunks.
+        
+        Args:
+            file_id: File ID
+            
+        Returns:
+            List of blob paths
+        """
+        rows = self.db.query(FileChunk.blob_storage_path)\
+                    .filter(FileChunk.file_id == file_id)\
+                    .distinct()\
+                    .all()
+        return [row[0] for row in rows]
+    
+    def delete_unembedded(self, file_id: UUID) -> int:
+        """
+        Delete the chunks of a file that have no vector yet.
+        
+        Args:
+            file_id: File ID
+            
+        Returns:
+            Number of chunks deleted
+        """
+        deleted = self.db.query(FileChunk)\
+                    .filter(and_(
+                        FileChunk.file_id == file_id,
+                        FileChunk.vector_id.is_(None)
+                    ))\
+                    .delete(synchronize_session=False)
+        self.db.commit()
+        return deleted
+    
+    def delete_many(self, chunk_ids: List[UUID], commit: bool = True) -> int:
+        """
+        Delete chunks by ID with one statement.
+        
+        Args:
+            chunk_ids: Chunk IDs
+            commit: Commit immediately (False to include the delete in a larger transaction)
+            
+        Returns:
+            Number of chunks deleted
+        """
+        deleted = self.db.query(FileChunk)\
+                    .filter(FileChunk.id.in_(chunk_ids))\
+                    .delete(synchronize_session=False)
+        if commit:
+            self.db.commit()
+        return deleted
+    
+    def bulk_create(self, chunks: List[FileChunk], commit: bool = True) -> List[FileChunk]:
         """
         Bulk create chunks.
         
         Args:
             chunks: List of FileChunk objects
+            commit: Commit immediately (False to include the insert in a larger transaction)
             
         Returns:
             Created chunks
         """
         self.db.bulk_save_objects(chunks)
-        self.db.commit()
+        if commit:
+            self.db.commit()
         return chunks
     
+    def bulk_update(self, mappings: List[dict], commit: bool = True) -> None:
+        """
+        Bulk update chunks from column dicts.
+        
+        Args:
+            mappings: One dict per chunk with its "id" and the columns to set
+            commit: Commit immediately (False to include the update in a larger transaction)
+        """
+        self.db.bulk_update_mappings(FileChunk, mappings)
+        if commit:
+            self.db.commit()
+    
     def update_vector_id(self, chunk_id: UUID, vector_id: str) -> Optional[FileChunk]:
         """
         Update the vector ID for a chunk after embedding.
@@ -184,3 +317,118 @@ class FileChunkRepository(BaseRepository[FileChunk]):
             self.db.refresh(chunk)
         return chunk
 
+
+class ContentBlobRepository(BaseRepository[ContentBlob]):
+    """
+    Repository for content-addressed blob operations.
+    
+    acquire() and release() lock the row (SELECT ... FOR UPDATE) so
+    concurrent uploads and deletes of the same content keep ref_count exact.
+    Neither commits; the caller commits together with its File changes.
+    """
+    
+    def __init__(self, db: Session):
+        super().__init__(ContentBlob, db)
+    
+    def get_by_hash(self, organization_id: UUID, content_hash: str) -> Optional[ContentBlob]:
+        """
+        Get content blob by organization and content hash.
+        
+        Args:
+            organization_id: Organization ID
+            content_hash: SHA-256 hex digest
+            
+        Returns:
+            Content blob if found
+        """
+        return self.db.query(ContentBlob)\
+                    .filter(and_(
+                        ContentBlob.organization_id == organization_id,
+                        ContentBlob.content_hash == content_hash
+                    ))\
+                    .first()
+    
+    def acquire(self, organization_id: UUID, content_hash: str) -> Optional[ContentBlob]:
+        """
+        Add a reference to an existing content blob.
+        
+        Args:
+            organization_id: Organization ID
+            content_hash: SHA-256 hex digest
+            
+        Returns:
+            Content blob with incremented ref_count, or None if not stored yet
+        """
+        content_blob = self.db.query(ContentBlob)\
+                    .filter(and_(
+                        ContentBlob.organization_id == organization_id,
+                        ContentBlob.content_hash == content_hash
+                    ))\
+                    .with_for_update()\
+                    .first()
+        if content_blob:
+            content_blob.ref_count += 1
+        return content_blob
+    
+    def release(self, organization_id: UUID, content_hash: str, references: int = 1) -> Optional[ContentBlob]:
+        """
+        Drop references to a content blob.
+        
+        When the last reference is dropped the row is deleted and returned,
+        so the caller can remove its storage objects after committing.
+        
+        Args:
+            organization_id: Organization ID
+            content_hash: SHA-256 hex digest
+            references: Number of references to drop
+            
+        Returns:
+            The content blob if it is no longer referenced, otherwise None
+        """
+        content_blob = self.db.query(ContentBlob)\
+                    .filter(and_(
+                        ContentBlob.organization_id == organization_id,
+                        ContentBlob.content_hash == content_hash
+                    ))\
+                    .with_for_update()\
+                    .first()
+        if not content_blob:
+            return None
+        
+        content_blob.ref_count -= references
+        if content_blob.ref_count > 0:
+            return None
+        
+        self.db.delete(content_blob)
+        return content_blob
+    
+    def release_files(self, organization_id: UUID, files: List[File]) -> List[ContentBlob]:
+        """
+        Drop the references held by files that are about to be deleted.
+        
+        Files whose raw blob is their own (uploaded before deduplication or
+        with it disabled) hold no reference and are skipped.
+        
+        Args:
+            organization_id: Organization ID
+            files: Files being deleted
+            
+        Returns:
+            Content blobs that are no longer referenced
+        """
+        released = []
+        
+        # Sorted so concurrent deletes lock rows in the same order
+        for content_hash in sorted({f.content_hash for f in files if f.content_hash}):
+            content_blob = self.get_by_hash(organization_id, content_hash)
+            if not content_blob:
+                continue
+            
+            references = sum(
+                1 for f in files
+                if f.content_hash == content_hash and f.blob_storage_path == content_blob.blob_storage_path
+            )
+            if references and self.release(organization_id, content_hash, references):
+                released.append(content_blob)
+        
+        return released
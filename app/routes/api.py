@@ -7,7 +7,8 @@ from app.controllers import (
     organization_controller,
     project_controller,
     member_controller,
-    file_controller
+    file_controller,
+    storage_controller
 )
 
 # Create API router
@@ -31,4 +32,5 @@ router.include_router(organization_controller.router)
 router.include_router(project_controller.router)
 router.include_router(member_controller.router)
 router.include_router(file_controller.router)
+router.include_router(storage_controller.router)
 
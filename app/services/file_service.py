@@ -2,20 +2,28 @@
 File service for handling file upload, processing, and retrieval operations.
 """
 import os
+import asyncio
+import hashlib
 import mimetypes
-from typing import Optional, List, Dict, Any
-from uuid import UUID
+from typing import Optional, List, Dict, Any, AsyncIterator
+from uuid import UUID, uuid4
 from fastapi import UploadFile, HTTPException
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 import math
 
 from app.models.file import File, FileStatus
+from app.models.content_blob import ContentBlob
 from app.repositories.file_repository import (
     FileRepository,
-    FileChunkRepository
+    FileChunkRepository,
+    ContentBlobRepository
 )
-from app.core.storage import get_storage_client
+from app.repositories.project_repository import ProjectRepository
+from app.core.storage import get_storage_client, BaseStorageClient
 from app.core.vector_store import get_vector_store
+from app.core.embeddings import embed_query
+from app.core.request_timing import RequestTimer
 from app.dtos.file_dto import (
     FileUploadResponseDTO,
     FileStatusResponseDTO,
@@ -27,21 +35,102 @@ from app.dtos.file_dto import (
     FileDetailResponseDTO,
     FileInitUploadRequestDTO,
     FileInitUploadResponseDTO,
-    FileMetadataRequestDTO
+    FileMetadataRequestDTO,
+    FileDownloadUrlDTO,
+    FileDownloadUrlsResponseDTO
 )
-from app.tasks.file_tasks import process_file_pipeline_task
+from app.tasks.file_tasks import process_file_pipeline_task, schedule_blob_prefix_deletion
+from app.tasks.chunking import read_chunk_records
+from app.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def sniff_mime_type(filename: str, head: bytes) -> str:
+    """
+    Determine the MIME type of an upload.
+    
+    The filename extension wins when it is recognised (office formats sniff as
+    generic zip/ole containers); otherwise the first bytes are inspected with
+    libmagic when it is available.
+    
+    Args:
+        filename: Original filename
+        head: First bytes of the file content
+        
+    Returns:
+        MIME type string (application/octet-stream if unknown)
+    """
+    mime_type, _ = mimetypes.guess_type(filename)
+    if mime_type:
+        return mime_type
+    
+    try:
+        import magic
+        sniffed = magic.from_buffer(head, mime=True)
+        if sniffed:
+            return sniffed
+    except Exception as e:
+        logger.debug(f"MIME sniffing unavailable for {filename}: {str(e)}")
+    
+    return 'application/octet-stream'
+
+
+class UploadChunkReader:
+    """
+    Async iterator over an UploadFile in fixed-size chunks.
+    
+    Tracks the total size and a SHA-256 content hash as chunks are consumed,
+    so both are known once the storage upload finishes without ever holding
+    the whole file in memory.
+    """
+    
+    def __init__(self, file: UploadFile, chunk_size: int):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._head: Optional[bytes] = None
+    
+    async def read_head(self) -> bytes:
+        """Read (and keep) the first chunk, e.g. for MIME sniffing."""
+        if self._head is None:
+            self._head = await self.file.read(self.chunk_size)
+        return self._head
+    
+    @property
+    def sha256(self) -> str:
+        """Hex digest of all content consumed so far."""
+        return self._hash.hexdigest()
+    
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        chunk = await self.read_head()
+        while chunk:
+            self._hash.update(chunk)
+            self.size += len(chunk)
+            yield chunk
+            chunk = await self.file.read(self.chunk_size)
+
+
 class FileService:
     """Service for file operations."""
     
+    # Files whose pipeline is not running and can take a revision
+    REVISABLE_STATUSES = (
+        FileStatus.READY,
+        FileStatus.UPLOAD_FAILED,
+        FileStatus.CONVERSION_FAILED,
+        FileStatus.PARSING_FAILED,
+        FileStatus.CHUNKING_FAILED,
+        FileStatus.EMBEDDING_FAILED,
+    )
+    
     def __init__(self, db: Session):
         self.db = db
         self.file_repo = FileRepository(db)
         self.chunk_repo = FileChunkRepository(db)
+        self.content_repo = ContentBlobRepository(db)
         self.storage_client = get_storage_client()
     
     async def upload_file(
@@ -54,6 +143,11 @@ class FileService:
         """
         Upload a file and initiate RAG processing pipeline.
         
+        The upload is streamed from the request spool to storage in blocks of
+        settings.upload_block_size, so memory per request stays bounded
+        regardless of file size. Size, MIME type and content hash are computed
+        while streaming.
+        
         Args:
             file: Uploaded file
             project_id: Project ID
@@ -64,20 +158,15 @@ class FileService:
             FileUploadResponseDTO with file details
         """
         try:
-            # Read file content
-            file_content = await file.read()
-            file_size = len(file_content)
-            
-            # Determine MIME type
-            mime_type, _ = mimetypes.guess_type(file.filename)
-            if not mime_type:
-                mime_type = 'application/octet-stream'
+            # Only the first block is read up front (for MIME sniffing)
+            reader = UploadChunkReader(file, settings.upload_block_size)
+            mime_type = sniff_mime_type(file.filename, await reader.read_head())
             
-            # Create file record
+            # Create file record (size is finalised after streaming)
             new_file = File(
                 name=file.filename,
                 original_filename=file.filename,
-                size=file_size,
+                size=file.size or 0,
                 mime_type=mime_type,
                 project_id=project_id,
                 uploaded_by_user_id=user_id,
@@ -104,14 +193,21 @@ class FileService:
             self.db.commit()
             self.db.refresh(new_file)
             
-            # Upload to blob storage
-            logger.info(f"Uploading file {new_file.id} to blob storage: {blob_path}")
-            await self.storage_client.upload_file(
-                file_content=file_content,
+            # Stream to blob storage
+            logger.info(f"Streaming file {new_file.id} to blob storage: {blob_path}")
+            await self.storage_client.upload_chunks(
+                chunks=reader,
                 blob_path=blob_path,
                 content_type=mime_type
             )
             
+            new_file.size = reader.size
+            self.db.commit()
+            logger.info(f"Uploaded {reader.size} bytes for file {new_file.id} (sha256={reader.sha256})")
+            
+            # Share the raw blob with identical content already in the organization
+            await self._register_content(new_file, organization_id, reader.sha256)
+            
             # Update status to uploaded
             self.file_repo.update_status(new_file.id, FileStatus.UPLOADED)
             
@@ -136,6 +232,115 @@ class FileService:
                 )
             raise HTTPException(status_code=500, detail=f"File upload failed: {str(e)}")
     
+    async def upload_revision(
+        self,
+        file: UploadFile,
+        file_id: UUID,
+        project_id: UUID,
+        organization_id: UUID
+    ) -> FileUploadResponseDTO:
+        """
+        Replace the content of an existing file with a revised version.
+        
+        The file keeps its ID and its chunks. The new content is streamed like
+        a regular upload and the pipeline runs again; chunking then matches
+        the new chunks against the existing ones by chunk_hash, so only
+        changed chunks are embedded, unchanged vectors are kept and stale
+        vectors are deleted in one batch. Uploading identical content to a
+        ready file is a no-op.
+        
+        Args:
+            file: Uploaded file (the revision)
+            file_id: File being revised
+            project_id: Project ID
+            organization_id: Organization ID for storage path
+            
+        Returns:
+            FileUploadResponseDTO with file details
+        """
+        existing = self.file_repo.get_with_chunks(file_id, project_id)
+        if not existing:
+            raise HTTPException(status_code=404, detail="File not found")
+        if existing.status not in self.REVISABLE_STATUSES:
+            raise HTTPException(
+                status_code=409,
+                detail=f"File is still being processed. Current status: {existing.status}"
+            )
+        
+        try:
+            reader = UploadChunkReader(file, settings.upload_block_size)
+            mime_type = sniff_mime_type(file.filename, await reader.read_head())
+            previous_path = existing.blob_storage_path
+            previous_status = existing.status
+            
+            self.file_repo.update_status(existing.id, FileStatus.UPLOADING)
+            
+            blob_path = self.storage_client.generate_blob_path(
+                org_id=str(organization_id),
+                project_id=str(project_id),
+                file_id=str(existing.id),
+                stage="raw",
+                filename=file.filename
+            )
+            logger.info(f"Streaming revision of file {existing.id} to blob storage: {blob_path}")
+            await self.storage_client.upload_chunks(
+                chunks=reader,
+                blob_path=blob_path,
+                content_type=mime_type
+            )
+            
+            # Identical content needs no processing unless the previous run failed
+            if reader.sha256 == existing.content_hash and previous_status == FileStatus.READY:
+                if blob_path != previous_path:
+                    await self.storage_client.delete_file(blob_path)
+                self.file_repo.update_status(existing.id, FileStatus.READY)
+                logger.info(f"Revision of file {existing.id} is identical to the current content")
+                return FileUploadResponseDTO.model_validate(existing)
+            
+            # The previous content is only removed from storage with its last reference
+            released = self.content_repo.release_files(organization_id, [existing])
+            existing.name = file.filename
+            existing.original_filename = file.filename
+            existing.mime_type = mime_type
+            existing.size = reader.size
+            existing.blob_storage_path = blob_path
+            existing.content_hash = None
+            existing.is_converted = False
+            existing.converted_file_path = None
+            existing.enriched_file_path = None
+            existing.error_message = None
+            self.db.commit()
+            
+            schedule_blob_prefix_deletion([
+                BaseStorageClient.generate_content_blob_prefix(str(organization_id), b.content_hash, str(b.id))
+                for b in released
+            ])
+            file_prefix = BaseStorageClient.generate_blob_prefix(str(organization_id), str(project_id), str(existing.id))
+            if previous_path != blob_path and previous_path.startswith(file_prefix):
+                await self.storage_client.delete_file(previous_path)
+            
+            await self._register_content(existing, organization_id, reader.sha256)
+            self.file_repo.update_status(existing.id, FileStatus.UPLOADED)
+            
+            logger.info(f"Triggering RAG pipeline for revision of file {existing.id}")
+            try:
+                task_result = process_file_pipeline_task.delay(str(existing.id), str(project_id))
+                logger.info(f"Task queued successfully! Task ID: {task_result.id}")
+            except Exception as task_error:
+                logger.error(f"Failed to queue task: {task_error}", exc_info=True)
+            
+            return FileUploadResponseDTO.model_validate(existing)
+            
+        except Exception as e:
+            logger.error(f"Error uploading revision of file {file_id}: {str(e)}")
+            self.db.rollback()
+            self.file_repo.update_status(
+                existing.id,
+                FileStatus.UPLOAD_FAILED,
+                error_message=str(e)
+            )
+            raise HTTPException(status_code=500, detail=f"File revision upload failed: {str(e)}")
+    
     def get_file_status(self, file_id: UUID, project_id: UUID) -> FileStatusResponseDTO:
         """
         Get detailed file processing status.
@@ -213,6 +418,10 @@ class FileService:
         """
         Delete a file from storage, vector DB, and database.
         
+        Storage is cleaned up by a background task that batch-deletes the
+        file's whole prefix (raw, converted, enriched, chunks), plus the shared
+        content prefix when this was its last reference.
+        
         Args:
             file_id: File ID
             project_id: Project ID
@@ -226,8 +435,15 @@ class FileService:
             raise HTTPException(status_code=404, detail="File not found")
         
         try:
-            # Delete from blob storage
-            await self.storage_client.delete_file(file.blob_storage_path)
+            project = ProjectRepository(self.db).get(project_id)
+            org_id = str(project.organization_id)
+            
+            # Shared content is only removed from storage with its last reference
+            released = self.content_repo.release_files(project.organization_id, [file])
+            blob_prefixes = [BaseStorageClient.generate_blob_prefix(org_id, str(project_id), str(file_id))]
+            blob_prefixes += [
+                BaseStorageClient.generate_content_blob_prefix(org_id, b.content_hash, str(b.id)) for b in released
+            ]
             
             # Delete chunks from vector DB if they exist
             if file.chunks:
@@ -240,6 +456,9 @@ class FileService:
             self.db.delete(file)
             self.db.commit()
             
+            # Delete from blob storage once no row references the blobs
+            schedule_blob_prefix_deletion(blob_prefixes)
+            
             logger.info(f"Deleted file {file_id} and all associated data")
             return True
             
@@ -247,6 +466,92 @@ class FileService:
             logger.error(f"Error deleting file {file_id}: {str(e)}")
             raise HTTPException(status_code=500, detail=f"File deletion failed: {str(e)}")
     
+    async def register_stored_content(self, file: File, organization_id: UUID) -> None:
+        """
+        Hash a file already in storage and register its content.
+        
+        Used for direct uploads, which reach storage without passing through
+        the API. Runs at the start of the processing pipeline (in the worker)
+        so confirm_upload never reads file content.
+        
+        Args:
+            file: File whose raw content is at file.blob_storage_path
+            organization_id: Organization ID (deduplication scope)
+        """
+        digest = hashlib.sha256()
+        async for chunk in self.storage_client.open_stream(file.blob_storage_path):
+            digest.update(chunk)
+        
+        await self._register_content(file, organization_id, digest.hexdigest())
+    
+    async def _register_content(self, file: File, organization_id: UUID, content_hash: str) -> None:
+        """
+        Record the content hash and point the file at its content-addressed raw blob.
+        
+        If the organization already stores this content, the fresh upload is
+        deleted and the file references the existing blob; the pipeline then
+        reuses its converted PDF and enriched JSON instead of re-running
+        LibreOffice and AFR. Otherwise the upload is moved to the
+        content-addressed path and registered with ref_count 1.
+        
+        Args:
+            file: File whose raw content was just uploaded to file.blob_storage_path
+            organization_id: Organization ID (deduplication scope)
+            content_hash: SHA-256 hex digest of the raw content
+        """
+        file.content_hash = content_hash
+        self.db.commit()
+        
+        if not settings.enable_content_dedup:
+            return
+        
+        uploaded_path = file.blob_storage_path
+        content_blob = self.content_repo.acquire(organization_id, content_hash)
+        
+        if content_blob is None:
+            # The ID is part of the path, so it is chosen before the row is inserted
+            blob_id = uuid4()
+            content_path = self.storage_client.generate_content_blob_path(
+                org_id=str(organization_id),
+                content_hash=content_hash,
+                blob_id=str(blob_id),
+                stage="raw",
+                filename=file.original_filename
+            )
+            await self.storage_client.move_file(uploaded_path, content_path)
+            
+            try:
+                self.db.add(ContentBlob(
+                    id=blob_id,
+                    organization_id=organization_id,
+                    content_hash=content_hash,
+                    size=file.size,
+                    blob_storage_path=content_path,
+                    ref_count=1
+                ))
+                file.blob_storage_path = content_path
+                self.db.commit()
+                logger.info(f"Stored new content {content_hash} for file {file.id} at {content_path}")
+                return
+            except IntegrityError:
+                # A concurrent upload registered the same content first
+                self.db.rollback()
+                uploaded_path = content_path
+                content_blob = self.content_repo.acquire(organization_id, content_hash)
+                if content_blob is None:
+                    raise
+        
+        file.blob_storage_path = content_blob.blob_storage_path
+        self.db.commit()
+        
+        if uploaded_path != content_blob.blob_storage_path:
+            await self.storage_client.delete_file(uploaded_path)
+        
+        logger.info(
+            f"File {file.id} deduplicated against content {content_hash} "
+            f"({content_blob.ref_count} references)"
+        )
+    
     def update_metadata(
         self,
         file_id: UUID,
@@ -287,34 +592,99 @@ class FileService:
         query: str,
         project_id: UUID,
         top_k: int = 10,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        timer: Optional[RequestTimer] = None
     ) -> FileSearchResultDTO:
         """
-        Semantic search for similar content (stub for Phase 1).
-        In Phase 2, this will use actual embeddings and Pinecone.
+        Semantic search for similar content.
+        
+        Stages, all within the timer's deadline budget:
+        1. embed: embed the query (cached; bypasses the batch embedding queue)
+        2. vector_query: query the vector store in the project namespace
+        3. resolve: load the matching chunks and their files in one query
+        4. hydrate: read the chunk texts from storage (one ranged read per
+           file bundle, all files concurrently)
+        
+        Matches whose chunk no longer exists (a file deleted since) are skipped.
         
         Args:
             query: Search query
             project_id: Project ID
             top_k: Number of results
-            filters: Optional filters
+            filters: Optional vector metadata filters
+            timer: Request timer holding the deadline and collecting stage
+                timings (a SEARCH_DEADLINE_MS timer when omitted)
             
         Returns:
-            FileSearchResultDTO with results
+            FileSearchResultDTO with results, best match first
+            
+        Raises:
+            HTTPException: 504 when the deadline passes (with the stage timings
+                so far in a Server-Timing header), 500 when a stage fails
         """
-        # Phase 1: Return placeholder results
-        logger.info(f"[STUB] Semantic search for query: {query} in project {project_id}")
+        timer = timer or RequestTimer(settings.search_deadline_ms / 1000)
+        try:
+            query_vector = await timer.run("embed", asyncio.to_thread(embed_query, query))
+            
+            matches = await timer.run("vector_query", get_vector_store().query(
+                query_vector=query_vector,
+                namespace=str(project_id),
+                top_k=top_k,
+                filter_dict=filters
+            ))
+            
+            with timer.stage("resolve"):
+                chunks = self.chunk_repo.get_by_vector_ids(
+                    [match["id"] for match in matches],
+                    project_id=project_id
+                ) if matches else []
+            chunks_by_vector = {chunk.vector_id: chunk for chunk in chunks}
+            ranked = [
+                (chunks_by_vector[match["id"]], match["score"])
+                for match in matches
+                if match["id"] in chunks_by_vector
+            ]
+            
+            records = await timer.run("hydrate", read_chunk_records(
+                self.storage_client, [chunk for chunk, _ in ranked]
+            )) if ranked else []
+            
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Search in project {project_id} exceeded its {timer.budget_seconds * 1000:.0f} ms "
+                f"deadline ({timer.server_timing()})"
+            )
+            raise HTTPException(
+                status_code=504,
+                detail="Search deadline exceeded",
+                headers={"Server-Timing": timer.server_timing()}
+            )
+        except Exception as e:
+            logger.error(f"Error searching project {project_id}: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
         
-        # TODO: In Phase 2, implement actual semantic search:
-        # 1. Generate embedding for query
-        # 2. Query Pinecone with embedding
-        # 3. Fetch chunks from database
-        # 4. Return formatted results
+        results = [
+            FileChunkResultDTO(
+                chunk_id=chunk.id,
+                file_id=chunk.file_id,
+                file_name=chunk.file.name,
+                chunk_index=chunk.chunk_index,
+                chunk_text=record.get("text", ""),
+                score=score,
+                chunk_metadata=chunk.chunk_metadata,
+                blob_storage_path=chunk.blob_storage_path
+            )
+            for (chunk, score), record in zip(ranked, records)
+        ]
+        logger.info(
+            f"Search in project {project_id} returned {len(results)} of {len(matches)} matches "
+            f"({timer.server_timing()})"
+        )
         
         return FileSearchResultDTO(
             query=query,
-            results=[],
-            total_results=0
+            results=results,
+            total_results=len(results)
         )
     
     async def init_upload(
@@ -426,9 +796,9 @@ class FileService:
                     detail=f"File is not in UPLOADING status. Current status: {file.status}"
                 )
             
-            # Verify file exists in storage
-            file_exists = await self.storage_client.file_exists(file.blob_storage_path)
-            if not file_exists:
+            # Verify file exists in storage (metadata only, no content is read)
+            properties = await self.storage_client.stat(file.blob_storage_path)
+            if properties is None:
                 self.file_repo.update_status(
                     file_id,
                     FileStatus.UPLOAD_FAILED,
@@ -439,6 +809,19 @@ class FileService:
                     detail="File not found in storage. Upload may have failed."
                 )
             
+            # Verify the upload is complete (size declared in init_upload)
+            if properties.size != file.size:
+                error_message = f"Uploaded size {properties.size} does not match declared size {file.size}"
+                self.file_repo.update_status(
+                    file_id,
+                    FileStatus.UPLOAD_FAILED,
+                    error_message=error_message
+                )
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"{error_message}. Upload may be incomplete."
+                )
+            
             # Update status to UPLOADED
             self.file_repo.update_status(file_id, FileStatus.UPLOADED)
             
@@ -507,4 +890,50 @@ class FileService:
         except Exception as e:
             logger.error(f"Error generating download URL for file {file_id}: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Failed to generate download URL: {str(e)}")
-
+    
+    async def get_download_urls(
+        self,
+        file_ids: List[UUID],
+        project_id: UUID,
+        expiry_seconds: int = 3600
+    ) -> FileDownloadUrlsResponseDTO:
+        """
+        Get presigned download URLs for many files in one call.
+        
+        Files are loaded with a single query and signed concurrently; URLs come
+        from the signed URL cache when available.
+        
+        Args:
+            file_ids: File IDs
+            project_id: Project ID for validation
+            expiry_seconds: URL expiry time in seconds
+            
+        Returns:
+            FileDownloadUrlsResponseDTO with URLs and the IDs that could not be signed
+        """
+        try:
+            files = [
+                f for f in self.file_repo.get_many(file_ids, project_id)
+                if f.status != FileStatus.UPLOADING
+            ]
+            
+            download_urls = await asyncio.gather(*(
+                self.storage_client.get_file_url(
+                    blob_path=f.blob_storage_path,
+                    expiry_seconds=expiry_seconds
+                )
+                for f in files
+            ))
+            
+            signed_ids = {f.id for f in files}
+            return FileDownloadUrlsResponseDTO(
+                items=[
+                    FileDownloadUrlDTO(file_id=f.id, download_url=url, expires_in=expiry_seconds)
+                    for f, url in zip(files, download_urls)
+                ],
+                missing=[file_id for file_id in file_ids if file_id not in signed_ids]
+            )
+            
+        except Exception as e:
+            logger.error(f"Error generating download URLs for project {project_id}: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Failed to generate download URLs: {str(e)}")
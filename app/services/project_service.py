@@ -9,7 +9,10 @@ from app.models import Project
 from app.models.user_organization import UserRole
 from app.repositories.project_repository import ProjectRepository
 from app.repositories.member_repository import MemberRepository
+from app.repositories.file_repository import FileRepository, ContentBlobRepository
 from app.core.tenant_context import TenantContext
+from app.core.storage import BaseStorageClient
+from app.tasks.file_tasks import schedule_blob_prefix_deletion
 from app.dtos.project_dto import ProjectCreate, ProjectUpdate
 
 
@@ -183,6 +186,10 @@ class ProjectService:
         """
         Delete project (OWNER or ADMIN only).
         
+        Database rows cascade; storage is cleaned up by a background task that
+        batch-deletes the project prefix and any shared content left
+        unreferenced.
+        
         Args:
             org_id: Organization ID
             project_id: Project ID
@@ -221,5 +228,18 @@ class ProjectService:
                 detail="Project not found"
             )
         
-        return self.project_repo.delete(project_id)
+        # Drop shared content references held by the project's files
+        files = FileRepository(self.db).get_with_content_hash(project_id)
+        released = ContentBlobRepository(self.db).release_files(org_id, files)
+        blob_prefixes = [BaseStorageClient.generate_blob_prefix(str(org_id), str(project_id))]
+        blob_prefixes += [
+            BaseStorageClient.generate_content_blob_prefix(str(org_id), b.content_hash, str(b.id)) for b in released
+        ]
+        
+        deleted = self.project_repo.delete(project_id)
+        
+        if deleted:
+            schedule_blob_prefix_deletion(blob_prefixes)
+        
+        return deleted
 
@@ -0,0 +1,37 @@
+"""
+Chunking module for document processing.
+
+Turns enriched JSON "digital twins" (see app/tasks/parsing) into
+token-bounded chunks for embedding. Sections are streamed from the enriched
+JSON and chunks are produced by a generator, so memory use does not grow
+with document size. All chunks of a file are stored in one JSONL bundle
+(see bundle.py).
+"""
+
+from .bundle import (
+    BUNDLE_CONTENT_TYPE,
+    BUNDLE_FILENAME,
+    ChunkBundleWriter,
+    bundle_filename,
+    chunk_location,
+    iter_bundle,
+    read_chunk_records,
+)
+from app.core.tokenizer import estimate_tokens
+
+from .chunker import Chunk, DocumentChunker
+from .section_reader import iter_sections
+
+__all__ = [
+    "BUNDLE_CONTENT_TYPE",
+    "BUNDLE_FILENAME",
+    "Chunk",
+    "ChunkBundleWriter",
+    "DocumentChunker",
+    "bundle_filename",
+    "chunk_location",
+    "estimate_tokens",
+    "iter_bundle",
+    "iter_sections",
+    "read_chunk_records",
+]
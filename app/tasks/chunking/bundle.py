@@ -0,0 +1,180 @@
+"""
+Packed chunk bundles.
+
+All chunks of a file are stored in one JSONL blob
+({org_id}/{project_id}/{file_id}/chunks/chunks_{content_hash[:16]}_{run_id}.jsonl),
+one chunk record per line. Every chunking run writes a bundle of its own, so
+the bundle the committed rows point at is never overwritten: the new one is
+written next to it, rows switch over in one transaction and only then is the
+previous bundle deleted. Each FileChunk row points at the bundle and keeps the byte range of its
+line in chunk_metadata (bundle_offset / bundle_length), so a file costs one
+storage write, one delete, and a few range reads when hydrating search hits
+instead of one blob operation per chunk.
+
+Rows written before bundles existed point at a per-chunk JSON blob and have
+no byte range; read_chunk_records() downloads those whole.
+"""
+
+import asyncio
+import json
+from typing import Any, BinaryIO, Iterable, Iterator, Optional, Protocol
+
+from app.core.storage import BaseStorageClient
+
+from .chunker import Chunk
+
+BUNDLE_FILENAME = "chunks.jsonl"  # Local name of a bundle being written
+BUNDLE_CONTENT_TYPE = "application/x-ndjson"
+
+# chunk_metadata keys holding a chunk's byte range within the bundle
+OFFSET_KEY = "bundle_offset"
+LENGTH_KEY = "bundle_length"
+
+# Ranges closer than this are fetched with one read; re-reading a small gap
+# is cheaper than another storage round trip
+_MAX_READ_GAP = 256 * 1024
+
+
+class ChunkRow(Protocol):
+    """What read_chunk_records() needs from a FileChunk."""
+
+    blob_storage_path: str
+    chunk_metadata: Optional[dict]
+
+
+def bundle_filename(content_hash: Optional[str], run_id: str) -> str:
+    """Bundle filename for one chunking run of a file's current content."""
+    if not content_hash:
+        return f"chunks_{run_id}.jsonl"
+    return f"chunks_{content_hash[:16]}_{run_id}.jsonl"
+
+
+def chunk_record(chunk: Chunk) -> dict[str, Any]:
+    """Stored form of a chunk (one bundle line, or a legacy per-chunk blob)."""
+    return {
+        "chunk_index": chunk.index,
+        "text": chunk.text,
+        "token_count": chunk.token_count,
+        "metadata": chunk.metadata,
+    }
+
+
+class ChunkBundleWriter:
+    """Appends chunk records to a local bundle file, tracking their byte ranges."""
+
+    def __init__(self, fp: BinaryIO):
+        """
+        Args:
+            fp: Bundle file opened for binary writing, positioned at its start
+        """
+        self.fp = fp
+        self.size = 0
+
+    def add(self, chunk: Chunk) -> dict[str, int]:
+        """
+        Append one chunk.
+
+        Returns:
+            dict: bundle_offset / bundle_length of the chunk's line, to merge
+            into its chunk_metadata
+        """
+        line = json.dumps(chunk_record(chunk), ensure_ascii=False).encode("utf-8") + b"\n"
+        self.fp.write(line)
+        location = {OFFSET_KEY: self.size, LENGTH_KEY: len(line)}
+        self.size += len(line)
+        return location
+
+
+def chunk_location(chunk_metadata: Optional[dict]) -> Optional[tuple[int, int]]:
+    """(offset, length) of a chunk within its bundle, or None for a per-chunk blob."""
+    if not chunk_metadata or OFFSET_KEY not in chunk_metadata:
+        return None
+    return chunk_metadata[OFFSET_KEY], chunk_metadata[LENGTH_KEY]
+
+
+def iter_bundle(fp: BinaryIO) -> Iterator[dict[str, Any]]:
+    """Yield the chunk records of a bundle file in order (whole-file reads, e.g. embedding)."""
+    for line in fp:
+        if line.strip():
+            yield json.loads(line)
+
+
+def _coalesce(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Merge sorted (offset, length) ranges separated by at most _MAX_READ_GAP bytes."""
+    merged: list[tuple[int, int]] = []
+    for offset, length in ranges:
+        if merged:
+            start, span = merged[-1]
+            if offset - (start + span) <= _MAX_READ_GAP:
+                merged[-1] = (start, max(span, offset + length - start))
+                continue
+        merged.append((offset, length))
+    return merged
+
+
+async def _read_bundle(
+    storage_client: BaseStorageClient,
+    blob_path: str,
+    locations: list[tuple[int, int]],
+) -> dict[tuple[int, int], dict[str, Any]]:
+    """Fetch the given chunk ranges of one bundle with as few range reads as possible."""
+    wanted = sorted(set(locations))
+    reads = _coalesce(wanted)
+    payloads = await asyncio.gather(*(
+        storage_client.download_range(blob_path, start, length) for start, length in reads
+    ))
+
+    records: dict[tuple[int, int], dict[str, Any]] = {}
+    read_index = 0
+    for offset, length in wanted:
+        while offset >= reads[read_index][0] + reads[read_index][1]:
+            read_index += 1
+        start = offset - reads[read_index][0]
+        records[(offset, length)] = json.loads(payloads[read_index][start:start + length])
+    return records
+
+
+async def read_chunk_records(storage_client: BaseStorageClient, chunks: Iterable[ChunkRow]) -> list[dict[str, Any]]:
+    """
+    Fetch the stored records (text, token_count, metadata) of FileChunk rows.
+
+    Chunks of the same bundle are read with coalesced range reads, so the
+    number of storage calls grows with the number of files, not chunks.
+    Bundles are read concurrently.
+
+    Args:
+        storage_client: Storage backend holding the chunks
+        chunks: FileChunk rows, from any number of files
+
+    Returns:
+        list: One record per chunk, in the order of chunks
+    """
+    chunks = list(chunks)
+    bundles: dict[str, list[tuple[int, int]]] = {}
+    legacy: set[str] = set()
+    for chunk in chunks:
+        location = chunk_location(chunk.chunk_metadata)
+        if location is None:
+            legacy.add(chunk.blob_storage_path)
+        else:
+            bundles.setdefault(chunk.blob_storage_path, []).append(location)
+
+    bundle_paths = list(bundles)
+    legacy_paths = list(legacy)
+    results = await asyncio.gather(
+        *(_read_bundle(storage_client, path, bundles[path]) for path in bundle_paths),
+        *(storage_client.download_file(path) for path in legacy_paths),
+    )
+    bundle_records = dict(zip(bundle_paths, results[:len(bundle_paths)]))
+    legacy_records = {
+        path: json.loads(payload) for path, payload in zip(legacy_paths, results[len(bundle_paths):])
+    }
+
+    records = []
+    for chunk in chunks:
+        location = chunk_location(chunk.chunk_metadata)
+        if location is None:
+            records.append(legacy_records[chunk.blob_storage_path])
+        else:
+            records.append(bundle_records[chunk.blob_storage_path][location])
+    return records
@@ -0,0 +1,321 @@
+"""
+Token-bounded chunking of enriched JSON sections.
+
+DocumentChunker consumes sections in document order (see section_reader)
+and yields chunks as soon as they are complete, so a document of any length
+is chunked in constant memory:
+
+- Headings (role "title" / "sectionHeading") start a new chunk and are kept
+  as the heading path of the chunks under them.
+- Tables are never merged with body text or with each other. A table that
+  fits in chunk_size tokens is one chunk (prefixed by any headings directly
+  above it); with table_mode "rows", larger tables are split into groups of
+  rows, each repeating the table's <th> header rows (see tables.py).
+- Page headers, footers and page numbers are dropped.
+- Paragraph text is packed sentence by sentence up to chunk_size tokens;
+  consecutive chunks of the same section share up to chunk_overlap tokens
+  of trailing sentences. Sentences longer than chunk_size are split on
+  word boundaries.
+
+Token counts come from a BaseTokenizer (app/core/tokenizer.py); the
+sentences of a section are counted with one batched call.
+
+Every chunk records chunk_hash (SHA-256 of its text) and section_hashes
+(short hashes of the sections it was built from), so a re-chunked revision
+can be diffed against the previous chunks without comparing text.
+"""
+
+import hashlib
+import re
+from itertools import groupby
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Iterator, Optional
+
+from app.core.tokenizer import BaseTokenizer, EstimateTokenizer
+
+from .tables import parse_table, render_table
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def text_hash(text: str) -> str:
+    """SHA-256 hex digest of text (a chunk's chunk_hash)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def section_hash(section: dict[str, Any]) -> str:
+    """Short content hash of an enriched JSON section (only compared within one file)."""
+    key = "\x1f".join(str(section.get(name) or "") for name in ("type", "role", "content"))
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class Chunk:
+    """One chunk produced by DocumentChunker."""
+
+    index: int
+    text: str
+    token_count: int
+    metadata: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class _Unit:
+    """Smallest piece of text packed into chunks (a sentence or a word window)."""
+
+    text: str
+    tokens: int
+    page: int
+    section: int  # Index of the section the text came from
+    section_hash: str = ""
+    heading: bool = False
+
+
+class DocumentChunker:
+    """Splits a stream of enriched JSON sections into token-bounded chunks."""
+
+    HEADING_ROLES = ("title", "sectionHeading")
+    SKIPPED_ROLES = ("pageHeader", "pageFooter", "pageNumber")
+    TABLE_MODES = ("rows", "whole")
+
+    def __init__(
+        self,
+        chunk_size: int,
+        chunk_overlap: int,
+        tokenizer: Optional[BaseTokenizer] = None,
+        table_mode: str = "rows",
+    ):
+        """
+        Initialize the chunker.
+
+        Args:
+            chunk_size: Maximum tokens per text chunk
+            chunk_overlap: Tokens of trailing text repeated at the start of the next chunk
+            tokenizer: Token counter (None = EstimateTokenizer)
+            table_mode: "rows" splits tables larger than chunk_size by row groups,
+                "whole" keeps every table in one chunk
+        """
+        if chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size")
+        if table_mode not in self.TABLE_MODES:
+            raise ValueError(f"table_mode must be one of {self.TABLE_MODES}")
+
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.tokenizer = tokenizer or EstimateTokenizer()
+        self.table_mode = table_mode
+
+    def chunk(self, sections: Iterable[dict[str, Any]]) -> Iterator[Chunk]:
+        """
+        Chunk sections in document order.
+
+        Args:
+            sections: Enriched JSON sections (content, type, page_number, role)
+
+        Yields:
+            Chunk: Chunks in order, numbered from 0
+        """
+        state = _ChunkingState(self)
+
+        for section_index, section in enumerate(sections):
+            content = (section.get("content") or "").strip()
+            role = section.get("role")
+            if not content or role in self.SKIPPED_ROLES:
+                continue
+
+            page = section.get("page_number") or 1
+
+            if section.get("type") == "table":
+                if state.has_body():
+                    yield from state.flush()
+                headings = state.take_headings()
+                for text, token_count, rows in self._table_parts(headings, content):
+                    metadata = {
+                        "type": "table",
+                        "page": page,
+                        "page_end": page,
+                        "headings": state.heading_path(),
+                        "section_start": section_index,
+                        "section_end": section_index,
+                        "section_hashes": [section_hash(section)],
+                        "row_count": section.get("row_count"),
+                        "column_count": section.get("column_count"),
+                    }
+                    if rows:
+                        metadata["row_start"], metadata["row_end"] = rows
+                    yield state.emit(text=text, token_count=token_count, metadata=metadata)
+                continue
+
+            heading = role in self.HEADING_ROLES
+            if heading:
+                # Consecutive headings stay together at the top of the next chunk
+                if state.has_body():
+                    yield from state.flush()
+                state.set_heading(role, content)
+
+            digest = section_hash(section)
+            for unit in self._units(content, page, section_index):
+                unit.heading = heading
+                unit.section_hash = digest
+                yield from state.add(unit)
+
+        yield from state.flush()
+
+    def _table_parts(
+        self, headings: list[str], content: str
+    ) -> Iterator[tuple[str, int, Optional[tuple[int, int]]]]:
+        """
+        Text, token count and row range (first, last; 0-based, inclusive) of each chunk of a table.
+
+        Row groups end before the next row would push the chunk past
+        chunk_size and never cut through a rowspan cell; a single row larger
+        than the budget becomes a chunk of its own. The header rows are only
+        repeated while they take at most half of chunk_size.
+        """
+        text = "\n\n".join(headings + [content])
+        token_count = self.tokenizer.count_tokens(text)
+        table = parse_table(content)
+        if table is None:
+            yield text, token_count, None
+            return
+        if self.table_mode == "whole" or token_count <= self.chunk_size:
+            yield text, token_count, (0, len(table.rows) - 1)
+            return
+
+        header = table.rows[:table.header_rows]
+        fixed_tokens = self.tokenizer.count_tokens("\n\n".join(headings + [render_table(header)]))
+        if fixed_tokens > self.chunk_size // 2:
+            header = []
+            fixed_tokens = self.tokenizer.count_tokens("\n\n".join(headings + [render_table([])]))
+        first = len(header)
+
+        # One token per row for the line break and indent joining it to the table
+        row_tokens = [tokens + 1 for tokens in self.tokenizer.count_batch(table.rows[first:])]
+
+        def part(start: int, end: int) -> tuple[str, int, tuple[int, int]]:
+            part_text = "\n\n".join(headings + [render_table(header + table.rows[start:end])])
+            return part_text, self.tokenizer.count_tokens(part_text), (start, end - 1)
+
+        start = first
+        tokens = fixed_tokens
+        split_at = None  # Latest row a group could end before, if the group must end early
+        for index in range(first, len(table.rows)):
+            if index > start and table.can_split_before(index):
+                split_at = index
+            tokens += row_tokens[index - first]
+            if tokens > self.chunk_size and split_at is not None:
+                yield part(start, split_at)
+                tokens = fixed_tokens + sum(row_tokens[split_at - first:index - first + 1])
+                start = split_at
+                split_at = None
+        yield part(start, len(table.rows))
+
+    def _units(self, text: str, page: int, section: int) -> Iterator[_Unit]:
+        """Sentences of text, with sentences longer than chunk_size split into word windows."""
+        sentences = _SENTENCE_END.split(text)
+        for sentence, tokens in zip(sentences, self.tokenizer.count_batch(sentences)):
+            if tokens <= self.chunk_size:
+                yield _Unit(sentence, tokens, page, section)
+                continue
+
+            words: list[str] = []
+            window_tokens = 0
+            sentence_words = sentence.split()
+            for word, word_tokens in zip(sentence_words, self.tokenizer.count_batch(sentence_words)):
+                if words and window_tokens + word_tokens > self.chunk_size:
+                    yield _Unit(" ".join(words), window_tokens, page, section)
+                    words, window_tokens = [], 0
+                words.append(word)
+                window_tokens += word_tokens
+            if words:
+                yield _Unit(" ".join(words), window_tokens, page, section)
+
+
+class _ChunkingState:
+    """Pending text and heading context of one DocumentChunker.chunk() run."""
+
+    def __init__(self, chunker: DocumentChunker):
+        self.chunker = chunker
+        self.units: list[_Unit] = []
+        self.tokens = 0
+        self.carried = 0  # Leading units repeated from the previous chunk
+        self.headings: dict[str, Optional[str]] = {role: None for role in DocumentChunker.HEADING_ROLES}
+        self.next_index = 0
+
+    def has_body(self) -> bool:
+        """Whether the pending units hold new text other than headings."""
+        return any(not unit.heading for unit in self.units[self.carried:])
+
+    def take_headings(self) -> list[str]:
+        """Remove and return pending headings, one string each (pending units are all headings or carried)."""
+        # A heading can span several units ("2. System Components" splits after "2.")
+        headings = [
+            self._join(list(units))
+            for _, units in groupby(self.units[self.carried:], key=lambda unit: unit.section)
+        ]
+        self.units, self.tokens, self.carried = [], 0, 0
+        return headings
+
+    def heading_path(self) -> list[str]:
+        return [h for h in self.headings.values() if h]
+
+    def set_heading(self, role: str, text: str) -> None:
+        self.headings[role] = text
+        if role == "title":
+            # A new title starts a new part of the document
+            self.headings["sectionHeading"] = None
+
+    def emit(self, text: str, token_count: int, metadata: dict[str, Any]) -> Chunk:
+        metadata["chunk_hash"] = text_hash(text)
+        chunk = Chunk(index=self.next_index, text=text, token_count=token_count, metadata=metadata)
+        self.next_index += 1
+        return chunk
+
+    def add(self, unit: _Unit) -> Iterator[Chunk]:
+        """Append a unit, first emitting the pending chunk if the unit would not fit."""
+        if self.units and self.tokens + unit.tokens > self.chunker.chunk_size:
+            yield from self.flush(keep_overlap=True)
+            # The overlap itself must leave room for the unit
+            while self.units and self.tokens + unit.tokens > self.chunker.chunk_size:
+                self.tokens -= self.units.pop(0).tokens
+                self.carried -= 1
+        self.units.append(unit)
+        self.tokens += unit.tokens
+
+    def flush(self, keep_overlap: bool = False) -> Iterator[Chunk]:
+        """Emit the pending units as a chunk (if they hold anything new)."""
+        if len(self.units) > self.carried:
+            yield self.emit(
+                text=self._join(self.units),
+                token_count=self.tokens,
+                metadata={
+                    "type": "text",
+                    "page": self.units[0].page,
+                    "page_end": self.units[-1].page,
+                    "headings": self.heading_path(),
+                    "section_start": self.units[0].section,
+                    "section_end": self.units[-1].section,
+                    "section_hashes": list(dict.fromkeys(unit.section_hash for unit in self.units)),
+                },
+            )
+
+        carried: list[_Unit] = []
+        if keep_overlap:
+            budget = self.chunker.chunk_overlap
+            for unit in reversed(self.units):
+                if unit.tokens > budget:
+                    break
+                carried.insert(0, unit)
+                budget -= unit.tokens
+        self.units = carried
+        self.tokens = sum(u.tokens for u in carried)
+        self.carried = len(carried)
+
+    @staticmethod
+    def _join(units: list[_Unit]) -> str:
+        """Sentences of one section joined by spaces, sections by blank lines."""
+        parts = [units[0].text]
+        for previous, unit in zip(units, units[1:]):
+            parts.append(" " if unit.section == previous.section else "\n\n")
+            parts.append(unit.text)
+        return "".join(parts)
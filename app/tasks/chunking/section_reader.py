@@ -0,0 +1,117 @@
+"""
+Streaming reader for enriched JSON documents.
+
+The enriched JSON of a large document (thousands of pages) can be hundreds
+of megabytes. The reader walks the top-level object with json.JSONDecoder
+.raw_decode over a sliding buffer and yields the entries of "sections" one
+at a time, so memory stays bounded by the largest single section instead of
+the whole document. Other top-level values (page_info, metadata, ...) are
+decoded and skipped.
+"""
+
+import json
+from typing import Any, Iterator, TextIO
+
+# Characters read from the file per refill
+_READ_SIZE = 256 * 1024
+
+_WHITESPACE = " \t\n\r"
+
+
+class _Buffer:
+    """Sliding window over a text file for incremental JSON decoding."""
+
+    def __init__(self, fp: TextIO):
+        self.fp = fp
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, minimum: int = _READ_SIZE) -> bool:
+        """Read more of the file, dropping what was consumed; False at end of file."""
+        if self.eof:
+            return False
+        data = self.fp.read(max(minimum, _READ_SIZE))
+        if not data:
+            self.eof = True
+            return False
+        self.text = self.text[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ("" at end of file)."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Malformed enriched JSON: expected {char!r}, found {found!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode the next JSON value, reading more of the file until it is complete."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.text, self.pos)
+                # A number at the end of the buffer may continue in the next read
+                if end < len(self.text) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # Grow the read so a huge value is not re-decoded once per small read
+            self._fill(minimum=len(self.text) - self.pos)
+
+
+def iter_sections(fp: TextIO) -> Iterator[dict[str, Any]]:
+    """
+    Yield the sections of an enriched JSON document in order.
+
+    Args:
+        fp: Enriched JSON file opened in text mode
+
+    Yields:
+        dict: One section (content, type, page_number, role, ...)
+
+    Raises:
+        ValueError: If the document is not a JSON object
+    """
+    buffer = _Buffer(fp)
+    buffer.expect("{")
+    if buffer.peek() == "}":
+        return
+
+    while True:
+        key = buffer.value()
+        buffer.expect(":")
+
+        if key == "sections":
+            buffer.expect("[")
+            if buffer.peek() == "]":
+                buffer.pos += 1
+            else:
+                while True:
+                    yield buffer.value()
+                    if buffer.peek() == ",":
+                        buffer.pos += 1
+                        continue
+                    buffer.expect("]")
+                    break
+        else:
+            buffer.value()
+
+        if buffer.peek() == ",":
+            buffer.pos += 1
+            continue
+        buffer.expect("}")
+        return
@@ -0,0 +1,64 @@
+"""
+Row-level view of the HTML tables in enriched JSON.
+
+AzureFormRecognizerClient._table_to_html writes one <tr> per line, with
+column header cells as <th>. parse_table() recovers those rows so large
+tables can be chunked by row groups, each group repeating the header rows.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+_ROW_PATTERN = re.compile(r"<tr\b.*?</tr>", re.IGNORECASE | re.DOTALL)
+_CELL_PATTERN = re.compile(r"<(t[hd])\b([^>]*)>", re.IGNORECASE)
+_ROWSPAN_PATTERN = re.compile(r"rowspan\s*=\s*['\"]?(\d+)", re.IGNORECASE)
+
+
+@dataclass
+class TableRows:
+    """Rows of one HTML table."""
+
+    rows: list[str]  # Row HTML ("<tr>...</tr>"), in table order
+    header_rows: int  # Leading rows made only of <th> cells
+    covered_to: list[int]  # Last row reached by a rowspan cell starting at or before each row
+
+    def can_split_before(self, index: int) -> bool:
+        """Whether a row group may start at row index without cutting a rowspan cell."""
+        return index == 0 or self.covered_to[index - 1] < index
+
+
+def parse_table(html: str) -> Optional[TableRows]:
+    """
+    Split an HTML table into rows.
+
+    Args:
+        html: Table HTML, as stored in a table section's content
+
+    Returns:
+        TableRows, or None if the content has no <tr> rows
+    """
+    rows = [match.group(0) for match in _ROW_PATTERN.finditer(html)]
+    if not rows:
+        return None
+
+    header_rows = 0
+    covered_to = []
+    reach = 0
+    for index, row in enumerate(rows):
+        cells = _CELL_PATTERN.findall(row)
+        if header_rows == index and cells and all(tag.lower() == "th" for tag, _ in cells):
+            header_rows += 1
+        spans = [int(span) for _, attributes in cells for span in _ROWSPAN_PATTERN.findall(attributes)]
+        reach = max(reach, index + max(spans, default=1) - 1)
+        covered_to.append(reach)
+
+    # A table made only of header cells has no body to split
+    if header_rows == len(rows):
+        header_rows = 0
+    return TableRows(rows=rows, header_rows=header_rows, covered_to=covered_to)
+
+
+def render_table(rows: list[str]) -> str:
+    """Table HTML for rows, in the layout of AzureFormRecognizerClient._table_to_html."""
+    return "<table>\n" + "\n".join(f"  {row}" for row in rows) + "\n</table>"
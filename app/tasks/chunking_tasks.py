@@ -1,21 +1,84 @@
 """
-Document chunking tasks for breaking documents into semantic chunks.
-This is a stub implementation that will be replaced with actual logic in Phase 2.
+Document chunking tasks for breaking documents into token-bounded chunks.
+
+Reads the enriched JSON produced by parsing, streams its sections through
+DocumentChunker and stores every chunk as one line of the file's JSONL chunk
+bundle plus a FileChunk row holding the line's byte range. The bundle is
+written to a local temp file and uploaded once; rows are written in batches
+of CHUNK_FLUSH_BATCH_SIZE, so memory use does not depend on document size.
+
+Re-chunking a file (a revision upload, or a retry) is incremental: chunks
+are matched to the previous ones by chunk_hash, unchanged chunks keep their
+vectors, only new chunks are left for embedding, and vectors of chunks that
+no longer exist are deleted in one batch.
 """
-import time
+import asyncio
 import logging
+import os
+import tempfile
 from datetime import datetime, UTC
-from uuid import UUID
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+from uuid import UUID, uuid4
 
 from app.celery_app import celery_app
+from app.config import settings
 from app.models.file import FileStatus
 from app.models.file_chunk import FileChunk
 from app.database import SessionLocal
 from app.repositories.file_repository import FileRepository, FileChunkRepository
+from app.repositories.project_repository import ProjectRepository
+from app.core.storage import BaseStorageClient, get_storage_client
+from app.core.tokenizer import get_tokenizer
+from app.core.vector_store import get_vector_store
+
+from .chunking import (
+    BUNDLE_CONTENT_TYPE,
+    BUNDLE_FILENAME,
+    Chunk,
+    ChunkBundleWriter,
+    DocumentChunker,
+    bundle_filename,
+    iter_sections,
+)
 
 logger = logging.getLogger(__name__)
 
 
+def run_async(coro):
+    """Helper to run async functions in Celery tasks."""
+    try:
+        loop = asyncio.get_event_loop()
+        if loop.is_closed():
+            # Loop is closed, create a new one
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+    except RuntimeError:
+        # No event loop in current thread, create a new one
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+    
+    return loop.run_until_complete(coro)
+
+
+def _previous_chunks(chunk_repo: FileChunkRepository, file_id: UUID) -> Dict[str, List[Tuple[UUID, str]]]:
+    """Embedded chunks of a file as chunk_hash -> [(chunk id, vector ID)] (repeated text has several)."""
+    previous: Dict[str, List[Tuple[UUID, str]]] = {}
+    for chunk_id, vector_id, chunk_hash in chunk_repo.get_embedded_hashes(file_id):
+        # Chunks stored before hashes were recorded never match, so they are replaced
+        previous.setdefault(chunk_hash or f"unhashed:{chunk_id}", []).append((chunk_id, vector_id))
+    return previous
+
+
+def _batches(chunks: Iterator[Chunk], size: int) -> Iterator[List[Chunk]]:
+    """Group a chunk stream into lists of at most size chunks."""
+    while True:
+        batch = list(islice(chunks, size))
+        if not batch:
+            return
+        yield batch
+
+
 @celery_app.task(
     bind=True,
     name="app.tasks.chunking_tasks.chunk_file",
@@ -24,58 +87,134 @@ logger = logging.getLogger(__name__)
 )
 def chunk_file_task(self, file_id: str, project_id: str):
     """
-    Dummy task for document chunking (Phase 1 stub).
-    In Phase 2, this will be replaced with actual chunking logic using
-    semantic chunking algorithms from rag-chunking.
+    Chunk a parsed document.
+    
+    This task:
+    1. Downloads the enriched JSON to a local temp file
+    2. Streams its sections through DocumentChunker (CHUNK_SIZE / CHUNK_OVERLAP tokens)
+    3. Writes the chunks to a local JSONL bundle and writes their FileChunk rows in batches;
+       chunks whose chunk_hash matches an embedded chunk of the previous version keep
+       that row and its vector
+    4. Uploads the bundle with a single storage write
+    5. Deletes the vectors of previous chunks left unmatched in one batch, then commits
+       the new chunk set in one transaction
+    6. Updates the file's chunk count and status
     
     Args:
         file_id: File ID
         project_id: Project ID
-        
+    
     Returns:
         Dict with chunking result
     """
     db = SessionLocal()
+    # Bundle uploaded by this run that no committed row points at yet
+    uploaded_bundle: Optional[str] = None
     try:
-        logger.info(f"[STUB] Starting chunking for file {file_id}")
+        logger.info(f"Starting chunking for file {file_id}")
         
         file_repo = FileRepository(db)
         chunk_repo = FileChunkRepository(db)
+        storage_client = get_storage_client()
         
         # Update status to chunking_started
         file_repo.update_status(UUID(file_id), FileStatus.CHUNKING_STARTED)
         
         # Mark chunking start time
         file = file_repo.get(UUID(file_id))
-        if file:
-            file.chunking_started_at = datetime.now(UTC)
-            db.commit()
+        if not file:
+            raise ValueError(f"File not found: {file_id}")
+        if not file.enriched_file_path:
+            raise ValueError(f"File {file_id} has no enriched JSON to chunk")
+        file.chunking_started_at = datetime.now(UTC)
+        db.commit()
         
-        # Simulate chunking work (Phase 1)
-        time.sleep(2)
-        logger.info(f"[STUB] Chunking simulation complete for file {file_id}")
+        # Chunks of the previous version (or an earlier attempt) that already have a vector
+        # keep it when a new chunk has the same chunk_hash; chunks never embedded are rebuilt
+        chunk_repo.delete_unembedded(UUID(file_id))
+        previous_paths = set(chunk_repo.get_blob_paths(UUID(file_id)))
+        previous = _previous_chunks(chunk_repo, UUID(file_id))
         
-        # Create dummy chunks for testing
         # Note: chunk text is stored in blob storage (blob_storage_path), NOT in database
-        dummy_chunks = []
-        for i in range(3):
-            # Generate proper blob path (remove /raw/filename from end, add /chunks/)
-            base_path = file.blob_storage_path.rsplit('/', 2)[0]  # Remove /raw/filename
-            chunk_blob_path = f"{base_path}/chunks/chunk_{i}.json"
+        # Chunks are per file, so they never live under a shared content-addressed raw path.
+        # Each run writes its own bundle; the one committed rows point at is never overwritten
+        project = ProjectRepository(db).get(UUID(project_id))
+        bundle_path = BaseStorageClient.generate_blob_path(
+            org_id=str(project.organization_id),
+            project_id=project_id,
+            file_id=file_id,
+            stage="chunks",
+            filename=bundle_filename(file.content_hash, uuid4().hex[:12])
+        )
+        chunker = DocumentChunker(
+            settings.chunk_size, settings.chunk_overlap, get_tokenizer(), settings.chunk_table_mode
+        )
+        
+        total_chunks = 0
+        total_tokens = 0
+        kept_chunks = 0
+        with tempfile.TemporaryDirectory(prefix="memic_chunking_") as temp_dir:
+            local_path = os.path.join(temp_dir, "enriched.json")
+            local_bundle_path = os.path.join(temp_dir, BUNDLE_FILENAME)
+            run_async(storage_client.download_to_path(file.enriched_file_path, local_path))
             
-            chunk = FileChunk(
-                file_id=UUID(file_id),
-                chunk_index=i,
-                token_count=50,
-                blob_storage_path=chunk_blob_path,
-                chunk_metadata={"page": i + 1, "type": "text"}
-            )
-            dummy_chunks.append(chunk)
+            # Rows are written without committing: readers keep seeing the previous
+            # chunks (and bundle) until the new set is committed as a whole below
+            with open(local_path, encoding="utf-8") as enriched, open(local_bundle_path, "wb") as bundle:
+                writer = ChunkBundleWriter(bundle)
+                chunks = chunker.chunk(iter_sections(enriched))
+                for batch in _batches(chunks, settings.chunk_flush_batch_size):
+                    new_rows = []
+                    kept_rows = []
+                    for chunk in batch:
+                        metadata = {**chunk.metadata, **writer.add(chunk)}
+                        matches = previous.get(metadata["chunk_hash"])
+                        if matches:
+                            chunk_id, _ = matches.pop()
+                            kept_rows.append({
+                                "id": chunk_id,
+                                "chunk_index": chunk.index,
+                                "token_count": chunk.token_count,
+                                "blob_storage_path": bundle_path,
+                                "chunk_metadata": metadata
+                            })
+                        else:
+                            new_rows.append(FileChunk(
+                                file_id=UUID(file_id),
+                                chunk_index=chunk.index,
+                                token_count=chunk.token_count,
+                                blob_storage_path=bundle_path,
+                                chunk_metadata=metadata
+                            ))
+                    chunk_repo.bulk_create(new_rows, commit=False)
+                    chunk_repo.bulk_update(kept_rows, commit=False)
+                    total_chunks += len(batch)
+                    total_tokens += sum(chunk.token_count for chunk in batch)
+                    kept_chunks += len(kept_rows)
+                    logger.info(f"Stored {total_chunks} chunks for file {file_id}")
+            
+            run_async(storage_client.upload_file_from_path(local_bundle_path, bundle_path, BUNDLE_CONTENT_TYPE))
+            uploaded_bundle = bundle_path
+            logger.info(f"Uploaded chunk bundle for file {file_id} ({writer.size} bytes) to {bundle_path}")
         
-        # Save chunks
-        for chunk in dummy_chunks:
-            db.add(chunk)
+        # Previous chunks left unmatched are stale: their vectors go in one delete
+        # before the switch, so a failed commit retries into the same (idempotent) delete
+        stale = [chunk for matches in previous.values() for chunk in matches]
+        if stale:
+            if not run_async(get_vector_store().delete([vector_id for _, vector_id in stale], namespace=project_id)):
+                raise RuntimeError(f"Failed to delete {len(stale)} stale vectors of file {file_id}")
+            chunk_repo.delete_many([chunk_id for chunk_id, _ in stale], commit=False)
         db.commit()
+        uploaded_bundle = None
+        logger.info(
+            f"File {file_id}: {kept_chunks} chunks unchanged, {total_chunks - kept_chunks} to embed, "
+            f"{len(stale)} stale vectors deleted"
+        )
+        
+        # Bundles of earlier runs (or legacy per-chunk blobs) are no longer referenced
+        if previous_paths:
+            deleted = run_async(storage_client.delete_files(sorted(previous_paths)))
+            logger.info(f"Deleted {deleted}/{len(previous_paths)} previous chunk blobs of file {file_id}")
         
         # Update status to chunking_complete
         file_repo.update_status(UUID(file_id), FileStatus.CHUNKING_COMPLETE)
@@ -83,21 +222,30 @@ def chunk_file_task(self, file_id: str, project_id: str):
         # Mark chunking complete time and update total chunks
         file = file_repo.get(UUID(file_id))
         if file:
-            file.total_chunks = len(dummy_chunks)
+            file.total_chunks = total_chunks
             file.chunking_completed_at = datetime.now(UTC)
             db.commit()
         
+        logger.info(f"Chunking completed for file {file_id}: {total_chunks} chunks, {total_tokens} tokens")
+        
         return {
             "file_id": file_id,
             "status": "chunking_complete",
-            "total_chunks": len(dummy_chunks),
-            "message": "File chunked successfully (stub)"
+            "total_chunks": total_chunks,
+            "total_tokens": total_tokens,
+            "unchanged_chunks": kept_chunks,
+            "stale_chunks": len(stale),
+            "message": "File chunked successfully"
         }
-        
+    
     except Exception as e:
-        logger.error(f"Error chunking file {file_id}: {str(e)}")
+        logger.error(f"Error chunking file {file_id}: {str(e)}", exc_info=True)
         
         # Update status to chunking_failed
+        db.rollback()
+        if uploaded_bundle:
+            # Never committed; the retry writes a bundle of its own
+            run_async(get_storage_client().delete_file(uploaded_bundle))
         file_repo = FileRepository(db)
         file_repo.update_status(
             UUID(file_id),
@@ -107,7 +255,6 @@ def chunk_file_task(self, file_id: str, project_id: str):
         
         # Retry the task
         raise self.retry(exc=e)
-        
+    
     finally:
         db.close()
-
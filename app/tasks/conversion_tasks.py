@@ -12,9 +12,14 @@ from typing import Dict, Any
 from app.celery_app import celery_app
 from app.models.file import FileStatus
 from app.database import SessionLocal
-from app.repositories.file_repository import FileRepository
+from app.repositories.file_repository import FileRepository, ContentBlobRepository
 from app.core.storage import get_storage_client
-from app.tasks.file_converter import needs_conversion, convert_file_to_pdf
+from app.tasks.file_converter import (
+    needs_conversion,
+    convert_path_to_pdf,
+    create_temp_directory,
+    cleanup_temp_files
+)
 
 logger = logging.getLogger(__name__)
 
@@ -66,6 +71,7 @@ def convert_file_task(self, file_id: str, org_id: str, project_id: str) -> Dict[
     """
     db = SessionLocal()
     storage_client = None
+    temp_dir = None
     
     try:
         logger.info(f"Starting conversion check for file {file_id}")
@@ -109,6 +115,39 @@ def convert_file_task(self, file_id: str, org_id: str, project_id: str) -> Dict[
                 "message": f"File {filename} does not need conversion"
             }
         
+        # Duplicate content: reuse the PDF converted for the first upload
+        content_blob = None
+        if file.content_hash:
+            content_blob = ContentBlobRepository(db).get_by_hash(UUID(org_id), file.content_hash)
+            if content_blob and content_blob.blob_storage_path != file.blob_storage_path:
+                content_blob = None  # File keeps its own raw blob, not the shared one
+        
+        if content_blob and content_blob.converted_file_path:
+            logger.info(f"Reusing converted PDF {content_blob.converted_file_path} for file {file_id}")
+            
+            file_repo.update_status(UUID(file_id), FileStatus.CONVERSION_COMPLETE)
+            
+            file = file_repo.get(UUID(file_id))
+            if file:
+                file.is_converted = True
+                file.converted_file_path = content_blob.converted_file_path
+                file.conversion_started_at = datetime.now(UTC)
+                file.conversion_completed_at = datetime.now(UTC)
+                db.commit()
+
+            # Chain to parsing task
+            from app.tasks.parsing_tasks import parse_file_task
+            parse_file_task.delay(file_id, org_id, project_id)
+            logger.info(f"Triggered parsing task for file {file_id}")
+
+            return {
+                "file_id": file_id,
+                "status": "conversion_complete",
+                "converted": True,
+                "converted_path": content_blob.converted_file_path,
+                "message": f"Reused converted PDF for duplicate content of {filename}"
+            }
+        
         # File needs conversion
         logger.info(f"File {filename} requires conversion to PDF")
         
@@ -123,24 +162,37 @@ def convert_file_task(self, file_id: str, org_id: str, project_id: str) -> Dict[
         # Initialize storage client
         storage_client = get_storage_client()
         
-        # Download file from storage
+        # Stream file from storage to local disk (never held in memory)
+        temp_dir = create_temp_directory()
+        input_path = os.path.join(temp_dir, filename)
         logger.info(f"Downloading file from: {file.blob_storage_path}")
-        file_content = run_async(storage_client.download_file(file.blob_storage_path))
-        logger.info(f"Downloaded {len(file_content)} bytes")
+        downloaded = run_async(storage_client.download_to_path(file.blob_storage_path, input_path))
+        logger.info(f"Downloaded {downloaded} bytes")
         
         # Convert to PDF using LibreOffice
         logger.info(f"Converting {filename} to PDF")
-        pdf_content, pdf_filename = convert_file_to_pdf(file_content, filename)
-        logger.info(f"Conversion complete: {pdf_filename} ({len(pdf_content)} bytes)")
+        pdf_path = convert_path_to_pdf(input_path, temp_dir)
+        pdf_filename = os.path.splitext(filename)[0] + '.pdf'
+        logger.info(f"Conversion complete: {pdf_filename} ({os.path.getsize(pdf_path)} bytes)")
         
         # Generate converted file path
         # Path format: org_id/project_id/file_id/converted/filename.pdf
-        converted_blob_path = f"{org_id}/{project_id}/{file_id}/converted/{pdf_filename}"
+        # Shared content: org_id/_content/content_hash/blob_id/converted/filename.pdf
+        if content_blob:
+            converted_blob_path = storage_client.generate_content_blob_path(
+                org_id=org_id,
+                content_hash=content_blob.content_hash,
+                blob_id=str(content_blob.id),
+                stage="converted",
+                filename=pdf_filename
+            )
+        else:
+            converted_blob_path = f"{org_id}/{project_id}/{file_id}/converted/{pdf_filename}"
         
-        # Upload converted PDF to storage
+        # Upload converted PDF to storage straight from disk
         logger.info(f"Uploading converted PDF to: {converted_blob_path}")
-        run_async(storage_client.upload_file(
-            file_content=pdf_content,
+        run_async(storage_client.upload_file_from_path(
+            local_path=pdf_path,
             blob_path=converted_blob_path,
             content_type="application/pdf"
         ))
@@ -154,6 +206,8 @@ def convert_file_task(self, file_id: str, org_id: str, project_id: str) -> Dict[
             file.is_converted = True
             file.converted_file_path = converted_blob_path
             file.conversion_completed_at = datetime.now(UTC)
+            if content_blob:
+                content_blob.converted_file_path = converted_blob_path
             db.commit()
         
         logger.info(f"File {filename} converted successfully to {pdf_filename}")
@@ -189,5 +243,7 @@ def convert_file_task(self, file_id: str, org_id: str, project_id: str) -> Dict[
         raise self.retry(exc=e)
         
     finally:
+        if temp_dir:
+            cleanup_temp_files(temp_dir)
         db.close()
 
@@ -1,20 +1,69 @@
 """
 Embedding tasks for generating and storing vector embeddings.
-This is a stub implementation that will be replaced with actual logic in Phase 2.
+
+Chunk text is read from the file's chunk bundle and embedded through the
+process-wide EmbeddingEngine, which packs chunks (of this and any other file
+being embedded on the worker) into filled provider requests. A file is
+processed EMBEDDING_TASK_WINDOW chunks at a time: the next window is read and
+queued for embedding while the vectors of the previous one are upserted.
+Texts whose embedding is cached (EMBEDDING_CACHE_*) are not sent again.
+Requests count against the shared embedding rate limits, and each window
+waits for the organization's token quota (EMBEDDING_TENANT_TOKENS_PER_MINUTE).
 """
-import time
+import asyncio
 import logging
+from collections import deque
+from concurrent.futures import Future
 from datetime import datetime, UTC
+from typing import Deque, List, Tuple
 from uuid import UUID
 
 from app.celery_app import celery_app
+from app.config import settings
 from app.models.file import FileStatus
+from app.models.file_chunk import FileChunk
 from app.database import SessionLocal
 from app.repositories.file_repository import FileRepository, FileChunkRepository
+from app.repositories.project_repository import ProjectRepository
+from app.core.embeddings import get_embedding_engine
+from app.core.storage import get_storage_client
+from app.core.vector_store import get_vector_store
+
+from .chunking import read_chunk_records
 
 logger = logging.getLogger(__name__)
 
 
+def run_async(coro):
+    """Helper to run async functions in Celery tasks."""
+    try:
+        loop = asyncio.get_event_loop()
+        if loop.is_closed():
+            # Loop is closed, create a new one
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+    except RuntimeError:
+        # No event loop in current thread, create a new one
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+    
+    return loop.run_until_complete(coro)
+
+
+def _vector_tuple(file_id: str, chunk: FileChunk, vector: List[float]) -> tuple:
+    """(id, values, metadata) for upsert_vectors; chunk IDs keep vector IDs unique across revisions."""
+    return (
+        f"vec_{file_id}_{chunk.id}",
+        vector,
+        {
+            "file_id": file_id,
+            "chunk_id": str(chunk.id),
+            "chunk_index": chunk.chunk_index,
+            "page": (chunk.chunk_metadata or {}).get("page")
+        }
+    )
+
+
 @celery_app.task(
     bind=True,
     name="app.tasks.embedding_tasks.embed_chunks",
@@ -23,23 +72,38 @@ logger = logging.getLogger(__name__)
 )
 def embed_chunks_task(self, file_id: str, project_id: str):
     """
-    Dummy task for embedding generation (Phase 1 stub).
-    In Phase 2, this will be replaced with actual embedding logic using
-    Azure OpenAI and Pinecone from rag-embedding.
+    Embed the chunks of a file and upsert their vectors.
+    
+    This task:
+    1. Selects the file's chunks without a vector (unchanged chunks of a
+       revision kept theirs)
+    2. Per window of EMBEDDING_TASK_WINDOW chunks, reads their text from the chunk
+       bundle and submits it to the shared EmbeddingEngine
+    3. Upserts each window's vectors in the project namespace and records the
+       vector IDs, while the next window is being embedded
+    4. Marks the file READY
+    
+    A retry only embeds chunks whose vector was not recorded yet; vectors
+    upserted by a failed attempt are overwritten under the same IDs.
     
     Args:
         file_id: File ID
         project_id: Project ID
-        
+    
     Returns:
         Dict with embedding result
     """
     db = SessionLocal()
     try:
-        logger.info(f"[STUB] Starting embedding for file {file_id}")
+        logger.info(f"Starting embedding for file {file_id}")
         
         file_repo = FileRepository(db)
         chunk_repo = FileChunkRepository(db)
+        storage_client = get_storage_client()
+        vector_store = get_vector_store()
+        engine = get_embedding_engine()
+        project = ProjectRepository(db).get(UUID(project_id))
+        tenant_id = str(project.organization_id) if project else None
         
         # Update status to embedding_started
         file_repo.update_status(UUID(file_id), FileStatus.EMBEDDING_STARTED)
@@ -50,17 +114,49 @@ def embed_chunks_task(self, file_id: str, project_id: str):
             file.embedding_started_at = datetime.now(UTC)
             db.commit()
         
-        # Get all chunks for this file
-        chunks = chunk_repo.get_by_file(UUID(file_id))
-        
-        # Simulate embedding work (Phase 1)
-        time.sleep(2)
-        logger.info(f"[STUB] Embedding simulation complete for file {file_id}")
-        
-        # Update vector IDs for chunks (dummy values)
-        for i, chunk in enumerate(chunks):
-            chunk.vector_id = f"vec_{file_id}_{i}"
-        db.commit()
+        # Chunks unchanged since the previous version kept their vectors
+        chunks = [chunk for chunk in chunk_repo.get_by_file(UUID(file_id)) if chunk.vector_id is None]
+        windows = [
+            chunks[i:i + settings.embedding_task_window]
+            for i in range(0, len(chunks), settings.embedding_task_window)
+        ]
+        
+        def start(window: List[FileChunk]):
+            records = run_async(read_chunk_records(storage_client, window))
+            return engine.submit(
+                [record["text"] for record in records],
+                [chunk.token_count for chunk in window],
+                tenant=tenant_id
+            )
+        
+        total_embeddings = 0
+        total_tokens = 0
+        in_flight: Deque[Tuple[List[FileChunk], Future]] = deque()
+        for index in range(len(windows)):
+            # Keep the next window embedding while this one is upserted
+            while len(in_flight) < 2 and index + len(in_flight) < len(windows):
+                window = windows[index + len(in_flight)]
+                in_flight.append((window, start(window)))
+            
+            window, future = in_flight.popleft()
+            vectors = [
+                _vector_tuple(file_id, chunk, vector)
+                for chunk, vector in zip(window, future.result())
+            ]
+            results = run_async(vector_store.upsert_vectors(vectors, namespace=project_id))
+            failed = [result for result in results if not result.success]
+            if failed:
+                raise RuntimeError(
+                    f"Failed to upsert {sum(r.vector_count for r in failed)} vectors of file {file_id}: "
+                    f"{failed[0].error}"
+                )
+            
+            for chunk, vector in zip(window, vectors):
+                chunk.vector_id = vector[0]
+            db.commit()
+            total_embeddings += len(window)
+            total_tokens += sum(chunk.token_count for chunk in window)
+            logger.info(f"Embedded {total_embeddings}/{len(chunks)} chunks for file {file_id}")
         
         # Update status to embedding_complete
         file_repo.update_status(UUID(file_id), FileStatus.EMBEDDING_COMPLETE)
@@ -74,19 +170,23 @@ def embed_chunks_task(self, file_id: str, project_id: str):
         # Final status update to READY
         file_repo.update_status(UUID(file_id), FileStatus.READY)
         
-        logger.info(f"[STUB] File {file_id} is now READY for retrieval")
+        logger.info(f"File {file_id} is now READY for retrieval ({total_embeddings} chunks, {total_tokens} tokens embedded)")
+        if engine.cache:
+            logger.info(f"Embedding cache: {engine.cache.stats.summary()}")
         
         return {
             "file_id": file_id,
             "status": "ready",
-            "total_embeddings": len(chunks),
-            "message": "File embeddings created successfully (stub)"
+            "total_embeddings": total_embeddings,
+            "total_tokens": total_tokens,
+            "message": "File embeddings created successfully"
         }
-        
+    
     except Exception as e:
-        logger.error(f"Error embedding file {file_id}: {str(e)}")
+        logger.error(f"Error embedding file {file_id}: {str(e)}", exc_info=True)
         
         # Update status to embedding_failed
+        db.rollback()
         file_repo = FileRepository(db)
         file_repo.update_status(
             UUID(file_id),
@@ -96,7 +196,6 @@ def embed_chunks_task(self, file_id: str, project_id: str):
         
         # Retry the task
         raise self.retry(exc=e)
-        
+    
     finally:
         db.close()
-
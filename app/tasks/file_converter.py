@@ -345,6 +345,30 @@ def convert_to_pdf_libreoffice(input_path: str, output_dir: str, is_excel: bool
         raise
 
 
+def convert_path_to_pdf(input_path: str, output_dir: str) -> str:
+    """
+    Convert a file already on local disk to PDF.
+    
+    Lets callers stream the source file to disk and upload the result from
+    disk, so neither document has to be held in memory.
+    
+    Args:
+        input_path: Path to the input file
+        output_dir: Directory where the PDF (and any intermediates) are written
+        
+    Returns:
+        Path to the generated PDF file
+        
+    Raises:
+        RuntimeError: If conversion fails
+    """
+    # Check if this is an Excel file for preprocessing
+    is_excel = input_path.lower().endswith(('.xls', '.xlsx'))
+    
+    # Convert to PDF using LibreOffice
+    return convert_to_pdf_libreoffice(input_path, output_dir, is_excel=is_excel)
+
+
 def convert_file_to_pdf(input_file_content: bytes, filename: str) -> Tuple[bytes, str]:
     """
     Main conversion function: converts a file to PDF.
@@ -371,11 +395,7 @@ def convert_file_to_pdf(input_file_content: bytes, filename: str) -> Tuple[bytes
             f.write(input_file_content)
         logger.info(f"Saved input file: {input_path} ({len(input_file_content)} bytes)")
         
-        # Check if this is an Excel file for preprocessing
-        is_excel = filename.lower().endswith(('.xls', '.xlsx'))
-        
-        # Convert to PDF using LibreOffice
-        pdf_path = convert_to_pdf_libreoffice(input_path, temp_dir, is_excel=is_excel)
+        pdf_path = convert_path_to_pdf(input_path, temp_dir)
         
         # Read the generated PDF
         with open(pdf_path, 'rb') as f:
@@ -395,4 +415,3 @@ def convert_file_to_pdf(input_file_content: bytes, filename: str) -> Tuple[bytes
         # Clean up temporary files
         if temp_dir:
             cleanup_temp_files(temp_dir)
-
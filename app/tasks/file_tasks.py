@@ -6,12 +6,31 @@ from app.celery_app import celery_app
 from app.models.file import FileStatus
 from app.database import SessionLocal
 from app.repositories.file_repository import FileRepository
+from app.core.storage import get_storage_client
+import asyncio
 import logging
+from typing import List
 from uuid import UUID
 
 logger = logging.getLogger(__name__)
 
 
+def run_async(coro):
+    """Helper to run async code in sync context."""
+    try:
+        loop = asyncio.get_event_loop()
+        if loop.is_closed():
+            # Loop is closed, create a new one
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+    except RuntimeError:
+        # No event loop in current thread, create a new one
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+
+    return loop.run_until_complete(coro)
+
+
 @celery_app.task(bind=True, name="app.tasks.file_tasks.process_file_pipeline")
 def process_file_pipeline_task(self, file_id: str, project_id: str):
     """
@@ -48,6 +67,11 @@ def process_file_pipeline_task(self, file_id: str, project_id: str):
             
             org_id = str(project.organization_id)
             
+            # Direct uploads are hashed here rather than in the API on confirm
+            if file.content_hash is None:
+                from app.services.file_service import FileService
+                run_async(FileService(db).register_stored_content(file, project.organization_id))
+            
             # Build task chain - always run conversion task (it will skip if not needed)
             # Use si() (signature immutable) so tasks ignore previous results
             task_chain = chain(
@@ -110,3 +134,54 @@ def update_file_status_task(file_id: str, status: str, error_message: str = None
     finally:
         db.close()
 
+
+@celery_app.task(
+    bind=True,
+    name="app.tasks.file_tasks.delete_blob_prefix",
+    max_retries=3,
+    default_retry_delay=60
+)
+def delete_blob_prefix_task(self, prefix: str):
+    """
+    Delete every blob under a storage prefix (file or project cleanup).
+    
+    Runs after the database rows are gone, so the API responds without
+    waiting on storage. Retrying is safe: already-deleted blobs are skipped.
+    
+    Args:
+        prefix: Folder prefix ending in '/', e.g. org_id/project_id/file_id/
+        
+    Returns:
+        Dict with the number of blobs deleted
+    """
+    try:
+        storage_client = get_storage_client()
+        deleted = run_async(storage_client.delete_prefix(prefix))
+        logger.info(f"Deleted {deleted} blobs under {prefix}")
+        
+        return {
+            "prefix": prefix,
+            "deleted": deleted
+        }
+        
+    except Exception as e:
+        logger.error(f"Error deleting blobs under {prefix}: {str(e)}")
+        raise self.retry(exc=e)
+
+
+def schedule_blob_prefix_deletion(prefixes: List[str]) -> None:
+    """
+    Queue one background deletion task per storage prefix.
+    
+    Failures to queue are logged rather than raised: the database delete has
+    already been committed and should not be reported as failed.
+    
+    Args:
+        prefixes: Folder prefixes ending in '/'
+    """
+    for prefix in prefixes:
+        try:
+            task_result = delete_blob_prefix_task.delay(prefix)
+            logger.info(f"Queued blob deletion for {prefix} (task {task_result.id})")
+        except Exception as e:
+            logger.error(f"Failed to queue blob deletion for {prefix}: {str(e)}", exc_info=True)
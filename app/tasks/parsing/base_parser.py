@@ -6,9 +6,10 @@ and output format across different document types.
 """
 
 import logging
+import os
 from abc import ABC, abstractmethod
 from datetime import datetime, timezone
-from typing import Any, Optional
+from typing import Any, BinaryIO, Optional, Union
 
 from . import config
 
@@ -18,18 +19,27 @@ logger = logging.getLogger(__name__)
 class BaseParser(ABC):
     """Abstract base class for all document parsers."""
 
-    def __init__(self, file_content: bytes, filename: str, document_id: str):
+    def __init__(
+        self,
+        file_content: Union[bytes, BinaryIO],
+        filename: str,
+        document_id: str,
+        tenant_id: Optional[str] = None
+    ):
         """
         Initialize the parser.
 
         Args:
-            file_content: Raw bytes of the document
+            file_content: Raw bytes of the document, or an open binary file
+                (preferred for large documents, avoids holding them in memory)
             filename: Original filename
             document_id: Unique document identifier (UUID)
+            tenant_id: Organization ID (for per-tenant provider rate limits)
         """
         self.file_content = file_content
         self.filename = filename
         self.document_id = document_id
+        self.tenant_id = tenant_id
         self.parser_name = self.__class__.__name__
 
         # Log enabled features
@@ -66,9 +76,20 @@ class BaseParser(ABC):
             "parser": self.parser_name,
             "parsing_service": config.PARSING_SERVICE,
             "created_at": datetime.now(timezone.utc).isoformat(),
-            "file_size": len(self.file_content),
+            "file_size": self._get_file_size(),
         }
 
+    def _get_file_size(self) -> int:
+        """
+        Get document size in bytes for bytes or file-object content.
+
+        Returns:
+            int: Size in bytes
+        """
+        if isinstance(self.file_content, (bytes, bytearray)):
+            return len(self.file_content)
+        return os.fstat(self.file_content.fileno()).st_size
+
     def _create_enriched_json_structure(
         self,
         sections: list[dict[str, Any]],
@@ -122,7 +143,9 @@ class BaseParser(ABC):
             from .utils.llm_enrichment import LLMEnrichment
 
             enrichment = LLMEnrichment()
-            enriched_metadata = await enrichment.extract_metadata(text_content, self.filename)
+            enriched_metadata = await enrichment.extract_metadata(
+                text_content, self.filename, tenant_id=self.tenant_id
+            )
             logger.info(f"LLM enrichment successful for {self.filename}")
             return enriched_metadata
 
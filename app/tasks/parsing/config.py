@@ -47,6 +47,9 @@ AFR_POLLING_TIMEOUT: int = settings.afr_polling_timeout
 AFR_RETRY_ATTEMPTS: int = settings.afr_retry_attempts
 AFR_RETRY_DELAY: int = settings.afr_retry_delay
 
+# Provider rate limits (app.core.rate_limit); 429 retries beyond AFR_RETRY_ATTEMPTS
+RATE_LIMIT_MAX_THROTTLE_RETRIES: int = settings.rate_limit_max_throttle_retries
+
 
 def validate_config() -> dict[str, bool]:
     """
@@ -6,7 +6,7 @@ using Azure Form Recognizer.
 """
 
 import logging
-from typing import Any
+from typing import Any, BinaryIO, Optional, Union
 
 from .base_parser import BaseParser
 from .utils.afr_client import AzureFormRecognizerClient
@@ -24,16 +24,23 @@ class PowerPointParser(BaseParser):
     - Viewport coordinates for elements
     """
 
-    def __init__(self, file_content: bytes, filename: str, document_id: str):
+    def __init__(
+        self,
+        file_content: Union[bytes, BinaryIO],
+        filename: str,
+        document_id: str,
+        tenant_id: Optional[str] = None
+    ):
         """
         Initialize PowerPoint parser.
 
         Args:
-            file_content: PowerPoint file bytes
+            file_content: PowerPoint file bytes or open binary file
             filename: Original filename
             document_id: Unique document identifier
+            tenant_id: Organization ID (for per-tenant provider rate limits)
         """
-        super().__init__(file_content, filename, document_id)
+        super().__init__(file_content, filename, document_id, tenant_id)
         self.afr_client = AzureFormRecognizerClient()
 
     async def parse(self) -> dict[str, Any]:
@@ -53,6 +60,7 @@ class PowerPointParser(BaseParser):
             afr_result = await self.afr_client.analyze_document(
                 file_content=self.file_content,
                 model_id="prebuilt-layout",
+                tenant_id=self.tenant_id,
             )
 
             # Step 2: Extract sections and page info (pages = slides)
@@ -2,17 +2,21 @@
 Azure Form Recognizer client wrapper.
 
 This module provides a clean interface to Azure Form Recognizer with
-retry logic, error handling, and cost tracking.
+retry logic, error handling, and cost tracking. Analyses go through the
+shared AFR rate limiter (app.core.rate_limit): a 429 pauses AFR for every
+worker for its Retry-After instead of each worker sleeping on its own.
 """
 
 import asyncio
 import logging
-from typing import Any, Optional
+from typing import Any, BinaryIO, Optional, Union
 
 from azure.ai.formrecognizer import DocumentAnalysisClient
 from azure.core.credentials import AzureKeyCredential
 from azure.core.exceptions import HttpResponseError
 
+from app.core.rate_limit import get_rate_limiter
+
 from .. import config
 
 logger = logging.getLogger(__name__)
@@ -43,20 +47,23 @@ class AzureFormRecognizerClient:
             endpoint=self.endpoint,
             credential=AzureKeyCredential(config.AZURE_AFR_API_KEY),
         )
+        self.limiter = get_rate_limiter("afr")
 
         logger.info(f"Azure Form Recognizer client initialized: {self.endpoint}")
 
     async def analyze_document(
         self,
-        file_content: bytes,
+        file_content: Union[bytes, BinaryIO],
         model_id: str = "prebuilt-layout",
+        tenant_id: Optional[str] = None,
     ) -> Any:
         """
         Analyze document using Azure Form Recognizer.
 
         Args:
-            file_content: Document bytes
+            file_content: Document bytes or open binary file (streamed to AFR)
             model_id: AFR model to use (default: prebuilt-layout)
+            tenant_id: Organization ID (for per-tenant rate limits)
 
         Returns:
             Analyzed document result
@@ -71,17 +78,7 @@ class AzureFormRecognizerClient:
                     f"(attempt {attempt + 1}/{config.AFR_RETRY_ATTEMPTS})"
                 )
 
-                # Begin analysis (async operation)
-                poller = self.client.begin_analyze_document(
-                    model_id=model_id,
-                    document=file_content,
-                )
-
-                # Wait for completion with timeout
-                result = await asyncio.wait_for(
-                    asyncio.to_thread(poller.result),
-                    timeout=config.AFR_POLLING_TIMEOUT,
-                )
+                result = await self._analyze_within_limits(file_content, model_id, tenant_id)
 
                 logger.info("AFR analysis completed successfully")
                 return result
@@ -98,12 +95,7 @@ class AzureFormRecognizerClient:
 
             except HttpResponseError as e:
                 logger.error(f"AFR HTTP error: {e.status_code} - {e.message}")
-                if e.status_code == 429:  # Rate limit
-                    if attempt < config.AFR_RETRY_ATTEMPTS - 1:
-                        wait_time = config.AFR_RETRY_DELAY * (2 ** attempt)
-                        logger.info(f"Rate limited, waiting {wait_time}s before retry")
-                        await asyncio.sleep(wait_time)
-                        continue
+                # 429s were already retried after the shared pause
                 raise RuntimeError(f"AFR HTTP error: {e.message}")
 
             except Exception as e:
@@ -115,6 +107,44 @@ class AzureFormRecognizerClient:
 
         raise RuntimeError("AFR analysis failed after all retry attempts")
 
+    async def _analyze_within_limits(
+        self,
+        file_content: Union[bytes, BinaryIO],
+        model_id: str,
+        tenant_id: Optional[str],
+    ) -> Any:
+        """
+        Run one analysis within the AFR rate limits.
+
+        The limiter slot is held until the result is in, so AFR_MAX_CONCURRENCY
+        bounds analyses in flight. A 429 pauses AFR for all workers and is
+        retried (up to RATE_LIMIT_MAX_THROTTLE_RETRIES times) once the pause is over.
+        """
+        throttles = 0
+        while True:
+            # Rewind file input so retries resend the whole document
+            if not isinstance(file_content, (bytes, bytearray)):
+                file_content.seek(0)
+
+            try:
+                async with self.limiter.limit_async(tenant=tenant_id):
+                    # Begin analysis (async operation)
+                    poller = self.client.begin_analyze_document(
+                        model_id=model_id,
+                        document=file_content,
+                    )
+
+                    # Wait for completion with timeout
+                    return await asyncio.wait_for(
+                        asyncio.to_thread(poller.result),
+                        timeout=config.AFR_POLLING_TIMEOUT,
+                    )
+            except HttpResponseError as e:
+                if e.status_code != 429 or throttles >= config.RATE_LIMIT_MAX_THROTTLE_RETRIES:
+                    raise
+                throttles += 1
+                logger.info(f"AFR rate limited, retrying after the shared pause ({throttles})")
+
     def extract_sections_from_result(
         self, result: Any, include_tables: bool = True
     ) -> tuple[list[dict[str, Any]], dict[str, Any]]:
@@ -8,6 +8,10 @@ This module uses OpenAI to extract structured metadata from documents:
 - date_of_authoring: Extracted date if available
 
 Cost: ~$0.002 per document with gpt-4o-mini (as of 2024)
+
+Requests go through the shared LLM rate limiter (app.core.rate_limit),
+which counts their estimated tokens against the tokens-per-minute quotas
+and pauses every worker after a 429.
 """
 
 import logging
@@ -16,10 +20,16 @@ from typing import Any, Optional
 from openai import AsyncOpenAI
 from pydantic import BaseModel, Field
 
+from app.core.rate_limit import get_rate_limiter, is_rate_limited
+from app.core.tokenizer import get_tokenizer
+
 from .. import config
 
 logger = logging.getLogger(__name__)
 
+# Completion tokens reserved per request (the structured metadata is short)
+_COMPLETION_TOKENS = 300
+
 
 class EnrichedMetadata(BaseModel):
     """Structured enriched metadata extracted by LLM."""
@@ -62,13 +72,19 @@ class LLMEnrichment:
                 "Please set OPENAI_API_KEY or disable ENABLE_LLM_ENRICHMENT"
             )
 
-        self.client = AsyncOpenAI(api_key=config.OPENAI_API_KEY)
+        # 429s are retried through the shared limiter rather than by the SDK
+        self.client = AsyncOpenAI(api_key=config.OPENAI_API_KEY, max_retries=0)
         self.model = config.OPENAI_MODEL
+        self.limiter = get_rate_limiter("llm")
 
         logger.info(f"LLM enrichment initialized with model: {self.model}")
 
     async def extract_metadata(
-        self, text_content: str, filename: str, max_chars: int = 8000
+        self,
+        text_content: str,
+        filename: str,
+        max_chars: int = 8000,
+        tenant_id: Optional[str] = None,
     ) -> dict[str, Any]:
         """
         Extract enriched metadata using LLM.
@@ -77,6 +93,7 @@ class LLMEnrichment:
             text_content: Full text content of document
             filename: Original filename (provides context)
             max_chars: Maximum characters to send to LLM (cost control)
+            tenant_id: Organization ID (for per-tenant rate limits)
 
         Returns:
             dict: Extracted enriched metadata
@@ -95,24 +112,37 @@ class LLMEnrichment:
             # Create prompt
             prompt = self._create_extraction_prompt(filename, truncated_content)
 
+            messages = [
+                {
+                    "role": "system",
+                    "content": (
+                        "You are a document analysis expert. Extract structured "
+                        "metadata from documents accurately and concisely."
+                    ),
+                },
+                {"role": "user", "content": prompt},
+            ]
+            tokens = sum(get_tokenizer().count_batch([m["content"] for m in messages])) + _COMPLETION_TOKENS
+
             # Call OpenAI with structured output
             logger.info(f"Requesting LLM metadata extraction with {self.model}")
 
-            response = await self.client.beta.chat.completions.parse(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are a document analysis expert. Extract structured "
-                            "metadata from documents accurately and concisely."
-                        ),
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                response_format=EnrichedMetadata,
-                temperature=0.3,  # Lower temperature for more consistent extraction
-            )
+            throttles = 0
+            while True:
+                try:
+                    async with self.limiter.limit_async(tokens=tokens, tenant=tenant_id):
+                        response = await self.client.beta.chat.completions.parse(
+                            model=self.model,
+                            messages=messages,
+                            response_format=EnrichedMetadata,
+                            temperature=0.3,  # Lower temperature for more consistent extraction
+                        )
+                    break
+                except Exception as e:
+                    # The limiter paused enrichment for all workers; retry once it is over
+                    if not is_rate_limited(e) or throttles >= config.RATE_LIMIT_MAX_THROTTLE_RETRIES:
+                        raise
+                    throttles += 1
 
             # Parse response
             enriched_metadata = response.choices[0].message.parsed
@@ -26,24 +26,28 @@ class ParsingStorageHelper:
         """
         self.storage_client = storage_client
 
-    async def download_file(self, blob_path: str) -> bytes:
+    async def download_file(self, blob_path: str, local_path: str) -> int:
         """
-        Download file from storage.
+        Download file from storage to a local path.
+
+        The file is streamed to disk chunk by chunk, so worker memory does not
+        grow with document size.
 
         Args:
             blob_path: Path to blob in storage
+            local_path: Destination path on local disk
 
         Returns:
-            bytes: File content
+            int: Number of bytes written
 
         Raises:
             RuntimeError: If download fails
         """
         try:
             logger.info(f"Downloading file from: {blob_path}")
-            content = await self.storage_client.download_file(blob_path)
-            logger.info(f"Downloaded {len(content)} bytes from {blob_path}")
-            return content
+            size = await self.storage_client.download_to_path(blob_path, local_path)
+            logger.info(f"Downloaded {size} bytes from {blob_path}")
+            return size
         except Exception as e:
             logger.error(f"Failed to download file from {blob_path}: {str(e)}")
             raise RuntimeError(f"Failed to download file: {str(e)}")
@@ -8,13 +8,16 @@ LLM-enriched metadata.
 
 import asyncio
 import logging
+import os
+import tempfile
 from datetime import datetime, UTC
+from typing import BinaryIO, Optional, Union
 from uuid import UUID
 
 from app.celery_app import celery_app
 from app.models.file import FileStatus
 from app.database import SessionLocal
-from app.repositories.file_repository import FileRepository
+from app.repositories.file_repository import FileRepository, ContentBlobRepository
 from app.core.storage import get_storage_client
 
 from .parsing import PDFParser, ExcelParser, PowerPointParser
@@ -41,15 +44,19 @@ def run_async(coro):
 
 
 def get_parser_for_file(
-    file_content: bytes, filename: str, document_id: str
+    file_content: Union[bytes, BinaryIO],
+    filename: str,
+    document_id: str,
+    tenant_id: Optional[str] = None,
 ) -> PDFParser | ExcelParser | PowerPointParser:
     """
     Select appropriate parser based on file extension.
 
     Args:
-        file_content: File bytes
+        file_content: File bytes or open binary file
         filename: Original filename
         document_id: Document UUID
+        tenant_id: Organization ID (for per-tenant provider rate limits)
 
     Returns:
         Parser instance
@@ -60,11 +67,11 @@ def get_parser_for_file(
     filename_lower = filename.lower()
 
     if filename_lower.endswith(".pdf"):
-        return PDFParser(file_content, filename, document_id)
+        return PDFParser(file_content, filename, document_id, tenant_id)
     elif filename_lower.endswith((".xlsx", ".xls")):
-        return ExcelParser(file_content, filename, document_id)
+        return ExcelParser(file_content, filename, document_id, tenant_id)
     elif filename_lower.endswith((".pptx", ".ppt")):
-        return PowerPointParser(file_content, filename, document_id)
+        return PowerPointParser(file_content, filename, document_id, tenant_id)
     else:
         raise ValueError(
             f"Unsupported file type for parsing: {filename}. "
@@ -134,6 +141,29 @@ def parse_file_task(self, file_id: str, org_id: str, project_id: str):
         file.parsing_started_at = datetime.now(UTC)
         db.commit()
 
+        # Duplicate content: reuse the enriched JSON parsed for the first upload
+        content_blob = None
+        if file.content_hash:
+            content_blob = ContentBlobRepository(db).get_by_hash(UUID(org_id), file.content_hash)
+            if content_blob and content_blob.blob_storage_path != file.blob_storage_path:
+                content_blob = None  # File keeps its own raw blob, not the shared one
+
+        if content_blob and content_blob.enriched_file_path:
+            logger.info(
+                f"Reusing enriched JSON {content_blob.enriched_file_path} for file {file_id}, skipping AFR"
+            )
+            file_repo.update_status(UUID(file_id), FileStatus.PARSING_COMPLETE)
+            file.enriched_file_path = content_blob.enriched_file_path
+            file.parsing_completed_at = datetime.now(UTC)
+            db.commit()
+
+            return {
+                "file_id": file_id,
+                "status": "parsing_complete",
+                "enriched_path": content_blob.enriched_file_path,
+                "reused": True,
+            }
+
         # Determine which file to parse (converted or original)
         if file.is_converted and file.converted_file_path:
             blob_path = file.converted_file_path
@@ -145,27 +175,41 @@ def parse_file_task(self, file_id: str, org_id: str, project_id: str):
             parse_filename = file.original_filename
             logger.info(f"Parsing original file: {blob_path}")
 
-        # Download file from storage
-        file_content = run_async(storage_helper.download_file(blob_path))
-
-        # Get appropriate parser based on actual file type
-        parser = get_parser_for_file(
-            file_content=file_content,
-            filename=parse_filename,  # Use converted filename if file was converted
-            document_id=file_id,
-        )
-
-        logger.info(f"Using parser: {parser.__class__.__name__}")
-
-        # Parse document
-        enriched_json = run_async(parser.parse())
-
-        # Generate enriched JSON path
-        enriched_path = storage_helper.generate_enriched_json_path(
-            org_id=org_id,
-            project_id=project_id,
-            file_id=file_id,
-        )
+        # Stream file from storage to a local temp file and parse from disk,
+        # so worker memory stays flat regardless of document size
+        with tempfile.TemporaryDirectory(prefix="memic_parsing_") as temp_dir:
+            local_path = os.path.join(temp_dir, parse_filename)
+            run_async(storage_helper.download_file(blob_path, local_path))
+
+            with open(local_path, "rb") as file_content:
+                # Get appropriate parser based on actual file type
+                parser = get_parser_for_file(
+                    file_content=file_content,
+                    filename=parse_filename,  # Use converted filename if file was converted
+                    document_id=file_id,
+                    tenant_id=org_id,
+                )
+
+                logger.info(f"Using parser: {parser.__class__.__name__}")
+
+                # Parse document
+                enriched_json = run_async(parser.parse())
+
+        # Generate enriched JSON path (shared by all files with this content)
+        if content_blob:
+            enriched_path = storage_client.generate_content_blob_path(
+                org_id=org_id,
+                content_hash=content_blob.content_hash,
+                blob_id=str(content_blob.id),
+                stage="enriched",
+                filename="enriched.json",
+            )
+        else:
+            enriched_path = storage_helper.generate_enriched_json_path(
+                org_id=org_id,
+                project_id=project_id,
+                file_id=file_id,
+            )
 
         # Upload enriched JSON to storage
         run_async(storage_helper.upload_enriched_json(enriched_json, enriched_path))
@@ -174,6 +218,8 @@ def parse_file_task(self, file_id: str, org_id: str, project_id: str):
         file_repo.update_status(UUID(file_id), FileStatus.PARSING_COMPLETE)
         file.enriched_file_path = enriched_path
         file.parsing_completed_at = datetime.now(UTC)
+        if content_blob:
+            content_blob.enriched_file_path = enriched_path
 
         # Store enriched_metadata if available (for easy querying)
         enriched_metadata = enriched_json.get("enriched_metadata", {})
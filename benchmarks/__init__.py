@@ -0,0 +1,7 @@
+"""
+Standalone performance benchmarks.
+
+Each module is runnable from the repository root, e.g.:
+
+    python -m benchmarks.bench_file_endpoints --help
+"""
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+"""
+Storage calls and wall time of per-chunk blobs vs. packed chunk bundles.
+
+Writes --chunks synthetic chunks of one file to a fake Blob server with a
+per-request latency, once as one JSON blob per chunk (the old layout) and
+once as a single JSONL bundle (app/tasks/chunking/bundle.py), then hydrates
+--hits random chunks the way search does. Request counts come from the fake
+server, so they include every block / range request the SDK makes.
+
+Usage:
+    python -m benchmarks.bench_chunk_bundle --chunks 10000 --hits 20 --latency 0.02
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from types import SimpleNamespace
+
+from benchmarks.fake_blob_server import FakeBlobServer
+
+# Uploads in flight for the per-chunk layout (chunking_tasks used to gather one flush batch)
+PER_CHUNK_BATCH = 256
+BUNDLE_PATH = "bench/bundle/chunks.jsonl"
+
+
+def make_chunks(count: int, chunk_tokens: int):
+    from app.tasks.chunking import Chunk
+
+    words = ["storage", "vector", "bundle", "offset", "range", "search", "token", "chunk"]
+    rng = random.Random(0)
+    for index in range(count):
+        text = " ".join(rng.choice(words) for _ in range(chunk_tokens))
+        yield Chunk(index=index, text=text, token_count=chunk_tokens, metadata={"type": "text", "page": index // 4 + 1})
+
+
+async def write_per_chunk(storage_client, chunks) -> None:
+    from app.tasks.chunking.bundle import chunk_record
+
+    for i in range(0, len(chunks), PER_CHUNK_BATCH):
+        await asyncio.gather(*(
+            storage_client.upload_file(
+                json.dumps(chunk_record(chunk)).encode("utf-8"),
+                f"bench/per_chunk/chunk_{chunk.index}.json",
+                "application/json",
+            )
+            for chunk in chunks[i:i + PER_CHUNK_BATCH]
+        ))
+
+
+async def read_per_chunk(storage_client, hits: list[int]) -> list[dict]:
+    payloads = await asyncio.gather(*(
+        storage_client.download_file(f"bench/per_chunk/chunk_{i}.json") for i in hits
+    ))
+    return [json.loads(payload) for payload in payloads]
+
+
+async def write_bundle(storage_client, chunks, workdir: str) -> list[SimpleNamespace]:
+    """Upload the bundle; returns FileChunk-like rows for every chunk."""
+    from app.tasks.chunking import BUNDLE_CONTENT_TYPE, ChunkBundleWriter
+
+    local_path = os.path.join(workdir, "chunks.jsonl")
+    with open(local_path, "wb") as fp:
+        writer = ChunkBundleWriter(fp)
+        rows = [
+            SimpleNamespace(blob_storage_path=BUNDLE_PATH, chunk_metadata={**chunk.metadata, **writer.add(chunk)})
+            for chunk in chunks
+        ]
+    await storage_client.upload_file_from_path(local_path, BUNDLE_PATH, BUNDLE_CONTENT_TYPE)
+    return rows
+
+
+async def read_bundle(storage_client, rows, hits: list[int]) -> list[dict]:
+    from app.tasks.chunking import read_chunk_records
+
+    return await read_chunk_records(storage_client, [rows[i] for i in hits])
+
+
+async def run(args, server, storage_client, chunks, hits: list[int], workdir: str) -> dict:
+    results = {}
+
+    async def measure(step):
+        requests_before = server.request_count
+        start = time.perf_counter()
+        value = await step
+        return value, server.request_count - requests_before, time.perf_counter() - start
+
+    _, write_requests, write_seconds = await measure(write_per_chunk(storage_client, chunks))
+    records, read_requests, read_seconds = await measure(read_per_chunk(storage_client, hits))
+    assert [r["chunk_index"] for r in records] == hits
+    results["per-chunk blobs"] = (write_requests, write_seconds, read_requests, read_seconds)
+
+    rows, write_requests, write_seconds = await measure(write_bundle(storage_client, chunks, workdir))
+    records, read_requests, read_seconds = await measure(read_bundle(storage_client, rows, hits))
+    assert [r["chunk_index"] for r in records] == hits
+    results["bundle"] = (write_requests, write_seconds, read_requests, read_seconds)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=10000, help="Chunks in the file")
+    parser.add_argument("--chunk-tokens", type=int, default=400, help="Words per synthetic chunk")
+    parser.add_argument("--hits", type=int, default=20, help="Chunks hydrated per search")
+    parser.add_argument("--latency", type=float, default=0.02, help="Fake server latency per request (s)")
+    args = parser.parse_args()
+
+    chunks = list(make_chunks(args.chunks, args.chunk_tokens))
+    hits = random.Random(1).sample(range(args.chunks), min(args.hits, args.chunks))
+
+    with FakeBlobServer(latency=args.latency) as server, tempfile.TemporaryDirectory() as workdir:
+        from app.config import settings
+        from app.core.storage import AzureBlobStorageClient
+
+        settings.azure_storage_connection_string = server.connection_string
+        storage_client = AzureBlobStorageClient()
+        try:
+            results = asyncio.run(run(args, server, storage_client, chunks, hits, workdir))
+        finally:
+            storage_client.close()
+
+    print("\n" + "=" * 80)
+    print(f"  CHUNK STORAGE ({args.chunks} chunks, {args.hits} hits, {args.latency * 1000:.0f}ms latency)")
+    print("=" * 80)
+    print(f"  {'layout':<18}{'write reqs':>12}{'write s':>10}{'read reqs':>12}{'read s':>10}")
+    for label, (write_requests, write_seconds, read_requests, read_seconds) in results.items():
+        print(f"  {label:<18}{write_requests:>12}{write_seconds:>10.2f}{read_requests:>12}{read_seconds:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
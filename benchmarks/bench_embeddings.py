@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+"""
+Embedding throughput and cost against a local fake OpenAI embeddings server.
+
+Builds chunk-sized texts (about CHUNK_SIZE tokens) from the test_data corpus
+and spreads them over many small files and a few large ones; --boilerplate
+of the chunks are instead drawn from 50 repeated texts (disclaimers, headers,
+duplicate pages), with varying whitespace. Then embeds
+every file the way a worker would, with --workers files in progress at once
+(a threads-pool Celery worker):
+
+  - one-per-chunk:    one request per chunk (measured on --naive-sample chunks)
+  - per-file batches: each file packed into filled requests of its own,
+                      sent one after the other
+  - engine:           files submitted in EMBEDDING_TASK_WINDOW windows to one
+                      EmbeddingEngine, which coalesces chunks of concurrent
+                      files and keeps EMBEDDING_MAX_INFLIGHT requests in flight
+  - engine + cache:   the same with an EmbeddingCache, cold and then warm
+                      (the same content arriving again, e.g. from another tenant)
+
+Reports embeddings/sec, requests, inputs per request, cache hit rate and
+the cost per 1k chunks at EMBEDDING_PRICE_PER_MILLION_TOKENS. Billing is per
+token, so batching alone buys throughput and fewer requests against the
+provider's request-per-minute quota; only the cache cuts cost.
+
+Usage:
+    python -m benchmarks.bench_embeddings --small-files 200 --large-files 2 --latency 0.1 --boilerplate 0.2
+"""
+import argparse
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+from app.config import settings
+from app.core.embedding_cache import EmbeddingCache
+from app.core.embeddings import (
+    BaseEmbeddingProvider,
+    EmbeddingEngine,
+    EmbeddingResponse,
+    EmbeddingStats,
+    OpenAIEmbeddingProvider,
+)
+from app.core.tokenizer import get_tokenizer
+from benchmarks.bench_tokenizer import TEST_DATA, load_corpus
+from benchmarks.fake_embedding_server import fake_embedding_server_process
+
+# One file: list of (text, token_count)
+File = List[Tuple[str, int]]
+
+
+class CountingProvider(BaseEmbeddingProvider):
+    """Provider wrapper counting requests, inputs and billed tokens."""
+
+    def __init__(self, provider: BaseEmbeddingProvider):
+        self.provider = provider
+        self.stats = EmbeddingStats()
+        self._lock = threading.Lock()
+
+    def embed(self, texts: List[str]) -> EmbeddingResponse:
+        response = self.provider.embed(texts)
+        with self._lock:
+            self.stats.requests += 1
+            self.stats.inputs += len(texts)
+            self.stats.tokens += response.tokens
+        return response
+
+    def close(self) -> None:
+        self.provider.close()
+
+
+def build_chunks(count: int, chunk_size: int) -> File:
+    """Distinct chunk-sized texts made of consecutive corpus lines (numbered, as the corpus wraps around)."""
+    lines = load_corpus(TEST_DATA)
+    counts = get_tokenizer().count_batch(lines)
+    chunks: File = []
+    text, tokens, index = [], 0, 0
+    while len(chunks) < count:
+        line, line_tokens = lines[index % len(lines)], counts[index % len(lines)]
+        index += 1
+        if text and tokens + line_tokens > chunk_size:
+            chunks.append((f"[{len(chunks)}] " + "\n".join(text), tokens))
+            text, tokens = [], 0
+        if line_tokens <= chunk_size:
+            text.append(line)
+            tokens += line_tokens
+    return chunks
+
+
+def build_files(small_files: int, large_files: int, large_size: int, boilerplate: float) -> List[File]:
+    rng = random.Random(7)
+    sizes = [rng.randint(2, 30) for _ in range(small_files)] + [large_size] * large_files
+    rng.shuffle(sizes)
+    chunks = build_chunks(sum(sizes) + 50, settings.chunk_size)
+    repeated, chunks = chunks[:50], chunks[50:]
+    files, start = [], 0
+    for size in sizes:
+        file = chunks[start:start + size]
+        for index in range(len(file)):
+            if rng.random() < boilerplate:
+                text, tokens = rng.choice(repeated)
+                # Layout whitespace differs between documents; normalization still matches it
+                file[index] = (text.replace("\n", rng.choice(["\n", " \n", "\n\n"])), tokens)
+        files.append(file)
+        start += size
+    return files
+
+
+def pack(file: File, max_inputs: int, max_tokens: int) -> List[File]:
+    """Split one file into filled requests (the engine's packing, without coalescing)."""
+    batches, batch, tokens = [], [], 0
+    for text, count in file:
+        if batch and (len(batch) >= max_inputs or tokens + count > max_tokens):
+            batches.append(batch)
+            batch, tokens = [], 0
+        batch.append((text, count))
+        tokens += count
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def run_one_per_chunk(provider: BaseEmbeddingProvider, files: List[File], sample: int, workers: int) -> float:
+    chunks = [chunk for file in files for chunk in file][:sample]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        list(pool.map(lambda chunk: provider.embed([chunk[0]]), chunks))
+    return time.perf_counter() - start
+
+
+def run_per_file(provider: BaseEmbeddingProvider, files: List[File], workers: int) -> float:
+    def embed_file(file: File):
+        for batch in pack(file, settings.embedding_batch_max_inputs, settings.embedding_batch_max_tokens):
+            provider.embed([text for text, _ in batch])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        list(pool.map(embed_file, files))
+    return time.perf_counter() - start
+
+
+def run_engine(engine: EmbeddingEngine, files: List[File], workers: int, window: int) -> float:
+    def embed_file(file: File):
+        futures = [
+            engine.submit([text for text, _ in file[i:i + window]], [count for _, count in file[i:i + window]])
+            for i in range(0, len(file), window)
+        ]
+        return [vector for future in futures for vector in future.result()]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        results = list(pool.map(embed_file, files))
+    elapsed = time.perf_counter() - start
+    assert all(len(vectors) == len(file) for vectors, file in zip(results, files))
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--small-files", type=int, default=200, help="Files of 2-30 chunks")
+    parser.add_argument("--large-files", type=int, default=2, help="Files of --large-size chunks")
+    parser.add_argument("--large-size", type=int, default=3000, help="Chunks per large file")
+    parser.add_argument("--workers", type=int, default=8, help="Files embedded concurrently")
+    parser.add_argument("--latency", type=float, default=0.1, help="Fake server seconds per request")
+    parser.add_argument("--tokens-per-second", type=float, default=2_000_000, help="Fake server compute rate")
+    parser.add_argument("--naive-sample", type=int, default=400, help="Chunks embedded one request each")
+    parser.add_argument("--boilerplate", type=float, default=0.2, help="Fraction of chunks that are repeated texts")
+    args = parser.parse_args()
+
+    files = build_files(args.small_files, args.large_files, args.large_size, args.boilerplate)
+    total_chunks = sum(len(file) for file in files)
+    total_tokens = sum(count for file in files for _, count in file)
+    price = settings.embedding_price_per_million_tokens
+
+    report = []
+    with fake_embedding_server_process(args.latency, args.tokens_per_second, settings.embedding_dimension) as base_url:
+        def provider(connections: int) -> CountingProvider:
+            return CountingProvider(OpenAIEmbeddingProvider(
+                "test-key", settings.embedding_model, base_url=base_url, max_connections=connections
+            ))
+
+        sample = min(args.naive_sample, total_chunks)
+        counting = provider(args.workers)
+        elapsed = run_one_per_chunk(counting, files, sample, args.workers)
+        report.append(("one-per-chunk", sample, counting.stats, elapsed, None))
+
+        counting = provider(args.workers)
+        elapsed = run_per_file(counting, files, args.workers)
+        report.append(("per-file batches", total_chunks, counting.stats, elapsed, None))
+
+        def engine(cache=None) -> EmbeddingEngine:
+            return EmbeddingEngine(
+                provider(settings.embedding_max_inflight),
+                max_inputs=settings.embedding_batch_max_inputs,
+                max_tokens=settings.embedding_batch_max_tokens,
+                max_inflight=settings.embedding_max_inflight,
+                coalesce_wait=settings.embedding_coalesce_wait,
+                cache=cache
+            )
+
+        # The warm pass reuses the cold pass's cache, like the same content arriving again
+        cache = EmbeddingCache(settings.embedding_model, settings.embedding_cache_size)
+        for label, run_cache in [("engine", None), ("engine + cache (cold)", cache), ("engine + cache (warm)", cache)]:
+            runner = engine(run_cache)
+            elapsed = run_engine(runner, files, args.workers, settings.embedding_task_window)
+            runner.close()
+            report.append((label, total_chunks, runner.provider.stats, elapsed, runner.stats))
+
+    print("\n" + "=" * 96)
+    print(
+        f"  EMBEDDING THROUGHPUT ({len(files)} files, {total_chunks} chunks, {total_tokens} tokens, "
+        f"{args.workers} concurrent files, {args.latency * 1000:.0f} ms/request)"
+    )
+    print("=" * 96)
+    print(
+        f"  {'mode':<24}{'chunks':>8}{'requests':>10}{'inputs/req':>12}{'seconds':>9}{'emb/s':>10}"
+        f"{'cached':>8}{'$ / 1k chunks':>15}"
+    )
+    for label, chunks, stats, elapsed, engine_stats in report:
+        cached = (engine_stats.cache_hits + engine_stats.deduplicated) / chunks if engine_stats else 0.0
+        print(
+            f"  {label:<24}{chunks:>8}{stats.requests:>10}{stats.inputs / max(stats.requests, 1):>12.1f}"
+            f"{elapsed:>9.2f}{chunks / elapsed:>10,.0f}{cached:>8.1%}{stats.cost(price) / chunks * 1000:>15.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+"""
+File endpoint latency benchmark.
+
+Reports per-request latency (mean / p50 / p95 / p99) for the metadata-only
+file endpoints that never touch blob data:
+- GET /projects/{project_id}/files            (list_files)
+- GET /projects/{project_id}/files/{id}/status (get_file_status)
+
+Run it once against the old build and once against the new build with a
+different --label to compare before/after numbers.
+
+A second mode (--mode client) measures the storage client cost in-process:
+building a fresh client per request (old behaviour) vs. reusing the shared
+process-wide client returned by get_storage_client().
+
+A third mode (--mode search) measures POST /projects/{project_id}/files/search
+and breaks each request down by the stages of its Server-Timing header
+(embed, vector_query, resolve, hydrate, total). Queries cycle through
+--queries distinct texts, so after the first round they hit the query
+embedding cache; --queries 0 makes every query new.
+
+Usage:
+    python -m benchmarks.bench_file_endpoints --label after --requests 200
+    python -m benchmarks.bench_file_endpoints --mode client --requests 50
+    python -m benchmarks.bench_file_endpoints --mode search --requests 200 --top-k 10
+"""
+import argparse
+import statistics
+import time
+from typing import Callable, Dict, List
+
+BASE_URL = "http://localhost:8000"
+EMAIL = "punith@memic.ai"
+PASSWORD = "12345678"
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(name: str, samples_ms: List[float]) -> Dict[str, float]:
+    """Print and return a latency summary for one endpoint."""
+    summary = {
+        "mean": statistics.fmean(samples_ms),
+        "p50": percentile(samples_ms, 50),
+        "p95": percentile(samples_ms, 95),
+        "p99": percentile(samples_ms, 99),
+    }
+    print(
+        f"  {name:<28} n={len(samples_ms):<5} "
+        f"mean={summary['mean']:8.2f}ms  p50={summary['p50']:8.2f}ms  "
+        f"p95={summary['p95']:8.2f}ms  p99={summary['p99']:8.2f}ms"
+    )
+    return summary
+
+
+def time_calls(fn: Callable[[], None], count: int, warmup: int = 5) -> List[float]:
+    """Call fn count times (after warmup) and return latencies in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def login(args):
+    """Log in and pick the first project; returns (client, auth headers, project_id)."""
+    import httpx
+
+    client = httpx.Client(base_url=args.base_url, timeout=30.0)
+
+    response = client.post("/api/v1/auth/login", json={"email": args.email, "password": args.password})
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    org_id = str(client.get("/api/v1/organizations/", headers=headers).json()[0]["id"])
+    project_id = str(
+        client.get(f"/api/v1/organizations/{org_id}/projects/", headers=headers).json()[0]["id"]
+    )
+    return client, headers, project_id
+
+
+def parse_server_timing(value: str) -> Dict[str, float]:
+    """Durations by metric name from a Server-Timing header ("name;dur=12.3, ...")."""
+    durations = {}
+    for metric in value.split(","):
+        name, _, params = metric.strip().partition(";")
+        for param in params.split(";"):
+            key, _, duration = param.strip().partition("=")
+            if key == "dur":
+                durations[name] = float(duration)
+    return durations
+
+
+def run_http(args) -> None:
+    """Benchmark list_files and get_file_status against a running API server."""
+    client, headers, project_id = login(args)
+
+    files = client.get(f"/api/v1/projects/{project_id}/files", headers=headers).json()["items"]
+    if not files:
+        raise SystemExit("Project has no files; upload at least one file before benchmarking")
+    file_id = str(files[0]["id"])
+
+    def list_files():
+        client.get(f"/api/v1/projects/{project_id}/files", headers=headers).raise_for_status()
+
+    def get_file_status():
+        client.get(f"/api/v1/projects/{project_id}/files/{file_id}/status", headers=headers).raise_for_status()
+
+    print("\n" + "=" * 80)
+    print(f"  FILE ENDPOINT LATENCY [{args.label}]  ({args.base_url})")
+    print("=" * 80)
+    summarize("list_files", time_calls(list_files, args.requests))
+    summarize("get_file_status", time_calls(get_file_status, args.requests))
+
+
+def run_search(args) -> None:
+    """Benchmark semantic search against a running API server, per stage."""
+    client, headers, project_id = login(args)
+    texts = [
+        "quarterly revenue by region", "termination clause notice period", "installation requirements",
+        "data retention policy", "warranty exclusions", "security incident response", "pricing tiers",
+        "service level agreement uptime", "onboarding checklist", "liability cap",
+    ]
+    counter = 0
+
+    def search() -> Dict[str, float]:
+        nonlocal counter
+        counter += 1
+        text = texts[counter % args.queries] if args.queries else f"{texts[counter % len(texts)]} {counter}"
+        response = client.post(
+            f"/api/v1/projects/{project_id}/files/search",
+            json={"query": text, "top_k": args.top_k},
+            headers=headers,
+        )
+        response.raise_for_status()
+        return parse_server_timing(response.headers.get("server-timing", ""))
+
+    for _ in range(5):
+        search()
+    stages: Dict[str, List[float]] = {}
+    client_ms = []
+    for _ in range(args.requests):
+        start = time.perf_counter()
+        timings = search()
+        client_ms.append((time.perf_counter() - start) * 1000)
+        for name, duration in timings.items():
+            stages.setdefault(name, []).append(duration)
+
+    print("\n" + "=" * 80)
+    print(f"  SEARCH LATENCY [{args.label}]  (top_k={args.top_k}, {args.base_url})")
+    print("=" * 80)
+    for name, samples in stages.items():
+        summarize(f"server {name}", samples)
+    summarize("client round trip", client_ms)
+
+
+def run_client(args) -> None:
+    """Compare per-request storage client construction with the shared client."""
+    from app.core import storage
+
+    def fresh_client():
+        storage._create_storage_client().close()
+
+    def shared_client():
+        storage.get_storage_client()
+
+    print("\n" + "=" * 80)
+    print("  STORAGE CLIENT ACQUISITION COST (per request)")
+    print("=" * 80)
+    summarize("fresh client (before)", time_calls(fresh_client, args.requests, warmup=1))
+    summarize("shared client (after)", time_calls(shared_client, args.requests, warmup=1))
+    storage.close_storage_client()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["http", "client", "search"], default="http")
+    parser.add_argument("--label", default="current", help="Label printed with results (e.g. before/after)")
+    parser.add_argument("--requests", type=int, default=200, help="Timed requests per endpoint")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--email", default=EMAIL)
+    parser.add_argument("--password", default=PASSWORD)
+    parser.add_argument("--top-k", type=int, default=10, help="Results per search (search mode)")
+    parser.add_argument("--queries", type=int, default=10, help="Distinct queries cycled through, max 10 (0 = all new)")
+    args = parser.parse_args()
+
+    if args.mode == "http":
+        run_http(args)
+    elif args.mode == "search":
+        run_search(args)
+    else:
+        run_client(args)
+
+
+if __name__ == "__main__":
+    main()
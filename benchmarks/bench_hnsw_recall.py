@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+"""
+Recall@k vs latency of the local vector store's HNSW index.
+
+Generates synthetic embeddings with low intrinsic dimension (a random
+projection of a small latent space plus noise, which is how real text
+embeddings behave -- isotropic Gaussian vectors are a worst case no ANN
+index does well on), upserts them through LocalVectorStore with
+LOCAL_VECTOR_INDEX=hnsw, waits for background compaction to build the
+graph, then sweeps ef_search. Ground truth comes from the same store in
+flat mode, so results also check the two modes agree.
+
+Reports graph build time and, per ef_search, recall@k and p50/p99 query
+latency next to the exact baseline.
+
+Usage:
+    python -m benchmarks.bench_hnsw_recall
+    python -m benchmarks.bench_hnsw_recall --vectors 50000 --ef 16 32 64 128 256
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+
+from app.config import settings
+
+
+def fixture(count: int, dimension: int, latent: int, seed: int = 5) -> tuple[np.ndarray, np.ndarray]:
+    """Unit vectors from a latent-space projection, and the projection (for drawing queries)."""
+    rng = np.random.default_rng(seed)
+    projection = rng.normal(size=(latent, dimension)).astype(np.float32)
+    values = rng.normal(size=(count, latent)).astype(np.float32) @ projection
+    values += 0.1 * rng.normal(size=values.shape).astype(np.float32)
+    values /= np.linalg.norm(values, axis=1, keepdims=True)
+    return values, projection
+
+
+async def measure(store, queries: np.ndarray, top_k: int, ef_search, truth: List[set]):
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        results = await store.query(query.tolist(), "bench", top_k=top_k, ef_search=ef_search)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(expected & {r["id"] for r in results})
+    recall = hits / (len(truth) * top_k) if truth else 1.0
+    return recall, float(np.percentile(latencies, 50)), float(np.percentile(latencies, 99)), latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--latent", type=int, default=64, help="Intrinsic dimension of the synthetic data")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--m", type=int, default=settings.local_vector_hnsw_m)
+    parser.add_argument("--ef-construction", type=int, default=settings.local_vector_hnsw_ef_construction)
+    parser.add_argument("--ef", type=int, nargs="+", default=[16, 32, 64, 128, 256])
+    args = parser.parse_args()
+
+    settings.embedding_dimension = args.dimension
+    settings.local_vector_hnsw_m = args.m
+    settings.local_vector_hnsw_ef_construction = args.ef_construction
+    settings.local_vector_hnsw_min_rows = min(settings.local_vector_hnsw_min_rows, args.vectors)
+
+    values, projection = fixture(args.vectors, args.dimension, args.latent)
+    vectors = [(f"bench_{i}", values[i], {"chunk_index": i}) for i in range(len(values))]
+
+    rng = np.random.default_rng(9)
+    queries = rng.normal(size=(args.queries, args.latent)).astype(np.float32) @ projection
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    from app.core.vector_store import LocalVectorStore
+
+    rows = []
+    with tempfile.TemporaryDirectory() as root:
+        settings.local_vector_store_path = root
+
+        # Exact baseline
+        settings.local_vector_index = "flat"
+        flat = LocalVectorStore()
+        try:
+            asyncio.run(flat.upsert_vectors(vectors, "bench"))
+            truth = []
+            for query in queries:
+                results = asyncio.run(flat.query(query.tolist(), "bench", top_k=args.top_k))
+                truth.append({r["id"] for r in results})
+            _, p50, p99, _ = asyncio.run(measure(flat, queries, args.top_k, None, truth))
+            rows.append(("flat", 1.0, p50, p99))
+            asyncio.run(flat.delete_namespace("bench"))
+        finally:
+            flat.close()
+
+        settings.local_vector_index = "hnsw"
+        store = LocalVectorStore()
+        try:
+            start = time.perf_counter()
+            asyncio.run(store.upsert_vectors(vectors, "bench"))
+            upsert_seconds = time.perf_counter() - start
+
+            # Compaction runs in the background; wait until the graph covers every row
+            while True:
+                segments = store._load("bench")
+                if len(segments) == 1 and segments[0].graph is not None \
+                        and store._compaction_pending == set():
+                    break
+                store._schedule_compaction("bench")
+                time.sleep(0.5)
+            build_seconds = time.perf_counter() - start
+
+            for ef in args.ef:
+                recall, p50, p99, _ = asyncio.run(measure(store, queries, args.top_k, ef, truth))
+                rows.append((f"hnsw ef={ef}", recall, p50, p99))
+        finally:
+            store.close()
+
+    print("\n" + "=" * 64)
+    print("  HNSW RECALL / LATENCY (LocalVectorStore)")
+    print("=" * 64)
+    print(f"  {args.vectors} x {args.dimension}-d vectors (latent dim {args.latent}), "
+          f"{args.queries} queries, top_k={args.top_k}")
+    print(f"  m={args.m} ef_construction={args.ef_construction}: upsert {upsert_seconds:.1f}s, "
+          f"searchable graph after {build_seconds:.1f}s ({args.vectors / build_seconds:.0f} vec/s)\n")
+    print(f"  {'index':<16} {f'recall@{args.top_k}':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for label, recall, p50, p99 in rows:
+        print(f"  {label:<16} {recall:>10.3f} {p50:>8.2f} {p99:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+Storage concurrency check against a local fake Blob server.
+
+Starts benchmarks.fake_blob_server with an artificial per-request latency,
+points AzureBlobStorageClient at it and runs many uploads concurrently on
+one event loop while a heartbeat task measures how long the loop is blocked.
+
+With blocking SDK calls on the event loop the uploads run one after another
+and the heartbeat stalls for the full transfer time. With the thread-offload
+adapter the uploads overlap (bounded by STORAGE_MAX_WORKERS) and the loop
+stays responsive.
+
+Exits non-zero if the worst event loop stall exceeds --max-stall-ms.
+
+Usage:
+    python -m benchmarks.bench_storage_concurrency --uploads 32 --latency 0.25
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.fake_blob_server import FakeBlobServer
+
+
+async def heartbeat(stop: asyncio.Event, interval: float, stalls: list) -> None:
+    """Tick every interval seconds and record how late each tick fires."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        stalls.append((time.perf_counter() - start - interval) * 1000)
+
+
+async def run(args, storage_client) -> dict:
+    payload = os.urandom(args.size)
+    stalls: list = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(heartbeat(stop, 0.01, stalls))
+
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        storage_client.upload_file(payload, f"bench/concurrency/blob_{i}.bin", "application/octet-stream")
+        for i in range(args.uploads)
+    ])
+    elapsed = time.perf_counter() - start
+
+    # Mixed workload: downloads and existence checks share the same pool
+    await asyncio.gather(
+        *[storage_client.download_file(f"bench/concurrency/blob_{i}.bin") for i in range(args.uploads)],
+        *[storage_client.file_exists(f"bench/concurrency/blob_{i}.bin") for i in range(args.uploads)],
+    )
+
+    stop.set()
+    await ticker
+    return {"elapsed": elapsed, "max_stall_ms": max(stalls), "ticks": len(stalls)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=32, help="Concurrent uploads")
+    parser.add_argument("--size", type=int, default=256 * 1024, help="Bytes per upload")
+    parser.add_argument("--latency", type=float, default=0.25, help="Fake server latency per request (s)")
+    parser.add_argument("--max-stall-ms", type=float, default=250.0, help="Fail above this event loop stall")
+    args = parser.parse_args()
+
+    with FakeBlobServer(latency=args.latency) as server:
+        os.environ["AZURE_STORAGE_CONNECTION_STRING"] = server.connection_string
+
+        from app.config import settings
+        from app.core.storage import AzureBlobStorageClient
+
+        settings.azure_storage_connection_string = server.connection_string
+        storage_client = AzureBlobStorageClient()
+        try:
+            result = asyncio.run(run(args, storage_client))
+        finally:
+            storage_client.close()
+
+    serial_estimate = args.uploads * args.latency
+    print("\n" + "=" * 80)
+    print("  STORAGE CONCURRENCY (fake Blob server)")
+    print("=" * 80)
+    print(f"  uploads:              {args.uploads} x {args.size} bytes, {args.latency * 1000:.0f}ms latency each")
+    print(f"  pool size:            {settings.storage_max_workers}")
+    print(f"  wall time:            {result['elapsed']:.2f}s (serial would be ~{serial_estimate:.2f}s)")
+    print(f"  max event loop stall: {result['max_stall_ms']:.1f}ms over {result['ticks']} heartbeats")
+
+    if result["max_stall_ms"] > args.max_stall_ms:
+        print(f"\n  FAIL: event loop blocked for more than {args.max_stall_ms:.0f}ms")
+        raise SystemExit(1)
+    print("\n  PASS: event loop stayed responsive during concurrent transfers")
+
+
+if __name__ == "__main__":
+    main()
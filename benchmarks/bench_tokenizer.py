@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+"""
+Token counting throughput of the tokenizer backends on the test_data corpus.
+
+Extracts the text of test_data (plain text, JSON, email, and the XML parts
+of docx / pptx / xlsx), splits it into lines the way enriched JSON holds
+sections, and repeats the corpus --repeat times. Each available backend
+then counts every line:
+
+  - one-by-one: count_tokens() per line, count cache disabled
+  - batched:    count_batch() over --batch-size lines, count cache disabled
+  - cached:     batched again with the LRU enabled and warm (repeated
+                corpus pages behave like headers and footers)
+
+Backends: estimate (always), bpe and tiktoken with --bpe-file (a local
+.tiktoken rank file), tiktoken without it only if it can load its own ranks.
+
+Usage:
+    python -m benchmarks.bench_tokenizer --repeat 50
+    python -m benchmarks.bench_tokenizer --bpe-file ./cl100k_base.tiktoken
+"""
+import argparse
+import re
+import time
+import zipfile
+from pathlib import Path
+from typing import List
+
+from app.config import settings
+
+TEST_DATA = Path(__file__).resolve().parent.parent / "test_data"
+TEXT_SUFFIXES = {".txt", ".md", ".json", ".eml"}
+ZIP_SUFFIXES = {".docx", ".pptx", ".xlsx"}
+_XML_TAG = re.compile(r"<[^>]+>")
+
+
+def load_corpus(root: Path) -> List[str]:
+    """Non-empty lines of every readable test_data file."""
+    lines = []
+    for path in sorted(root.rglob("*")):
+        suffix = path.suffix.lower()
+        if suffix in TEXT_SUFFIXES:
+            text = path.read_text(encoding="utf-8", errors="replace")
+        elif suffix in ZIP_SUFFIXES:
+            with zipfile.ZipFile(path) as archive:
+                parts = [name for name in archive.namelist() if name.endswith(".xml")]
+                text = "\n".join(
+                    _XML_TAG.sub("\n", archive.read(name).decode("utf-8", errors="replace")) for name in parts
+                )
+        else:
+            continue
+        lines.extend(line.strip() for line in text.splitlines() if line.strip())
+    return lines
+
+
+def build_tokenizers(bpe_file: str):
+    from app.core.tokenizer import BpeTokenizer, EstimateTokenizer, TiktokenTokenizer, load_bpe_ranks
+
+    tokenizers = [("estimate", lambda **cache: EstimateTokenizer(**cache))]
+    if bpe_file:
+        ranks = load_bpe_ranks(bpe_file)
+        tokenizers.append(("bpe (pure Python)", lambda **cache: BpeTokenizer(ranks, settings.tokenizer_encoding, **cache)))
+    try:
+        TiktokenTokenizer(settings.tokenizer_encoding, bpe_file or None)
+        tokenizers.append((
+            "tiktoken",
+            lambda **cache: TiktokenTokenizer(settings.tokenizer_encoding, bpe_file or None, settings.tokenizer_threads, **cache),
+        ))
+    except Exception as e:
+        print(f"  skipping tiktoken: {str(e)[:100]}")
+    return tokenizers
+
+
+def run(factory, lines: List[str], batch_size: int) -> dict:
+    results = {}
+
+    tokenizer = factory()
+    start = time.perf_counter()
+    tokens = sum(tokenizer.count_tokens(line) for line in lines)
+    results["one-by-one"] = time.perf_counter() - start
+
+    tokenizer = factory()
+    start = time.perf_counter()
+    batched = sum(sum(tokenizer.count_batch(lines[i:i + batch_size])) for i in range(0, len(lines), batch_size))
+    results["batched"] = time.perf_counter() - start
+    assert batched == tokens
+
+    tokenizer = factory(cache_size=settings.tokenizer_cache_size, cache_max_chars=settings.tokenizer_cache_max_chars)
+    for i in range(0, len(lines), batch_size):
+        tokenizer.count_batch(lines[i:i + batch_size])
+    start = time.perf_counter()
+    cached = sum(sum(tokenizer.count_batch(lines[i:i + batch_size])) for i in range(0, len(lines), batch_size))
+    results["cached"] = time.perf_counter() - start
+    assert cached == tokens
+
+    return {"tokens": tokens, **results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50, help="Copies of the corpus counted")
+    parser.add_argument("--batch-size", type=int, default=256, help="Lines per count_batch() call")
+    parser.add_argument("--bpe-file", default=settings.tokenizer_bpe_file, help="Local .tiktoken rank file")
+    args = parser.parse_args()
+
+    corpus = load_corpus(TEST_DATA)
+    lines = corpus * args.repeat
+    size_mb = sum(len(line.encode("utf-8")) for line in lines) / 1024 / 1024
+
+    report = []
+    for label, factory in build_tokenizers(args.bpe_file):
+        report.append((label, run(factory, lines, args.batch_size)))
+
+    print("\n" + "=" * 80)
+    print(f"  TOKENIZER THROUGHPUT ({len(corpus)} lines x {args.repeat} = {size_mb:.1f} MB)")
+    print("=" * 80)
+    print(f"  {'backend':<20}{'tokens':>12}{'one-by-one tok/s':>18}{'batched tok/s':>15}{'cached tok/s':>15}")
+    for label, result in report:
+        tokens = result["tokens"]
+        print(
+            f"  {label:<20}{tokens:>12}{tokens / result['one-by-one']:>18,.0f}"
+            f"{tokens / result['batched']:>15,.0f}{tokens / result['cached']:>15,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
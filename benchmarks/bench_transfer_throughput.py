@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+Throughput check for large storage transfers.
+
+Uploads and downloads payloads of increasing size (1 MB to 1 GB by default)
+through AzureBlobStorageClient.upload_file_from_path / download_to_path --
+the calls the conversion and parsing tasks use for converted PDFs and
+enriched JSON -- against a fake Blob server running in a separate process
+with a per-connection bandwidth cap. Each size is transferred once with a
+single connection (max_concurrency=1) and once with
+settings.storage_transfer_max_concurrency parallel blocks/ranges.
+
+The input file is sparse, so no payload is ever generated in memory and the
+server keeps sizes only.
+
+Usage:
+    python -m benchmarks.bench_transfer_throughput --sizes-mb 1 16 128 1024 --bandwidth-mbps 50
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+MB = 1024 * 1024
+
+
+async def transfer(size: int, workdir: str, label: str) -> tuple[float, float]:
+    """Upload then download size bytes; returns (upload_seconds, download_seconds)."""
+    from app.core.storage import AzureBlobStorageClient
+
+    source = os.path.join(workdir, f"source-{size}.bin")
+    target = os.path.join(workdir, f"target-{size}.bin")
+    with open(source, "wb") as f:
+        f.truncate(size)
+
+    blob_path = f"bench/transfer/{label}/{size}.bin"
+    storage_client = AzureBlobStorageClient()
+    try:
+        start = time.perf_counter()
+        await storage_client.upload_file_from_path(source, blob_path, "application/octet-stream")
+        upload_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        downloaded = await storage_client.download_to_path(blob_path, target)
+        download_seconds = time.perf_counter() - start
+
+        if downloaded != size:
+            raise RuntimeError(f"Downloaded {downloaded} bytes, expected {size}")
+        await storage_client.delete_file(blob_path)
+    finally:
+        storage_client.close()
+        for path in (source, target):
+            if os.path.exists(path):
+                os.remove(path)
+
+    return upload_seconds, download_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[1, 16, 128, 1024], help="Payload sizes in MB")
+    parser.add_argument("--bandwidth-mbps", type=float, default=50.0, help="Per-connection bandwidth cap in MB/s")
+    parser.add_argument("--latency", type=float, default=0.02, help="Per-request latency in seconds")
+    args = parser.parse_args()
+
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.fake_blob_server", "--no-store-content",
+            "--bandwidth-mbps", str(args.bandwidth_mbps), "--latency", str(args.latency)
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    results = []
+    try:
+        from app.config import settings
+        settings.azure_storage_connection_string = server.stdout.readline().strip()
+        parallel = settings.storage_transfer_max_concurrency
+
+        with tempfile.TemporaryDirectory() as workdir:
+            for size_mb in args.sizes_mb:
+                size = size_mb * MB
+                settings.storage_transfer_max_concurrency = 1
+                serial = asyncio.run(transfer(size, workdir, "serial"))
+                settings.storage_transfer_max_concurrency = parallel
+                concurrent = asyncio.run(transfer(size, workdir, "parallel"))
+                results.append((size_mb, serial, concurrent))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print("\n" + "=" * 80)
+    print("  LARGE TRANSFER THROUGHPUT")
+    print("=" * 80)
+    print(f"  block size:      {settings.storage_transfer_block_size / MB:.1f} MB")
+    print(f"  link:            {args.bandwidth_mbps:.0f} MB/s per connection, {args.latency * 1000:.0f} ms latency")
+    print(f"\n  {'size':>8}  {'upload x1':>10}  {f'upload x{parallel}':>10}  "
+          f"{'download x1':>12}  {f'download x{parallel}':>12}  (MB/s)")
+    for size_mb, (up1, down1), (upn, downn) in results:
+        print(f"  {size_mb:>6} MB  {size_mb / up1:>10.1f}  {size_mb / upn:>10.1f}  "
+              f"{size_mb / down1:>12.1f}  {size_mb / downn:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+"""
+Memory-ceiling check for the streaming upload path.
+
+Streams a synthetic file (1 GB by default) through the same code path as
+POST /projects/{project_id}/files -- UploadChunkReader feeding
+AzureBlobStorageClient.upload_chunks -- into a fake Blob server running in a
+separate process (so the server's own buffers do not count), while sampling
+this process's resident set size.
+
+Exits non-zero if peak RSS grows by more than --ceiling-mb over the baseline.
+
+Usage:
+    python -m benchmarks.bench_upload_memory --size-mb 1024
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from starlette.datastructures import UploadFile
+
+MB = 1024 * 1024
+
+
+class SyntheticFile:
+    """Read-only file object producing size bytes of pseudo-random data lazily."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.position = 0
+        self._pattern = os.urandom(MB)
+
+    def read(self, n: int = -1) -> bytes:
+        remaining = self.size - self.position
+        if n < 0 or n > remaining:
+            n = remaining
+        offset = self.position % MB
+        self.position += n
+        out = bytearray()
+        while len(out) < n:
+            take = min(n - len(out), MB - offset)
+            out += self._pattern[offset:offset + take]
+            offset = 0
+        return bytes(out)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        self.position = offset
+        return self.position
+
+    def close(self) -> None:
+        pass
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process (Linux /proc)."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+class RssSampler(threading.Thread):
+    """Background thread recording peak RSS."""
+
+    def __init__(self, interval: float = 0.02):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = current_rss_bytes()
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        while not self._done.is_set():
+            self.peak = max(self.peak, current_rss_bytes())
+            time.sleep(self.interval)
+
+    def stop(self) -> int:
+        self._done.set()
+        self.join()
+        return self.peak
+
+
+async def stream_upload(size: int):
+    from app.config import settings
+    from app.core.storage import AzureBlobStorageClient
+    from app.services.file_service import UploadChunkReader, sniff_mime_type
+
+    storage_client = AzureBlobStorageClient()
+    try:
+        upload = UploadFile(SyntheticFile(size), size=size, filename="synthetic.bin")
+        reader = UploadChunkReader(upload, settings.upload_block_size)
+        mime_type = sniff_mime_type(upload.filename, await reader.read_head())
+        await storage_client.upload_chunks(reader, "bench/memory/synthetic.bin", mime_type)
+        return reader
+    finally:
+        storage_client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=1024, help="Synthetic upload size in MB")
+    parser.add_argument("--ceiling-mb", type=float, default=64.0, help="Max allowed RSS growth in MB")
+    args = parser.parse_args()
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_blob_server", "--no-store-content"],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        connection_string = server.stdout.readline().strip()
+        from app.config import settings
+        settings.azure_storage_connection_string = connection_string
+
+        # Import the app and SDK up front so module loading is not counted
+        import app.services.file_service  # noqa: F401
+        import azure.storage.blob  # noqa: F401
+
+        baseline = current_rss_bytes()
+        sampler = RssSampler()
+        sampler.start()
+        start = time.perf_counter()
+        reader = asyncio.run(stream_upload(args.size_mb * MB))
+        elapsed = time.perf_counter() - start
+        peak = sampler.stop()
+    finally:
+        server.terminate()
+        server.wait()
+
+    growth_mb = (peak - baseline) / MB
+    print("\n" + "=" * 80)
+    print("  STREAMING UPLOAD MEMORY CEILING")
+    print("=" * 80)
+    print(f"  uploaded:        {reader.size / MB:.0f} MB in {elapsed:.1f}s ({reader.size / MB / elapsed:.0f} MB/s)")
+    print(f"  sha256:          {reader.sha256}")
+    print(f"  block size:      {settings.upload_block_size / MB:.1f} MB x {settings.upload_max_inflight_blocks} in flight")
+    print(f"  baseline RSS:    {baseline / MB:.1f} MB")
+    print(f"  peak RSS:        {peak / MB:.1f} MB (+{growth_mb:.1f} MB)")
+
+    if reader.size != args.size_mb * MB:
+        print("\n  FAIL: streamed size does not match the synthetic file size")
+        raise SystemExit(1)
+    if growth_mb > args.ceiling_mb:
+        print(f"\n  FAIL: RSS grew by more than {args.ceiling_mb:.0f} MB")
+        raise SystemExit(1)
+    print("\n  PASS: memory stayed bounded while streaming")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+"""
+Recall and latency check for the vector store backends.
+
+Builds a Pinecone-shaped fixture -- (id, values, metadata) tuples drawn
+from clustered Gaussians, like embeddings of related chunks -- upserts it
+through BaseVectorStore.upsert_vectors into each backend and runs a set of
+queries (unfiltered and with a metadata filter). Ground truth is an exact
+NumPy search over the same fixture. Reports recall@k and p50/p95 query
+latency per backend.
+
+Backends:
+  - local:    LocalVectorStore in a temporary directory (always run), once
+              per --local-quantization mode. Quantized runs wait for the
+              background encoding and report the memory held for scanning
+              (codes, or float32 vectors of segments left unencoded).
+  - pgvector: PgVectorStore against DATABASE_URL (with --pgvector-project-id;
+              the project must exist, `alembic upgrade head` must have run,
+              and --dimension must match the migrated vector width). Uses
+              --vectors >= PGVECTOR_INDEX_MIN_ROWS to exercise the ANN index.
+              Benchmark vectors are deleted afterwards. PGVECTOR_QUANTIZATION
+              selects the index kind.
+
+Usage:
+    python -m benchmarks.bench_vector_search --vectors 20000 --dimension 384
+    python -m benchmarks.bench_vector_search --local-quantization none int8 pq
+    python -m benchmarks.bench_vector_search --pgvector-project-id <project-uuid>
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+
+from app.config import settings
+
+
+def fixture(count: int, dimension: int, clusters: int, seed: int = 7) -> List[tuple]:
+    """Clustered unit vectors with Pinecone-style metadata."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimension)).astype(np.float32)
+    assignment = rng.integers(0, clusters, size=count)
+    values = centers[assignment] + 0.35 * rng.normal(size=(count, dimension)).astype(np.float32)
+    values /= np.linalg.norm(values, axis=1, keepdims=True)
+    return [
+        (
+            f"bench_{i}",
+            values[i].tolist(),
+            {"chunk_index": i, "page": int(i % 50), "content_type": "table" if i % 5 == 0 else "text"}
+        )
+        for i in range(count)
+    ]
+
+
+def exact_top_k(vectors: List[tuple], queries: np.ndarray, top_k: int, mask: np.ndarray) -> List[set]:
+    matrix = np.asarray([v[1] for v in vectors], dtype=np.float32)
+    scores = queries @ matrix.T
+    scores[:, ~mask] = -np.inf
+    top = np.argsort(-scores, axis=1)[:, :top_k]
+    return [{vectors[i][0] for i in row} for row in top]
+
+
+async def measure(store, namespace: str, queries: np.ndarray, top_k: int, filter_dict, truth: List[set]):
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        results = await store.query(query.tolist(), namespace, top_k=top_k, filter_dict=filter_dict)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(expected & {r["id"] for r in results})
+    recall = hits / (len(truth) * top_k)
+    return recall, float(np.percentile(latencies, 50)), float(np.percentile(latencies, 95))
+
+
+def wait_for_quantization(store, namespace: str) -> float:
+    """Block until every large enough segment has codes; return the scanned bytes (MB)."""
+    while True:
+        segments = store._load(namespace)
+        pending = [
+            s for s in segments
+            if s.codes is None and len(s.ids) >= settings.local_vector_quantization_min_rows
+        ]
+        if not pending:
+            return sum(s.vectors.nbytes if s.codes is None else s.codes.nbytes for s in segments) / 1e6
+        store._schedule_compaction(namespace)
+        time.sleep(0.5)
+
+
+async def run_backend(label: str, store, namespace: str, vectors, queries, top_k, truth, filtered_truth, report):
+    start = time.perf_counter()
+    results = await store.upsert_vectors(vectors, namespace)
+    ingest = time.perf_counter() - start
+    if not all(r.success for r in results):
+        raise RuntimeError(f"{label}: some upsert batches failed")
+
+    memory = None
+    if hasattr(store, "quantization"):
+        memory = wait_for_quantization(store, namespace) if store.quantization != "none" \
+            else sum(s.vectors.nbytes for s in store._load(namespace)) / 1e6
+
+    for query_label, filter_dict, expected in (
+        ("unfiltered", None, truth),
+        ("content_type=table", {"content_type": "table"}, filtered_truth),
+    ):
+        recall, p50, p95 = await measure(store, namespace, queries, top_k, filter_dict, expected)
+        report.append((label, query_label, len(vectors) / ingest, memory, recall, p50, p95))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dimension", type=int, default=settings.embedding_dimension)
+    parser.add_argument("--clusters", type=int, default=64)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--local-quantization", nargs="+", default=["none", "int8", "pq"],
+                        choices=["none", "int8", "pq"])
+    parser.add_argument("--pgvector-project-id", help="Existing project to run the pgvector backend in")
+    args = parser.parse_args()
+
+    settings.embedding_dimension = args.dimension
+    # Encode the merged segments of a benchmark-sized namespace
+    settings.local_vector_quantization_min_rows = min(settings.local_vector_quantization_min_rows, args.vectors // 4)
+    vectors = fixture(args.vectors, args.dimension, args.clusters)
+
+    rng = np.random.default_rng(11)
+    picks = rng.integers(0, len(vectors), size=args.queries)
+    queries = np.asarray([vectors[i][1] for i in picks], dtype=np.float32)
+    queries += 0.2 * rng.normal(size=queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    everything = np.ones(len(vectors), dtype=bool)
+    tables = np.asarray([v[2]["content_type"] == "table" for v in vectors])
+    truth = exact_top_k(vectors, queries, args.top_k, everything)
+    filtered_truth = exact_top_k(vectors, queries, args.top_k, tables)
+
+    report = []
+
+    from app.core.vector_store import LocalVectorStore, PgVectorStore
+
+    for quantization in args.local_quantization:
+        settings.local_vector_quantization = quantization
+        with tempfile.TemporaryDirectory() as root:
+            settings.local_vector_store_path = root
+            store = LocalVectorStore()
+            try:
+                asyncio.run(run_backend(
+                    "local" if quantization == "none" else f"local ({quantization})", store, "bench",
+                    vectors, queries, args.top_k, truth, filtered_truth, report
+                ))
+            finally:
+                store.close()
+
+    if args.pgvector_project_id:
+        store = PgVectorStore()
+        try:
+            asyncio.run(run_backend(
+                f"pgvector ({settings.pgvector_index_type}, {settings.pgvector_quantization})",
+                store, args.pgvector_project_id,
+                vectors, queries, args.top_k, truth, filtered_truth, report
+            ))
+        finally:
+            asyncio.run(store.delete([v[0] for v in vectors], args.pgvector_project_id))
+            store.close()
+
+    print("\n" + "=" * 96)
+    print("  VECTOR SEARCH RECALL / LATENCY")
+    print("=" * 96)
+    print(f"  {args.vectors} x {args.dimension}-d vectors in {args.clusters} clusters, "
+          f"{args.queries} queries, top_k={args.top_k}\n")
+    print(f"  {'backend':<24} {'query':<20} {'ingest vec/s':>12} {'scan MB':>8} "
+          f"{'recall':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for label, query_label, ingest_rate, memory, recall, p50, p95 in report:
+        memory = f"{memory:>8.1f}" if memory is not None else f"{'-':>8}"
+        print(f"  {label:<24} {query_label:<20} {ingest_rate:>12.0f} {memory} "
+              f"{recall:>8.3f} {p50:>8.2f} {p95:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+"""
+Throughput check for the batched vector upsert pipeline.
+
+Upserts a synthetic document's vectors (1536 dimensions, with metadata)
+through BaseVectorStore.upsert_vectors into a local stand-in vector store
+that behaves like a remote service: a fixed latency per request, a
+bandwidth cap per request, Pinecone's request limits (1000 vectors / 2 MB)
+and an optional random failure rate. Compares:
+
+  - one request for the whole document (what upsert_vectors used to do)
+  - size-aware batches sent one at a time
+  - size-aware batches sent VECTOR_UPSERT_MAX_INFLIGHT at a time
+
+Usage:
+    python -m benchmarks.bench_vector_upsert --vectors 5000 --failure-rate 0.05
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.core.vector_store import BaseVectorStore, estimate_vector_bytes
+
+MB = 1000 * 1000
+
+
+class StandInVectorStore(BaseVectorStore):
+    """In-memory vector store with remote-service latency, limits and failures."""
+
+    def __init__(self, latency: float, bandwidth: float, failure_rate: float):
+        super().__init__()
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.failure_rate = failure_rate
+        self.vectors: Dict[str, Dict[str, tuple]] = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(7)
+
+    def _upsert_batch(self, vectors: List[tuple], namespace: str) -> None:
+        payload = sum(estimate_vector_bytes(v) for v in vectors)
+        with self._lock:
+            self.requests += 1
+            fail = self._random.random() < self.failure_rate
+        time.sleep(self.latency + payload / self.bandwidth)
+        if len(vectors) > 1000 or payload > 2 * MB:
+            raise ValueError(f"Request too large: {len(vectors)} vectors, {payload} bytes")
+        if fail:
+            raise ConnectionError("Injected transient failure")
+        with self._lock:
+            stored = self.vectors.setdefault(namespace, {})
+            for vector in vectors:
+                stored[vector[0]] = vector
+
+    async def query(
+        self,
+        query_vector: List[float],
+        namespace: str,
+        top_k: int = 10,
+        filter_dict: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        return []
+
+    async def delete(self, vector_ids: List[str], namespace: str) -> bool:
+        return True
+
+    async def delete_namespace(self, namespace: str) -> bool:
+        self.vectors.pop(namespace, None)
+        return True
+
+    async def get_index_stats(self, namespace: Optional[str] = None) -> Dict[str, Any]:
+        return {"vector_count": len(self.vectors.get(namespace, {}))}
+
+
+def synthetic_vectors(count: int, dimension: int) -> List[tuple]:
+    rng = random.Random(42)
+    return [
+        (
+            f"vec_{i}",
+            [rng.uniform(-1, 1) for _ in range(dimension)],
+            {"file_id": "bench", "chunk_index": i, "text": "lorem ipsum " * 20}
+        )
+        for i in range(count)
+    ]
+
+
+def run(label: str, vectors: List[tuple], args, batch_size: int, max_bytes: int, inflight: int) -> None:
+    settings.vector_upsert_batch_size = batch_size
+    settings.vector_upsert_max_bytes = max_bytes
+    settings.vector_upsert_max_inflight = inflight
+    settings.vector_upsert_retry_delay = 0.05
+
+    store = StandInVectorStore(args.latency, args.bandwidth_mbps * MB, args.failure_rate)
+    try:
+        start = time.perf_counter()
+        results = asyncio.run(store.upsert_vectors(vectors, namespace="bench"))
+        elapsed = time.perf_counter() - start
+    finally:
+        store.close()
+
+    stored = len(store.vectors.get("bench", {}))
+    failed = sum(1 for r in results if not r.success)
+    retries = sum(r.attempts - 1 for r in results)
+    print(f"  {label:<28} {elapsed:>7.2f}s  {stored / elapsed:>9.0f} vec/s  "
+          f"{len(results):>4} batches  {store.requests:>4} requests  {retries:>3} retries  "
+          f"{stored:>6}/{len(vectors)} stored  {failed} failed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=5000, help="Vectors in the synthetic document")
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--latency", type=float, default=0.05, help="Per-request latency in seconds")
+    parser.add_argument("--bandwidth-mbps", type=float, default=20.0, help="Per-request bandwidth in MB/s")
+    parser.add_argument("--failure-rate", type=float, default=0.05, help="Fraction of requests that fail")
+    args = parser.parse_args()
+
+    vectors = synthetic_vectors(args.vectors, args.dimension)
+    batch_size = settings.vector_upsert_batch_size
+    max_bytes = settings.vector_upsert_max_bytes
+    inflight = settings.vector_upsert_max_inflight
+
+    print("\n" + "=" * 80)
+    print("  VECTOR UPSERT PIPELINE")
+    print("=" * 80)
+    print(f"  {args.vectors} x {args.dimension}-d vectors, {args.latency * 1000:.0f} ms latency, "
+          f"{args.bandwidth_mbps:.0f} MB/s per request, {args.failure_rate:.0%} failures\n")
+    run("single request", vectors, args, len(vectors), 1 << 62, 1)
+    run("batched, serial", vectors, args, batch_size, max_bytes, 1)
+    run(f"batched, {inflight} in flight", vectors, args, batch_size, max_bytes, inflight)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+In-process fake of the Azure Blob Storage REST API for benchmarks.
+
+Implements just enough of the service for AzureBlobStorageClient:
+container create, Put Blob, Put Block / Put Block List, Get Blob (with
+ranges), Get Blob Properties, Delete Blob and List Blobs. Blobs are kept in
+memory. Authentication headers are accepted but not verified.
+
+Every request can be delayed by a fixed latency (per request) and a
+bandwidth cap (per byte transferred) to emulate a remote endpoint.
+
+With store_content=False only blob sizes are kept, so multi-gigabyte uploads
+can be benchmarked without the server itself holding the data; reads of such
+blobs return zero bytes of the recorded size.
+
+Usage:
+    with FakeBlobServer(latency=0.2) as server:
+        os.environ["AZURE_STORAGE_CONNECTION_STRING"] = server.connection_string
+
+    # Or as a separate process (prints the connection string on stdout):
+    python -m benchmarks.fake_blob_server --no-store-content
+"""
+import argparse
+import hashlib
+import threading
+import time
+import xml.etree.ElementTree as ET
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+ACCOUNT_NAME = "devstoreaccount1"
+# Well-known Azurite development key (not a secret)
+ACCOUNT_KEY = "Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq/K1SZFPTOtr/KBHBeksoGMGw=="
+
+
+class _Blob:
+    """Stored blob content and properties."""
+
+    def __init__(self, data: bytes, content_type: str, size: Optional[int] = None):
+        self.data = data
+        self.size = len(data) if size is None else size
+        self.content_type = content_type
+        self.etag = '"0x%s"' % hashlib.md5(data + str(self.size).encode()).hexdigest()[:16].upper()
+        self.last_modified = formatdate(usegmt=True)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Request handler; state lives on the server instance."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # noqa: A002 - silence default stderr logging
+        pass
+
+    # -- helpers -----------------------------------------------------------
+
+    def _parse(self) -> Tuple[str, str, Dict[str, str]]:
+        parsed = urlparse(self.path)
+        parts = unquote(parsed.path).lstrip("/").split("/", 2)
+        # Path layout: /{account}/{container}/{blob}
+        container = parts[1] if len(parts) > 1 else ""
+        blob = parts[2] if len(parts) > 2 else ""
+        query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        return container, blob, query
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        self.server.throttle(len(body))
+        return body
+
+    def _send(self, status: int, body: bytes = b"", headers: Optional[Dict[str, str]] = None):
+        self.server.throttle(len(body))
+        self.send_response(status)
+        self.send_header("x-ms-request-id", "fake")
+        self.send_header("x-ms-version", "2023-11-03")
+        self.send_header("Date", formatdate(usegmt=True))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if "Content-Length" not in (headers or {}):
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _error(self, status: int, code: str):
+        body = (
+            f'<?xml version="1.0" encoding="utf-8"?><Error><Code>{code}</Code>'
+            f"<Message>{code}</Message></Error>"
+        ).encode()
+        self._send(status, body, {"x-ms-error-code": code, "Content-Type": "application/xml"})
+
+    def _blob_headers(self, blob: _Blob) -> Dict[str, str]:
+        return {
+            "ETag": blob.etag,
+            "Last-Modified": blob.last_modified,
+            "Content-Type": blob.content_type,
+            "x-ms-blob-type": "BlockBlob",
+            "Accept-Ranges": "bytes",
+        }
+
+    # -- verbs -------------------------------------------------------------
+
+    def do_PUT(self):
+        self.server.delay()
+        container, blob_name, query = self._parse()
+        body = self._read_body()
+        store = self.server.store
+
+        if not blob_name and query.get("restype") == "container":
+            with self.server.lock:
+                if container in store:
+                    return self._error(409, "ContainerAlreadyExists")
+                store[container] = {}
+            return self._send(201)
+
+        content_type = self.headers.get("x-ms-blob-content-type", "application/octet-stream")
+        keep = self.server.store_content
+        with self.server.lock:
+            blobs = store.setdefault(container, {})
+            comp = query.get("comp")
+            if comp == "block":
+                staged = body if keep else len(body)
+                self.server.blocks.setdefault((container, blob_name), {})[query["blockid"]] = staged
+                return self._send(201)
+            if comp == "blocklist":
+                staged = self.server.blocks.pop((container, blob_name), {})
+                block_ids = [el.text for el in ET.fromstring(body)]
+                if keep:
+                    blobs[blob_name] = _Blob(b"".join(staged[b] for b in block_ids), content_type)
+                else:
+                    blobs[blob_name] = _Blob(b"", content_type, size=sum(staged[b] for b in block_ids))
+            else:
+                blobs[blob_name] = _Blob(body if keep else b"", content_type, size=len(body))
+            blob = blobs[blob_name]
+        self._send(201, headers={"ETag": blob.etag, "Last-Modified": blob.last_modified})
+
+    def do_GET(self):
+        self.server.delay()
+        container, blob_name, query = self._parse()
+
+        if not blob_name and query.get("comp") == "list":
+            return self._list_blobs(container, query)
+
+        blob = self.server.store.get(container, {}).get(blob_name)
+        if blob is None:
+            return self._error(404, "BlobNotFound")
+
+        headers = self._blob_headers(blob)
+        size = blob.size
+        data = blob.data if self.server.store_content else None
+        range_header = self.headers.get("x-ms-range") or self.headers.get("Range")
+        if not range_header:
+            return self._send(200, data if data is not None else bytes(size), headers)
+
+        start_str, _, end_str = range_header.split("=", 1)[1].partition("-")
+        start = int(start_str)
+        end = min(int(end_str) if end_str else size - 1, size - 1)
+        if start >= size:
+            headers["Content-Range"] = f"bytes */{size}"
+            return self._error(416, "InvalidRange")
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        self._send(206, data[start:end + 1] if data is not None else bytes(end - start + 1), headers)
+
+    def do_HEAD(self):
+        self.server.delay()
+        container, blob_name, _ = self._parse()
+        blob = self.server.store.get(container, {}).get(blob_name)
+        if blob is None:
+            self.send_response(404)
+            self.send_header("x-ms-error-code", "BlobNotFound")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        headers = self._blob_headers(blob)
+        headers["Content-Length"] = str(blob.size)
+        self._send(200, b"", headers)
+
+    def do_DELETE(self):
+        self.server.delay()
+        container, blob_name, _ = self._parse()
+        with self.server.lock:
+            removed = self.server.store.get(container, {}).pop(blob_name, None)
+        if removed is None:
+            return self._error(404, "BlobNotFound")
+        self._send(202)
+
+    def _list_blobs(self, container: str, query: Dict[str, str]):
+        prefix = query.get("prefix", "")
+        max_results = int(query.get("maxresults", 5000))
+        marker = query.get("marker", "")
+        names = sorted(
+            n for n in self.server.store.get(container, {})
+            if n.startswith(prefix) and n > marker
+        )
+        page, rest = names[:max_results], names[max_results:]
+
+        root = ET.Element("EnumerationResults", ServiceEndpoint=self.server.endpoint, ContainerName=container)
+        ET.SubElement(root, "Prefix").text = prefix
+        blobs_el = ET.SubElement(root, "Blobs")
+        for name in page:
+            blob = self.server.store[container][name]
+            blob_el = ET.SubElement(blobs_el, "Blob")
+            ET.SubElement(blob_el, "Name").text = name
+            props = ET.SubElement(blob_el, "Properties")
+            ET.SubElement(props, "Last-Modified").text = blob.last_modified
+            ET.SubElement(props, "Etag").text = blob.etag
+            ET.SubElement(props, "Content-Length").text = str(blob.size)
+            ET.SubElement(props, "Content-Type").text = blob.content_type
+            ET.SubElement(props, "BlobType").text = "BlockBlob"
+        ET.SubElement(root, "NextMarker").text = page[-1] if rest else ""
+        body = b'<?xml version="1.0" encoding="utf-8"?>' + ET.tostring(root)
+        self._send(200, body, {"Content-Type": "application/xml"})
+
+
+class FakeBlobServer(ThreadingHTTPServer):
+    """Threaded fake Blob service bound to 127.0.0.1 on a free port."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        bandwidth_bytes_per_sec: Optional[float] = None,
+        store_content: bool = True,
+        port: int = 0
+    ):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.latency = latency
+        self.bandwidth = bandwidth_bytes_per_sec
+        self.store_content = store_content
+        self.store: Dict[str, Dict[str, _Blob]] = {}
+        self.blocks: Dict[Tuple[str, str], Dict[str, bytes]] = {}
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/{ACCOUNT_NAME}"
+
+    @property
+    def connection_string(self) -> str:
+        return (
+            f"DefaultEndpointsProtocol=http;AccountName={ACCOUNT_NAME};"
+            f"AccountKey={ACCOUNT_KEY};BlobEndpoint={self.endpoint};"
+        )
+
+    def delay(self) -> None:
+        """Apply the per-request latency."""
+        self.request_count += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def throttle(self, nbytes: int) -> None:
+        """Apply the bandwidth cap for nbytes transferred."""
+        if self.bandwidth and nbytes:
+            time.sleep(nbytes / self.bandwidth)
+
+    def blob_bytes(self, container: str, blob_name: str) -> bytes:
+        """Return stored content (for assertions)."""
+        return self.store[container][blob_name].data
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the fake Blob server in the foreground")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--bandwidth-mbps", type=float, default=0.0, help="Per-request bandwidth cap in MB/s")
+    parser.add_argument("--no-store-content", action="store_true", help="Keep blob sizes only")
+    args = parser.parse_args()
+
+    server = FakeBlobServer(
+        latency=args.latency,
+        bandwidth_bytes_per_sec=args.bandwidth_mbps * 1024 * 1024 or None,
+        store_content=not args.no_store_content,
+        port=args.port
+    )
+    print(server.connection_string, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
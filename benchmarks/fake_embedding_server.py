@@ -0,0 +1,286 @@
+"""
+In-process fake of the OpenAI embeddings API for benchmarks.
+
+Serves POST /v1/embeddings with OpenAI's request limits (2048 inputs and
+300k tokens per request, 8191 tokens per input) and response format, both
+float and base64 encodings. Tokens are counted with the shared tokenizer
+and reported as usage, so billed tokens match what a worker would be
+charged for.
+
+Each request takes a fixed latency plus a per-token compute time, which is
+what makes one request per chunk slow and filled requests fast. Vectors are
+deterministic per text (one of a few precomputed unit vectors, picked by
+hash), so the server itself stays cheap.
+
+Optionally the server enforces a quota like OpenAI's: requests and tokens
+per minute (token buckets holding quota_burst_seconds of quota) answered
+with 429 and Retry-After when exceeded, and a capacity of concurrent
+requests beyond which every request slows down proportionally.
+
+Usage:
+    with FakeEmbeddingServer(latency=0.1) as server:
+        provider = OpenAIEmbeddingProvider("test-key", "text-embedding-ada-002", base_url=server.base_url)
+
+    # In a child process, so the server does not share the client's GIL:
+    with fake_embedding_server_process(latency=0.1) as base_url:
+        ...
+
+    # Or standalone (prints the base URL on stdout):
+    python -m benchmarks.fake_embedding_server --latency 0.1
+"""
+import argparse
+import array
+import base64
+import hashlib
+import json
+import math
+import multiprocessing
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional
+
+from app.core.rate_limit import Bucket, LocalBucketStore
+from app.core.tokenizer import get_tokenizer
+
+MAX_INPUTS = 2048
+MAX_REQUEST_TOKENS = 300_000
+MAX_INPUT_TOKENS = 8191
+_DISTINCT_VECTORS = 64
+
+
+def _unit_vectors(count: int, dimension: int) -> List[List[float]]:
+    rng = random.Random(42)
+    vectors = []
+    for _ in range(count):
+        values = [rng.gauss(0, 1) for _ in range(dimension)]
+        norm = math.sqrt(sum(v * v for v in values))
+        vectors.append([v / norm for v in values])
+    return vectors
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Request handler; state lives on the server instance."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in one segment, so keep-alive requests do not stall on delayed ACKs
+    wbufsize = 1 << 16
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):  # noqa: A002 - silence default stderr logging
+        pass
+
+    def _send_json(self, status: int, body: dict, headers: Optional[Dict[str, str]] = None) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _error(self, status: int, message: str) -> None:
+        self._send_json(status, {"error": {"message": message, "type": "invalid_request_error"}})
+
+    def do_POST(self):  # noqa: N802 - http.server naming
+        server: FakeEmbeddingServer = self.server.fake  # type: ignore[attr-defined]
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not self.path.rstrip("/").endswith("/embeddings"):
+            return self._error(404, f"Unknown path {self.path}")
+
+        texts = body.get("input")
+        if isinstance(texts, str):
+            texts = [texts]
+        if not texts:
+            return self._error(400, "'input' must be a non-empty string or array")
+        if len(texts) > MAX_INPUTS:
+            return self._error(400, f"Too many inputs: {len(texts)} > {MAX_INPUTS}")
+
+        counts = get_tokenizer().count_batch(texts)
+        tokens = sum(counts)
+        if max(counts) > MAX_INPUT_TOKENS:
+            return self._error(400, f"Input of {max(counts)} tokens exceeds {MAX_INPUT_TOKENS}")
+        if tokens > MAX_REQUEST_TOKENS:
+            return self._error(400, f"Request of {tokens} tokens exceeds {MAX_REQUEST_TOKENS}")
+
+        wait = server.take_quota(tokens)
+        if wait > 0:
+            with server.lock:
+                server.throttled += 1
+            return self._send_json(
+                429,
+                {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                {"retry-after-ms": str(int(wait * 1000) + 1), "retry-after": str(math.ceil(wait))},
+            )
+
+        with server.lock:
+            server.active += 1
+            overload = max(1.0, server.active / server.capacity) if server.capacity else 1.0
+        try:
+            time.sleep((server.latency + tokens / server.tokens_per_second) * overload)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+        encoded = body.get("encoding_format") == "base64"
+        data = []
+        for index, text in enumerate(texts):
+            slot = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=4).digest(), "little")
+            slot %= _DISTINCT_VECTORS
+            data.append({
+                "object": "embedding",
+                "index": index,
+                "embedding": server.encoded[slot] if encoded else server.vectors[slot],
+            })
+        with server.lock:
+            server.requests += 1
+            server.inputs += len(texts)
+            server.tokens += tokens
+        self._send_json(200, {
+            "object": "list",
+            "data": data,
+            "model": body.get("model"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        })
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Many workers connect at once; the default backlog of 5 drops connections
+    request_queue_size = 128
+
+
+class FakeEmbeddingServer:
+    """OpenAI-compatible embeddings endpoint on a local port."""
+
+    def __init__(
+        self,
+        latency: float = 0.1,
+        tokens_per_second: float = 2_000_000,
+        dimension: int = 1536,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        quota_burst_seconds: float = 1.0,
+        capacity: int = 0
+    ):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.capacity = capacity
+        self.quota = LocalBucketStore(quota_burst_seconds)
+        self.vectors = _unit_vectors(_DISTINCT_VECTORS, dimension)
+        self.encoded = []
+        for vector in self.vectors:
+            values = array.array("f", vector)
+            if sys.byteorder != "little":
+                values.byteswap()
+            self.encoded.append(base64.b64encode(values.tobytes()).decode())
+        self.requests = 0
+        self.inputs = 0
+        self.tokens = 0
+        self.throttled = 0
+        self.active = 0
+        self.lock = threading.Lock()
+        self._httpd = _Server((host, port), _Handler)
+        self._httpd.fake = self  # type: ignore[attr-defined]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def reset_counters(self) -> None:
+        with self.lock:
+            self.requests = self.inputs = self.tokens = self.throttled = 0
+
+    def take_quota(self, tokens: int) -> float:
+        """Charge a request to the quota; returns 0, or seconds until it would fit."""
+        buckets = [
+            Bucket(name, per_minute, cost)
+            for name, per_minute, cost in [("requests", self.requests_per_minute, 1), ("tokens", self.tokens_per_minute, tokens)]
+            if per_minute > 0
+        ]
+        return self.quota.try_acquire(buckets) if buckets else 0.0
+
+    def start(self) -> "FakeEmbeddingServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeEmbeddingServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def _serve(connection, latency: float, tokens_per_second: float, dimension: int, quota: dict) -> None:
+    server = FakeEmbeddingServer(latency, tokens_per_second, dimension, **quota).start()
+    connection.send(server.base_url)
+    threading.Event().wait()
+
+
+@contextmanager
+def fake_embedding_server_process(
+    latency: float = 0.1,
+    tokens_per_second: float = 2_000_000,
+    dimension: int = 1536,
+    **quota
+) -> Iterator[str]:
+    """
+    Run a FakeEmbeddingServer in a child process; yields its base URL.
+
+    Keyword arguments (requests_per_minute, tokens_per_minute,
+    quota_burst_seconds, capacity) are passed to the server.
+    """
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(
+        target=_serve, args=(sender, latency, tokens_per_second, dimension, quota), daemon=True
+    )
+    process.start()
+    try:
+        yield receiver.recv()
+    finally:
+        process.terminate()
+        process.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI embeddings endpoint")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.1, help="Seconds per request")
+    parser.add_argument("--tokens-per-second", type=float, default=2_000_000, help="Compute time per token")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per minute before 429 (0 = unlimited)")
+    parser.add_argument("--tpm", type=int, default=0, help="Tokens per minute before 429 (0 = unlimited)")
+    parser.add_argument("--capacity", type=int, default=0, help="Concurrent requests before latency rises")
+    args = parser.parse_args()
+
+    server = FakeEmbeddingServer(
+        args.latency,
+        args.tokens_per_second,
+        port=args.port,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+        capacity=args.capacity
+    ).start()
+    print(server.base_url, flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+"""
+Simulated worker fleet embedding against a quota-limited fake provider.
+
+Starts the fake OpenAI embeddings server with a requests/min and tokens/min
+quota (429 + Retry-After beyond it) and a concurrency capacity (requests
+beyond it are slower), then embeds the same files with --workers worker
+processes, simulated as separate EmbeddingEngines in this process, each
+with --files-per-worker files in progress:
+
+  - ad-hoc retries:     no limiter; a 429 is an ordinary failure, retried after
+                        the engine's own exponential backoff (the old behaviour)
+  - per-worker limits:  each worker has its own buckets set to the full quota
+                        (limits that are not shared)
+  - shared limits:      one bucket store for all workers (in-memory here, the
+                        Redis store with --redis-url), shared 429 pauses and
+                        AIMD concurrency per worker
+
+Files belong to two tenants: "bulk" uploads most of them, "small" a few.
+With --tenant-tpm the bulk tenant is capped, so the small tenant's files
+are not stuck behind it.
+
+Reports 429s, requests, failed files, wall time, achieved tokens/min
+against the quota and when the small tenant's last file finished.
+
+Usage:
+    python -m benchmarks.sim_rate_limit --workers 4 --rpm 300 --tpm 600000
+"""
+import argparse
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+from app.config import settings
+from app.core.embeddings import EmbeddingEngine, OpenAIEmbeddingProvider
+from app.core.rate_limit import (
+    AdaptiveConcurrency,
+    BaseBucketStore,
+    LocalBucketStore,
+    ProviderRateLimiter,
+    RedisBucketStore,
+)
+from benchmarks.bench_embeddings import build_chunks
+from benchmarks.fake_embedding_server import fake_embedding_server_process
+
+# One file: (tenant, [(text, token_count)])
+File = Tuple[str, List[Tuple[str, int]]]
+
+
+@dataclass
+class Result:
+    label: str
+    seconds: float
+    requests: int  # Successful requests
+    throttled: int
+    failed_files: int
+    tokens: int
+    small_done: float
+
+
+def build_files(count: int, chunks_per_file: int, small_share: float) -> List[File]:
+    rng = random.Random(11)
+    chunks = build_chunks(count * chunks_per_file, settings.chunk_size)
+    files = []
+    for index in range(count):
+        tenant = "small" if rng.random() < small_share else "bulk"
+        files.append((tenant, chunks[index * chunks_per_file:(index + 1) * chunks_per_file]))
+    return files
+
+
+def run(
+    label: str,
+    files: List[File],
+    workers: int,
+    files_per_worker: int,
+    make_engine: Callable[[int], EmbeddingEngine]
+) -> Result:
+    engines = [make_engine(worker) for worker in range(workers)]
+    queue = list(enumerate(files))
+    queue_lock = threading.Lock()
+    failed = 0
+    small_done = 0.0
+    start = time.perf_counter()
+
+    def worker_loop(engine: EmbeddingEngine):
+        nonlocal failed, small_done
+        while True:
+            with queue_lock:
+                if not queue:
+                    return
+                _, (tenant, chunks) = queue.pop(0)
+            try:
+                engine.embed([text for text, _ in chunks], [count for _, count in chunks], tenant=tenant)
+            except Exception:
+                with queue_lock:
+                    failed += 1
+            if tenant == "small":
+                with queue_lock:
+                    small_done = max(small_done, time.perf_counter() - start)
+
+    with ThreadPoolExecutor(workers * files_per_worker) as pool:
+        list(pool.map(worker_loop, [engine for engine in engines for _ in range(files_per_worker)]))
+    elapsed = time.perf_counter() - start
+
+    for engine in engines:
+        engine.close()
+    return Result(
+        label=label,
+        seconds=elapsed,
+        requests=sum(engine.stats.requests for engine in engines),
+        throttled=sum(engine.stats.throttled for engine in engines),
+        failed_files=failed,
+        tokens=sum(engine.stats.tokens for engine in engines),
+        small_done=small_done,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="Simulated worker processes")
+    parser.add_argument("--files-per-worker", type=int, default=4, help="Files in progress per worker")
+    parser.add_argument("--files", type=int, default=60)
+    parser.add_argument("--chunks-per-file", type=int, default=8)
+    parser.add_argument("--small-share", type=float, default=0.15, help="Share of files from the small tenant")
+    parser.add_argument("--rpm", type=int, default=300, help="Provider requests per minute")
+    parser.add_argument("--tpm", type=int, default=600_000, help="Provider tokens per minute")
+    parser.add_argument("--tenant-tpm", type=int, default=0, help="Tokens per minute per tenant (0 = unlimited)")
+    parser.add_argument("--capacity", type=int, default=8, help="Provider requests in flight before latency rises")
+    parser.add_argument("--latency", type=float, default=0.2, help="Provider seconds per request")
+    parser.add_argument("--max-inflight", type=int, default=4, help="Requests in flight per worker")
+    parser.add_argument("--batch-tokens", type=int, default=8192, help="Tokens per request")
+    parser.add_argument("--redis-url", help="Share the buckets through Redis instead of in memory")
+    args = parser.parse_args()
+
+    files = build_files(args.files, args.chunks_per_file, args.small_share)
+    total_tokens = sum(count for _, chunks in files for _, count in chunks)
+    burst = settings.rate_limit_burst_seconds
+
+    results = []
+    with fake_embedding_server_process(
+        args.latency,
+        dimension=settings.embedding_dimension,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+        quota_burst_seconds=burst,
+        capacity=args.capacity,
+    ) as base_url:
+        def engine(limiter: Optional[ProviderRateLimiter] = None) -> EmbeddingEngine:
+            provider = OpenAIEmbeddingProvider(
+                "test-key", settings.embedding_model, base_url=base_url, max_connections=args.max_inflight
+            )
+            return EmbeddingEngine(
+                provider,
+                max_tokens=args.batch_tokens,
+                max_inflight=args.max_inflight,
+                retry_delay=0.5,
+                limiter=limiter,
+                # Without a limiter a 429 is an ordinary failure, as before limits existed
+                max_throttle_retries=settings.rate_limit_max_throttle_retries if limiter else 0,
+            )
+
+        def limiter(store: BaseBucketStore) -> ProviderRateLimiter:
+            return ProviderRateLimiter(
+                "embedding",
+                store,
+                AdaptiveConcurrency(args.max_inflight, latency_target=args.latency * 3),
+                requests_per_minute=args.rpm,
+                tokens_per_minute=args.tpm,
+                tenant_tokens_per_minute=args.tenant_tpm,
+                default_backoff=settings.rate_limit_default_backoff,
+            )
+
+        shared: BaseBucketStore = (
+            RedisBucketStore(args.redis_url, burst, prefix=f"memic:sim:{time.time_ns()}")
+            if args.redis_url else LocalBucketStore(burst)
+        )
+        modes = [
+            ("ad-hoc retries", lambda _: engine()),
+            ("per-worker limits", lambda _: engine(limiter(LocalBucketStore(burst)))),
+            ("shared limits", lambda _: engine(limiter(shared))),
+        ]
+        for label, make_engine in modes:
+            # Let the provider's buckets refill between modes
+            time.sleep(burst + 1)
+            results.append(run(label, files, args.workers, args.files_per_worker, make_engine))
+
+    print("\n" + "=" * 100)
+    print(
+        f"  RATE LIMIT SIMULATION ({args.workers} workers x {args.files_per_worker} files, {len(files)} files, "
+        f"{total_tokens} tokens; quota {args.rpm} req/min, {args.tpm} tok/min)"
+    )
+    print("=" * 100)
+    print(
+        f"  {'mode':<20}{'seconds':>9}{'requests':>10}{'429s':>7}{'failed files':>14}"
+        f"{'tok/min':>11}{'of quota':>10}{'small tenant done':>19}"
+    )
+    for result in results:
+        per_minute = result.tokens / result.seconds * 60
+        print(
+            f"  {result.label:<20}{result.seconds:>9.1f}{result.requests:>10}{result.throttled:>7}"
+            f"{result.failed_files:>14}{per_minute:>11,.0f}{per_minute / args.tpm:>10.0%}"
+            f"{result.small_done:>18.1f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()